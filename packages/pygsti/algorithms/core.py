@@ -12,9 +12,13 @@ import scipy.optimize as _spo
 import scipy.stats    as _stats
 import warnings       as _warnings
 import time           as _time
+import os             as _os
+import pickle         as _pickle
+import hashlib        as _hashlib
 
 from .. import optimize as _opt
 from .. import tools    as _tools
+from ..tools import mpitools as _mpit
 from .. import objects  as _objs
 _dummy_profiler = _objs.profiler.DummyProfiler()
 
@@ -882,7 +886,10 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
               regularizeFactor=0, verbosity=0, check=False,
               check_jacobian=False, gatestringWeights=None,
               gateLabelAliases=None, memLimit=None, comm=None,
-              distributeMethod = "gatestrings", profiler=None):
+              distributeMethod = "gatestrings", profiler=None,
+              evaltreeCacheDir=None, nThreads=None, jacBlocks=None,
+              broydenIters=0, checkpointFn=None, resumeState=None,
+              baseEvalTree=None, productReuse=False, germPowers=False):
     """
     Performs Least-Squares Gate Set Tomography on the dataset.
 
@@ -973,6 +980,66 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
     profiler : Profiler, optional
         A profiler object used for to track timing and memory usage.
 
+    evaltreeCacheDir : str, optional
+        If not None, a directory in which evaluation trees are saved so that
+        later runs using the same gate strings (and gate set structure,
+        memLimit, comm size and distributeMethod) can load rather than
+        rebuild them.  See `GateSet.bulk_evaltree_from_resources`.
+
+    nThreads : int, optional
+        If greater than 1, the number of threads used (by each processor) to
+        compute probabilities and their derivatives: the evaluation tree is
+        split into more subtrees ("gatestrings" distribution) or derivative
+        columns into more blocks ("deriv" distribution), which are then
+        computed concurrently.
+
+    jacBlocks : bool, optional
+        Whether the optimizer is given the jacobian one evaluation-tree
+        sub-tree at a time, accumulating J^T J and J^T f without ever holding
+        the entire jacobian in memory.  None (the default) does this only
+        when `memLimit` is given and the jacobian would take more than half
+        of it.  When True, `check_jacobian` is ignored.
+
+    broydenIters : int, optional
+        The maximum number of consecutive optimizer iterations that may use
+        a rank-1 (Broyden) update of the previous jacobian instead of
+        computing it exactly, which saves time near convergence.  The exact
+        jacobian is re-computed whenever an updated one performs poorly.
+        Zero (the default) always computes the exact jacobian.  Has no
+        effect when jacobian blocks are used (see `jacBlocks`).
+
+    checkpointFn : function, optional
+        If not None, a function `checkpointFn(x, mu, nu, k)` called by the
+        optimizer at the start of each iteration with the current gate set
+        parameter vector `x`, Levenberg-Marquardt damping parameters `mu` and
+        `nu`, and iteration index `k` -- e.g. to save them to disk.
+
+    resumeState : tuple, optional
+        A `(mu, nu, k)` tuple, as given to `checkpointFn`, from which to resume
+        an interrupted optimization.  The parameters of `startGateset` should
+        then be the corresponding `x`.
+
+    baseEvalTree : EvalTree, optional
+        An un-split evaluation tree for the first `num_final_strings()`
+        elements of `gateStringsToUse` (or a new, empty, `EvalTree`), which is
+        extended in place rather than building a new tree from scratch.  This
+        lets iterative GST re-use the tree of the previous iteration.  See
+        `GateSet.bulk_evaltree`.
+
+    productReuse : bool, optional
+        If True, the product caches computed by each objective function
+        evaluation are kept so that the jacobian, which the optimizer
+        computes at the point of its last accepted evaluation, can reuse
+        them instead of recomputing them.  This needs memory for one extra
+        copy of the products of all the gate strings: when `memLimit` is
+        given, 10% of the memory not used by the final results is set aside
+        for it.
+
+    germPowers : bool, optional
+        If True, the evaluation tree computes gate strings containing
+        repeated germs (e.g. the germ powers of long-sequence GST) by
+        repeated squaring of the germ, which needs fewer matrix products
+        for long sequences.  See `GateSet.bulk_evaltree`.
 
     Returns
     -------
@@ -1018,7 +1085,12 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
     C = 1.0/1024.0**3
 
     #  Estimate & check persistent memory (from allocs directly below)
-    persistentMem = 8* (ng*(ns + ns*ne + 1 + 3*ns)) # final results in bytes
+    if jacBlocks is None:
+        jacBlocks = bool(CUSTOMLM and memLimit is not None and 8*ng*ns*ne > 0.5*memLimit)
+    if jacBlocks:
+        persistentMem = 8* (ng*(1 + 4*ns) + 2*ne*ne) # final results & J^T J sums in bytes
+    else:
+        persistentMem = 8* (ng*(ns + ns*ne + 1 + 3*ns)) # final results in bytes
     if memLimit is not None and memLimit < persistentMem:
         raise MemoryError("Memory limit (%g GB) is " % (memLimit*C) +
                           "< memory required to hold final results (%g GB)"
@@ -1029,14 +1101,23 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
     if (memLimit is not None):
         curMem = _objs.profiler._get_max_mem_usage(comm)
         gthrMem = int(0.1*(memLimit-persistentMem))
-        mlim = memLimit-persistentMem-gthrMem-curMem
+        reuseMem = gthrMem if productReuse else 0
+        mlim = memLimit-persistentMem-gthrMem-reuseMem-curMem
         printer.log("Memory limit = %.2fGB" % (memLimit*C))
-        printer.log("Cur, Persist, Gather = %.2f, %.2f, %.2f GB" %
-                    (curMem*C, persistentMem*C, gthrMem*C))
-    else: gthrMem = mlim = None
+        printer.log("Cur, Persist, Gather, Reuse = %.2f, %.2f, %.2f, %.2f GB" %
+                    (curMem*C, persistentMem*C, gthrMem*C, reuseMem*C))
+    else: gthrMem = mlim = reuseMem = None
+
+    if productReuse:
+        #Keep the product caches of the last objective function evaluation so
+        # the jacobian (computed at the same point) can reuse them.
+        gs.set_product_reuse(True, 1, reuseMem)
     evTree, wrtBlkSize, _ = gs.bulk_evaltree_from_resources(
         gateStringsToUse, comm, mlim, distributeMethod,
-        ["bulk_fill_probs","bulk_fill_dprobs"], printer) 
+        ["bulk_fill_probs", "bulk_dprobs_by_subtree" if jacBlocks
+         else "bulk_fill_dprobs"], printer,
+        germPowers=germPowers, cacheDir=evaltreeCacheDir, nThreads=nThreads,
+        baseTree=baseEvalTree)
     profiler.add_time("do_mc2gst: pre-opt treegen",tStart)
 
     # permute (if needed) gate string list for efficient subtree division
@@ -1072,11 +1153,11 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
     #  (must be AFTER possible gate string permutation by
     #   tree and initialization of dsGateStringsToUse)
     probs  = _np.empty( (len(spamLabels),len(gateStringsToUse)) )
-    jac    = _np.empty( (len(spamLabels)*len(gateStringsToUse)+ex,vec_gs_len) )
+    jac    = None if jacBlocks else \
+        _np.empty( (len(spamLabels)*len(gateStringsToUse)+ex,vec_gs_len) )
 
-    N =_np.array([dataset[gateStr].total() for gateStr in dsGateStringsToUse],'d')
-    f =_np.empty( (len(spamLabels),len(gateStringsToUse)) )
-    fweights = _np.empty( (len(spamLabels),len(gateStringsToUse)) )
+    N = dataset.get_counts_matrix(dsGateStringsToUse).sum(axis=0)
+    cntMx = dataset.get_counts_matrix(dsGateStringsToUse, spamLabels)
     z = _np.zeros( (len(spamLabels),len(gateStringsToUse)) ) # for deriv below
 
     #NOTE on chi^2 expressions:
@@ -1087,11 +1168,9 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
     #                         = (p - f)^2 * ( ((1-p) + p)/(p*(1-p)) )
     #                         = 1/(p*(1-p)) * (p - f)^2
 
-    for (i,gateStr) in enumerate(dsGateStringsToUse):
-        for k,sl in enumerate(spamLabels):
-            n = float(dataset[gateStr][sl])
-            f[k,i] = n / N[i];  f2 = (n+1)/(N[i]+2)
-            fweights[k,i] = _np.sqrt( N[i] / (f2*(1-f2)) )
+    f = cntMx / N[None,:]
+    f2 = (cntMx+1) / (N[None,:]+2)
+    fweights = _np.sqrt( N[None,:] / (f2*(1-f2)) )
 
     if gatestringWeights is not None:
         fweights *= gatestringWeights[None,:] #b/c we necessarily used unweighted N[i]'s above
@@ -1099,16 +1178,17 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
 
     maxGateStringLength = max([len(x) for x in gateStringsToUse])
 
+    #Note: fslc selects the gate strings (columns) p is given for
     if useFreqWeightedChiSq:
-        def get_weights(p):
-            return fweights
-        def get_dweights(p,wts):
-            return z
+        def get_weights(p, fslc=slice(None)):
+            return fweights[:,fslc]
+        def get_dweights(p,wts, fslc=slice(None)):
+            return z[:,fslc]
     else:
-        def get_weights(p):
+        def get_weights(p, fslc=slice(None)):
             cp = _np.clip(p,minProbClipForWeighting,1-minProbClipForWeighting)
-            return _np.sqrt(N / cp)  # nSpamLabels x nGateStrings array (K x M)
-        def get_dweights(p,wts):  #derivative of weights w.r.t. p
+            return _np.sqrt(N[fslc] / cp)  # nSpamLabels x nGateStrings array (K x M)
+        def get_dweights(p,wts, fslc=slice(None)):  #derivative of weights w.r.t. p
             cp = _np.clip(p,minProbClipForWeighting,1-minProbClipForWeighting)
             dw = -0.5 * wts / cp   # nSpamLabels x nGateStrings array (K x M)
             dw[ _np.logical_or(p < minProbClipForWeighting, p>(1-minProbClipForWeighting)) ] = 0.0
@@ -1121,7 +1201,7 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
                 tm = _time.time()
                 gs.from_vector(vectorGS)
                 gs.bulk_fill_probs(probs, spam_lbl_rows, evTree, probClipInterval,
-                                   check, comm)
+                                   check, comm, nThreads=nThreads)
                 v = (probs-f)*get_weights(probs) # dims K x M (K = nSpamLabels, M = nGateStrings)
                 profiler.add_time("do_mc2gst: OBJECTIVE",tm)
                 v.shape = [KM] #reshape ensuring no copy is needed
@@ -1133,7 +1213,7 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
                 tm = _time.time()
                 gs.from_vector(vectorGS)
                 gs.bulk_fill_probs(probs, spam_lbl_rows, evTree, probClipInterval,
-                                   check, comm)
+                                   check, comm, nThreads=nThreads)
                 weights = get_weights(probs)
                 v = (probs-f)*weights # dims K x M (K = nSpamLabels, M = nGateStrings)
                 gsVecNorm = regularizeFactor * _np.array( [ max(0,absx-1.0) for absx in map(abs,vectorGS) ], 'd')
@@ -1146,7 +1226,7 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
                 tm = _time.time()
                 gs.from_vector(vectorGS)
                 gs.bulk_fill_probs(probs, spam_lbl_rows, evTree, probClipInterval,
-                                   check, comm)
+                                   check, comm, nThreads=nThreads)
                 weights = get_weights(probs)
                 v = (probs-f)*weights # dims K x M (K = nSpamLabels, M = nGateStrings)
                 cpPenaltyVec = _cptp_penalty(gs,cptp_penalty_factor,gateBasis)
@@ -1159,7 +1239,7 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
             tm = _time.time()
             gs.from_vector(vectorGS)
             gs.bulk_fill_probs(probs, spam_lbl_rows, evTree, probClipInterval,
-                               check, comm)
+                               check, comm, nThreads=nThreads)
             weights = get_weights(probs)
 
             v = (probs - f) * weights;  chisq = _np.sum(v*v)
@@ -1189,7 +1269,32 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
 
 
     # Jacobian function
-    if printer.verbosity < 4: # Fast versions of functions
+    if jacBlocks: # Jacobian row blocks, given one (local) subtree at a time
+        def jacobian(vectorGS):
+            tm = _time.time()
+            gs.from_vector(vectorGS)
+            for fslc, dprobs, sub_probs in gs.bulk_dprobs_by_subtree(
+                    spam_lbl_rows, evTree, probClipInterval, check, comm,
+                    wrtBlkSize, profiler, gthrMem, nThreads):
+                weights  = get_weights( sub_probs, fslc )
+                dprobs *= (weights+(sub_probs-f[:,fslc])*get_dweights(
+                    sub_probs, weights, fslc ))[:,:,None]
+                for k in range(ns): # rows of jac for k-th spam label & fslc strings
+                    yield slice(k*ng+fslc.start, k*ng+fslc.stop), dprobs[k]
+                dprobs = None #free mem
+
+            if ex > 0 and (comm is None or comm.Get_rank() == 0):
+                exJac = _np.empty( (ex,vec_gs_len), 'd' )
+                if regularizeFactor != 0:
+                    exJac[:,:] = _np.diag( [ (regularizeFactor * _np.sign(x) if abs(x) > 1.0 else 0.0) for x in vectorGS ] )
+                else:
+                    _cptp_penalty_jac_fill(exJac, gs, cptp_penalty_factor,
+                                           vec_gs_len, nGateParams, nSpamParams,
+                                           gateBasis)
+                yield slice(KM,KM+ex), exJac
+            profiler.add_time("do_mc2gst: JACOBIAN",tm)
+
+    elif printer.verbosity < 4: # Fast versions of functions
         if regularizeFactor == 0 and cptp_penalty_factor == 0: # Fast un-regularized version
             def jacobian(vectorGS):
                 tm = _time.time()
@@ -1199,7 +1304,8 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
                 gs.bulk_fill_dprobs(dprobs, spam_lbl_rows, evTree,
                                     prMxToFill=probs, clipTo=probClipInterval,
                                     check=check, comm=comm, wrtBlockSize=wrtBlkSize,
-                                    profiler=profiler, gatherMemLimit=gthrMem)
+                                    profiler=profiler, gatherMemLimit=gthrMem,
+                                    nThreads=nThreads)
                 weights  = get_weights( probs )
                 dprobs *= (weights+(probs-f)*get_dweights(probs, weights ))[:,:,None]
                   # (K,M,N) * (K,M,1)   (N = dim of vectorized gateset)
@@ -1222,7 +1328,8 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
                 gs.bulk_fill_dprobs(dprobs, spam_lbl_rows, evTree,
                                     prMxToFill=probs, clipTo=probClipInterval,
                                     check=check, comm=comm, wrtBlockSize=wrtBlkSize,
-                                    profiler=profiler, gatherMemLimit=gthrMem)
+                                    profiler=profiler, gatherMemLimit=gthrMem,
+                                    nThreads=nThreads)
                 weights  = get_weights( probs )
                 dprobs *= (weights+(probs-f)*get_dweights( probs, weights ))[:,:,None]
                   # (K,M,N) * (K,M,1)   (N = dim of vectorized gateset)
@@ -1246,7 +1353,8 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
                 gs.bulk_fill_dprobs(dprobs, spam_lbl_rows, evTree,
                                     prMxToFill=probs, clipTo=probClipInterval,
                                     check=check, comm=comm, wrtBlockSize=wrtBlkSize,
-                                    profiler=profiler, gatherMemLimit=gthrMem)
+                                    profiler=profiler, gatherMemLimit=gthrMem,
+                                    nThreads=nThreads)
                 weights  = get_weights( probs )
                 dprobs *= (weights+(probs-f)*get_dweights( probs, weights ))[:,:,None]
                   # (K,M,N) * (K,M,1)   (N = dim of vectorized gateset)
@@ -1269,7 +1377,8 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
             gs.bulk_fill_dprobs(dprobs, spam_lbl_rows, evTree,
                                 prMxToFill=probs, clipTo=probClipInterval,
                                 check=check, comm=comm, wrtBlockSize=wrtBlkSize,
-                                profiler=profiler, gatherMemLimit=gthrMem)
+                                profiler=profiler, gatherMemLimit=gthrMem,
+                                nThreads=nThreads)
             weights  = get_weights( probs )
 
             #Attempt to control leastsq by zeroing clipped weights -- this doesn't seem to help (nor should it)
@@ -1354,7 +1463,9 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
             objective_func, jacobian, x0, f_norm2_tol=tol,
             jac_norm_tol=tol, rel_ftol=tol, rel_xtol=tol,
             max_iter=maxiter, comm=comm,
-            verbosity=printer.verbosity-1, profiler=profiler)
+            verbosity=printer.verbosity-1, profiler=profiler,
+            jac_blocks=jacBlocks, broyden_iters=broydenIters,
+            checkpoint_fn=checkpointFn, init_state=resumeState)
         printer.log("Least squares message = %s" % msg,2)
         assert(converged)
     else:
@@ -1362,6 +1473,7 @@ def do_mc2gst(dataset, startGateset, gateStringsToUse,
             _spo.leastsq( objective_func, x0, xtol=tol, ftol=tol, gtol=tol,
                           maxfev=maxfev*(len(x0)+1), full_output=True, Dfun=jacobian )
         printer.log("Least squares message = %s; flag =%s" % (msg, flag), 2)
+    if productReuse: gs.set_product_reuse(False) #free kept product caches
 
 
     full_minErrVec = objective_func(opt_x)  #note: calls gs.from_vector(opt_x,...) so don't need to call this again
@@ -1619,7 +1731,11 @@ def do_iterative_mc2gst(dataset, startGateset, gateStringSetsToUseInEstimation,
                         check=False, check_jacobian=False,
                         gatestringWeightsDict=None, memLimit=None,
                         profiler=None, comm=None, 
-                        distributeMethod = "gatestrings"):
+                        distributeMethod = "gatestrings",
+                        evaltreeCacheDir=None, nThreads=None, jacBlocks=None,
+                        broydenIters=0, checkpointFile=None,
+                        checkpointInterval=60, productReuse=False,
+                        germPowers=False):
     """
     Performs Iterative Minimum Chi^2 Gate Set Tomography on the dataset.
 
@@ -1715,6 +1831,56 @@ def do_iterative_mc2gst(dataset, startGateset, gateStringSetsToUseInEstimation,
         when comm is not None).  "gatestrings" will divide the list of
         gatestrings; "deriv" will divide the columns of the jacobian matrix.
 
+    evaltreeCacheDir : str, optional
+        If not None, a directory in which evaluation trees are saved so that
+        later runs using the same gate strings (and gate set structure,
+        memLimit, comm size and distributeMethod) can load rather than
+        rebuild them.  See `GateSet.bulk_evaltree_from_resources`.
+
+    nThreads : int, optional
+        If greater than 1, the number of threads used (by each processor) to
+        compute probabilities and their derivatives: the evaluation tree is
+        split into more subtrees ("gatestrings" distribution) or derivative
+        columns into more blocks ("deriv" distribution), which are then
+        computed concurrently.
+
+    jacBlocks : bool, optional
+        Whether the optimizer is given the jacobian one evaluation-tree
+        sub-tree at a time, accumulating J^T J and J^T f without ever holding
+        the entire jacobian in memory.  None (the default) does this only
+        when `memLimit` is given and the jacobian would take more than half
+        of it.
+
+    broydenIters : int, optional
+        The maximum number of consecutive optimizer iterations that may use
+        a rank-1 (Broyden) update of the previous jacobian instead of
+        computing it exactly, which saves time near convergence.  The exact
+        jacobian is re-computed whenever an updated one performs poorly.
+        Zero (the default) always computes the exact jacobian.  Has no
+        effect when jacobian blocks are used (see `jacBlocks`).
+
+    checkpointFile : str, optional
+        If not None, the name of a file in which the progress of this
+        computation is saved: after each iteration and, within iterations,
+        the optimizer's state at most every `checkpointInterval` seconds.  If
+        the file exists when this function is called, the computation resumes
+        from the saved state instead of starting over, so an interrupted run
+        can be continued by simply calling this function again with the same
+        arguments.  A ValueError is raised if the file was saved by a run with
+        a different dataset, starting gate set, gate string lists or objective
+        function.  The file is deleted when the computation finishes.
+
+    checkpointInterval : float, optional
+        The minimum number of seconds between optimizer-state checkpoints.
+
+    productReuse : bool, optional
+        Whether the jacobians reuse the product caches of the objective
+        function evaluations (see `do_mc2gst`).
+
+    germPowers : bool, optional
+        Whether the evaluation trees compute repeated germs by repeated
+        squaring (see `do_mc2gst`).
+
 
     Returns
     -------
@@ -1742,9 +1908,34 @@ def do_iterative_mc2gst(dataset, startGateset, gateStringSetsToUseInEstimation,
     #Run MC2GST iteratively on given sets of estimatable strings
     lsgstGatesets = [ ]; minErrs = [ ] #for returnAll == True case
     lsgstGateset = startGateset.copy(); nIters = len(gateStringLists)    
+    evtBase = prevStrings = None #evaluation tree extended by each iteration
     tStart = _time.time()
     tRef = tStart
 
+    ckpt = None
+    if checkpointFile is not None:
+        ckpt = _load_checkpoint(checkpointFile, comm)
+        key = _checkpoint_key(dataset, startGateset, gateStringLists,
+                              ("chi2", cptp_penalty_factor, minProbClipForWeighting,
+                               probClipInterval, useFreqWeightedChiSq,
+                               regularizeFactor, gatestringWeightsDict))
+        if ckpt is None:
+            ckpt = { 'objective': "chi2", 'nIters': nIters, 'key': key, 'stage': 0,
+                     'gateset': None, 'optimizer': None, 'results': [] }
+        elif ckpt['objective'] != "chi2" or ckpt['nIters'] != nIters:
+            raise ValueError("Checkpoint file %s is not from an iterative MC2GST"
+                             " run with %d iterations" % (checkpointFile, nIters))
+        elif ckpt.get('key',None) != key:
+            raise ValueError("Checkpoint file %s is from an iterative MC2GST run"
+                             " with different inputs" % checkpointFile)
+        else:
+            printer.log("Resuming iterative MC2GST at iteration %d from %s"
+                        % (ckpt['stage']+1, checkpointFile))
+            for minErr, lsgstGateset in ckpt['results']:
+                if returnAll:
+                    lsgstGatesets.append(lsgstGateset)
+                    minErrs.append(minErr)
+
     with printer.progress_logging(1):
         for (i, stringsToEstimate) in enumerate(gateStringLists):
             #printer.log('', 2)
@@ -1753,6 +1944,18 @@ def do_iterative_mc2gst(dataset, startGateset, gateStringSetsToUseInEstimation,
 
             if stringsToEstimate is None or len(stringsToEstimate) == 0: continue
 
+            evtBase = _next_base_evaltree(evtBase, stringsToEstimate, prevStrings)
+            prevStrings = stringsToEstimate
+
+            resumeState = checkpointFn = None
+            if ckpt is not None:
+                if i < ckpt['stage']: continue # completed before being checkpointed
+                if i == ckpt['stage']:
+                    lsgstGateset, resumeState = _resume_stage(ckpt, lsgstGateset)
+                ckpt.update(stage=i, gateset=lsgstGateset.copy())
+                checkpointFn = _optimizer_checkpointer(checkpointFile, ckpt,
+                                                       checkpointInterval, comm)
+
             if gatestringWeightsDict is not None:
                 gatestringWeights = _np.ones( len(stringsToEstimate), 'd')
                 for gatestr, weight in gatestringWeightsDict.items():
@@ -1769,17 +1972,26 @@ def do_iterative_mc2gst(dataset, startGateset, gateStringSetsToUseInEstimation,
                            useFreqWeightedChiSq, regularizeFactor,
                            printer-1, check, check_jacobian,
                            gatestringWeights, None, memLimit, comm,
-                           distributeMethod, profiler)
+                           distributeMethod, profiler, evaltreeCacheDir,
+                           nThreads, jacBlocks, broydenIters, checkpointFn,
+                           resumeState, evtBase, productReuse, germPowers)
             if returnAll:
                 lsgstGatesets.append(lsgstGateset)
                 minErrs.append(minErr)
 
+            if ckpt is not None:
+                ckpt['results'].append( (minErr, lsgstGateset) )
+                ckpt.update(stage=i+1, gateset=lsgstGateset, optimizer=None)
+                _save_checkpoint(checkpointFile, ckpt, comm)
+
             tNxt = _time.time();
             profiler.add_time('do_iterative_mc2gst: iter %d chi2-opt'%(i+1),tRef)
             printer.log("    Iteration %d took %.1fs" % (i+1,tNxt-tRef),2)
             printer.log('',2) #extra newline
             tRef=tNxt
 
+    if ckpt is not None: _remove_checkpoint(checkpointFile, comm)
+
     printer.log('Iterative MC2GST Total Time: %.1fs' % (_time.time()-tStart))
     profiler.add_time('do_iterative_mc2gst: total time', tStart)
 
@@ -1995,7 +2207,11 @@ def do_mlgst(dataset, startGateset, gateStringsToUse,
              probClipInterval=(-1e6,1e6), radius=1e-4,
              poissonPicture=True, verbosity=0, check=False,
              gateLabelAliases=None, memLimit=None, comm=None,
-             distributeMethod = "deriv", profiler=None):
+             distributeMethod = "deriv", profiler=None,
+             evaltreeCacheDir=None, nThreads=None,
+             jacBlocks=None, broydenIters=0, checkpointFn=None,
+             resumeState=None, baseEvalTree=None, productReuse=False,
+             germPowers=False):
 
     """
     Performs Maximum Likelihood Estimation Gate Set Tomography on the dataset.
@@ -2066,6 +2282,66 @@ def do_mlgst(dataset, startGateset, gateStringsToUse,
     profiler : Profiler, optional
         A profiler object used for to track timing and memory usage.
 
+    evaltreeCacheDir : str, optional
+        If not None, a directory in which evaluation trees are saved so that
+        later runs using the same gate strings (and gate set structure,
+        memLimit, comm size and distributeMethod) can load rather than
+        rebuild them.  See `GateSet.bulk_evaltree_from_resources`.
+
+    nThreads : int, optional
+        If greater than 1, the number of threads used (by each processor) to
+        compute probabilities and their derivatives: the evaluation tree is
+        split into more subtrees ("gatestrings" distribution) or derivative
+        columns into more blocks ("deriv" distribution), which are then
+        computed concurrently.
+
+    jacBlocks : bool, optional
+        Whether the optimizer is given the jacobian one evaluation-tree
+        sub-tree at a time, accumulating J^T J and J^T f without ever holding
+        the entire jacobian in memory.  None (the default) does this only
+        when `memLimit` is given and the jacobian would take more than half
+        of it.
+
+    broydenIters : int, optional
+        The maximum number of consecutive optimizer iterations that may use
+        a rank-1 (Broyden) update of the previous jacobian instead of
+        computing it exactly, which saves time near convergence.  The exact
+        jacobian is re-computed whenever an updated one performs poorly.
+        Zero (the default) always computes the exact jacobian.  Has no
+        effect when jacobian blocks are used (see `jacBlocks`).
+
+    checkpointFn : function, optional
+        If not None, a function `checkpointFn(x, mu, nu, k)` called by the
+        optimizer at the start of each iteration with the current gate set
+        parameter vector `x`, Levenberg-Marquardt damping parameters `mu` and
+        `nu`, and iteration index `k` -- e.g. to save them to disk.
+
+    resumeState : tuple, optional
+        A `(mu, nu, k)` tuple, as given to `checkpointFn`, from which to resume
+        an interrupted optimization.  The parameters of `startGateset` should
+        then be the corresponding `x`.
+
+    baseEvalTree : EvalTree, optional
+        An un-split evaluation tree for the first `num_final_strings()`
+        elements of `gateStringsToUse` (or a new, empty, `EvalTree`), which is
+        extended in place rather than building a new tree from scratch.  This
+        lets iterative GST re-use the tree of the previous iteration.  See
+        `GateSet.bulk_evaltree`.
+
+    productReuse : bool, optional
+        If True, the product caches computed by each objective function
+        evaluation are kept so that the jacobian, which the optimizer
+        computes at the point of its last accepted evaluation, can reuse
+        them instead of recomputing them.  This needs memory for one extra
+        copy of the products of all the gate strings: when `memLimit` is
+        given, 10% of the memory not used by the final results is set aside
+        for it.
+
+    germPowers : bool, optional
+        If True, the evaluation tree computes gate strings containing
+        repeated germs (e.g. the germ powers of long-sequence GST) by
+        repeated squaring of the germ, which needs fewer matrix products
+        for long sequences.  See `GateSet.bulk_evaltree`.
 
     Returns
     -------
@@ -2078,7 +2354,105 @@ def do_mlgst(dataset, startGateset, gateStringsToUse,
                           maxfev, tol,cptp_penalty_factor, minProbClip,
                           probClipInterval, radius, poissonPicture, verbosity,
                           check, gateLabelAliases, memLimit, comm,
-                          distributeMethod, profiler, None, None)
+                          distributeMethod, profiler, None, None,
+                          evaltreeCacheDir=evaltreeCacheDir, nThreads=nThreads,
+                          jacBlocks=jacBlocks, broydenIters=broydenIters,
+                          checkpointFn=checkpointFn, resumeState=resumeState,
+                          baseEvalTree=baseEvalTree, productReuse=productReuse,
+                          germPowers=germPowers)
+
+
+def do_mlgst_multi(datasets, startGateset, gateStringsToUse,
+                   maxiter=100000, maxfev=None, tol=1e-6,
+                   cptp_penalty_factor=0, minProbClip=1e-4,
+                   probClipInterval=(-1e6,1e6), radius=1e-4,
+                   poissonPicture=True, verbosity=0, check=False,
+                   gateLabelAliases=None, memLimit=None, comm=None,
+                   distributeMethod = "deriv", profiler=None,
+                   evaltreeCacheDir=None, nThreads=None,
+                   jacBlocks=None, broydenIters=0, warmStart=True,
+                   germPowers=False):
+    """
+    Performs Maximum Likelihood Estimation Gate Set Tomography separately on
+    each of several datasets which contain the same gate strings, e.g. the
+    re-sampled datasets used for bootstrapped error bars or the datasets of a
+    MultiDataSet.
+
+    All the fits share a single evaluation tree and gate string ordering, so
+    that these are computed only once (per processor) rather than once per
+    dataset.
+
+    Parameters
+    ----------
+    datasets : list of DataSets or MultiDataSet
+        The datasets to fit.  Each must contain (at least) all the gate
+        strings of `gateStringsToUse`.
+
+    startGateset : GateSet or list of GateSets
+        The GateSet used as a starting point for every fit, or a list of
+        starting gate sets, one per dataset.
+
+    gateStringsToUse : list of (tuples or GateStrings)
+        The gate strings used in every fit.
+
+    warmStart : bool, optional
+        If True, and a single `startGateset` is given, each fit (after the
+        first one performed by a processor) starts from the result of the
+        previous fit, which typically converges faster when the datasets are
+        similar.
+
+    comm : mpi4py.MPI.Comm, optional
+        When not None, an MPI communicator for distributing the computation
+        across multiple processors.  The datasets are divided among the
+        processors, each of which fits its datasets in turn.  When there are
+        more processors than datasets, each fit is further distributed
+        among a group of processors according to `distributeMethod`.
+
+    Other parameters are the same as those of :func:`do_mlgst`.
+
+    Returns
+    -------
+    maxLogLs : list of floats
+        The maximum log-likelihood obtained for each dataset.
+    gatesets : list of GateSets
+        The gate set that maximized the log-likelihood for each dataset.
+    """
+    if isinstance(datasets, _objs.MultiDataSet):
+        datasets = [ datasets[dsName] for dsName in datasets.keys() ]
+    if isinstance(startGateset, _objs.GateSet):
+        startGatesets = [ startGateset ] * len(datasets)
+    else:
+        startGatesets = list(startGateset); warmStart = False
+        assert(len(startGatesets) == len(datasets)), \
+            "Must give one start gate set per dataset"
+
+    printer = _objs.VerbosityPrinter.build_printer(verbosity, comm)
+    myIndices, owners, mySubComm = _mpit.distribute_indices(
+        list(range(len(datasets))), comm)
+
+    evaltree_cache = {} #shared by all the fits on this processor
+    results = {}; gs = None
+    for i in myIndices:
+        printer.log("MLGST fit of dataset %d of %d" % (i+1,len(datasets)), 1)
+        gs_start = gs if (warmStart and gs is not None) else startGatesets[i]
+        logL, gs = _do_mlgst_base(datasets[i], gs_start, gateStringsToUse,
+                                  maxiter, maxfev, tol, cptp_penalty_factor,
+                                  minProbClip, probClipInterval, radius,
+                                  poissonPicture, printer-1, check,
+                                  gateLabelAliases, memLimit, mySubComm,
+                                  distributeMethod, profiler, evaltree_cache,
+                                  evaltreeCacheDir=evaltreeCacheDir,
+                                  nThreads=nThreads, jacBlocks=jacBlocks,
+                                  broydenIters=broydenIters,
+                                  germPowers=germPowers)
+        results[i] = (logL, gs)
+
+    if comm is not None: #share the results of each owner with all processors
+        for i in range(len(datasets)):
+            results[i] = comm.bcast(results.get(i,None), root=owners[i])
+
+    return [ results[i][0] for i in range(len(datasets)) ], \
+           [ results[i][1] for i in range(len(datasets)) ]
 
 
 def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
@@ -2089,7 +2463,10 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
                    gateLabelAliases=None, memLimit=None, comm=None,
                    distributeMethod = "deriv", profiler=None,
                    evaltree_cache=None, forcefn_grad=None,
-                   shiftFctr=100):
+                   shiftFctr=100, evaltreeCacheDir=None, nThreads=None,
+                   jacBlocks=None, broydenIters=0, checkpointFn=None,
+                   resumeState=None, baseEvalTree=None, productReuse=False,
+                   germPowers=False):
     """ 
     Same args and behavior as do_mlgst, but with additional:
     
@@ -2100,7 +2477,8 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
         in this computation.  If an empty dictionary is supplied, it is filled
         with cached values to speed up subsequent executions of this function
         which use the *same* `startGateset`, `gateStringsToUse`, `memLimit`,
-        `comm`, and `distributeMethod`.
+        `comm`, `distributeMethod`, and `gateLabelAliases` (but possibly
+        different datasets).
        
     forcefn_grad : numpy array, optional
         An array of shape `(D,nParams)`, where `D` is the dimsion of the
@@ -2114,6 +2492,43 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
         This should be > 1, and the larger the value the more positive-shift 
         is applied to keep the forcing term positive.  Thus, if you receive
         an "Inadequate forcing shift" error, make this value larger.
+
+    evaltreeCacheDir : str, optional
+        A directory used to persist the computed EvalTree between runs (see
+        `GateSet.bulk_evaltree_from_resources`).  Unlike `evaltree_cache`,
+        which only lives as long as the dictionary, files in this directory
+        are reused by later processes.
+
+    nThreads : int, optional
+        The number of threads used to compute probabilities and their
+        derivatives (see `do_mlgst`).
+
+    jacBlocks : bool, optional
+        Whether the optimizer is given the jacobian one sub-tree at a time
+        (see `do_mlgst`).
+
+    broydenIters : int, optional
+        The maximum number of consecutive Broyden-updated jacobians the
+        optimizer may use (see `do_mlgst`).
+
+    checkpointFn : function, optional
+        A function to which the optimizer's state is given at the start of
+        each iteration (see `do_mlgst`).
+
+    resumeState : tuple, optional
+        The optimizer state to resume from (see `do_mlgst`).
+
+    baseEvalTree : EvalTree, optional
+        An evaluation tree to extend rather than building a new one (see
+        `do_mlgst`).
+
+    productReuse : bool, optional
+        Whether the jacobian reuses the product caches of the last objective
+        function evaluation (see `do_mlgst`).
+
+    germPowers : bool, optional
+        Whether the evaluation tree computes repeated germs by repeated
+        squaring (see `do_mlgst`).
     """
 
     printer = _objs.VerbosityPrinter.build_printer(verbosity, comm)
@@ -2156,7 +2571,12 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
     C = 1.0/1024.0**3
 
     #  Estimate & check persistent memory (from allocs directly below)
-    persistentMem = 8* (ng*(ns + ns*ne + 1*ns)) # final results in bytes
+    if jacBlocks is None:
+        jacBlocks = bool(CUSTOMLM and memLimit is not None and 8*ng*ns*ne > 0.5*memLimit)
+    if jacBlocks:
+        persistentMem = 8* (ng*(ns + 1*ns) + 2*ne*ne) # final results & J^T J sums in bytes
+    else:
+        persistentMem = 8* (ng*(ns + ns*ne + 1*ns)) # final results in bytes
     if memLimit is not None and memLimit < persistentMem:
         raise MemoryError("Memory limit (%g GB) is " % (memLimit*C) +
                           "< memory required to hold final results (%g GB)"
@@ -2166,14 +2586,20 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
     if (memLimit is not None):
         curMem = _objs.profiler._get_max_mem_usage(comm)
         gthrMem = int(0.1*(memLimit-persistentMem))
-        mlim = memLimit-persistentMem-gthrMem-curMem
+        reuseMem = gthrMem if productReuse else 0
+        mlim = memLimit-persistentMem-gthrMem-reuseMem-curMem
         printer.log("Memory: limit = %.2fGB" % (memLimit*C) + 
-                    "(cur, persist, gthr = %.2f, %.2f, %.2f GB)" %
-                    (curMem*C, persistentMem*C, gthrMem*C))
-    else: gthrMem = mlim = None
+                    "(cur, persist, gthr, reuse = %.2f, %.2f, %.2f, %.2f GB)" %
+                    (curMem*C, persistentMem*C, gthrMem*C, reuseMem*C))
+    else: gthrMem = mlim = reuseMem = None
+
+    if productReuse:
+        #Keep the product caches of the last objective function evaluation so
+        # the jacobian (computed at the same point) can reuse them.
+        gs.set_product_reuse(True, 1, reuseMem)
     
-    if evaltree_cache and evaltree_cache.has_key('evTree') \
-            and evaltree_cache.has_key('wrtBlkSize'):
+    if evaltree_cache and 'evTree' in evaltree_cache \
+            and 'wrtBlkSize' in evaltree_cache:
         #use cache dictionary to speed multiple calls which use
         # the same gateset, gate strings, comm, memlim, etc.
         evTree = evaltree_cache['evTree']
@@ -2181,31 +2607,43 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
     else:
         evTree, wrtBlkSize, _ = gs.bulk_evaltree_from_resources(
             gateStringsToUse, comm, mlim, distributeMethod,
-            ["bulk_fill_probs","bulk_fill_dprobs"], printer)
+            ["bulk_fill_probs", "bulk_dprobs_by_subtree" if jacBlocks
+             else "bulk_fill_dprobs"], printer,
+            germPowers=germPowers, cacheDir=evaltreeCacheDir, nThreads=nThreads,
+            baseTree=baseEvalTree)
         
         #Fill cache dict if one was given
         if evaltree_cache is not None:
             evaltree_cache['evTree'] = evTree
             evaltree_cache['wrtBlkSize'] = wrtBlkSize
 
-    # permute (if needed) gate string list for efficient subtree division
-    # Note: cannot rely on order of gateStringsToUse above this point --
-    #   (using len(gateStringsToUse) is fine though).
-    gateStringsToUse = evTree.generate_gatestring_list(permute=False)
-
-    #Expand gate label aliases used in DataSet lookups
-    if gateLabelAliases is not None:
-        #find & replace aliased gate labels with their expanded form
-        dsGateStringsToUse = []
-        for s in gateStringsToUse:
-            for label,expandedStr in gateLabelAliases.items():
-                while label in tuple(s):
-                    i = tuple(s).index(label)
-                    s = tuple(s)[:i] + tuple(expandedStr) + tuple(s)[i+1:]
-            dsGateStringsToUse.append(s)
+    if evaltree_cache and 'dsGateStringsToUse' in evaltree_cache:
+        #use the gate string ordering (and alias expansion) cached with the tree
+        gateStringsToUse = evaltree_cache['gateStringsToUse']
+        dsGateStringsToUse = evaltree_cache['dsGateStringsToUse']
     else:
-        dsGateStringsToUse = gateStringsToUse
-           # no difference in the strings used by the alias
+        # permute (if needed) gate string list for efficient subtree division
+        # Note: cannot rely on order of gateStringsToUse above this point --
+        #   (using len(gateStringsToUse) is fine though).
+        gateStringsToUse = evTree.generate_gatestring_list(permute=False)
+
+        #Expand gate label aliases used in DataSet lookups
+        if gateLabelAliases is not None:
+            #find & replace aliased gate labels with their expanded form
+            dsGateStringsToUse = []
+            for s in gateStringsToUse:
+                for label,expandedStr in gateLabelAliases.items():
+                    while label in tuple(s):
+                        i = tuple(s).index(label)
+                        s = tuple(s)[:i] + tuple(expandedStr) + tuple(s)[i+1:]
+                dsGateStringsToUse.append(s)
+        else:
+            dsGateStringsToUse = gateStringsToUse
+               # no difference in the strings used by the alias
+
+        if evaltree_cache is not None:
+            evaltree_cache['gateStringsToUse'] = gateStringsToUse
+            evaltree_cache['dsGateStringsToUse'] = dsGateStringsToUse
 
     #Compute "extra" (i.e. beyond the (gatestring,spamlable)) rows of jacobian        
     ex = 0
@@ -2215,7 +2653,8 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
     #Allocate peristent memory
     cntVecMx = _np.empty( (len(spamLabels),len(gateStringsToUse)), 'd' )
     probs = _np.empty( (len(spamLabels),len(gateStringsToUse)), 'd' )
-    jac    = _np.empty( (len(spamLabels)*len(gateStringsToUse)+ex,vec_gs_len) )
+    jac    = None if jacBlocks else \
+        _np.empty( (len(spamLabels)*len(gateStringsToUse)+ex,vec_gs_len) )
 
     spam_lbl_rows = { sl:i for (i,sl) in enumerate(spamLabels) }
     _tools.fill_count_vecs(cntVecMx, spam_lbl_rows, dataset, dsGateStringsToUse)
@@ -2264,81 +2703,9 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
         #  terms, where each term == sqrt( N_{i,sl} * -log(p_{i,sl}) + N[i] * p_{i,sl} )
         #
         # See LikelihoodFunctions.py for details on patching
-
-        def objective_func(vectorGS):
-            tm = _time.time()
-            gs.from_vector(vectorGS)
-            gs.bulk_fill_probs(probs, spam_lbl_rows, evTree, probClipInterval,
-                               check, comm)
-            pos_probs = _np.where(probs < min_p, min_p, probs)
-            S = minusCntVecMx / min_p + totalCntVec[None,:]
-            S2 = -0.5 * minusCntVecMx / (min_p**2)
-            v = freqTerm + minusCntVecMx * _np.log(pos_probs) + totalCntVec[None,:]*pos_probs # dims K x M (K = nSpamLabels, M = nGateStrings)
-            v = _np.maximum(v,0)  #remove small negative elements due to roundoff error (above expression *cannot* really be negative)
-            v = _np.where( probs < min_p, v + S*(probs - min_p) + S2*(probs - min_p)**2, v) #quadratic extrapolation of logl at min_p for probabilities < min_p
-            v = _np.where( minusCntVecMx == 0, totalCntVec[None,:] * _np.where(probs >= a, probs, (-1.0/(3*a**2))*probs**3 + probs**2/a + a/3.0), v)
-                    #special handling for f == 0 terms using quadratic rounding of function with minimum: max(0,(a-p)^2)/(2a) + p
-            v = _np.sqrt( v )
-            v.shape = [KM] #reshape ensuring no copy is needed
-            if cptp_penalty_factor != 0:
-                cpPenaltyVec = _cptp_penalty(gs,cptp_penalty_factor,gateBasis)
-                v = _np.concatenate( (v, cpPenaltyVec) )
-
-            if forcefn_grad is not None:
-                forceVec = forceShift - _np.dot(forcefn_grad,vectorGS)
-                assert(_np.all(forceVec >= 0)), "Inadequate forcing shift!"
-                v = _np.concatenate( (v, _np.sqrt(forceVec)) )
-            
-            profiler.add_time("do_mlgst: OBJECTIVE",tm)
-            return v #Note: no test for whether probs is in [0,1] so no guarantee that
-                     #      sqrt is well defined unless probClipInterval is set within [0,1].
-
-        #  derivative of  sqrt( N_{i,sl} * -log(p_{i,sl}) + N[i] * p_{i,sl} ) terms:
-        #   == 0.5 / sqrt( N_{i,sl} * -log(p_{i,sl}) + N[i] * p_{i,sl} ) * ( -N_{i,sl} / p_{i,sl} + N[i] ) * dp
-        #  if p <  p_min then term == sqrt( N_{i,sl} * -log(p_min) + N[i] * p_min + S*(p-p_min) )
-        #   and deriv == 0.5 / sqrt(...) * S * dp
-
-        def jacobian(vectorGS):
-            tm = _time.time()
-            dprobs = jac[0:KM,:] #avoid mem copying: use jac mem for dprobs
-            dprobs.shape = (ns,ng,vec_gs_len)
-            gs.from_vector(vectorGS)
-            gs.bulk_fill_dprobs(dprobs, spam_lbl_rows, evTree,
-                                prMxToFill=probs, clipTo=probClipInterval,
-                                check=check, comm=comm, wrtBlockSize=wrtBlkSize,
-                                profiler=profiler, gatherMemLimit=gthrMem)
-
-            pos_probs = _np.where(probs < min_p, min_p, probs)
-            S = minusCntVecMx / min_p + totalCntVec[None,:]
-            S2 = -0.5 * minusCntVecMx / (min_p**2)
-            v = freqTerm + minusCntVecMx * _np.log(pos_probs) + totalCntVec[None,:]*pos_probs # dims K x M (K = nSpamLabels, M = nGateStrings)
-            v = _np.maximum(v,0)  #remove small negative elements due to roundoff error (above expression *cannot* really be negative)
-            v = _np.where( probs < min_p, v + S*(probs - min_p) + S2*(probs - min_p)**2, v) #quadratic extrapolation of logl at min_p for probabilities < min_p
-            v = _np.where( minusCntVecMx == 0, totalCntVec[None,:] * _np.where(probs >= a, probs, (-1.0/(3*a**2))*probs**3 + probs**2/a + a/3.0), v)
-
-            v = _np.sqrt( v )
-            v = _np.maximum(v,1e-100) #derivative diverges as v->0, but v always >= 0 so clip v to a small positive value to avoid divide by zero below
-            dprobs_factor_pos = (0.5 / v) * (minusCntVecMx / pos_probs + totalCntVec[None,:])
-            dprobs_factor_neg = (0.5 / v) * (S + 2*S2*(probs - min_p))
-            dprobs_factor_zerofreq = (0.5 / v) * totalCntVec[None,:] * _np.where( probs >= a, 1.0, (-1.0/a**2)*probs**2 + 2*probs/a )
-            dprobs_factor = _np.where( probs < min_p, dprobs_factor_neg, dprobs_factor_pos)
-            dprobs_factor = _np.where( minusCntVecMx == 0, dprobs_factor_zerofreq, dprobs_factor )
-            dprobs *= dprobs_factor[:,:,None] # (K,M,N) * (K,M,1)   (N = dim of vectorized gateset)
-              #Note: this also sets jac[0:KM,:]
-
-            if cptp_penalty_factor != 0:
-                _cptp_penalty_jac_fill(jac[KM:,:], gs, cptp_penalty_factor,
-                                       vec_gs_len, nGateParams, nSpamParams,
-                                       gateBasis)
-
-            if forcefn_grad is not None:
-                jac[forceOffset:,:] = -forcefn_grad
-
-            if check: _opt.check_jac(objective_func, vectorGS, jac, tol=1e-3, eps=1e-6, errType='abs')
-            profiler.add_time("do_mlgst: JACOBIAN",tm)
-            return jac
-
-    else: # standard (non-Poisson-picture) logl
+        totalCntMx = _np.empty( (ns,ng), 'd' ); totalCntMx[:,:] = totalCntVec[None,:]
+        S = minusCntVecMx / min_p + totalCntMx
+    else:
 
         # The log(Likelihood) within the standard picture is:
         #
@@ -2354,77 +2721,104 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
         #  terms, where each term == sqrt( N_{i,sl} * -log(p_{i,sl}) )
         #
         # See LikelihoodFunction.py for details on patching
+        totalCntMx = None
+        S = minusCntVecMx / min_p
+
+    #Parameter-independent quantities used by the objective and jacobian, and
+    # pre-allocated scratch buffers, so that neither allocates K x M temporaries.
+    S2 = -0.5 * minusCntVecMx / (min_p**2)
+    zeroMask = (minusCntVecMx == 0)
+    posBuf = _np.empty( (ns,ng), 'd' )
+    lowMask = _np.empty( (ns,ng), bool )
+    vBuf = _np.empty( (ns,ng), 'd' )
+    dprobsFactor = _np.empty( (ns,ng), 'd' )
+
+    def objective_func(vectorGS):
+        tm = _time.time()
+        gs.from_vector(vectorGS)
+        gs.bulk_fill_probs(probs, spam_lbl_rows, evTree, probClipInterval,
+                           check, comm, nThreads=nThreads)
+        v = _np.empty(KM+ex, 'd') #the returned vector must be new memory
+        vTerms = v[0:KM].reshape( (ns,ng) ) # dims K x M (K = nSpamLabels, M = nGateStrings)
+        _logl_terms_fill(vTerms, probs, minusCntVecMx, totalCntMx, freqTerm, S, S2,
+                         zeroMask, min_p, a, posBuf, lowMask)
+        if cptp_penalty_factor != 0:
+            v[KM:KM+len(gs.gates)] = _cptp_penalty(gs,cptp_penalty_factor,gateBasis)
 
-        def objective_func(vectorGS):
-            tm = _time.time()
-            gs.from_vector(vectorGS)
-            gs.bulk_fill_probs(probs, spam_lbl_rows, evTree, probClipInterval,
-                               check, comm)
-            pos_probs = _np.where(probs < min_p, min_p, probs)
-            S = minusCntVecMx / min_p
-            S2 = -0.5 * minusCntVecMx / (min_p**2)
-            v = freqTerm + minusCntVecMx * _np.log(pos_probs)  # dims K x M (K = nSpamLabels, M = nGateStrings)
-            v = _np.maximum(v,0)  #remove small negative elements due to roundoff error (above expression *cannot* really be negative)
-            v = _np.where( probs < min_p, v + S*(probs - min_p) + S2*(probs - min_p)**2, v) #quadratic extrapolation of logl at min_p for probabilities < min_p
-            v = _np.where( minusCntVecMx == 0, 0.0, v)
-            v = _np.sqrt( v )
-            v.shape = [KM] #reshape ensuring no copy is needed
-            if cptp_penalty_factor != 0:
-                cpPenaltyVec = _cptp_penalty(gs,cptp_penalty_factor,gateBasis)
-                v = _np.concatenate( (v, cpPenaltyVec) )
-
-            if forcefn_grad is not None:
-                forceVec = forceShift - _np.dot(forcefn_grad,vectorGS)
-                assert(_np.all(forceVec >= 0)), "Inadequate forcing shift!"
-                v = _np.concatenate( (v, _np.sqrt(forceVec)) )
+        if forcefn_grad is not None:
+            forceVec = forceShift - _np.dot(forcefn_grad,vectorGS)
+            assert(_np.all(forceVec >= 0)), "Inadequate forcing shift!"
+            v[forceOffset:] = _np.sqrt(forceVec)
+
+        profiler.add_time("do_mlgst: OBJECTIVE",tm)
+        return v #Note: no test for whether probs is in [0,1] so no guarantee that
+                 #      sqrt is well defined unless probClipInterval is set within [0,1].
+
+    #  derivative of  sqrt( N_{i,sl} * -log(p_{i,sl}) + N[i] * p_{i,sl} ) terms:
+    #   == 0.5 / sqrt( N_{i,sl} * -log(p_{i,sl}) + N[i] * p_{i,sl} ) * ( -N_{i,sl} / p_{i,sl} + N[i] ) * dp
+    #  if p <  p_min then term == sqrt( N_{i,sl} * -log(p_min) + N[i] * p_min + S*(p-p_min) )
+    #   and deriv == 0.5 / sqrt(...) * S * dp
+    #  (in the standard picture the N[i] terms are absent)
+
+    def get_dprobs_factor(probs, fslc=slice(None)):
+        #Note: fslc selects the gate strings (columns) probs is given for
+        minusCnts = minusCntVecMx[:,fslc]; Ss = S[:,fslc]; S2s = S2[:,fslc]
+        totalCnts = None if totalCntMx is None else totalCntMx[:,fslc]
+        zeros = zeroMask[:,fslc]; pos = posBuf[:,fslc]; low = lowMask[:,fslc]
+        v = vBuf[:,fslc]; factor = dprobsFactor[:,fslc]
+        _logl_terms_fill(v, probs, minusCnts, totalCnts, freqTerm[:,fslc],
+                         Ss, S2s, zeros, min_p, a, pos, low)
+        _logl_dprobs_factor_fill(factor, probs, v, minusCnts, totalCnts,
+                                 Ss, S2s, zeros, min_p, a, pos, low)
+        return factor
+
+    def jacobian(vectorGS):
+        tm = _time.time()
+        dprobs = jac[0:KM,:] #avoid mem copying: use jac mem for dprobs
+        dprobs.shape = (ns,ng,vec_gs_len)
+        gs.from_vector(vectorGS)
+        gs.bulk_fill_dprobs(dprobs, spam_lbl_rows, evTree,
+                            prMxToFill=probs, clipTo=probClipInterval,
+                            check=check, comm=comm, wrtBlockSize=wrtBlkSize,
+                            profiler=profiler, gatherMemLimit=gthrMem,
+                            nThreads=nThreads)
+        dprobs *= get_dprobs_factor(probs)[:,:,None] # (K,M,N) * (K,M,1)   (N = dim of vectorized gateset)
+          #Note: this also sets jac[0:KM,:]
+
+        if cptp_penalty_factor != 0:
+            _cptp_penalty_jac_fill(jac[KM:,:], gs, cptp_penalty_factor,
+                                   vec_gs_len, nGateParams, nSpamParams,
+                                   gateBasis)
 
-            profiler.add_time("do_mlgst: OBJECTIVE",tm)
-            return v  #Note: no test for whether probs is in [0,1] so no guarantee that
-                      #      sqrt is well defined unless probClipInterval is set within [0,1].
+        if forcefn_grad is not None:
+            jac[forceOffset:,:] = -forcefn_grad
 
-        #  derivative of  sqrt( N_{i,sl} * -log(p_{i,sl}) + N[i] * p_{i,sl} ) terms:
-        #   == 0.5 / sqrt( N_{i,sl} * -log(p_{i,sl}) + N[i] * p_{i,sl} ) * ( -N_{i,sl} / p_{i,sl} + N[i] ) * dp
-        #  if p <  p_min then term == sqrt( N_{i,sl} * -log(p_min) + N[i] * p_min + S*(p-p_min) )
-        #   and deriv == 0.5 / sqrt(...) * S * dp
+        if check: _opt.check_jac(objective_func, vectorGS, jac, tol=1e-3, eps=1e-6, errType='abs')
+        profiler.add_time("do_mlgst: JACOBIAN",tm)
+        return jac
 
+    if jacBlocks: # Jacobian row blocks, given one (local) subtree at a time
         def jacobian(vectorGS):
             tm = _time.time()
-            dprobs = jac[0:KM,:] #avoid mem copying: use jac mem for dprobs
-            dprobs.shape = (ns,ng,vec_gs_len)
             gs.from_vector(vectorGS)
-            gs.bulk_fill_dprobs(dprobs, spam_lbl_rows, evTree,
-                                prMxToFill=probs, clipTo=probClipInterval,
-                                check=check, comm=comm, wrtBlockSize=wrtBlkSize,
-                                profiler=profiler, gatherMemLimit=gthrMem)
-
-            pos_probs = _np.where(probs < min_p, min_p, probs)
-            S = minusCntVecMx / min_p
-            S2 = -0.5 * minusCntVecMx / (min_p**2)
-            v = freqTerm + minusCntVecMx * _np.log(pos_probs) # dims K x M (K = nSpamLabels, M = nGateStrings)
-            v = _np.maximum(v,0)  #remove small negative elements due to roundoff error (above expression *cannot* really be negative)
-            v = _np.where( probs < min_p, v + S*(probs - min_p) + S2*(probs - min_p)**2, v) #quadratic extrapolation of logl at min_p for probabilities < min_p
-            v = _np.where( minusCntVecMx == 0, 0.0, v)
-            v = _np.sqrt( v )
-
-            v = _np.maximum(v,1e-100) #derivative diverges as v->0, but v always >= 0 so clip v to a small positive value to avoid divide by zero below
-            dprobs_factor_pos = (0.5 / v) * (minusCntVecMx / pos_probs)
-            dprobs_factor_neg = (0.5 / v) * (S + 2*S2*(probs - min_p))
-            dprobs_factor = _np.where( probs < min_p, dprobs_factor_neg, dprobs_factor_pos)
-            dprobs_factor = _np.where( minusCntVecMx == 0, 0.0, dprobs_factor )
-            dprobs *= dprobs_factor[:,:,None] # (K,M,N) * (K,M,1)   (N = dim of vectorized gateset)
-              #Note: this also sets jac[0:KM,:]
-
-            if cptp_penalty_factor != 0:
-                _cptp_penalty_jac_fill(jac[KM:,:], gs, cptp_penalty_factor,
-                                       vec_gs_len, nGateParams, nSpamParams,
-                                       gateBasis)
-
-            if forcefn_grad is not None:
-                jac[forceOffset:,:] = -forcefn_grad
-
-            if check: _opt.check_jac(objective_func, vectorGS, jac, tol=1e-3, eps=1e-6, errType='abs')
+            for fslc, dprobs, sub_probs in gs.bulk_dprobs_by_subtree(
+                    spam_lbl_rows, evTree, probClipInterval, check, comm,
+                    wrtBlkSize, profiler, gthrMem, nThreads):
+                dprobs *= get_dprobs_factor(sub_probs, fslc)[:,:,None]
+                for k in range(ns): # rows of jac for k-th spam label & fslc strings
+                    yield slice(k*ng+fslc.start, k*ng+fslc.stop), dprobs[k]
+                dprobs = None #free mem
+
+            if ex > 0 and (comm is None or comm.Get_rank() == 0):
+                exJac = _np.empty( (ex,vec_gs_len), 'd' )
+                if cptp_penalty_factor != 0:
+                    _cptp_penalty_jac_fill(exJac[0:len(gs.gates),:], gs, cptp_penalty_factor,
+                                           vec_gs_len, nGateParams, nSpamParams,
+                                           gateBasis)
+                if forcefn_grad is not None:
+                    exJac[forceOffset-KM:,:] = -forcefn_grad
+                yield slice(KM,KM+ex), exJac
             profiler.add_time("do_mlgst: JACOBIAN",tm)
-            return jac
 
     profiler.add_time("do_mlgst: pre-opt",tStart)
 
@@ -2436,7 +2830,9 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
             objective_func, jacobian, x0, f_norm2_tol=tol,
             jac_norm_tol=tol, rel_ftol=tol, rel_xtol=tol,
             max_iter=maxiter, comm=comm,
-            verbosity=printer.verbosity-1, profiler=profiler)
+            verbosity=printer.verbosity-1, profiler=profiler,
+            jac_blocks=jacBlocks, broyden_iters=broydenIters,
+            checkpoint_fn=checkpointFn, init_state=resumeState)
         printer.log("Least squares message = %s" % msg,2)
         assert(converged)
     else:
@@ -2444,6 +2840,7 @@ def _do_mlgst_base(dataset, startGateset, gateStringsToUse,
             _spo.leastsq( objective_func, x0, xtol=tol, ftol=tol, gtol=0,
                           maxfev=maxfev*(len(x0)+1), full_output=True, Dfun=jacobian )
         printer.log("Least squares message = %s; flag =%s" % (msg, flag), 2)
+    if productReuse: gs.set_product_reuse(False) #free kept product caches
     profiler.add_time("do_mlgst: leastsq",tm)
 
     tm = _time.time()
@@ -2531,7 +2928,11 @@ def do_iterative_mlgst(dataset, startGateset, gateStringSetsToUseInEstimation,
                        gateStringSetLabels=None, useFreqWeightedChiSq=False,
                        verbosity=0, check=False, memLimit=None, 
                        profiler=None, comm=None,
-                       distributeMethod = "gatestrings"):
+                       distributeMethod = "gatestrings",
+                       evaltreeCacheDir=None, nThreads=None,
+                       jacBlocks=None, broydenIters=0, checkpointFile=None,
+                       checkpointInterval=60, productReuse=False,
+                       germPowers=False):
     """
     Performs Iterative Maximum Liklihood Estimation Gate Set Tomography on the dataset.
 
@@ -2623,6 +3024,56 @@ def do_iterative_mlgst(dataset, startGateset, gateStringSetsToUseInEstimation,
         when comm is not None).  "gatestrings" will divide the list of
         gatestrings; "deriv" will divide the columns of the jacobian matrix.
 
+    evaltreeCacheDir : str, optional
+        If not None, a directory in which evaluation trees are saved so that
+        later runs using the same gate strings (and gate set structure,
+        memLimit, comm size and distributeMethod) can load rather than
+        rebuild them.  See `GateSet.bulk_evaltree_from_resources`.
+
+    nThreads : int, optional
+        If greater than 1, the number of threads used (by each processor) to
+        compute probabilities and their derivatives: the evaluation tree is
+        split into more subtrees ("gatestrings" distribution) or derivative
+        columns into more blocks ("deriv" distribution), which are then
+        computed concurrently.
+
+    jacBlocks : bool, optional
+        Whether the optimizer is given the jacobian one evaluation-tree
+        sub-tree at a time, accumulating J^T J and J^T f without ever holding
+        the entire jacobian in memory.  None (the default) does this only
+        when `memLimit` is given and the jacobian would take more than half
+        of it.
+
+    broydenIters : int, optional
+        The maximum number of consecutive optimizer iterations that may use
+        a rank-1 (Broyden) update of the previous jacobian instead of
+        computing it exactly, which saves time near convergence.  The exact
+        jacobian is re-computed whenever an updated one performs poorly.
+        Zero (the default) always computes the exact jacobian.  Has no
+        effect when jacobian blocks are used (see `jacBlocks`).
+
+    checkpointFile : str, optional
+        If not None, the name of a file in which the progress of this
+        computation is saved: after each iteration and, within iterations,
+        the optimizer's state at most every `checkpointInterval` seconds.  If
+        the file exists when this function is called, the computation resumes
+        from the saved state instead of starting over, so an interrupted run
+        can be continued by simply calling this function again with the same
+        arguments.  A ValueError is raised if the file was saved by a run with
+        a different dataset, starting gate set, gate string lists or objective
+        function.  The file is deleted when the computation finishes.
+
+    checkpointInterval : float, optional
+        The minimum number of seconds between optimizer-state checkpoints.
+
+    productReuse : bool, optional
+        Whether the jacobians reuse the product caches of the objective
+        function evaluations (see `do_mc2gst`).
+
+    germPowers : bool, optional
+        Whether the evaluation trees compute repeated germs by repeated
+        squaring (see `do_mc2gst`).
+
 
     Returns
     -------
@@ -2651,9 +3102,35 @@ def do_iterative_mlgst(dataset, startGateset, gateStringSetsToUseInEstimation,
     #Run extended MLGST iteratively on given sets of estimatable strings
     mleGatesets = [ ]; maxLogLs = [ ] #for returnAll == True case
     mleGateset = startGateset.copy(); nIters = len(gateStringLists)
+    evtBase = prevStrings = None #evaluation tree extended by each iteration
     tStart = _time.time()
     tRef = tStart
 
+    ckpt = None
+    if checkpointFile is not None:
+        ckpt = _load_checkpoint(checkpointFile, comm)
+        key = _checkpoint_key(dataset, startGateset, gateStringLists,
+                              ("logl", cptp_penalty_factor, minProbClip,
+                               probClipInterval, radius, poissonPicture,
+                               useFreqWeightedChiSq))
+        if ckpt is None:
+            ckpt = { 'objective': "logl", 'nIters': nIters, 'key': key, 'stage': 0,
+                     'phase': "chi2", 'gateset': None, 'optimizer': None,
+                     'results': [] }
+        elif ckpt['objective'] != "logl" or ckpt['nIters'] != nIters:
+            raise ValueError("Checkpoint file %s is not from an iterative MLGST"
+                             " run with %d iterations" % (checkpointFile, nIters))
+        elif ckpt.get('key',None) != key:
+            raise ValueError("Checkpoint file %s is from an iterative MLGST run"
+                             " with different inputs" % checkpointFile)
+        else:
+            printer.log("Resuming iterative MLGST at iteration %d from %s"
+                        % (ckpt['stage']+1, checkpointFile))
+            for maxLogL, mleGateset in ckpt['results']:
+                if returnAll:
+                    mleGatesets.append(mleGateset)
+                    maxLogLs.append(maxLogL)
+
     with printer.progress_logging(1):
         for (i,stringsToEstimate) in enumerate(gateStringLists):
             #printer.log('', 2)
@@ -2664,17 +3141,42 @@ def do_iterative_mlgst(dataset, startGateset, gateStringSetsToUseInEstimation,
 
             if stringsToEstimate is None or len(stringsToEstimate) == 0: continue
 
+            evtBase = _next_base_evaltree(evtBase, stringsToEstimate, prevStrings)
+            prevStrings = stringsToEstimate
+
+            phase = "chi2"; resumeState = checkpointFn = None
+            if ckpt is not None:
+                if i < ckpt['stage']: continue # completed before being checkpointed
+                if i == ckpt['stage']:
+                    phase = ckpt['phase']
+                    if phase == "chi2":
+                        mleGateset, resumeState = _resume_stage(ckpt, mleGateset)
+                    else: # resuming final ML optimization (resumed below)
+                        mleGateset = ckpt['gateset'].copy()
+                if phase == "chi2":
+                    ckpt.update(stage=i, phase=phase, gateset=mleGateset.copy())
+                    checkpointFn = _optimizer_checkpointer(checkpointFile, ckpt,
+                                                           checkpointInterval, comm)
+
             mleGateset.set_basis(startGateset.get_basis_name(),
                                    startGateset.get_basis_dimension()) 
               #set basis in case of CPTP constraints
 
-            _, mleGateset = do_mc2gst(dataset, mleGateset, stringsToEstimate,
-                                      maxiter, maxfev, tol, cptp_penalty_factor,
-                                      minProbClip, probClipInterval,
-                                      useFreqWeightedChiSq, 0,printer-1, check,
-                                      check, None, None, memLimit, comm,
-                                      distributeMethod, profiler)
-                                       # Note maxLogL is really chi2 number here
+            if phase == "chi2":
+                _, mleGateset = do_mc2gst(dataset, mleGateset, stringsToEstimate,
+                                          maxiter, maxfev, tol, cptp_penalty_factor,
+                                          minProbClip, probClipInterval,
+                                          useFreqWeightedChiSq, 0,printer-1, check,
+                                          check, None, None, memLimit, comm,
+                                          distributeMethod, profiler, evaltreeCacheDir,
+                                          nThreads, jacBlocks=jacBlocks,
+                                          broydenIters=broydenIters,
+                                          checkpointFn=checkpointFn,
+                                          resumeState=resumeState,
+                                          baseEvalTree=evtBase,
+                                          productReuse=productReuse,
+                                          germPowers=germPowers)
+                                           # Note maxLogL is really chi2 number here
 
             tNxt = _time.time();
             profiler.add_time('do_iterative_mlgst: iter %d chi2-opt'%(i+1),tRef)
@@ -2704,12 +3206,24 @@ def do_iterative_mlgst(dataset, startGateset, gateStringSetsToUseInEstimation,
 
                 mleGateset.set_basis(startGateset.get_basis_name(),
                                      startGateset.get_basis_dimension()) 
+
+                mlStartGateset = mleGateset; resumeState = checkpointFn = None
+                if ckpt is not None:
+                    if phase == "logl": # resuming
+                        mlStartGateset, resumeState = _resume_stage(ckpt, mleGateset)
+                    else:
+                        ckpt.update(phase="logl", gateset=mleGateset.copy(), optimizer=None)
+                        _save_checkpoint(checkpointFile, ckpt, comm)
+                    checkpointFn = _optimizer_checkpointer(checkpointFile, ckpt,
+                                                           checkpointInterval, comm)
     
                 maxLogL_p, mleGateset_p = do_mlgst(
-                  dataset, mleGateset, stringsToEstimate, maxiter, maxfev, tol,
+                  dataset, mlStartGateset, stringsToEstimate, maxiter, maxfev, tol,
                   cptp_penalty_factor, minProbClip, probClipInterval, radius,
                   poissonPicture, printer-1, check, None, memLimit, comm,
-                  distributeMethod, profiler)
+                  distributeMethod, profiler, evaltreeCacheDir, nThreads,
+                  jacBlocks, broydenIters, checkpointFn, resumeState,
+                  evtBase, productReuse, germPowers)
 
                 printer.log("2*Delta(log(L)) = %g" % (2*(logL_ub - maxLogL_p)),2)
 
@@ -2729,6 +3243,13 @@ def do_iterative_mlgst(dataset, startGateset, gateStringSetsToUseInEstimation,
                 mleGatesets.append(mleGateset)
                 maxLogLs.append(maxLogL)
 
+            if ckpt is not None:
+                ckpt['results'].append( (maxLogL, mleGateset) )
+                ckpt.update(stage=i+1, phase="chi2", gateset=mleGateset, optimizer=None)
+                _save_checkpoint(checkpointFile, ckpt, comm)
+
+    if ckpt is not None: _remove_checkpoint(checkpointFile, comm)
+
     printer.log('Iterative MLGST Total Time: %.1fs' % (_time.time()-tStart))
     profiler.add_time('do_iterative_mlgst: total time', tStart)
 
@@ -2741,6 +3262,232 @@ def do_iterative_mlgst(dataset, startGateset, gateStringSetsToUseInEstimation,
 #                 Other Tools
 ###################################################################################
 
+def _next_base_evaltree(evtBase, gateStrings, prevGateStrings):
+    """
+    Helper function - returns the (un-split) evaluation tree to be extended to
+    `gateStrings` by the next iterative-GST iteration: `evtBase`, which holds
+    `prevGateStrings`, when these begin `gateStrings` (as for nested gate
+    string lists), and a new tree otherwise.
+    """
+    if evtBase is None or prevGateStrings is None or \
+       list(gateStrings[0:len(prevGateStrings)]) != list(prevGateStrings):
+        return _objs.EvalTree()
+    return evtBase
+
+
+def _checkpoint_key(dataset, startGateset, gateStringLists, settings):
+    """
+    Helper function - returns a hash of the inputs of an iterative-GST run:
+    the counts of and the gate strings in `gateStringLists`, the parameters
+    of `startGateset`, and `settings`, a tuple of the other arguments which
+    determine the objective function.  A checkpoint is only resumed by a run
+    with the same key.
+    """
+    spamLabels = dataset.get_spam_labels()
+    h = _hashlib.sha1()
+    for x in (list(startGateset.gates.keys()), startGateset.get_spam_labels(),
+              startGateset.get_basis_name(), startGateset.get_basis_dimension(),
+              startGateset.num_params(), spamLabels, settings):
+        h.update(repr(x).encode('utf-8'))
+    h.update(startGateset.to_vector().tobytes())
+    for gateStrings in gateStringLists:
+        h.update(b"--\n")
+        if gateStrings is None or len(gateStrings) == 0: continue
+        for gs in gateStrings:
+            h.update((" ".join(gs) + "\n").encode('utf-8'))
+        h.update(dataset.get_counts_matrix(gateStrings, spamLabels).tobytes())
+    return h.hexdigest()
+
+
+def _load_checkpoint(filename, comm):
+    """
+    Helper function - returns the state saved by `_save_checkpoint` in
+    `filename`, or None if there is no such file.  All processors get
+    the state read by the root processor.
+    """
+    state = None
+    if comm is None or comm.Get_rank() == 0:
+        if _os.path.exists(filename):
+            with open(filename,"rb") as f:
+                state = _pickle.load(f)
+    if comm is not None: state = comm.bcast(state, root=0)
+    return state
+
+
+def _save_checkpoint(filename, state, comm):
+    """
+    Helper function - saves `state` (a dict) to `filename` from the root
+    processor, by writing and then renaming a temporary file so that an
+    interrupted save never corrupts an existing checkpoint.
+    """
+    if comm is not None and comm.Get_rank() != 0: return
+    dirname = _os.path.dirname(filename)
+    if dirname and not _os.path.isdir(dirname): _os.makedirs(dirname)
+    tmpFile = "%s.%d.tmp" % (filename, _os.getpid())
+    with open(tmpFile,"wb") as f:
+        _pickle.dump(state, f, _pickle.HIGHEST_PROTOCOL)
+    if _os.name == "nt" and _os.path.exists(filename):
+        _os.remove(filename) #rename can't overwrite on Windows
+    _os.rename(tmpFile, filename)
+
+
+def _remove_checkpoint(filename, comm):
+    """
+    Helper function - deletes the checkpoint `filename` of a finished
+    computation from the root processor.
+    """
+    if comm is not None and comm.Get_rank() != 0: return
+    if _os.path.exists(filename): _os.remove(filename)
+
+
+def _optimizer_checkpointer(filename, state, interval, comm):
+    """
+    Helper function - returns a function, to be given to the optimizer as its
+    `checkpoint_fn`, which saves the optimizer's state as `state['optimizer']`
+    (along with the rest of `state`) at most once every `interval` seconds.
+    """
+    tLast = [_time.time()]
+    def checkpoint_fn(x, mu, nu, k):
+        if _time.time() - tLast[0] < interval: return
+        state['optimizer'] = (x.copy(), mu, nu, k)
+        _save_checkpoint(filename, state, comm)
+        tLast[0] = _time.time()
+    return checkpoint_fn
+
+
+def _resume_stage(state, startGateset):
+    """
+    Helper function - returns the gate set and optimizer state (or None)
+    from which to resume the iterative-GST stage recorded in `state`.
+    """
+    gs = state['gateset'].copy() if state['gateset'] is not None \
+        else startGateset.copy()
+    if state['optimizer'] is None:
+        return gs, None
+    x, mu, nu, k = state['optimizer']
+    gs.from_vector(x)
+    return gs, (mu, nu, k)
+
+
+def _logl_terms_fill(vToFill, probs, minusCnts, totalCnts, freqTerm, S, S2,
+                     zeroMask, min_p, a, posBuf, lowMask):
+    """
+    Fill `vToFill` with the (square roots of the) per-(spam label, gate string)
+    terms of the negative log-likelihood used as the MLGST least-squares
+    objective, using only the given pre-allocated buffers.
+
+    All array arguments are K x M, where K is the number of spam labels and M
+    the number of gate strings, and may be (non-contiguous) views.
+
+    Parameters
+    ----------
+    vToFill : numpy ndarray
+        The array to fill with the objective terms.
+
+    probs : numpy ndarray
+        The (possibly clipped) probabilities.
+
+    minusCnts : numpy ndarray
+        The negated counts, i.e. -N_{i,sl}.
+
+    totalCnts : numpy ndarray or None
+        The total counts N[i] of each gate string, broadcast to K x M, for
+        the Poisson picture.  None selects the standard picture.
+
+    freqTerm : numpy ndarray
+        The parameter-independent frequency terms.
+
+    S, S2 : numpy ndarray
+        The parameter-independent linear and quadratic coefficients used to
+        extrapolate the terms below `min_p`.
+
+    zeroMask : numpy ndarray
+        A boolean array which is True for zero-count elements.
+
+    min_p : float
+        The minimum probability below which the terms are extrapolated.
+
+    a : float
+        The "roundness" parameter for zero-count terms (Poisson picture).
+
+    posBuf : numpy ndarray
+        A float scratch buffer; its contents are overwritten.
+
+    lowMask : numpy ndarray
+        A boolean scratch buffer; its contents are overwritten.
+
+    Returns
+    -------
+    None
+    """
+    _np.maximum(probs, min_p, posBuf)
+    _np.log(posBuf, vToFill)
+    vToFill *= minusCnts
+    vToFill += freqTerm
+    if totalCnts is not None:
+        posBuf *= totalCnts #note: clobbers posBuf
+        vToFill += posBuf
+    _np.maximum(vToFill, 0, vToFill) #remove small negative elements due to roundoff error
+
+    _np.less(probs, min_p, lowMask)
+    if lowMask.any(): #quadratic extrapolation of logl at min_p for probabilities < min_p
+        d = probs[lowMask] - min_p
+        vToFill[lowMask] += S[lowMask]*d + S2[lowMask]*d**2
+
+    if totalCnts is None:
+        vToFill[zeroMask] = 0.0
+    else: #quadratic rounding of function with minimum: max(0,(a-p)^2)/(2a) + p
+        p = probs[zeroMask]
+        vToFill[zeroMask] = totalCnts[zeroMask] * \
+            _np.where(p >= a, p, (-1.0/(3*a**2))*p**3 + p**2/a + a/3.0)
+    _np.sqrt(vToFill, vToFill)
+
+
+def _logl_dprobs_factor_fill(factorToFill, probs, v, minusCnts, totalCnts, S, S2,
+                             zeroMask, min_p, a, posBuf, lowMask):
+    """
+    Fill `factorToFill` with the derivatives of the MLGST least-squares terms
+    computed by :func:`_logl_terms_fill` with respect to the probabilities,
+    using only the given pre-allocated buffers.
+
+    Parameters
+    ----------
+    factorToFill : numpy ndarray
+        The array to fill.
+
+    probs : numpy ndarray
+        The (possibly clipped) probabilities.
+
+    v : numpy ndarray
+        The terms computed by :func:`_logl_terms_fill` for `probs`.  This
+        array is overwritten.
+
+    Other parameters are the same as those of :func:`_logl_terms_fill`.
+
+    Returns
+    -------
+    None
+    """
+    _np.maximum(v, 1e-100, v) #derivative diverges as v->0, but v always >= 0 so clip v to a small positive value
+    _np.divide(0.5, v, v) # v := 0.5 / v
+    _np.maximum(probs, min_p, posBuf)
+    _np.divide(minusCnts, posBuf, factorToFill)
+    if totalCnts is not None: factorToFill += totalCnts
+    factorToFill *= v
+
+    _np.less(probs, min_p, lowMask)
+    if lowMask.any():
+        d = probs[lowMask] - min_p
+        factorToFill[lowMask] = v[lowMask] * (S[lowMask] + 2*S2[lowMask]*d)
+
+    if totalCnts is None:
+        factorToFill[zeroMask] = 0.0
+    else:
+        p = probs[zeroMask]
+        factorToFill[zeroMask] = v[zeroMask] * totalCnts[zeroMask] * \
+            _np.where(p >= a, 1.0, (-1.0/a**2)*p**2 + 2*p/a)
+
+
 def _cptp_penalty(gs,prefactor,gateBasis):
     """
     Helper function - CPTP penalty: (sum of tracenorms of gates),
@@ -2752,9 +3499,9 @@ def _cptp_penalty(gs,prefactor,gateBasis):
     numpy array
         a (real) 1D array of length len(gs.gates).
     """
-    return prefactor*_np.sqrt( _np.array( [_tools.tracenorm(
-                    _tools.fast_jamiolkowski_iso_std(gate, gateBasis)
-                    ) for _,gate in gs.iter_gates()], 'd') )
+    gateMxs = _np.array([ _np.asarray(gate) for _,gate in gs.iter_gates() ])
+    evals, _ = _tools.choi_eigensystems(gateMxs, gateBasis)
+    return prefactor*_np.sqrt( _np.abs(evals).sum(axis=1) )
 
 
 def _cptp_penalty_jac_fill(cpPenaltyVecGradToFill, gs, prefactor, nParams,
@@ -2764,60 +3511,21 @@ def _cptp_penalty_jac_fill(cpPenaltyVecGradToFill, gs, prefactor, nParams,
     Returns a (real) array of shape (len(gs.gates), nParams).
     """
     
-    # d( sqrt(|chi|_Tr) ) = (0.5 / sqrt(|chi|_Tr)) * d( |chi|_Tr )
+    # d( sqrt(|chi|_Tr) ) = (0.5 / sqrt(|chi|_Tr)) * d( |chi|_Tr ), and
+    # d( |chi|_Tr ) = sum_k sgn(evals[k]) d(evals[k]) for Hermitian chi
+    gateMxs = _np.array([ _np.asarray(gate) for _,gate in gs.iter_gates() ])
+    evals, evecs = _tools.choi_eigensystems(gateMxs, gateBasis)
+    sgnevals = _np.where(_np.abs(evals) > 1e-7, _np.sign(evals), 0.0)
+    dTrNorm_dG = _tools.choi_evals_derivs(evecs, sgnevals, gateBasis) #(nGates,dim,dim)
+    factors = prefactor * (0.5 / _np.sqrt(_np.abs(evals).sum(axis=1)))
+
     k = nSpamParams # offset to beginning of current gate's params
     for i,(gl,gate) in enumerate(gs.iter_gates()):
         nP = gate.num_params()
-
-        #get sgn(chi-matrix) == d(|chi|_Tr)/dchi in std basis
-        # so sgnchi == d(|chi_std|_Tr)/dchi_std
-        chi = _tools.fast_jamiolkowski_iso_std(gate, gateBasis)
-        assert(_np.linalg.norm(chi - chi.T.conjugate()) < 1e-4), \
-            "chi should be Hermitian!"
-
-        # Alt#1 way to compute sgnchi (evals) - works equally well to svd below
-        #evals,U = _np.linalg.eig(chi)
-        #sgnevals = [ ev/abs(ev) if (abs(ev) > 1e-7) else 0.0 for ev in evals]
-        #sgnchi = _np.dot(U,_np.dot(_np.diag(sgnevals),_np.linalg.inv(U)))
-
-        # Alt#2 way to compute sgnchi (sqrtm) - DOESN'T work well; sgnchi NOT very hermitian!
-        #sgnchi = _np.dot(chi, _np.linalg.inv(
-        #        _spl.sqrtm(_np.matrix(_np.dot(chi.T.conjugate(),chi)))))
-
-        U,s,Vt = _np.linalg.svd(chi)
-        sgnvals = [ sv/abs(sv) if (abs(sv) > 1e-7) else 0.0 for sv in s]
-        sgnchi = _np.dot(U,_np.dot(_np.diag(sgnvals),Vt))
-        assert(_np.linalg.norm(sgnchi - sgnchi.T.conjugate()) < 1e-4), \
-            "sngchi should be Hermitian!"
-
-        # get d(gate)/dp in gateBasis [shape == (nP,dim,dim)]
-        #OLD: dGdp = gs.dproduct((gl,)) but wasteful
         dGdp = gate.deriv_wrt_params() #shape (dim**2, nP)
-        dGdp = _np.swapaxes(dGdp,0,1)  #shape (nP, dim**2, )
-        dGdp.shape = (nP,gs.dim,gs.dim)
-        
-        # M maps to choi-jamiolkowsky "basis".  MdGdp_std is choi mapping
-        # of dGdp in the std basis == dchi_std/dp
-        MdGdp_std = _np.empty((nP,gs.dim,gs.dim), 'complex')
-        for p in range(gate.num_params()): #p indexes param
-            MdGdp_std[p] = _tools.fast_jamiolkowski_iso_std(dGdp[p], gateBasis) #now "M(dGdp_std)"
-            assert(_np.linalg.norm(MdGdp_std[p] - MdGdp_std[p].T.conjugate()) < 1e-8) #check hermitian
-
-        MdGdp_std = _np.conjugate(MdGdp_std) # I'm not sure
-          # why this is needed: I think b/c els of sgnchi and MdGdp_std[p]
-          # are hermitian and we want to think of the real and im parts of
-          # (i,j) and (j,i) els as the two "variables" we differentiate wrt.
-          # TODO: work this out on paper.
-
-        #contract to get (note contract along both mx indices b/c treat like a
-        # mx basis): d(|chi_std|_Tr)/dp = d(|chi_std|_Tr)/dchi_std * dchi_std/dp
-        v =  _np.einsum("ij,aij->a",sgnchi,MdGdp_std)
-        v *= prefactor * (0.5 / _np.sqrt(_tools.tracenorm(chi))) #add 0.5/|chi|_Tr factor
-        assert(_np.linalg.norm(v.imag) < 1e-4)
         cpPenaltyVecGradToFill[i,:] = 0.0
-        cpPenaltyVecGradToFill[i,k:k+gate.num_params()] = v.real
-        chi = sgnchi = dGdp = MdGdp_std = v = None #free mem
-        k += gate.num_params()
+        cpPenaltyVecGradToFill[i,k:k+nP] = factors[i] * _np.dot(dTrNorm_dG[i].flatten(), dGdp)
+        k += nP
 
 
 def find_closest_unitary_gatemx(gateMx):
@@ -877,9 +877,15 @@ def grasp_fiducial_optimization(gateset, fidsList, prepOrMeas, alpha,
                                 iterations=5, scoreFunc='all', gatePenalty=0.0,
                                 l1Penalty=0.0, returnAll=False,
                                 forceEmpty=True, threshold=1e6, seed=None,
-                                verbosity=0):
+                                verbosity=0, nProcesses=1):
     """Use GRASP to find a high-performing set of fiducials.
 
+    Parameters
+    ----------
+    nProcesses : int, optional
+        The number of processes used to run the GRASP iterations (or, when
+        there are fewer iterations than processes, to score candidate
+        fiducial sets) concurrently.  See :func:`~pygsti.algorithms.grasp.grasp`.
     """
     printer = _objs.VerbosityPrinter.build_printer(verbosity)
 
@@ -935,41 +941,12 @@ def grasp_fiducial_optimization(gateset, fidsList, prepOrMeas, alpha,
 
     rclFn = lambda x: _scoring.composite_rcl_fn(x, alpha)
 
-    initialSolns = []
-    localSolns = []
-
-    for iteration in range(iterations):
-        # This loop is parallelizable (each iteration is independent of all
-        # other iterations).
-        printer.log('Starting iteration {} of {}.'.format(iteration + 1,
-                                                          iterations), 1)
-        success = False
-        failCount = 0
-        while not success and failCount < 10:
-            try:
-                iterSolns = _grasp.do_grasp_iteration(
-                    elements=fidsList, greedyScoreFn=scoreFn, rclFn=rclFn,
-                    localScoreFn=scoreFn,
-                    getNeighborsFn=getNeighborsFn,
-                    feasibleThreshold=feasibleThreshold,
-                    initialElements=initialWeights, seed=seed,
-                    verbosity=verbosity)
-
-                initialSolns.append(iterSolns[0])
-                localSolns.append(iterSolns[1])
-
-                success = True
-                printer.log('Finished iteration {} of {}.'.format(
-                    iteration + 1, iterations), 1)
-            except Exception as e:
-                failCount += 1
-                if failCount == 10:
-                    raise e
-                else:
-                    printer.warning(e)
-
-    finalScores = _np.array([finalScoreFn(localSoln)
-                             for localSoln in localSolns])
-    bestSoln = localSolns[_np.argmin(finalScores)]
+    bestSoln, initialSolns, localSolns = _grasp.grasp(
+        elements=fidsList, greedyScoreFn=scoreFn, rclFn=rclFn,
+        localScoreFn=scoreFn, getNeighborsFn=getNeighborsFn,
+        finalScoreFn=finalScoreFn, iterations=iterations,
+        feasibleThreshold=feasibleThreshold, initialElements=initialWeights,
+        seed=seed, verbosity=verbosity, returnAll=True,
+        nProcesses=nProcesses)
 
     return (bestSoln, initialSolns, localSolns) if returnAll else bestSoln
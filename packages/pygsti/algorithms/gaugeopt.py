@@ -6,6 +6,9 @@ from __future__ import division, print_function, absolute_import, unicode_litera
 #*****************************************************************
 """ GST gauge optimization algorithms """
 
+import os as _os
+import time as _time
+import multiprocessing as _mp
 import numpy as _np
 import warnings as _warnings
 
@@ -13,11 +16,21 @@ from .. import objects as _objs
 from .. import tools as _tools
 from .. import optimize as _opt
 
+#Multi-start gauge optimization: standard deviation of the random offsets
+# added to the initial gauge parameters, and the number of iterations a start
+# is always allowed before it may be abandoned as hopeless.
+MULTISTART_SCALE = 0.1
+MULTISTART_MIN_ITERS = 10
+
+_multistartState = {} #inherited by the forked worker processes of _multistart
+
+
 def gaugeopt_to_target(gateset, targetGateset, itemWeights=None,
                        CPpenalty=0, TPpenalty=0, validSpamPenalty=0,
                        gatesMetric="frobenius", spamMetric="frobenius",
                        gauge_group=None, method='L-BFGS-B', maxiter=100000,
-                       maxfev=None, tol=1e-8, returnAll=False, verbosity=0):
+                       maxfev=None, tol=1e-8, returnAll=False, verbosity=0,
+                       nStarts=1, nProcesses=1, abortRatio=2.0, seed=None):
     """
     Optimize the gauge degrees of freedom of a gateset to that of a target.
 
@@ -80,6 +93,9 @@ def gaugeopt_to_target(gateset, targetGateset, itemWeights=None,
         known by scipy.optimize.minimize such as 'BFGS', 'Nelder-Mead', 'CG', 'L-BFGS-B',
         or additionally:
 
+        - 'ls' -- least-squares (Levenberg-Marquardt) minimization using the
+          analytic jacobian of the frobenius distance.  Only applies when both
+          metrics are "frobenius" and all the penalty factors are zero.
         - 'custom' -- custom CG that often works better than 'CG'
         - 'supersimplex' -- repeated application of 'Nelder-Mead' to converge it
         - 'basinhopping' -- scipy.optimize.basinhopping using L-BFGS-B as a local optimizer
@@ -104,19 +120,52 @@ def gaugeopt_to_target(gateset, targetGateset, itemWeights=None,
     verbosity : int, optional
         How much detail to send to stdout.
 
+    nStarts : int, optional
+        The number of starting points to run the (local) optimization from.
+        The first is the gauge group's initial element and the others are
+        random perturbations of it, obtained by adding normally distributed
+        offsets with standard deviation `MULTISTART_SCALE` to its parameters.
+        The best of the resulting optima is returned.
+
+    nProcesses : int, optional
+        The number of processes used to run the `nStarts` optimizations
+        concurrently.  Worker processes are forked, so when `os.fork()` is
+        unavailable the starts are run serially.
+
+    abortRatio : float or None, optional
+        When `nStarts > 1`, a start is abandoned if, after at least
+        `MULTISTART_MIN_ITERS` iterations, the best objective value it has
+        found exceeds the best final value of the completed starts, `fbest`,
+        by more than `(abortRatio-1)*abs(fbest)`.  None disables this early
+        termination.
+
+    seed : int, optional
+        The seed used to generate the random starting points.
+
 
     Returns
     -------
-    gateset                            if returnAll == False
+    gateset                                       if returnAll == False
 
-    (goodnessMin, gaugeMx, gateset)    if returnAll == True
+    (goodnessMin, gaugeMx, gateset)               if returnAll == True
+
+    (goodnessMin, gaugeMx, gateset, startInfo)    if returnAll == True and nStarts > 1
 
       where goodnessMin is the minimum value of the goodness function (the best 'goodness')
       found, gaugeMx is the gauge matrix used to transform the gateset, and gateset is the
-      final gauge-transformed gateset.
+      final gauge-transformed gateset.  startInfo is a list with one dictionary per start
+      containing its initial parameters ("x0"), final parameters ("x", None if aborted),
+      objective value ("fun"), run time in seconds ("time"), number of iterations
+      ("iterations") and whether it was abandoned ("aborted").
     """
 
     if itemWeights is None: itemWeights = {}
+    bLeastSquares = bool(targetGateset is not None and gatesMetric == "frobenius"
+                         and spamMetric == "frobenius" and CPpenalty == 0
+                         and TPpenalty == 0 and validSpamPenalty == 0)
+    if method == "ls" and not bLeastSquares:
+        raise ValueError("The 'ls' method requires frobenius metrics and no penalty terms")
+
     gateWeight = itemWeights.get('gates',1.0)
     spamWeight = itemWeights.get('spam',1.0)
     mxBasis = gateset.get_basis_name()
@@ -188,13 +237,20 @@ def gaugeopt_to_target(gateset, targetGateset, itemWeights=None,
 
         return ret
     
-    result = gaugeopt_custom(gateset, objective_fn, gauge_group,
-                 method, maxiter, maxfev, tol, returnAll, verbosity)
+    if method == "ls":
+        result = _gaugeopt_frobenius_ls(gateset, targetGateset, gauge_group,
+                                        gateWeight, spamWeight, itemWeights,
+                                        maxiter, tol, returnAll, verbosity,
+                                        nStarts, nProcesses, abortRatio, seed)
+    else:
+        result = gaugeopt_custom(gateset, objective_fn, gauge_group,
+                                 method, maxiter, maxfev, tol, returnAll, verbosity,
+                                 nStarts, nProcesses, abortRatio, seed)
 
     #If we've gauge optimized to a target gate set, declare that the
     # resulting gate set is now in the same basis as the target.
     if targetGateset is not None:
-        newGateset = result[-1] if returnAll else result
+        newGateset = result[2] if returnAll else result
         newGateset.set_basis(targetGateset.get_basis_name(),
                              targetGateset.get_basis_dimension())
     
@@ -204,7 +260,8 @@ def gaugeopt_to_target(gateset, targetGateset, itemWeights=None,
 
 def gaugeopt_custom(gateset, objective_fn, gauge_group=None,
                     method='L-BFGS-B', maxiter=100000, maxfev=None, tol=1e-8,
-                    returnAll=False, verbosity=0):
+                    returnAll=False, verbosity=0, nStarts=1, nProcesses=1,
+                    abortRatio=2.0, seed=None):
     """
     Optimize the gauge of a gateset using a custom objective function.
 
@@ -250,16 +307,43 @@ def gaugeopt_custom(gateset, objective_fn, gauge_group=None,
     verbosity : int, optional
         How much detail to send to stdout.
 
+    nStarts : int, optional
+        The number of starting points to run the (local) optimization from.
+        The first is the gauge group's initial element and the others are
+        random perturbations of it, obtained by adding normally distributed
+        offsets with standard deviation `MULTISTART_SCALE` to its parameters.
+        The best of the resulting optima is returned.
+
+    nProcesses : int, optional
+        The number of processes used to run the `nStarts` optimizations
+        concurrently.  Worker processes are forked, so when `os.fork()` is
+        unavailable the starts are run serially.
+
+    abortRatio : float or None, optional
+        When `nStarts > 1`, a start is abandoned if, after at least
+        `MULTISTART_MIN_ITERS` iterations, the best objective value it has
+        found exceeds the best final value of the completed starts, `fbest`,
+        by more than `(abortRatio-1)*abs(fbest)`.  None disables this early
+        termination.
+
+    seed : int, optional
+        The seed used to generate the random starting points.
+
 
     Returns
     -------
-    gateset                            if returnAll == False
+    gateset                                       if returnAll == False
 
-    (goodnessMin, gaugeMx, gateset)    if returnAll == True
+    (goodnessMin, gaugeMx, gateset)               if returnAll == True
+
+    (goodnessMin, gaugeMx, gateset, startInfo)    if returnAll == True and nStarts > 1
 
       where goodnessMin is the minimum value of the goodness function (the best 'goodness')
       found, gaugeMx is the gauge matrix used to transform the gateset, and gateset is the
-      final gauge-transformed gateset.
+      final gauge-transformed gateset.  startInfo is a list with one dictionary per start
+      containing its initial parameters ("x0"), final parameters ("x", None if aborted),
+      objective value ("fun"), run time in seconds ("time"), number of iterations
+      ("iterations") and whether it was abandoned ("aborted").
     """
 
     printer = _objs.VerbosityPrinter.build_printer(verbosity)
@@ -274,33 +358,236 @@ def gaugeopt_custom(gateset, objective_fn, gauge_group=None,
 
     x0 = gauge_group.get_initial_params() #gauge group picks a good initial el
     gaugeGroupEl = gauge_group.get_element(x0) #re-used element for evals
+    bToStdout = (printer.verbosity > 2 and printer.filename is None)
+
+    def local_opt(xStart, check_abort):
+        runningMin = [_np.inf]
+
+        def call_objective_fn(gaugeGroupElVec):
+            gaugeGroupEl.from_vector(gaugeGroupElVec)
+            gs = gateset.copy(); gs.transform(gaugeGroupEl)
+            f = objective_fn(gs); runningMin[0] = min(runningMin[0], f)
+            return f
+
+        print_obj_func = _opt.create_obj_func_printer(call_objective_fn) #only ever prints to stdout!
+        def callback(x, **kwargs):
+            if bToStdout: print_obj_func(x, **kwargs)
+            check_abort(runningMin[0])
+
+        if bToStdout: print_obj_func(xStart) #print initial point
+        minSol = _opt.minimize(call_objective_fn, xStart,
+                               method=method, maxiter=maxiter, maxfev=maxfev, tol=tol,
+                               callback=callback)
+        return minSol.fun, minSol.x
+
+    return _finish_gaugeopt(gateset, gaugeGroupEl, local_opt, x0, returnAll,
+                            nStarts, nProcesses, abortRatio, seed, printer)
+
+    #OLD regarding stopval setting (in call to _opt.minimize):
+    # stopval= -20 if toGetTo == "CPTP" else None,
+    ## stopval=1e-7 -- (before I added log10)
 
-    def call_objective_fn(gaugeGroupElVec):
-        gaugeGroupEl.from_vector(gaugeGroupElVec)
-        gs = gateset.copy(); gs.transform(gaugeGroupEl)
-        return objective_fn(gs)
 
-    bToStdout = (printer.verbosity > 2 and printer.filename is None)
-    print_obj_func = _opt.create_obj_func_printer(call_objective_fn) #only ever prints to stdout!
-    if bToStdout: print_obj_func(x0) #print initial point
-    minSol = _opt.minimize(call_objective_fn, x0,
-                          method=method, maxiter=maxiter, maxfev=maxfev, tol=tol,
-                          callback = print_obj_func if bToStdout else None)
 
-    gaugeGroupEl.from_vector(minSol.x)
+
+def _gaugeopt_frobenius_ls(gateset, targetGateset, gauge_group, gateWeight,
+                           spamWeight, itemWeights, maxiter, tol, returnAll,
+                           verbosity, nStarts=1, nProcesses=1, abortRatio=2.0,
+                           seed=None):
+    """
+    Minimize the (weighted, normalized) frobenius distance between a gauge
+    transformed `gateset` and `targetGateset` as a least-squares problem,
+    using the analytic jacobian of the transformed gate matrices and SPAM
+    vectors with respect to the gauge group parameters.  Arguments and
+    return values are as for :func:`gaugeopt_to_target`.
+    """
+    printer = _objs.VerbosityPrinter.build_printer(verbosity)
+
+    if gauge_group is None:
+        gauge_group = gateset.default_gauge_group
+        if gauge_group is None:
+            #don't do any gauge optimization (assum trivial gauge group)
+            if returnAll:
+                return None, None, gateset.copy() 
+            else: return gateset.copy()
+
+    #Residual blocks: (type, matrix, target, scale) such that the
+    # frobenius distance is the norm of the concatenated
+    # scale * (transformed matrix - target) blocks.
+    blocks = []; nSummands = 0.0
+    for lbl,gate in gateset.gates.items():
+        blocks.append( ('gate', _np.asarray(gate), _np.asarray(targetGateset.gates[lbl]),
+                        itemWeights.get(lbl, gateWeight)) )
+    for lbl,rhoVec in gateset.preps.items():
+        blocks.append( ('prep', _np.asarray(rhoVec), _np.asarray(targetGateset.preps[lbl]),
+                        itemWeights.get(lbl, spamWeight)) )
+    for lbl,EVec in gateset.effects.items():
+        blocks.append( ('effect', _np.asarray(EVec), _np.asarray(targetGateset.effects[lbl]),
+                        itemWeights.get(lbl, spamWeight)) )
+    if gateset.povm_identity is not None and targetGateset.povm_identity is not None:
+        blocks.append( ('effect', _np.asarray(gateset.povm_identity),
+                        _np.asarray(targetGateset.povm_identity),
+                        itemWeights.get(gateset._identitylabel, spamWeight)) )
+    for typ,mx,target,wt in blocks: nSummands += wt * mx.size
+    if nSummands == 0: nSummands = 1.0 #no normalization (as in frobeniusdist)
+    blocks = [ (typ, mx, target, _np.sqrt(wt/nSummands)) for typ,mx,target,wt in blocks ]
+
+    dim = gateset.get_dimension()
+    nResiduals = sum([ mx.size for typ,mx,target,sc in blocks ])
+    x0 = gauge_group.get_initial_params() #gauge group picks a good initial el
+    gaugeGroupEl = gauge_group.get_element(x0) #re-used element for evals
+    jac = _np.empty( (nResiduals, len(x0)), 'd' ) #re-used jacobian workspace
+
+    def objective_fn(gaugeGroupElVec):
+        gaugeGroupEl.from_vector(gaugeGroupElVec)
+        S = gaugeGroupEl.get_transform_matrix()
+        Si = gaugeGroupEl.get_transform_matrix_inverse()
+        f = _np.empty(nResiduals, 'd'); off = 0
+        for typ,mx,target,sc in blocks:
+            if typ == 'gate': trans = _np.dot(Si,_np.dot(mx,S))
+            elif typ == 'prep': trans = _np.dot(Si,mx)
+            else: trans = _np.dot(S.T,mx)
+            f[off:off+mx.size] = sc * (trans - target).flat; off += mx.size
+        return f
+
+    def jacobian_fn(gaugeGroupElVec):
+        # With dS = D_k the derivative of S wrt the k-th parameter, and
+        #  d(inv(S)) = -inv(S) D_k inv(S):
+        #  d(inv(S) G S) = -inv(S) D_k (inv(S) G S) + inv(S) G D_k
+        #  d(inv(S) rho) = -inv(S) D_k (inv(S) rho)
+        #  d(S^T E)      = D_k^T E
+        gaugeGroupEl.from_vector(gaugeGroupElVec)
+        S = gaugeGroupEl.get_transform_matrix()
+        Si = gaugeGroupEl.get_transform_matrix_inverse()
+        D = gaugeGroupEl.deriv_wrt_params().reshape( (dim,dim,len(x0)) )
+        SiD = _np.tensordot(Si, D, (1,0)) # [i,j,k] = (inv(S) D_k)[i,j]
+        off = 0
+        for typ,mx,target,sc in blocks:
+            if typ == 'gate':
+                SiG = _np.dot(Si,mx)
+                d = _np.tensordot(SiG, D, (1,0)) - \
+                    _np.einsum('ijk,jl->ilk', SiD, _np.dot(SiG,S))
+            elif typ == 'prep':
+                d = -_np.einsum('ijk,j->ik', SiD, _np.dot(Si,mx)[:,0])
+            else:
+                d = _np.einsum('ajk,a->jk', D, mx[:,0])
+            jac[off:off+mx.size,:] = sc * d.reshape( (mx.size, len(x0)) ); off += mx.size
+        return jac
+
+    def local_opt(xStart, check_abort):
+        def checked_objective_fn(gaugeGroupElVec):
+            f = objective_fn(gaugeGroupElVec)
+            check_abort(_np.linalg.norm(f))
+            return f
+
+        opt_x, converged, msg = _opt.custom_leastsq(
+            checked_objective_fn, jacobian_fn, xStart, f_norm2_tol=tol**2,
+            jac_norm_tol=tol, rel_ftol=tol, rel_xtol=tol, max_iter=maxiter,
+            verbosity=printer.verbosity-1)
+        printer.log("Gauge optimization least squares message = %s" % msg, 2)
+        return _np.linalg.norm(objective_fn(opt_x)), opt_x
+
+    return _finish_gaugeopt(gateset, gaugeGroupEl, local_opt, x0, returnAll,
+                            nStarts, nProcesses, abortRatio, seed, printer)
+
+
+def _finish_gaugeopt(gateset, gaugeGroupEl, local_opt, x0, returnAll, nStarts,
+                     nProcesses, abortRatio, seed, printer):
+    """
+    Run `local_opt` from `x0` (or from `nStarts` points, see :func:`_multistart`)
+    and return the gauge-transformed `gateset` as :func:`gaugeopt_custom` does.
+    """
+    if nStarts > 1:
+        startInfo = _multistart(local_opt, x0, nStarts, nProcesses, abortRatio,
+                                seed, printer)
+        best = min([ info for info in startInfo if not info['aborted'] ],
+                   key=lambda info: info['fun'])
+        minVal, xBest = best['fun'], best['x']
+    else:
+        minVal, xBest = local_opt(x0, lambda f: None)
+
+    gaugeGroupEl.from_vector(xBest)
     newGateset = gateset.copy()
     newGateset.transform(gaugeGroupEl)
 
     if returnAll:
-        return minSol.fun, gaugeMat, newGateset
+        ret = (minVal, gaugeGroupEl.get_transform_matrix(), newGateset)
+        return ret + (startInfo,) if nStarts > 1 else ret
     else:  return newGateset
 
-    #OLD regarding stopval setting (in call to _opt.minimize):
-    # stopval= -20 if toGetTo == "CPTP" else None,
-    ## stopval=1e-7 -- (before I added log10)
 
+class _StartAborted(Exception):
+    """ Raised to abandon a hopeless start of a multi-start optimization """
+    def __init__(self, fun):
+        Exception.__init__(self, "Start abandoned with f = %g" % fun)
+        self.fun = fun
 
 
+def _run_start(i):
+    """ Run the `i`-th start of the multi-start optimization in `_multistartState` """
+    local_opt, xStart = _multistartState['local_opt'], _multistartState['starts'][i]
+    best, abortRatio = _multistartState['best'], _multistartState['abortRatio']
+    nIters = [0]
+
+    def check_abort(f):
+        nIters[0] += 1
+        if abortRatio is not None and nIters[0] >= MULTISTART_MIN_ITERS:
+            fbest = best.value
+            if f > fbest + (abortRatio-1.0)*abs(fbest): raise _StartAborted(f)
+
+    tStart = _time.time()
+    try:
+        fun, x = local_opt(xStart, check_abort); aborted = False
+        with best.get_lock():
+            if fun < best.value: best.value = fun
+    except _StartAborted as e:
+        fun, x, aborted = e.fun, None, True
+    return {'x0': xStart, 'x': x, 'fun': fun, 'time': _time.time()-tStart,
+            'iterations': nIters[0], 'aborted': aborted}
+
+
+def _multistart(local_opt, x0, nStarts, nProcesses, abortRatio, seed, printer):
+    """
+    Run `local_opt(xStart, check_abort)`, which returns a `(fun, x)` tuple,
+    from `x0` and from `nStarts-1` random perturbations of it, using up to
+    `nProcesses` (forked) processes.  The best objective value of the
+    completed starts is shared between processes, and `local_opt` should
+    call `check_abort(f)` once per iteration with the best value `f` it
+    has found so far; this raises an exception to abandon the start when it
+    is hopeless (see `abortRatio` in :func:`gaugeopt_custom`).
+
+    Returns a list of per-start information dictionaries.
+    """
+    rndm = _np.random.RandomState(seed)
+    starts = [ _np.array(x0,'d') ] + \
+             [ x0 + MULTISTART_SCALE * rndm.randn(len(x0)) for i in range(nStarts-1) ]
+
+    if nProcesses > 1 and not hasattr(_os, "fork"):
+        _warnings.warn("Multi-start gauge optimization requires os.fork() to"
+                       " use several processes - running starts serially")
+        nProcesses = 1
+    ctx = _mp.get_context("fork") if hasattr(_mp, "get_context") else _mp
+
+    _multistartState.update(local_opt=local_opt, starts=starts, abortRatio=abortRatio,
+                            best=ctx.Value('d', _np.inf))
+    try:
+        if nProcesses > 1:
+            pool = ctx.Pool(min(nProcesses, nStarts)) #workers fork *after* state is set
+            try:
+                startInfo = pool.map(_run_start, range(nStarts), chunksize=1)
+            finally:
+                pool.close(); pool.join()
+        else:
+            startInfo = [ _run_start(i) for i in range(nStarts) ]
+    finally:
+        _multistartState.clear()
+
+    for i,info in enumerate(startInfo):
+        printer.log("Start %d: f = %g after %d iterations (%.2fs)%s" %
+                    (i, info['fun'], info['iterations'], info['time'],
+                     " - abandoned" if info['aborted'] else ""), 2)
+    return startInfo
+
 
 # OLD ############################################################################################
 
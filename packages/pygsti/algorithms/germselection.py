@@ -378,6 +378,17 @@ def compute_non_AC_score(scoreFn, thresholdAC=1e6, initN=1,
     combinedDDD = _np.sum(partialDerivDaggerDeriv, axis=0)
     sortedEigenvals = _np.sort(_np.real(_nla.eigvalsh(combinedDDD)))
     observableEigenvals = sortedEigenvals[numGaugeParams:]
+    nonAC_score = _non_AC_score_from_eigenvalues(observableEigenvals, scoreFn,
+                                                 thresholdAC, initN)
+    # Apply penalties
+    score = nonAC_score.score + l1Score + gateScore
+
+    return _scoring.CompositeScore(score, nonAC_score.N)
+
+
+def _non_AC_score_from_eigenvalues(observableEigenvals, scoreFn, thresholdAC,
+                                   initN):
+    """The (un-penalized) :func:`compute_non_AC_score` of sorted eigenvalues"""
     N_AC = 0
     AC_score = _np.inf
     for N in range(initN, len(observableEigenvals) + 1):
@@ -389,10 +400,7 @@ def compute_non_AC_score(scoreFn, thresholdAC=1e6, initN=1,
         else:
             AC_score = candidate_AC_score
             N_AC = N
-    # Apply penalties
-    score = AC_score + l1Score + gateScore
-
-    return _scoring.CompositeScore(score, N_AC)
+    return _scoring.CompositeScore(AC_score, N_AC)
 
 
 def calc_twirled_DDD(gateset, germsList, eps=None, check=False,
@@ -414,25 +422,293 @@ def calc_twirled_DDD(gateset, germsList, eps=None, check=False,
     return twirledDerivDaggerDeriv
 
 
+def calc_twirled_DDD_factors(gateset, germsList, eps=None, check=False,
+                             germLengths=None):
+    """Calculate low-rank factors of the positive squares of germ Jacobians.
+
+    Returns a list `F` of arrays, one per germ, such that
+    ``dot(F[i].T.conjugate(), F[i])`` equals the i-th element of
+    :func:`calc_twirled_DDD`'s output.  Each `F[i]` has shape
+    (rank_i, vec_gateset_dim), where rank_i is the numerical rank of the
+    i-th germ's twirled Jacobian (typically far below vec_gateset_dim).
+    """
+    if germLengths is None:
+        germLengths = _np.array([len(germ) for germ in germsList])
+    btd_kwargs = {'gateset': gateset, 'gatestrings': germsList, 'check': check}
+    if eps is not None:
+        btd_kwargs['eps'] = eps
+    twirledDeriv = bulk_twirled_deriv(**btd_kwargs)/germLengths[:, None, None]
+    _, sVals, Vh = _np.linalg.svd(twirledDeriv, full_matrices=False)
+
+    factors = []
+    for s, vh in zip(sVals, Vh):
+        rank = _np.count_nonzero(s > 1e-10*s[0]) if s[0] > 0 else 0
+        factors.append(s[:rank, None] * vh[:rank])
+    return factors
+
+
+class IncrementalGermScorer(object):
+    """Scores germ sets near a reference germ set using low-rank updates.
+
+    The combined positive-squared Jacobian of a germ set is the weighted sum
+    ``A = sum_i w_i DDD_i`` of its germs' contributions.  This object keeps
+    the eigen-decomposition of `A` for a reference ("base") weight vector,
+    and scores other weight vectors, which differ from the base in the
+    weights of only a few germs, by updating it:
+
+    - the 'all' score (the sum of inverse observable eigenvalues) of a germ
+      set that is amplificationally complete is updated in
+      O(k * vec_gateset_dim^2) using the Woodbury identity, where k is the
+      total rank of the changed germs;
+    - the observable eigenvalues themselves are computed from an eigenvalue
+      problem restricted to the range of the base matrix plus the range of
+      the added germs, which is much smaller than the full problem while the
+      base germ set is small (e.g. when building up a germ set).
+
+    Weight vectors further than `maxChanges` germs from the base become the
+    new base, so that neighboring germ sets (e.g. those differing by the
+    addition, removal or swap of a germ) are scored incrementally.
+
+    Parameters
+    ----------
+    derivFactors : list of numpy.ndarray
+        The low-rank factors of each germ's positive-squared Jacobian, as
+        returned by :func:`calc_twirled_DDD_factors`.
+
+    numGaugeParams : int
+        The number of gauge parameters of the gateset, i.e. the number of
+        smallest eigenvalues which are not scored.
+
+    scoreFunc : {'all', 'worst'}, optional
+        How eigenvalues are scored; see
+        :func:`~pygsti.algorithms.scoring.list_score`.
+
+    weights : numpy.ndarray, optional
+        Non-negative initial base weights (one per germ).  Defaults to the
+        empty germ set.
+
+    maxChanges : int, optional
+        The maximum number of germs whose weights may differ from the base's
+        before a weight vector is instead made the new base.
+    """
+
+    def __init__(self, derivFactors, numGaugeParams, scoreFunc='all',
+                 weights=None, maxChanges=4):
+        self.derivFactors = derivFactors
+        self.numGaugeParams = numGaugeParams
+        self.scoreFunc = scoreFunc
+        self.maxChanges = maxChanges
+        self.rankTol = 1e-10  # relative size of "zero" eigenvalues
+        self.condTol = 1e-8  # minimum relative conditioning for Woodbury
+        self.dim = derivFactors[0].shape[1]
+        if weights is None:
+            weights = _np.zeros(len(derivFactors), 'd')
+        self.set_weights(weights)
+
+    def set_weights(self, weights):
+        """Make `weights` the base weight vector, re-factorizing from scratch.
+
+        Parameters
+        ----------
+        weights : numpy.ndarray
+            Non-negative weights, one per germ.
+
+        Returns
+        -------
+        None
+        """
+        self.weights = _np.array(weights, 'd')
+        rows = [_np.sqrt(self.weights[i])*self.derivFactors[i]
+                for i in _np.nonzero(self.weights)[0]]
+        if len(rows) > 0:
+            F = _np.concatenate(rows, axis=0)
+            self.combinedDDD = _np.dot(F.T.conjugate(), F)
+        else:
+            self.combinedDDD = _np.zeros((self.dim, self.dim), 'complex')
+        self.evals, self.evecs = _np.linalg.eigh(self.combinedDDD)
+
+        obsEvals = self.evals[self.numGaugeParams:]
+        self.regular = (len(obsEvals) > 0
+                        and obsEvals[0] > self.rankTol*obsEvals[-1] > 0)
+        self.baseAllScore = _np.sum(1.0/obsEvals) if self.regular else None
+
+    def _update_rows(self, weights):
+        """ Get (W,S) s.t. sum_i weights[i]*DDD_i = base + dot(W^H*S, W) """
+        diffs = _np.asarray(weights, 'd') - self.weights
+        changed = _np.nonzero(diffs)[0]
+        if len(changed) > self.maxChanges:
+            self.set_weights(weights)
+            changed = []
+        if len(changed) == 0:
+            return _np.zeros((0, self.dim), 'complex'), _np.zeros(0, 'd')
+        W = _np.concatenate([_np.sqrt(abs(diffs[i]))*self.derivFactors[i]
+                             for i in changed], axis=0)
+        S = _np.concatenate([_np.sign(diffs[i])*_np.ones(len(self.derivFactors[i]))
+                             for i in changed])
+        return W, S
+
+    def _all_score(self, W, S):
+        """ The 'all' score via Woodbury, or None if it isn't reliable """
+        if not self.regular:
+            return None
+        if len(S) == 0:
+            return self.baseAllScore
+        lam = self.evals[self.numGaugeParams:]
+        Z = _np.dot(W, self.evecs[:, self.numGaugeParams:])
+        Zl = Z / lam[None, :]
+        C = _np.diag(S) + _np.dot(Zl, Z.T.conjugate())  # "capacitance" mx
+        c, U = _np.linalg.eigh(C)
+
+        # The updated matrix is positive definite (on the observable space)
+        # iff C has as many positive eigenvalues as S (Haynsworth inertia).
+        absc = abs(c)
+        if (_np.count_nonzero(c > 0) != _np.count_nonzero(S > 0)
+                or absc.min() <= self.condTol*absc.max()):
+            return None
+        G = _np.dot(Zl, Zl.T.conjugate())
+        correction = _np.sum(_np.real(_np.sum(U.conjugate()*_np.dot(G, U),
+                                              axis=0)) / c)
+        score = self.baseAllScore - correction
+        return score if score > 0 else None
+
+    def _observable_eigenvalues(self, W, S):
+        """ Sorted observable eigenvalues of base + W^H*S*W """
+        if len(S) == 0:
+            return self.evals[self.numGaugeParams:]
+        keep = self.evals > self.rankTol*max(self.evals[-1], 0.0)
+        nAdded = _np.count_nonzero(S > 0)
+
+        if _np.count_nonzero(keep) + nAdded >= self.dim // 2:
+            # reduced problem isn't much smaller, so solve the full one
+            updated = self.combinedDDD + _np.dot(W.T.conjugate()*S[None, :], W)
+            evals = _np.linalg.eigvalsh(updated)
+        else:
+            # Work in the range of the base matrix + the added germs' ranges
+            Q = self.evecs[:, keep]
+            Wadd = W[S > 0].T.conjugate()
+            X = Wadd - _np.dot(Q, _np.dot(Q.T.conjugate(), Wadd))
+            u, s, _ = _np.linalg.svd(X, full_matrices=False)
+            scale = max(self.evals[-1], s[0]**2 if len(s) > 0 else 0.0)
+            V = _np.concatenate((Q, u[:, s**2 > self.rankTol*scale]), axis=1)
+            WV = _np.dot(W, V)
+            reduced = _np.dot(WV.T.conjugate()*S[None, :], WV)
+            reduced[_np.diag_indices(Q.shape[1])] += self.evals[keep]
+            evals = _np.concatenate((_np.zeros(self.dim - V.shape[1], 'd'),
+                                     _np.linalg.eigvalsh(reduced)))
+        return _np.sort(_np.real(evals))[self.numGaugeParams:]
+
+    def observable_eigenvalues(self, weights):
+        """Sorted non-gauge eigenvalues of the germ set given by `weights`.
+
+        Parameters
+        ----------
+        weights : numpy.ndarray
+            Non-negative weights, one per germ.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        return self._observable_eigenvalues(*self._update_rows(weights))
+
+    def list_score(self, weights):
+        """The score of the germ set given by `weights`.
+
+        Equivalent to ``list_score(observable_eigenvalues(weights),
+        scoreFunc)`` (without any penalties).
+
+        Parameters
+        ----------
+        weights : numpy.ndarray
+            Non-negative weights, one per germ.
+
+        Returns
+        -------
+        float
+        """
+        W, S = self._update_rows(weights)
+        if self.scoreFunc == 'all':
+            score = self._all_score(W, S)
+            if score is not None:
+                return score
+        return _scoring.list_score(self._observable_eigenvalues(W, S),
+                                   self.scoreFunc)
+
+    def non_AC_score(self, weights, thresholdAC=1e6, initN=1):
+        """The score of a germ set which may not be AC.
+
+        Equivalent to :func:`compute_non_AC_score` (without any penalties)
+        for the germ set given by `weights`.
+
+        Parameters
+        ----------
+        weights : numpy.ndarray
+            Non-negative weights, one per germ.
+
+        thresholdAC : float, optional
+            Value which the score must be lower than for the germ set to be
+            considered AC.
+
+        initN : int, optional
+            The number of largest eigenvalues to begin with checking.
+
+        Returns
+        -------
+        CompositeScore
+        """
+        W, S = self._update_rows(weights)
+        nObservable = self.dim - self.numGaugeParams
+        if initN < 1 or self.scoreFunc not in ('all', 'worst'):
+            scoreFn = lambda x: _scoring.list_score(x, scoreFunc=self.scoreFunc)
+            return _non_AC_score_from_eigenvalues(
+                self._observable_eigenvalues(W, S), scoreFn, thresholdAC, initN)
+        if initN > nObservable:
+            return _scoring.CompositeScore(_np.inf, 0)
+
+        # Scores of the N largest eigenvalues grow with N, so an AC germ set
+        # scores N == nObservable, and otherwise N is found all at once.
+        if self.scoreFunc == 'all':
+            score = self._all_score(W, S)
+            if score is not None and score <= thresholdAC:
+                return _scoring.CompositeScore(score, nObservable)
+
+        with _np.errstate(divide='ignore'):
+            inv = 1.0/abs(self._observable_eigenvalues(W, S)[::-1])
+        partialScores = (_np.cumsum(inv) if self.scoreFunc == 'all' else
+                         _np.maximum.accumulate(inv))[initN - 1:]
+        tooLarge = _np.nonzero(partialScores > thresholdAC)[0]
+        nAC = tooLarge[0] if len(tooLarge) > 0 else len(partialScores)
+        if nAC == 0:
+            return _scoring.CompositeScore(_np.inf, 0)
+        return _scoring.CompositeScore(partialScores[nAC - 1], initN - 1 + nAC)
+
+
 def compute_score(weights, gateset_num, scoreFunc, derivDaggerDerivList,
                   forceIndices, forceScore,
                   nGaugeParams, gatePenalty, germLengths, l1Penalty=1e-2,
-                  scoreDict=None):
+                  scoreDict=None, scorerList=None):
     """Returns a germ set "score" in which smaller is better.  Also returns
     intentionally bad score (`forceScore`) if `weights` is zero on any of
     the "forced" germs (i.e. at any index in `forcedIndices`).
     This function is included for use by :func:`optimize_integer_germs_slack`,
     but is not convenient for just computing the score of a germ set. For that,
-    use :func:`calculate_germset_score`.
+    use :func:`calculate_germset_score`.  If `scorerList` (a list of
+    :class:`IncrementalGermScorer` objects, one per gateset) is given it is
+    used in place of `derivDaggerDerivList`, which may then be None.
     """
     if forceIndices and _np.any(weights[forceIndices] <= 0):
         score = forceScore
     else:
-        combinedDDD = _np.einsum('i,ijk', weights,
-                                 derivDaggerDerivList[gateset_num])
-        sortedEigenvals = _np.sort(_np.real(_nla.eigvalsh(combinedDDD)))
-        observableEigenvals = sortedEigenvals[nGaugeParams:]
-        score = (_scoring.list_score(observableEigenvals, scoreFunc)
+        if scorerList is not None:
+            observableScore = scorerList[gateset_num].list_score(weights)
+        else:
+            combinedDDD = _np.einsum('i,ijk', weights,
+                                     derivDaggerDerivList[gateset_num])
+            sortedEigenvals = _np.sort(_np.real(_nla.eigvalsh(combinedDDD)))
+            observableEigenvals = sortedEigenvals[nGaugeParams:]
+            observableScore = _scoring.list_score(observableEigenvals,
+                                                  scoreFunc)
+        score = (observableScore
                  + l1Penalty*_np.sum(weights)
                  + gatePenalty*_np.dot(germLengths, weights))
     if scoreDict is not None:
@@ -534,6 +810,74 @@ def _SuperOpForPerfectTwirl(wrt, eps):
     return SuperOp  # a gate_dim^2 x gate_dim^2 matrix
 
 
+def _bulk_perfect_twirl(wrts, derivs, eps):
+    """Apply the perfect twirl with respect to each of a stack of matrices.
+
+    Equivalent to ``dot(_SuperOpForPerfectTwirl(wrts[i], eps), derivs[i])``
+    for each ``i``, but without forming any gate_dim^2 x gate_dim^2 super
+    operators.  All of the `wrts` are diagonalized at once, and since each
+    projector is diagonal in the eigenbasis of its `wrt`, the twirl is
+
+    twirl(X) = M * (C o (Minv * X * M)) * Minv,  C = mask^T * diag(1/n) * mask
+
+    where ``mask[i,j] = (abs(evals[i] - evals[j]) <= eps)`` and ``n`` holds
+    the row sums of `mask` (the projector traces).  Only the K nonzero
+    elements (a,b) of C contribute, so the twirl is the rank-K operator
+    ``sum_ab C[a,b] vec(m_a r_b) (r_a (x) m_b)^T``, where m_a is the a-th
+    column of M and r_b the b-th row of Minv.  K == gate_dim unless there
+    are degeneracies, and the factors of all matrices sharing the same K are
+    built together.
+
+    Parameters
+    ----------
+    wrts : numpy array
+        Array of shape (N, gate_dim, gate_dim) giving the matrices to twirl
+        with respect to (e.g. germ products).
+
+    derivs : numpy array
+        Array of shape (N, gate_dim^2, nParams) of derivatives with respect
+        to flattened (row-major) gate matrices.
+
+    eps : float
+        Tolerance used for testing whether two eigenvalues are degenerate.
+
+    Returns
+    -------
+    numpy array
+        Complex array of shape (N, gate_dim^2, nParams).
+    """
+    N, dim, _ = wrts.shape
+    ret = _np.empty((N, dim**2, derivs.shape[2]), 'complex')
+
+    evals, M = _np.linalg.eig(wrts)  # (N,dim), (N,dim,dim)
+    Minv = _np.linalg.inv(M)
+    Mcols = _np.swapaxes(M, 1, 2)  # Mcols[k,a] == a-th column of M[k]
+
+    # mask[k,i,j] = eigenvalue j of the k-th wrt is degenerate with eigenvalue i
+    mask = (abs(evals[:, :, None] - evals[:, None, :]) <= eps).astype('d')
+    C = _np.einsum('kia,ki,kib->kab', mask, 1.0 / mask.sum(axis=2), mask)
+    nonzero = C > 0
+    ranks = nonzero.sum(axis=(1, 2))
+
+    for K in _np.unique(ranks):
+        ks = _np.nonzero(ranks == K)[0]
+        rows = _np.arange(len(ks))[:, None]
+        kk, a, b = _np.nonzero(nonzero[ks])  # ordered by kk, so reshapes ok
+        a = a.reshape(len(ks), K); b = b.reshape(len(ks), K)
+        w = C[ks[kk], a.flat, b.flat].reshape(len(ks), K)
+
+        # V[k,ab] = r_a (x) m_b and U[k,ab] = vec(m_a r_b), shapes (n,K,dim^2)
+        R, Mc = Minv[ks], Mcols[ks]
+        V = (R[rows, a][:, :, :, None] *
+             Mc[rows, b][:, :, None, :]).reshape(len(ks), K, dim**2)
+        U = (Mc[rows, a][:, :, :, None] *
+             R[rows, b][:, :, None, :]).reshape(len(ks), K, dim**2)
+        U *= w[:, :, None]
+        for i, k in enumerate(ks):  # (np.dot is much faster than np.matmul)
+            ret[k] = _np.dot(U[i].T, _np.dot(V[i], derivs[k]))
+    return ret
+
+
 def sq_sing_vals_from_deriv(deriv, weights=None):
     """Calculate the squared singulare values of the Jacobian of the germ set.
     Parameters
@@ -625,14 +969,8 @@ def bulk_twirled_deriv(gateset, gatestrings, eps=1e-6, check=False):
     gate_dim = gateset.get_dimension()
     fd = gate_dim**2 # flattened gate dimension
 
-    ret = _np.empty((len(gatestrings), fd, dProds.shape[1]), 'complex')
-    for i in range(len(gatestrings)):
-
-        # flattened_gate_dim x flattened_gate_dim
-        twirler = _SuperOpForPerfectTwirl(prods[i], eps)
-
-        # flattened_gate_dim x vec_gateset_dim
-        ret[i] = _np.dot(twirler, dProds[i*fd:(i+1)*fd])
+    ret = _bulk_perfect_twirl(_np.asarray(prods),
+                              dProds.reshape(len(gatestrings), fd, -1), eps)
 
     if check:
         for i, gatestring in enumerate(gatestrings):
@@ -830,9 +1168,9 @@ def build_up(gatesetList, germsList, randomize=True,
 
     printer.log("Starting germ set optimization. Lower score is better.", 1)
 
-    twirledDerivDaggerDerivList = [calc_twirled_DDD(gateset, germsList, tol,
-                                                    check, germLengths)
-                                   for gateset in gatesetList]
+    scorerList = [IncrementalGermScorer(
+        calc_twirled_DDD_factors(gateset, germsList, tol, check, germLengths),
+        numGaugeParams, scoreFunc) for gateset in gatesetList]
 
     # Dict of keyword arguments passed to compute_score_non_AC that don't
     # change from call to call
@@ -845,7 +1183,7 @@ def build_up(gatesetList, germsList, randomize=True,
         }
 
     for gatesetNum, reducedGateset in enumerate(reducedGatesetList):
-        derivDaggerDeriv = twirledDerivDaggerDerivList[gatesetNum]
+        scorer = scorerList[gatesetNum]
         # Make sure the set of germs you come up with is AC for all
         # gatesets.
         # Remove any SPAM vectors from gateset since we only want
@@ -860,14 +1198,13 @@ def build_up(gatesetList, germsList, randomize=True,
                 break
             candidateGerms = _np.where(weights == 0)[0]
             candidateGermScores = []
+            scorer.set_weights(weights)
             for candidateGermIdx in _np.where(weights == 0)[0]:
                 # If the germs aren't sufficient, try adding a single germ
                 candidateWeights = weights.copy()
                 candidateWeights[candidateGermIdx] = 1
-                partialDDD = derivDaggerDeriv[
-                    _np.where(candidateWeights == 1)[0], :, :]
-                candidateGermScore = compute_non_AC_score(
-                    partialDerivDaggerDeriv=partialDDD, **nonAC_kwargs)
+                candidateGermScore = _incremental_non_AC_score(
+                    [scorer], candidateWeights, **nonAC_kwargs)
                 candidateGermScores.append(candidateGermScore)
             # Add the germ that give the best score
             bestCandidateGerm = candidateGerms[_np.array(
@@ -936,9 +1273,9 @@ def build_up_breadth(gatesetList, germsList, randomize=True,
 
     printer.log("Starting germ set optimization. Lower score is better.", 1)
 
-    twirledDerivDaggerDerivList = [calc_twirled_DDD(gateset, germsList, tol,
-                                                    check, germLengths)
-                                   for gateset in gatesetList]
+    scorerList = [IncrementalGermScorer(
+        calc_twirled_DDD_factors(gateset, germsList, tol, check, germLengths),
+        numGaugeParams, scoreFunc) for gateset in gatesetList]
 
     # Dict of keyword arguments passed to compute_score_non_AC that don't
     # change from call to call
@@ -963,6 +1300,8 @@ def build_up_breadth(gatesetList, germsList, randomize=True,
         candidateGerms = _np.where(weights == 0)[0]
         candidateGermScores = []
         candidateGermIndices = _np.where(weights == 0)[0]
+        for scorer in scorerList:
+            scorer.set_weights(weights)
         with printer.progress_logging(3):
             for i,candidateGermIdx in enumerate(candidateGermIndices):
                 printer.show_progress(i, len(candidateGermIndices), 
@@ -972,17 +1311,10 @@ def build_up_breadth(gatesetList, germsList, randomize=True,
                 # If the germs aren't sufficient, try adding a single germ
                 candidateWeights = weights.copy()
                 candidateWeights[candidateGermIdx] = 1
-                germVsGatesetScores = []
-                for derivDaggerDeriv in twirledDerivDaggerDerivList:
-                    # Loop over all gatesets
-                    partialDDD = derivDaggerDeriv[
-                        _np.where(candidateWeights == 1)[0], :, :]
-                    germVsGatesetScores.append(compute_non_AC_score(
-                        partialDerivDaggerDeriv=partialDDD, initN=initN,
-                        **nonAC_kwargs))
                 # Take the score for the current germ to be it's worst score over
                 # all gatesets.
-                worstScore = max(germVsGatesetScores)
+                worstScore = _incremental_non_AC_score(
+                    scorerList, candidateWeights, initN=initN, **nonAC_kwargs)
                 printer.log(str(worstScore), 4)
                 candidateGermScores.append(worstScore)
         # Add the germ that gives the best worst score
@@ -1171,15 +1503,16 @@ def optimize_integer_germs_slack(gatesetList, germsList, randomize=True,
     else:
         forceIndices = None
 
-    twirledDerivDaggerDerivList = [calc_twirled_DDD(gateset, germsList, tol,
-                                                    check, germLengths)
-                                   for gateset in gatesetList]
+    scorerList = [IncrementalGermScorer(
+        calc_twirled_DDD_factors(gateset, germsList, tol, check, germLengths),
+        nGaugeParams, scoreFunc, weights) for gateset in gatesetList]
 
     # Dict of keyword arguments passed to compute_score that don't change from
     # call to call
     cs_kwargs = {
         'scoreFunc': scoreFunc,
-        'derivDaggerDerivList': twirledDerivDaggerDerivList,
+        'derivDaggerDerivList': None,
+        'scorerList': scorerList,
         'forceIndices': forceIndices,
         'forceScore': forceScore,
         'nGaugeParams': nGaugeParams,
@@ -1203,6 +1536,8 @@ def optimize_integer_germs_slack(gatesetList, germsList, randomize=True,
                                   suffix="score=%g, nGerms=%d" % (score, L1))
 
             bFoundBetterNeighbor = False
+            for scorer in scorerList:  # neighbors are low-rank updates of this
+                scorer.set_weights(weights)
             for neighbor in get_neighbors(weights):
                 neighborScoreList = []
                 for gateset_num in range(len(gatesetList)):
@@ -1279,8 +1614,26 @@ def optimize_integer_germs_slack(gatesetList, germsList, randomize=True,
         return goodGerms
 
 
+def _incremental_non_AC_score(scorerList, weights, thresholdAC=1e6, initN=1,
+                              gatePenalty=0.0, germLengths=None, l1Penalty=0.0,
+                              scoreFn=None, numGaugeParams=None):
+    """Worst :func:`compute_non_AC_score` over the gatesets of `scorerList`.
+
+    Takes the same keyword arguments as :func:`compute_non_AC_score`, and
+    applies penalties in the same way for the germ set given by (0 or 1)
+    `weights` when `germLengths` are those of all the germs.  `scoreFn` and
+    `numGaugeParams` are ignored in favor of the scorers' own.
+    """
+    worstScore = max([scorer.non_AC_score(weights, thresholdAC, initN)
+                      for scorer in scorerList])
+    l1Score = l1Penalty*_np.count_nonzero(weights)
+    gateScore = gatePenalty*_np.sum(germLengths) if gatePenalty != 0.0 else 0.0
+    return _scoring.CompositeScore(worstScore.score + l1Score + gateScore,
+                                   worstScore.N)
+
+
 def germ_breadth_score_fn(germSet, germsList, twirledDerivDaggerDerivList,
-                          nonAC_kwargs, initN=1):
+                          nonAC_kwargs, initN=1, scorerList=None):
     """Score a germ set against a collection of gatesets.
     Calculate the score of the germ set with respect to each member of a
     collection of gatesets and return the worst score among that collection.
@@ -1302,6 +1655,9 @@ def germ_breadth_score_fn(germSet, germsList, twirledDerivDaggerDerivList,
         The number of eigenvalues to begin checking for amplificational
         completeness with respect to. Passed as an argument to
         :func:`compute_non_AC_score`.
+    scorerList : list of IncrementalGermScorer, optional
+        If not None, one scorer per gateset which is used (incrementally) in
+        place of `twirledDerivDaggerDerivList`, which may then be None.
     Returns
     -------
     CompositeScore
@@ -1310,6 +1666,9 @@ def germ_breadth_score_fn(germSet, germsList, twirledDerivDaggerDerivList,
     weights = _np.zeros(len(germsList))
     for germ in germSet:
         weights[germsList.index(germ)] = 1
+    if scorerList is not None:
+        return _incremental_non_AC_score(scorerList, weights, initN=initN,
+                                         **nonAC_kwargs)
     germsVsGatesetScores = []
     for derivDaggerDeriv in twirledDerivDaggerDerivList:
         # Loop over all gatesets
@@ -1327,7 +1686,7 @@ def grasp_germ_set_optimization(gatesetList, germsList, alpha, randomize=True,
                                 scoreFunc='all', tol=1e-6, threshold=1e6,
                                 check=False, force="singletons",
                                 iterations=5, returnAll=False, shuffle=False,
-                                verbosity=0):
+                                verbosity=0, nProcesses=1):
     """Use GRASP to find a high-performing germ set.
     Parameters
     ----------
@@ -1408,6 +1767,12 @@ def grasp_germ_set_optimization(gatesetList, germsList, alpha, randomize=True,
         solution to the first better solution it finds in the neighborhood).
     verbosity : int, optional
         Integer >= 0 indicating the amount of detail to print.
+    nProcesses : int, optional
+        The number of processes used to run the GRASP iterations (or, when
+        there are fewer iterations than processes, to score candidate germ
+        sets) concurrently.  The processes are forked after the twirled
+        derivatives are computed, and so share them rather than receiving
+        copies.  See :func:`~pygsti.algorithms.grasp.grasp`.
     Returns
     -------
     finalGermList : list of GateString
@@ -1452,9 +1817,10 @@ def grasp_germ_set_optimization(gatesetList, germsList, alpha, randomize=True,
 
     printer.log("Starting germ set optimization. Lower score is better.", 1)
 
-    twirledDerivDaggerDerivList = [calc_twirled_DDD(gateset, germsList, tol,
-                                                    check, germLengths)
-                                   for gateset in gatesetList]
+    # Neighboring germ sets (swaps) are scored as low-rank updates
+    scorerList = [IncrementalGermScorer(
+        calc_twirled_DDD_factors(gateset, germsList, tol, check, germLengths),
+        numGaugeParams, scoreFunc) for gateset in gatesetList]
 
     # Dict of keyword arguments passed to compute_score_non_AC that don't
     # change from call to call
@@ -1470,53 +1836,23 @@ def grasp_germ_set_optimization(gatesetList, germsList, alpha, randomize=True,
     final_nonAC_kwargs['l1Penalty'] = l1Penalty
 
     scoreFn = (lambda germSet:
-               germ_breadth_score_fn(germSet, germsList,
-                                     twirledDerivDaggerDerivList, nonAC_kwargs,
-                                     initN=1))
+               germ_breadth_score_fn(germSet, germsList, None, nonAC_kwargs,
+                                     initN=1, scorerList=scorerList))
     finalScoreFn = (lambda germSet:
-                    germ_breadth_score_fn(germSet, germsList,
-                                          twirledDerivDaggerDerivList,
-                                          final_nonAC_kwargs, initN=1))
+                    germ_breadth_score_fn(germSet, germsList, None,
+                                          final_nonAC_kwargs, initN=1,
+                                          scorerList=scorerList))
 
     feasibleThreshold = _scoring.CompositeScore(threshold, numNonGaugeParams)
 
     rclFn = lambda x: _scoring.composite_rcl_fn(x, alpha)
 
-    initialSolns = []
-    localSolns = []
-
-    for iteration in range(iterations):
-        # This loop is parallelizable (each iteration is independent of all
-        # other iterations).
-        printer.log('Starting iteration {} of {}.'.format(iteration + 1,
-                                                          iterations), 1)
-        success = False
-        failCount = 0
-        while not success and failCount < 10:
-            try:
-                iterSolns = _grasp.do_grasp_iteration(
-                    elements=germsList, greedyScoreFn=scoreFn, rclFn=rclFn,
-                    localScoreFn=scoreFn,
-                    getNeighborsFn=getNeighborsFn,
-                    feasibleThreshold=feasibleThreshold,
-                    initialElements=initialWeights, seed=seed,
-                    verbosity=verbosity)
-
-                initialSolns.append(iterSolns[0])
-                localSolns.append(iterSolns[1])
-
-                success = True
-                printer.log('Finished iteration {} of {}.'.format(
-                    iteration + 1, iterations), 1)
-            except Exception as e:
-                failCount += 1
-                if failCount == 10:
-                    raise e
-                else:
-                    printer.warning(e)
-
-    finalScores = _np.array([finalScoreFn(localSoln)
-                             for localSoln in localSolns])
-    bestSoln = localSolns[_np.argmin(finalScores)]
+    bestSoln, initialSolns, localSolns = _grasp.grasp(
+        elements=germsList, greedyScoreFn=scoreFn, rclFn=rclFn,
+        localScoreFn=scoreFn, getNeighborsFn=getNeighborsFn,
+        finalScoreFn=finalScoreFn, iterations=iterations,
+        feasibleThreshold=feasibleThreshold, initialElements=initialWeights,
+        seed=seed, verbosity=verbosity, returnAll=True,
+        nProcesses=nProcesses)
 
     return (bestSoln, initialSolns, localSolns) if returnAll else bestSoln
@@ -7,12 +7,21 @@ from __future__ import division, print_function, absolute_import, unicode_litera
 """Functions to facilitate using GRASP."""
 
 import itertools
+import multiprocessing as _mp
+import os as _os
 import random
+import warnings as _warnings
 
 import numpy as _np
 
 from .. import objects as _objs
 
+#The number of (differently seeded) attempts made at each GRASP iteration
+# before the error raised by the last failed attempt is propagated.
+GRASP_MAX_ATTEMPTS = 10
+
+_graspState = {} #inherited by the forked worker processes of grasp
+
 
 def get_swap_neighbors(weights, forcedWeights=None, shuffle=False):
     """Return the list of weights in the neighborhood of a given weight vector.
@@ -64,7 +73,11 @@ def get_swap_neighbors(weights, forcedWeights=None, shuffle=False):
 
 def grasp_greedy_construction(elements, scoreFn, rclFn, feasibleThreshold=None,
                               feasibleFn=None, initialElements=None,
-                              seed=None):
+                              seed=None, mapFn=None):
+    if mapFn is None:
+        mapFn = _serial_map
+    rndm = _np.random if seed is None else _np.random.RandomState(seed)
+
     if initialElements is None:
         weights = _np.zeros(len(elements))
     else:
@@ -89,10 +102,9 @@ def grasp_greedy_construction(elements, scoreFn, rclFn, feasibleThreshold=None,
     while _np.any(weights==0) and not feasible:
         candidateIdxs = _np.where(weights==0)[0]
         candidateSolns = [soln + [elements[idx]] for idx in candidateIdxs]
-        candidateScores = _np.array([scoreFn(candidateSoln)
-                                     for candidateSoln in candidateSolns])
+        candidateScores = _np.array(mapFn(scoreFn, candidateSolns))
         rclIdxs = rclFn(candidateScores)
-        chosenIdx = _np.random.choice(rclIdxs)
+        chosenIdx = rndm.choice(rclIdxs)
         soln = candidateSolns[chosenIdx]
         weights[candidateIdxs[chosenIdx]] = 1
         if feasibleTest == 'threshold':
@@ -107,7 +119,8 @@ def grasp_greedy_construction(elements, scoreFn, rclFn, feasibleThreshold=None,
 
 
 def grasp_local_search(initialSoln, scoreFn, elements, getNeighborsFn,
-                       feasibleThreshold=None, feasibleFn=None):
+                       feasibleThreshold=None, feasibleFn=None, mapFn=None,
+                       blockSize=1):
 
     if feasibleThreshold is not None:
         feasibleTest = 'threshold'
@@ -116,6 +129,8 @@ def grasp_local_search(initialSoln, scoreFn, elements, getNeighborsFn,
     else:
         raise ValueError('Must provide either feasibleFn or '
                          'feasibleThreshold!')
+    if mapFn is None:
+        mapFn = _serial_map
 
     currentSoln = initialSoln
     currentWeights = _np.zeros(len(elements))
@@ -135,33 +150,33 @@ def grasp_local_search(initialSoln, scoreFn, elements, getNeighborsFn,
             feasibleNeighborSolns = [(idx, soln) for idx, soln
                                      in enumerate(neighborSolns)
                                      if feasibleFn(soln)]
-            for idx, soln in feasibleNeighborSolns:
-                solnScore = scoreFn(soln)
-                if solnScore < currentScore:
-                    betterSolnFound = True
-                    currentScore = solnScore
-                    currentSoln = soln
-                    currentWeights = weightsNeighbors[idx]
-                    break
-
         elif feasibleTest == 'threshold':
-            for idx, soln in enumerate(neighborSolns):
-                solnScore = scoreFn(soln)
-                # The current score is by construction below the threshold,
-                # so we don't need to check that.
+            # The current score is by construction below the threshold,
+            # so we don't need to check that.
+            feasibleNeighborSolns = list(enumerate(neighborSolns))
+
+        # Neighbors are scored `blockSize` at a time, and the first one (in
+        # neighborhood order) that improves on the current solution is taken.
+        for start in range(0, len(feasibleNeighborSolns), blockSize):
+            block = feasibleNeighborSolns[start:start + blockSize]
+            blockScores = mapFn(scoreFn, [soln for idx, soln in block])
+            for (idx, soln), solnScore in zip(block, blockScores):
                 if solnScore < currentScore:
                     betterSolnFound = True
                     currentScore = solnScore
                     currentSoln = soln
                     currentWeights = weightsNeighbors[idx]
                     break
+            if betterSolnFound:
+                break
 
     return currentSoln
 
 
 def do_grasp_iteration(elements, greedyScoreFn, rclFn, localScoreFn,
                        getNeighborsFn, feasibleThreshold=None, feasibleFn=None,
-                       initialElements=None, seed=None, verbosity=0):
+                       initialElements=None, seed=None, verbosity=0,
+                       mapFn=None, blockSize=1):
     """Perform one iteration of GRASP (greedy construction and local search).
 
     Parameters
@@ -212,11 +227,25 @@ def do_grasp_iteration(elements, greedyScoreFn, rclFn, localScoreFn,
         routine at the start of its construction.
 
     seed : int
-        Seed for the random number generator.
+        Seed for the random number generators used by the greedy construction
+        and (through the `random` module) by `getNeighborsFn`, if it shuffles
+        the neighborhood.  The caller's `random` state is restored afterwards.
+        If None, the generators' current states are used.
 
     verbosity : int
         Sets the level of logging messages the printer will display.
 
+    mapFn : callable, optional
+        Function such that ``mapFn(scoreFn, solns)`` returns the list of the
+        scores of the candidate solutions `solns`, used to score the
+        candidates of each greedy step and blocks of neighbors during the
+        local search (e.g. in parallel).  Defaults to scoring serially.
+
+    blockSize : int, optional
+        The number of neighbors scored together by the local search.  The
+        first improving neighbor (in the order given by `getNeighborsFn`)
+        is always chosen, so this affects only the amount of work done.
+
     Returns
     -------
     initialSoln : list
@@ -230,13 +259,20 @@ def do_grasp_iteration(elements, greedyScoreFn, rclFn, localScoreFn,
 
     initialSoln = grasp_greedy_construction(elements, greedyScoreFn, rclFn,
                                             feasibleThreshold, feasibleFn,
-                                            initialElements, seed)
+                                            initialElements, seed, mapFn)
     printer.log('Initial construction:', 1)
     printer.log(str([str(element) for element in initialSoln]), 1)
 
-    localSoln = grasp_local_search(initialSoln, localScoreFn, elements,
-                                   getNeighborsFn, feasibleThreshold,
-                                   feasibleFn)
+    if seed is not None: # seed `random` only for the local search
+        callerState = random.getstate()
+        random.seed(seed)
+    try:
+        localSoln = grasp_local_search(initialSoln, localScoreFn, elements,
+                                       getNeighborsFn, feasibleThreshold,
+                                       feasibleFn, mapFn, blockSize)
+    finally:
+        if seed is not None:
+            random.setstate(callerState)
     printer.log('Local optimum:', 1)
     printer.log(str([str(element) for element in localSoln]), 1)
 
@@ -245,7 +281,8 @@ def do_grasp_iteration(elements, greedyScoreFn, rclFn, localScoreFn,
 
 def grasp(elements, greedyScoreFn, rclFn, localScoreFn, getNeighborsFn,
           finalScoreFn, iterations, feasibleThreshold=None, feasibleFn=None,
-          initialElements=None, seed=None, verbosity=0):
+          initialElements=None, seed=None, verbosity=0, returnAll=False,
+          nProcesses=1):
     """Perform GRASP to come up with an optimal feasible set of elements.
 
     Parameters
@@ -305,32 +342,126 @@ def grasp(elements, greedyScoreFn, rclFn, localScoreFn, getNeighborsFn,
         start of its construction.
 
     seed : int
-        Seed for the random number generator.
+        Seed for the random number generator.  Each iteration is run with
+        its own seed drawn from it, so the result does not depend on
+        `nProcesses`.  If None, the seeds are drawn from `numpy.random`.
 
     verbosity : int
         Sets the level of logging messages the printer will display.
 
+    returnAll : bool, optional
+        If True, also return the lists of the initial constructions and the
+        local optima of all the iterations.
+
+    nProcesses : int, optional
+        The number of (forked) processes used.  If there are at least as
+        many iterations as processes, the iterations are run concurrently;
+        otherwise they are run one after another, with the candidates of the
+        greedy construction and the neighbors of the local search scored
+        concurrently.  Worker processes inherit the score functions (and any
+        data they use) from this process rather than receiving them by
+        pickling, so when `os.fork()` is unavailable everything is run in
+        this process.
+
     Returns
     -------
-    list of GateString
-        The best germ set from all locally-optimal germ sets constructed.
+    bestSoln : list
+        The best solution (sublist of `elements`) from all locally-optimal
+        solutions constructed.
+
+    initialSolns, localSolns : list of lists
+        Only returned when `returnAll` is True: the initial constructions
+        and local optima of each iteration.
 
     """
     printer = _objs.VerbosityPrinter.build_printer(verbosity)
 
-    bestSoln = None
-    for iteration in range(iterations):
+    rndm = _np.random if seed is None else _np.random.RandomState(seed)
+    attemptSeeds = rndm.randint(0, 2**31 - 1,
+                                size=(iterations, GRASP_MAX_ATTEMPTS))
+
+    if nProcesses > 1 and not hasattr(_os, "fork"):
+        _warnings.warn("Parallel GRASP requires os.fork() to use several"
+                       " processes - running serially")
+        nProcesses = 1
+    ctx = _mp.get_context("fork") if hasattr(_mp, "get_context") else _mp
+
+    iterKwargs = {'elements': elements, 'greedyScoreFn': greedyScoreFn,
+                  'rclFn': rclFn, 'localScoreFn': localScoreFn,
+                  'getNeighborsFn': getNeighborsFn,
+                  'feasibleThreshold': feasibleThreshold,
+                  'feasibleFn': feasibleFn, 'initialElements': initialElements}
+    _graspState.update(iterKwargs=iterKwargs, attemptSeeds=attemptSeeds,
+                       scoreFns=[greedyScoreFn, localScoreFn])
+    try:
+        if nProcesses > 1:
+            parallelIterations = iterations >= nProcesses
+            pool = ctx.Pool(nProcesses) #workers fork *after* state is set
+            try:
+                if parallelIterations:
+                    iterInfo = pool.map(_run_iteration, range(iterations),
+                                        chunksize=1)
+                else:
+                    mapFn = lambda scoreFn, solns: pool.map(
+                        _call_score_fn,
+                        [(_graspState['scoreFns'].index(scoreFn), soln)
+                         for soln in solns])
+                    iterInfo = [_run_iteration(iteration, mapFn,
+                                               4 * nProcesses)
+                                for iteration in range(iterations)]
+            finally:
+                pool.close(); pool.join()
+        else:
+            iterInfo = [_run_iteration(iteration)
+                        for iteration in range(iterations)]
+    finally:
+        _graspState.clear()
+
+    for iteration, (initialSoln, localSoln, errors) in enumerate(iterInfo):
         printer.log('Iteration {}'.format(iteration), 1)
-        initialSoln, localSoln = do_grasp_iteration(elements, greedyScoreFn,
-                                                    rclFn, localScoreFn,
-                                                    getNeighborsFn,
-                                                    feasibleThreshold,
-                                                    feasibleFn,
-                                                    initialElements, seed,
-                                                    verbosity)
-        if bestSoln is None:
-            bestSoln = localSoln
-        elif finalScoreFn(localSoln) < finalScoreFn(bestSoln):
-            bestSoln = localSoln
-
-    return bestSoln
+        for e in errors:
+            printer.warning(e)
+        printer.log('Initial construction:', 1)
+        printer.log(str([str(element) for element in initialSoln]), 1)
+        printer.log('Local optimum:', 1)
+        printer.log(str([str(element) for element in localSoln]), 1)
+
+    initialSolns = [info[0] for info in iterInfo]
+    localSolns = [info[1] for info in iterInfo]
+    finalScores = _np.array([finalScoreFn(localSoln)
+                             for localSoln in localSolns])
+    bestSoln = localSolns[_np.argmin(finalScores)]
+
+    return (bestSoln, initialSolns, localSolns) if returnAll else bestSoln
+
+
+def _serial_map(scoreFn, solns):
+    """ Score each of `solns` with `scoreFn` in this process """
+    return [scoreFn(soln) for soln in solns]
+
+
+def _call_score_fn(args):
+    """ Evaluate `_graspState['scoreFns'][i](soln)`, where `args = (i, soln)` """
+    i, soln = args
+    return _graspState['scoreFns'][i](soln)
+
+
+def _run_iteration(iteration, mapFn=None, blockSize=1):
+    """
+    Run the `iteration`-th GRASP iteration described by `_graspState`,
+    retrying (with the next seed) when an attempt raises an exception.
+
+    Returns `(initialSoln, localSoln, errors)`, where `errors` holds the
+    messages of any failed attempts.
+    """
+    errors = []
+    for attemptSeed in _graspState['attemptSeeds'][iteration]:
+        try:
+            initialSoln, localSoln = do_grasp_iteration(
+                seed=int(attemptSeed), mapFn=mapFn, blockSize=blockSize,
+                **_graspState['iterKwargs'])
+            return initialSoln, localSoln, errors
+        except Exception as e:
+            if len(errors) == GRASP_MAX_ATTEMPTS - 1:
+                raise e
+            errors.append(str(e))
@@ -638,14 +638,14 @@ def build_gate(stateSpaceDims, stateSpaceLabels, gateExpr, basis="gm", parameter
         full_ppToFinal = _np.identity( gateDim, 'complex' )
 
         if basis == "std":
-            ppToStd = _bt.pp_to_std_transform_matrix(blockDims[iTensorProdBlk]); stdToPP = _np.linalg.inv(ppToStd)
+            ppToStd, stdToPP = _bt.basis_transform_matrices("pp", blockDims[iTensorProdBlk])
             full_ppToFinal[offset:offset+N,offset:offset+N] = ppToStd
             full_finalToPP[offset:offset+N,offset:offset+N] = stdToPP
             realMx = False
 
         elif basis == "gm":
-            ppToStd = _bt.pp_to_std_transform_matrix(blockDims[iTensorProdBlk]); stdToPP = _np.linalg.inv(ppToStd)
-            gmToStd = _bt.gm_to_std_transform_matrix(blockDims[iTensorProdBlk]); stdToGM = _np.linalg.inv(gmToStd)
+            ppToStd, stdToPP = _bt.basis_transform_matrices("pp", blockDims[iTensorProdBlk])
+            gmToStd, stdToGM = _bt.basis_transform_matrices("gm", blockDims[iTensorProdBlk])
             full_ppToFinal[offset:offset+N,offset:offset+N] = _np.dot( stdToGM, ppToStd )
             full_finalToPP[offset:offset+N,offset:offset+N] = _np.dot( stdToPP, gmToStd )
             realMx = True
@@ -656,8 +656,8 @@ def build_gate(stateSpaceDims, stateSpaceLabels, gateExpr, basis="gm", parameter
             realMx = True
 
         elif basis == "qt":
-            ppToStd = _bt.pp_to_std_transform_matrix(blockDims[iTensorProdBlk]); stdToPP = _np.linalg.inv(ppToStd)
-            qtToStd = _bt.qt_to_std_transform_matrix(blockDims[iTensorProdBlk]); stdToQT = _np.linalg.inv(qtToStd)
+            ppToStd, stdToPP = _bt.basis_transform_matrices("pp", blockDims[iTensorProdBlk])
+            qtToStd, stdToQT = _bt.basis_transform_matrices("qt", blockDims[iTensorProdBlk])
             full_ppToFinal[offset:offset+N,offset:offset+N] = _np.dot( stdToQT, ppToStd )
             full_finalToPP[offset:offset+N,offset:offset+N] = _np.dot( stdToPP, qtToStd )
             realMx = True
@@ -12,6 +12,7 @@ from .longsequence import do_long_sequence_gst as _do_long_sequence_gst
 from .. import objects as _obj
 from .. import algorithms as _alg
 from .. import tools as _tools
+from .. import construction as _construction
 
 def make_bootstrap_dataset(inputDataSet,generationMethod,inputGateSet=None,
                            seed=None,spamLabels=None,verbosity=1):
@@ -97,7 +98,8 @@ def make_bootstrap_gatesets(numGateSets, inputDataSet, generationMethod,
                             fiducialPrep, fiducialMeasure, germs, maxLengths,
                             inputGateSet=None, targetGateSet=None, startSeed=0,
                             spamLabels=None, lsgstLists=None,
-                            returnData=False, verbosity=2):
+                            returnData=False, verbosity=2,
+                            fitMethod="longsequence", comm=None):
     """
     Creates a series of "bootstrapped" GateSets form a single DataSet (and
     possibly GateSet) used for generating bootstrapped error bars.  The
@@ -167,6 +169,21 @@ def make_bootstrap_gatesets(numGateSets, inputDataSet, generationMethod,
     verbosity : int
         Level of detail printed to stdout.
 
+    fitMethod : {"longsequence", "mlgst"}, optional
+        How gate sets are fit to the generated datasets.  "longsequence"
+        runs the full long-sequence GST protocol (`do_long_sequence_gst`)
+        on each dataset.  "mlgst" runs MLGST on the final list of gate
+        strings for all the datasets together (see
+        `pygsti.algorithms.do_mlgst_multi`), sharing one evaluation tree and
+        warm-starting each fit from the previous one.  The first fit starts
+        from `inputGateSet` ('parametric') or from the long-sequence GST
+        estimate for `inputDataSet` ('nonparametric').  This is much faster
+        when many gate sets are needed.
+
+    comm : mpi4py.MPI.Comm, optional
+        When not None and `fitMethod == "mlgst"`, an MPI communicator used
+        to divide the fits among multiple processors.
+
     Returns
     -------
     gatesets : list
@@ -186,6 +203,9 @@ def make_bootstrap_gatesets(numGateSets, inputDataSet, generationMethod,
     if (inputGateSet is not None and targetGateSet is not None):
         raise ValueError("Cannot supply both inputGateSet and targetGateSet!")
 
+    if fitMethod not in ("longsequence", "mlgst"):
+        raise ValueError("Invalid fitMethod: %s" % fitMethod)
+
     if generationMethod == 'parametric':
         targetGateSet = inputGateSet
 
@@ -199,14 +219,30 @@ def make_bootstrap_gatesets(numGateSets, inputDataSet, generationMethod,
                                    spamLabels)
             )
 
-    gatesetList = []
     print("Creating GateSets: ")
-    for run in range(numGateSets):
-        print("Running MLGST Iteration %d " % run)
-        results = _do_long_sequence_gst(
-            datasetList[run], targetGateSet, fiducialPrep, fiducialMeasure,
-            germs, maxLengths, lsgstLists=lsgstLists, verbosity=verbosity)
-        gatesetList.append(results.gatesets['final estimate'])
+    if fitMethod == "mlgst":
+        if lsgstLists is None:
+            lsgstLists = _construction.make_lsgst_lists(
+                list(targetGateSet.gates.keys()), fiducialPrep,
+                fiducialMeasure, germs, maxLengths)
+        if generationMethod == 'parametric':
+            gs_start = inputGateSet
+        else:
+            gs_start = _do_long_sequence_gst(
+                inputDataSet, targetGateSet, fiducialPrep, fiducialMeasure,
+                germs, maxLengths, lsgstLists=lsgstLists,
+                verbosity=verbosity).gatesets['final estimate']
+        _, gatesetList = _alg.do_mlgst_multi(
+            datasetList, gs_start, lsgstLists[-1], verbosity=verbosity,
+            comm=comm)
+    else:
+        gatesetList = []
+        for run in range(numGateSets):
+            print("Running MLGST Iteration %d " % run)
+            results = _do_long_sequence_gst(
+                datasetList[run], targetGateSet, fiducialPrep, fiducialMeasure,
+                germs, maxLengths, lsgstLists=lsgstLists, verbosity=verbosity)
+            gatesetList.append(results.gatesets['final estimate'])
 
     if not returnData:
         return gatesetList
@@ -112,6 +112,24 @@ def do_long_sequence_gst(dataFilenameOrSet, targetGateFilenameOrSet,
         - useFreqWeightedChiSq = True / False (default)
         - nestedGateStringLists = True (default) / False
         - distributeMethod = "gatestrings" or "deriv" (default)
+        - evaltreeCacheDir = str or None (default) : directory in which to
+          persist evaluation trees between runs
+        - nThreads = int or None (default) : number of threads used to compute
+          probabilities and their derivatives
+        - jacBlocks = True / False / None (default) : whether the optimizer
+          accumulates J^T J from per-subtree jacobian blocks (None => only
+          when memLimit requires it)
+        - broydenIters = int (default == 0) : maximum number of consecutive
+          optimizer iterations using a Broyden-updated jacobian
+        - checkpointFile = str or None (default) : file in which the progress
+          of the iterative optimization is saved.  If it exists, a previously
+          interrupted run is resumed from it.
+        - checkpointInterval = float (default == 60) : minimum number of
+          seconds between checkpoints of the optimizer's state
+        - productReuse = True / False (default) : whether the jacobians reuse
+          the gate-string products of the objective function evaluations
+        - germPowers = True / False (default) : whether the evaluation trees
+          compute repeated germs by repeated squaring
         - profile = int (default == 1)
         - check = True / False (default)
         - truncScheme = "whole germ powers" (default) or "truncated germ powers"
@@ -322,6 +340,14 @@ def do_long_sequence_gst(dataFilenameOrSet, targetGateFilenameOrSet,
                 'useFreqWeightedChiSq',False), profiler=profiler,
             comm=comm, distributeMethod=advancedOptions.get(
                 'distributeMethod',"deriv"),
+            evaltreeCacheDir=advancedOptions.get('evaltreeCacheDir',None),
+            nThreads=advancedOptions.get('nThreads',None),
+            jacBlocks=advancedOptions.get('jacBlocks',None),
+            broydenIters=advancedOptions.get('broydenIters',0),
+            checkpointFile=advancedOptions.get('checkpointFile',None),
+            checkpointInterval=advancedOptions.get('checkpointInterval',60),
+            productReuse=advancedOptions.get('productReuse',False),
+            germPowers=advancedOptions.get('germPowers',False),
             check_jacobian=advancedOptions.get('check',False),
             check=advancedOptions.get('check',False))
 
@@ -340,6 +366,14 @@ def do_long_sequence_gst(dataFilenameOrSet, targetGateFilenameOrSet,
                 'useFreqWeightedChiSq',False), 
           distributeMethod=advancedOptions.get(
                 'distributeMethod',"deriv"),
+          evaltreeCacheDir=advancedOptions.get('evaltreeCacheDir',None),
+          nThreads=advancedOptions.get('nThreads',None),
+          jacBlocks=advancedOptions.get('jacBlocks',None),
+          broydenIters=advancedOptions.get('broydenIters',0),
+          checkpointFile=advancedOptions.get('checkpointFile',None),
+          checkpointInterval=advancedOptions.get('checkpointInterval',60),
+          productReuse=advancedOptions.get('productReuse',False),
+          germPowers=advancedOptions.get('germPowers',False),
           check=advancedOptions.get('check',False))
     else:
         raise ValueError("Invalid longSequenceObjective: %s" % objective)
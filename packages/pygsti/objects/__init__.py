@@ -33,6 +33,7 @@ from .multidataset import MultiDataSet
 from .spamspec import SpamSpec
 from .profiler import Profiler
 from .profiler import DummyProfiler
+from .localcomm import LocalComm
 
 from .gaugegroup import FullGaugeGroup, TPGaugeGroup, \
     DiagGaugeGroup, TPDiagGaugeGroup, UnitaryGaugeGroup
@@ -44,3 +45,4 @@ from .gaugegroup import FullGaugeGroup, TPGaugeGroup, \
 #Functions
 from .gate import compose, optimize_gate
 from .verbosityprinter import VerbosityPrinter
+from .localcomm import run_with_local_comm
@@ -313,6 +313,61 @@ class DataSet(object):
             self.add_count_dict(gatestring, countDict)
         
 
+    def get_row_indices(self, gatestrings):
+        """
+        Get the indices of the rows of this DataSet's `counts` which hold the
+        data for many gate strings at once.  This is much faster than
+        accessing the rows one at a time (using [ ] indexing).
+
+        Parameters
+        ----------
+        gatestrings : list of (tuples or GateStrings)
+            The gate sequences to get row indices for.
+
+        Returns
+        -------
+        numpy array
+            An array of integer row indices, one per gate string.
+        """
+        gsIndex = self.gsIndex
+        return _np.array([ gsIndex[gs] for gs in gatestrings ], 'i')
+
+
+    def get_counts_matrix(self, gatestrings, spamLabels=None):
+        """
+        Get the counts of many gate strings at once, as a matrix whose rows
+        correspond to spam labels and whose columns correspond to gate strings.
+        This is much faster than accessing the counts one at a time, as in
+        `dataset[gatestring][spamLabel]`.
+
+        Parameters
+        ----------
+        gatestrings : list of (tuples or GateStrings)
+            The gate sequences to extract counts for, which determine the
+            order of the columns of the returned matrix.
+
+        spamLabels : list of strings, optional
+            The spam labels to extract counts for, which determine the order
+            of the rows of the returned matrix.  If None, all the spam labels
+            of this DataSet (see `get_spam_labels`) are used.
+
+        Returns
+        -------
+        numpy array
+            A new len(spamLabels) x len(gatestrings) array of counts.
+        """
+        if spamLabels is None: spamLabels = self.get_spam_labels()
+        rows = self.get_row_indices(gatestrings)
+        cols = _np.array([ self.slIndex[sl] for sl in spamLabels ], 'i')
+        if self.bStatic:
+            return self.counts[ _np.ix_(rows,cols) ].T.copy()
+        else:
+            cntMx = _np.empty( (len(cols),len(rows)), 'd' )
+            for j,i in enumerate(rows):
+                cntMx[:,j] = self.counts[i][cols]
+            return cntMx
+
+
     def keys(self, stripOccuranceTags=False):
         """
         Returns the gate strings used as keys of this DataSet.
@@ -11,8 +11,18 @@ from ..tools import mpitools as _mpit
 from .verbosityprinter import VerbosityPrinter
 
 import numpy as _np
+import pickle as _pickle
 import time as _time #DEBUG TIMERS
 
+def _trie_node(node, labels):
+    """ Get (creating as needed) the evaluation-trie node reached from `node` by `labels` """
+    for gl in labels:
+        children = node[1]
+        if gl not in children: children[gl] = [None, {}]
+        node = children[gl]
+    return node
+
+
 class EvalTree(list):
     """
     An Evaluation Tree.  Instances of this class specify how to
@@ -36,9 +46,19 @@ class EvalTree(list):
         self.parentIndexMap = None
         self.original_index_lookup = None
         self.distribution = {}
+        self.eval_levels = None
+        self.prefix_trie = None
+        self._evalTrie = None
         super(EvalTree, self).__init__(items)
 
-    def initialize(self, gateLabels, gatestring_list, numSubTreeComms=1):
+    def __getstate__(self):
+        #don't pickle the evaluation trie: it is deeply nested and can be rebuilt
+        state = self.__dict__.copy()
+        state['_evalTrie'] = None
+        return state
+
+    def initialize(self, gateLabels, gatestring_list, numSubTreeComms=1, check=True,
+                   germPowers=False):
         """
           Initialize an evaluation tree using a set of gate strings.
           This function must be called before using an EvalTree.
@@ -62,6 +82,20 @@ class EvalTree(list):
               when calling `distribute`.  By default, the
               communicator is not divided.
 
+          check : bool, optional
+              If True, verify that the constructed tree reproduces
+              `gatestring_list` (via `generate_gatestring_list`).  This
+              check can take as long as the construction itself, and
+              may be skipped for very large or long gate string lists.
+
+          germPowers : bool, optional
+              If True, look for a repeated germ, i.e. a germ^n substring
+              with n >= 8, within each gate string (as in long-sequence
+              GST strings) and compute germ^n by repeated squaring.  The
+              intermediate germ powers are shared by all the strings that
+              use them, so the number of products needed for each germ is
+              O(log n) instead of O(n).
+
           Returns
           -------
           None
@@ -74,10 +108,16 @@ class EvalTree(list):
         if len(gatestring_list ) > 0 and isinstance(gatestring_list[0],_gs.GateString):
             gatestring_list = [gs.tup for gs in gatestring_list]
 
-        #Evaluation dictionary:
-        # keys == gate strings that have been evaluated so far
-        # values == index of gate string (key) within evalTree
-        evalDict = { }
+        #Evaluation trie:
+        # A prefix tree of the gate strings that have been evaluated so far.
+        # Each trie node is a [index, children] list, where index is the
+        # index of the node's gate string within evalTree (None if that
+        # string hasn't been evaluated) and children is a dict whose keys
+        # are gate labels and whose values are trie nodes.  Finding the
+        # longest evaluated string starting at a given position of a gate
+        # string is then a single walk down the trie.  The trie is kept
+        # (until the tree is split) so that the tree can be extended.
+        self._evalTrie = [None, {}]
 
         #Evaluation tree:
         # A list of tuples, where each element contains
@@ -102,19 +142,131 @@ class EvalTree(list):
         #Single gate (or zero-gate) computations are assumed to be atomic, and be computed independently.
         #  These labels serve as the initial values, and each gate string is assumed to be a tuple of
         #  gate labels.
+        firstIndices = {} # first index of each (zero- or single-gate) string in gatestring_list
+        for k,gateString in enumerate(gatestring_list):
+            if len(gateString) <= 1 and gateString not in firstIndices:
+                firstIndices[gateString] = k
+
         self.init_indices = [] #indices to put initial zero & single gate results
         for gateLabel in self.gateLabels:
             tup = () if gateLabel == "" else (gateLabel,) #special case of empty label == no gate
-            if tup in gatestring_list:
-                indx = gatestring_list.index(tup) 
+            if tup in firstIndices:
+                indx = firstIndices[tup]
                 self[indx] = (None,None) #iLeft = iRight = None for always-evaluated zero string
             else:
                 indx = len(self)
                 self.append( (None,None) ) #iLeft = iRight = None for always-evaluated zero string
             self.init_indices.append( indx )
-            evalDict[ tup ] = indx
+            _trie_node(self._evalTrie, tup)[0] = indx
+
+        self._add_final_strings(gatestring_list, 0, germPowers)
+
+        #see if there are superfluous tree nodes: those with iFinal == -1 and
+        self.myFinalToParentFinalMap = None #this tree has no "children",
+        self.parentIndexMap = None          # i.e. has not been created by a 'split'
+        self.original_index_lookup = None
+        self.eval_levels = None
+        self.prefix_trie = None
+        self.subTrees = [] #no subtrees yet
+        if check:
+            assert(self.generate_gatestring_list() == gatestring_list)
+        assert(None not in gatestring_list)
+
 
-        #print("DB: initial eval dict = ",evalDict)
+    def add_gatestrings(self, gatestring_list, check=True, germPowers=False):
+        """
+        Add gate strings to the end of the list of "final" gate strings
+        evaluated by this (un-split) tree.
+
+        Only the nodes needed to compute the new strings are added; the
+        existing nodes are re-indexed but otherwise untouched.  Extending a
+        tree built for gate strings `A` with gate strings `B` is much faster
+        than building a new tree for `A + B` when `B` is shorter than `A`
+        (as when the lists of successive long-sequence GST iterations are
+        nested).
+
+        Parameters
+        ----------
+        gatestring_list : list of (tuples or GateStrings)
+            The gate strings to add.  Their (final) indices will be
+            `num_final_strings()`, `num_final_strings()+1`, etc.
+
+        check : bool, optional
+            If True, verify that the extended tree reproduces the new strings.
+
+        germPowers : bool, optional
+            Whether to compute repeated germs by repeated squaring (see
+            `initialize`).
+
+        Returns
+        -------
+        None
+        """
+        if self.is_split() or self.original_index_lookup is not None:
+            raise ValueError("Only un-split evaluation trees can be extended")
+
+        if len(gatestring_list ) > 0 and isinstance(gatestring_list[0],_gs.GateString):
+            gatestring_list = [gs.tup for gs in gatestring_list]
+        nOld = self.num_final_strs; nNew = len(gatestring_list)
+        if nNew == 0: return
+
+        if self._evalTrie is None: #e.g. after a copy or load
+            self._evalTrie = self._build_eval_trie()
+
+        #Shift non-final indices by nNew to make room for the new final strings
+        def shift(i):
+            return i if (i is None or i < nOld) else i+nNew
+        self[:] = [ (shift(iLeft),shift(iRight)) for iLeft,iRight in self[0:nOld] ] \
+            + [None]*nNew + [ (shift(iLeft),shift(iRight)) for iLeft,iRight in self[nOld:] ]
+        self.init_indices = [ shift(i) for i in self.init_indices ]
+        self.eval_order = [ shift(i) for i in self.eval_order ]
+        nodesToVisit = [ self._evalTrie ]
+        while len(nodesToVisit) > 0:
+            node = nodesToVisit.pop()
+            node[0] = shift(node[0])
+            nodesToVisit.extend( node[1].values() )
+        self.num_final_strs = nOld + nNew
+
+        self._add_final_strings(gatestring_list, nOld, germPowers)
+
+        self.eval_levels = None
+        self.prefix_trie = None
+        if check:
+            assert(self.generate_gatestring_list()[nOld:] == gatestring_list)
+        assert(None not in gatestring_list)
+
+
+    def _build_eval_trie(self):
+        """ Returns the evaluation trie (see `initialize`) of this (un-split) tree """
+        evalTrie = [None, {}]
+        gateStrings = [None]*len(self)
+        for i,gateLabel in zip(self.init_indices, self.gateLabels):
+            gateStrings[i] = () if gateLabel == "" else (gateLabel,)
+        for i in self.eval_order:
+            iLeft, iRight = self[i]
+            gateStrings[i] = gateStrings[iLeft] + gateStrings[iRight]
+        for i in self.init_indices + self.eval_order:
+            node = _trie_node(evalTrie, gateStrings[i])
+            if node[0] is None: node[0] = i # (duplicates are evaluated from the first)
+        return evalTrie
+
+
+    def _add_final_strings(self, gatestring_list, kStart, germPowers):
+        """
+        Adds the nodes which compute the strings of `gatestring_list`,
+        placing the k-th one at index `kStart + k`, whose elements must be
+        None.  Updates `self._evalTrie` accordingly.
+        """
+        evalTrie = self._evalTrie
+
+        def longest_evaluated(gateString, start):
+            """ Returns (bite, trie node) of the longest evaluated gateString[start:start+bite] """
+            node = bestNode = evalTrie; bite = 0
+            for end in range(start,len(gateString)):
+                node = node[1].get(gateString[end], None)
+                if node is None: break
+                if node[0] is not None: bite = end+1-start; bestNode = node
+            return bite, bestNode
 
         #Process gatestrings in order of length, so that we always place short strings
         # in the right place (otherwise assert stmt below can fail)
@@ -122,81 +274,112 @@ class EvalTree(list):
             sorted(list(range(len(gatestring_list))),
                    key=lambda i: len(gatestring_list[i]))
 
-        #avgBiteSize = 0
-        #useCounts = {}
-        #OLD (sequential): for (k,gateString) in enumerate(gatestring_list):
-        for k in indices_sorted_by_gatestring_len:
-            gateString = gatestring_list[k]
+        iEmptyStr = evalTrie[0]
+        labelIndices = { gl: i for i,gl in enumerate(self.gateLabels) }
+
+        def add_node(iLeft, iRight, node, k=None):
+            """ Add (iLeft, iRight) as the gate string of trie `node`, at index k if given """
+            if k is None:
+                k = len(self)
+                self.append( (iLeft,iRight) )
+            else:
+                assert(self[k] is None) #make sure we haven't put anything here yet
+                self[k] = (iLeft,iRight)
+            node[0] = k
+            self.eval_order.append(k)
+            return k
+
+        def evaluate(gateString, k=None):
+            """ Add the nodes which compute gateString (placed at index k if given) """
             L = len(gateString)
             if L == 0:
-                iEmptyStr = evalDict.get( (), None)
                 assert(iEmptyStr is not None) # duplicate () final strs require
-                if k != iEmptyStr:
-                    assert(self[k] is None)       # the empty string to be included in the tree too!
-                    self[k] = (iEmptyStr, iEmptyStr) # compute the duplicate () using by
-                    self.eval_order.append(k)        #  multiplying by the empty string.
-
-            start = 0; bite = 1
-            #nBites = 0
-            #print("\nDB: string = ",gateString, "(len=%d)" % len(gateString))
+                if k is not None and k != iEmptyStr: # the empty string to be included in the tree too!
+                    return add_node(iEmptyStr, iEmptyStr, [None], k) # compute the duplicate () by
+                                                                     #  multiplying by the empty string.
+                return iEmptyStr
 
+            start = 0
             while start < L:
 
-                #Take a bite out of gateString, starting at `start` that is in evalDict
-                for b in range(L-start,0,-1):
-                    if gateString[start:start+b] in evalDict:
-                        bite = b; break
-                else: assert(False) #Logic error - loop above should always exit when b == 1
-
-                #iInFinal = k if bool(start + bite == L) else -1
+                #Take a bite out of gateString, starting at `start` that has been evaluated
+                bite, biteNode = longest_evaluated(gateString, start)
+                assert(bite > 0) #Logic error - all single gates should always be evaluated
+                iBite = biteNode[0]
                 bFinal = bool(start + bite == L)
-                #print("DB: start=",start,": found ",gateString[start:start+bite],
-                #      " (len=%d) in evalDict" % bite, "(final=%s)" % bFinal)
-
-                if start == 0: #first in-evalDict bite - no need to add anything to self yet
-                    iCur = evalDict[ gateString[0:bite] ]
-                    #print("DB: taking bite: ", gateString[0:bite], "indx = ",iCur)
-                    if bFinal:
-                        if iCur != k:  #then we have a duplicate final gate string
-                            iEmptyStr = evalDict.get( (), None)
-                            assert(iEmptyStr is not None) # duplicate final strs require
-                                      # the empty string to be included in the tree too!
-                            assert(self[k] is None) #make sure we haven't put anything here yet
-                            self[k] = (iCur, iEmptyStr) # compute the duplicate using by                             
-                            self.eval_order.append(k)   #  multiplying by the empty string.
+
+                if start == 0: #first evaluated bite - no need to add anything to self yet
+                    iCur = iBite
+                    curNode = biteNode
+                    if bFinal and k is not None and iCur != k:
+                        #then we have a duplicate final gate string
+                        assert(iEmptyStr is not None) # duplicate final strs require
+                                  # the empty string to be included in the tree too!
+                        iCur = add_node(iCur, iEmptyStr, [None], k) # compute the duplicate using by
+                                                                    #  multiplying by the empty string.
                 else:
-                    # add (iCur, iBite)
-                    assert(gateString[0:start+bite] not in evalDict)
-                    iBite = evalDict[ gateString[start:start+bite] ]
-                    if bFinal: #place (iCur, iBite) at location k
-                        iNew = k
-                        evalDict[ gateString[0:start+bite] ] = iNew
-                        assert(self[iNew] is None) #make sure we haven't put anything here yet
-                        self[k] = (iCur, iBite)
-                    else:
-                        iNew = len(self)
-                        evalDict[ gateString[0:start+bite] ] = iNew
-                        self.append( (iCur,iBite) )
-
-                    #print("DB: add %s (index %d)" % (str(gateString[0:start+bite]),iNew))
-                    self.eval_order.append(iNew)
-                    iCur = iNew
+                    # add (iCur, iBite), placing it at location k if it's the final one
+                    curNode = _trie_node(curNode, gateString[start:start+bite])
+                    assert(curNode[0] is None)
+                    iCur = add_node(iCur, iBite, curNode, k if bFinal else None)
                 start += bite
-                #nBites += 1
+            return iCur
 
-            #if nBites > 0: avgBiteSize += L / float(nBites)
-            assert(k in self.eval_order or k in self.init_indices)
-        
-        #avgBiteSize /= float(len(gatestring_list))
-        #print "DEBUG: Avg bite size = ",avgBiteSize
+        def find_germ_power(gateString, minPower=8, maxGermLength=16):
+            """ Returns (germ, n, start) such that germ^n is the longest repeated-germ run of gateString """
+            bestGerm, bestN, bestStart = None, 0, None
+            L = len(gateString)
+            if L < 2*minPower: return bestGerm, bestN, bestStart # too short to contain a germ^minPower
+            codes = _np.array([ labelIndices[gl] for gl in gateString ], 'i')
+            for p in range(1, min(maxGermLength, L//minPower)+1):
+                # a run of r matches of gateString[i] == gateString[i+p] is a period-p substring of length r+p
+                matches = _np.concatenate(([0], (codes[p:] == codes[:-p]).astype('i'), [0]))
+                edges = _np.diff(matches)
+                runStarts = _np.nonzero(edges == 1)[0]
+                if len(runStarts) == 0: continue
+                runLengths = _np.nonzero(edges == -1)[0] - runStarts
+                j = _np.argmax(runLengths)
+                n = int(runLengths[j] + p) // p
+                if n >= minPower and n*p > bestN*len(bestGerm or ()): #ties go to shorter germs
+                    bestStart = runStarts[j]
+                    bestGerm, bestN = tuple(gateString[bestStart:bestStart+p]), n
+            return bestGerm, bestN, bestStart
+
+        def evaluate_power(germ, n, k=None):
+            """ Add the nodes which compute germ^n by repeated squaring (placed at index k if given) """
+            node = _trie_node(evalTrie, germ*n)
+            if node[0] is not None or n == 1:
+                return evaluate(germ*n, k)
+            iHalf = evaluate_power(germ, n//2)
+            if n % 2 == 0:
+                return add_node(iHalf, iHalf, node, k)
+            iEven = evaluate_power(germ, n-1)
+            return add_node(iEven, evaluate_power(germ, 1), node, k)
+
+        def evaluate_with_power(gateString, germ, n, start, k):
+            """ Add the nodes which compute gateString = A + germ^n + B as (A + germ^n) + B """
+            end = start + len(germ)*n; L = len(gateString)
+            iCur = evaluate_power(germ, n, k if (start == 0 and end == L) else None)
+            curNode = _trie_node(evalTrie, gateString[0:end])
+            if start > 0: # A + germ^n is shared by all the strings with the same A and germ^n
+                if curNode[0] is None:
+                    iCur = add_node(evaluate(gateString[0:start]), iCur, curNode, k if end == L else None)
+                else: iCur = curNode[0]
+            if end < L:
+                iCur = add_node(iCur, evaluate(gateString[end:]), _trie_node(curNode, gateString[end:]), k)
+            return iCur
 
-        #see if there are superfluous tree nodes: those with iFinal == -1 and
-        self.myFinalToParentFinalMap = None #this tree has no "children",
-        self.parentIndexMap = None          # i.e. has not been created by a 'split'
-        self.original_index_lookup = None
-        self.subTrees = [] #no subtrees yet
-        assert(self.generate_gatestring_list() == gatestring_list)
-        assert(None not in gatestring_list)
+        #OLD (sequential): for (k,gateString) in enumerate(gatestring_list):
+        for i in indices_sorted_by_gatestring_len:
+            gateString = gatestring_list[i]; k = kStart + i
+
+            if germPowers:
+                germ, n, start = find_germ_power(gateString)
+                if n > 0 and longest_evaluated(gateString, 0)[0] < len(gateString): # (not a duplicate)
+                    evaluate_with_power(gateString, germ, n, start, k); continue
+
+            evaluate(gateString, k)
+            assert(self[k] is not None) # k is in self.eval_order or self.init_indices
 
 
     def copy(self):
@@ -212,8 +395,109 @@ class EvalTree(list):
         newTree.subTrees = [ st.copy() for st in self.subTrees ]
         newTree.original_index_lookup = self.original_index_lookup[:] \
             if (self.original_index_lookup is not None) else None
+        newTree.eval_levels = self.eval_levels[:] \
+            if (self.eval_levels is not None) else None
+        newTree.prefix_trie = self.prefix_trie
         return newTree
 
+    def _get_state(self):
+        """ Returns a compact, picklable, dictionary describing this tree """
+        state = { 'tree': _np.array([ (-1 if iLeft is None else iLeft, -1 if iRight is None else iRight)
+                                      for iLeft,iRight in self ], 'i').reshape(len(self),2),
+                  'gateLabels': list(self.gateLabels),
+                  'init_indices': _np.array(self.init_indices, 'i'),
+                  'eval_order': _np.array(self.eval_order, 'i'),
+                  'num_final_strs': self.num_final_strs,
+                  'myFinalToParentFinalMap': self.myFinalToParentFinalMap,
+                  'distribution': dict(self.distribution),
+                  'subTrees': [ st._get_state() for st in self.subTrees ] }
+        if self.parentIndexMap is not None:
+            state['parentIndexMap'] = _np.array(self.parentIndexMap, 'i')
+        if self.original_index_lookup is not None:
+            state['original_index_lookup'] = _np.array(
+                list(self.original_index_lookup.items()), 'i').reshape(-1,2)
+        return state
+
+    def _set_state(self, state):
+        """ Sets this tree to the one described by `state` (see `_get_state`) """
+        self[:] = [ (None if iLeft < 0 else iLeft, None if iRight < 0 else iRight)
+                    for iLeft,iRight in state['tree'].tolist() ]
+        self.gateLabels = state['gateLabels']
+        self.init_indices = state['init_indices'].tolist()
+        self.eval_order = state['eval_order'].tolist()
+        self.num_final_strs = state['num_final_strs']
+        self.myFinalToParentFinalMap = state['myFinalToParentFinalMap']
+        self.distribution = state['distribution']
+        self.parentIndexMap = state['parentIndexMap'].tolist() \
+            if ('parentIndexMap' in state) else None
+        self.original_index_lookup = { icur: inew for icur,inew in state['original_index_lookup'].tolist() } \
+            if ('original_index_lookup' in state) else None
+        self.eval_levels = None
+        self.prefix_trie = None
+        self._evalTrie = None
+        self.subTrees = []
+        for subTreeState in state['subTrees']:
+            subTree = EvalTree(); subTree._set_state(subTreeState)
+            self.subTrees.append(subTree)
+
+    def save(self, fileOrFilename):
+        """
+        Save this EvalTree (including any sub-trees) to a file.
+
+        Indices are stored as integer arrays, so this is more compact and
+        much faster to load than pickling the tree directly.
+
+        Parameters
+        ----------
+        fileOrFilename : string or file object
+            If a string,  interpreted as a filename.  If this filename ends
+            in ".gz", the file will be gzip compressed.
+
+        Returns
+        -------
+        None
+        """
+        bOpen = not (hasattr(fileOrFilename, 'write'))
+        if bOpen:
+            if fileOrFilename.endswith(".gz"):
+                import gzip as _gzip
+                f = _gzip.open(fileOrFilename,"wb")
+            else:
+                f = open(fileOrFilename,"wb")
+        else:
+            f = fileOrFilename
+
+        _pickle.dump(self._get_state(), f, _pickle.HIGHEST_PROTOCOL)
+        if bOpen: f.close()
+
+    def load(self, fileOrFilename):
+        """
+        Load an EvalTree from a file written by `save`, replacing any
+        existing contents of this tree.
+
+        Parameters
+        ----------
+        fileOrFilename : string or file object
+            If a string,  interpreted as a filename.  If this filename ends
+            in ".gz", the file will be gzip uncompressed as it is read.
+
+        Returns
+        -------
+        None
+        """
+        bOpen = not (hasattr(fileOrFilename, 'read'))
+        if bOpen:
+            if fileOrFilename.endswith(".gz"):
+                import gzip as _gzip
+                f = _gzip.open(fileOrFilename,"rb")
+            else:
+                f = open(fileOrFilename,"rb")
+        else:
+            f = fileOrFilename
+
+        self._set_state(_pickle.load(f))
+        if bOpen: f.close()
+
     def get_init_labels(self):
         """ Return a tuple of the gate labels (strings)
             which form the beginning of the tree.
@@ -236,6 +520,135 @@ class EvalTree(list):
         return self.eval_order
 
 
+    def get_evaluation_levels(self):
+        """
+        Return the evaluation order grouped into dependency levels.
+
+        The nodes of a level only depend on nodes of earlier levels (or on
+        the initial single- and zero-gate nodes), so all the products of a
+        level can be computed at once, e.g. using stacked matrix products.
+        The levels are computed once and cached.
+
+        Returns
+        -------
+        list
+            A list of `(indices, iLefts, iRights)` tuples, one per level in
+            the order the levels should be evaluated, where each element is
+            a 1D integer numpy array and
+            `gatestring[indices[k]] = gatestring[iLefts[k]] + gatestring[iRights[k]]`.
+        """
+        if getattr(self, 'eval_levels', None) is None: #(may be absent from old pickles)
+            nodeLevels = _np.zeros( len(self), 'i' ) #initial nodes have level 0
+            for i in self.eval_order:
+                iLeft, iRight = self[i]
+                nodeLevels[i] = max(nodeLevels[iLeft], nodeLevels[iRight]) + 1
+
+            evalOrder = _np.array(self.eval_order, 'i')
+            orderLevels = nodeLevels[evalOrder]
+            indicesByLevel = evalOrder[ _np.argsort(orderLevels, kind='mergesort') ]
+            levelCounts = _np.bincount(orderLevels)[1:] if len(evalOrder) > 0 else []
+
+            self.eval_levels = []; start = 0
+            for cnt in levelCounts:
+                indices = indicesByLevel[start:start+cnt]; start += cnt
+                lefts = _np.array([ self[i][0] for i in indices ], 'i')
+                rights = _np.array([ self[i][1] for i in indices ], 'i')
+                self.eval_levels.append( (indices, lefts, rights) )
+
+        return self.eval_levels
+
+
+    def get_nodes_containing(self, gateLabels):
+        """
+        Find the elements of this tree whose gate strings contain any of the
+        given gate labels, i.e. those which must be recomputed when the gates
+        with these labels change.
+
+        Parameters
+        ----------
+        gateLabels : iterable
+            The gate labels to look for.
+
+        Returns
+        -------
+        numpy array
+            A boolean array of length `len(self)` which is True at the indices
+            of the (zero-, single-gate or composite) strings containing any
+            label in `gateLabels`.
+        """
+        gateLabels = set(gateLabels)
+        mask = _np.zeros( len(self), 'bool' )
+        if len(gateLabels) == 0: return mask
+        for i,gl in zip(self.init_indices, self.gateLabels):
+            mask[i] = gl in gateLabels
+        for indices, lefts, rights in self.get_evaluation_levels():
+            mask[indices] = _np.logical_or(mask[lefts], mask[rights])
+        return mask
+
+
+    def get_prefix_trie(self):
+        """
+        Get the prefix trie of this tree's final gate strings.
+
+        The trie's nodes are the distinct prefixes of the final gate strings,
+        with node 0 being the empty string, so that each final string can be
+        built up one gate at a time from the prefix it shares with others.
+        This is what is needed to propagate a state *vector* through all the
+        final strings with one matrix-vector product per trie node (instead
+        of building full products).  Nodes are grouped by their length and
+        last gate label so that the nodes of each group can be computed at
+        once.  The trie is computed once and cached.
+
+        Returns
+        -------
+        groups : list
+            A list of `(gateLabel, indices, parents)` tuples, in the order the
+            groups should be evaluated, where `indices` and `parents` are 1D
+            integer numpy arrays and the string of node `indices[k]` equals
+            the string of node `parents[k]` followed by `gateLabel`.
+
+        finalNodes : numpy array
+            The trie node of each final gate string, in the computation order
+            (see `generate_gatestring_list`).
+
+        nNodes : int
+            The total number of trie nodes, including the root.
+        """
+        if getattr(self, 'prefix_trie', None) is None: #(may be absent from old pickles)
+            children = [ {} ]; parents = [ -1 ]; depths = [ 0 ]; labels = [ None ]
+            finalNodes = []
+            for gateString in self.generate_gatestring_list(permute=False):
+                iNode = 0
+                for gl in gateString:
+                    iChild = children[iNode].get(gl, None)
+                    if iChild is None:
+                        iChild = len(children)
+                        children[iNode][gl] = iChild
+                        children.append( {} ); parents.append(iNode)
+                        depths.append(depths[iNode]+1); labels.append(gl)
+                    iNode = iChild
+                finalNodes.append(iNode)
+
+            #group the (non-root) nodes by depth and then gate label
+            labelIndex = { gl: k for k,gl in enumerate(sorted(set(labels[1:]))) }
+            nodes = _np.arange(1, len(children))
+            labelInds = _np.array([ labelIndex[gl] for gl in labels[1:] ], 'i')
+            order = _np.lexsort( (labelInds, _np.array(depths[1:], 'i')) )
+            nodes = nodes[order]; groupKeys = _np.array(depths,'i')[nodes] * len(labelIndex) \
+                + labelInds[order]
+            bounds = list(_np.flatnonzero(_np.diff(groupKeys)) + 1)
+            parentsAr = _np.array(parents, 'i')
+
+            groups = []
+            starts = [0]+bounds if len(nodes) > 0 else []
+            for start,end in zip(starts, bounds+[len(nodes)]):
+                indices = nodes[start:end]
+                groups.append( (labels[indices[0]], indices, parentsAr[indices]) )
+            self.prefix_trie = (groups, _np.array(finalNodes, 'i'), len(children))
+
+        return self.prefix_trie
+
+
     def final_view(self, a, axis=None):
         """ 
         Returns a view of array `a` restricting it to only the
@@ -851,6 +1264,9 @@ class EvalTree(list):
         self[:] = [ (parentIndexPerm[self[iCur][0]] if (self[iCur][0] is not None) else None,
                      parentIndexPerm[self[iCur][1]] if (self[iCur][1] is not None) else None)
                     for iCur in parentIndexRevPerm ]
+        self.eval_levels = None
+        self.prefix_trie = None
+        self._evalTrie = None #trie indices are no longer valid
         assert(self.myFinalToParentFinalMap is None)
         assert(self.parentIndexMap is None)
 
@@ -2177,8 +2177,8 @@ class LindbladParameterizedGate(Gate):
         #Assume gate in in the pauli-product basis for now, just for
         # simplicity.  I think everything should work fine in any other
         # basis with the same trace(BiBj) = delta_ij property (e.g. Gell-Mann)
-        ppToStd = _bt.pp_to_std_transform_matrix(d)
-        self.leftTrans  = _np.linalg.inv(ppToStd)
+        ppToStd, stdToPP = _bt.basis_transform_matrices("pp", d)
+        self.leftTrans  = stdToPP
         self.rightTrans = ppToStd
 
         #initialize intermediate storage for matrix and for deriv computation
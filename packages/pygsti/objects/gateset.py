@@ -13,6 +13,9 @@ import itertools as _itertools
 import collections as _collections
 import warnings as _warnings
 import time as _time
+import os as _os
+import hashlib as _hashlib
+import pickle as _pickle
 
 from ..tools import matrixtools as _mt
 from ..tools import basistools as _bt
@@ -109,6 +112,8 @@ class GateSet(object):
         self._remainderlabel = remainder_label
         self._identitylabel = identity_label
         self._default_gauge_group = None
+        self._productStore = None #see set_product_reuse
+        self._calcType = "product" #see set_calc_type
 
         super(GateSet, self).__init__()
 
@@ -947,10 +952,92 @@ class GateSet(object):
 
 
     def _calc(self):
-        return _gscalc.GateSetCalculator(self._dim, self.gates, self.preps,
-                                         self.effects, self.povm_identity,
-                                         self.spamdefs, self._remainderlabel,
-                                         self._identitylabel)
+        calcClass = _gscalc.GateSetVectorCalculator \
+            if getattr(self,'_calcType','product') == "vector" \
+            else _gscalc.GateSetCalculator
+        return calcClass(self._dim, self.gates, self.preps,
+                         self.effects, self.povm_identity,
+                         self.spamdefs, self._remainderlabel,
+                         self._identitylabel,
+                         getattr(self,'_productStore',None))
+
+    def set_calc_type(self, calcType="product"):
+        """
+        Set how this gate set computes bulk probabilities.
+
+        Parameters
+        ----------
+        calcType : {"product", "vector"}
+            With "product" (the default), the products of the gate matrices
+            of each gate string are computed (and shared between strings by
+            an evaluation tree) and then contracted with the SPAM vectors.
+            With "vector", each state preparation vector is instead
+            propagated through the gate strings, sharing common prefixes,
+            which needs only matrix-vector products.  This is faster for
+            probability-only computations (e.g. `bulk_fill_probs`,
+            `bulk_probs`, and so data generation and log-likelihood
+            evaluation), especially for larger gate dimensions.  Derivatives
+            and Hessians are always computed using products.
+
+        Returns
+        -------
+        None
+        """
+        if calcType not in ("product","vector"):
+            raise ValueError("Invalid calcType: %s" % calcType)
+        self._calcType = calcType
+
+    def set_product_reuse(self, bReuse=True, maxCaches=1, maxBytes=None):
+        """
+        Turn on or off the reuse of product caches between evaluations.
+
+        When on, this gate set keeps copies of the product caches computed
+        for the evaluation trees it is given (e.g. by `bulk_fill_probs` or
+        `bulk_fill_dprobs`).  When the same tree is evaluated again, a cache
+        computed from the same gates is reused outright (e.g. when the
+        probabilities and then their derivatives are computed at the same
+        point) and otherwise only the elements whose gate strings contain
+        gates that have changed (e.g. via `from_vector`) are recomputed,
+        which saves time when only some gate parameters change, as in
+        finite-difference checks or per-gate optimization moves.  This
+        costs the memory of the kept caches.  The results are identical to
+        those computed without reuse.
+
+        Parameters
+        ----------
+        bReuse : bool, optional
+            Whether to reuse product caches.  Calling this function (with
+            either value) discards any kept caches and resets the counts
+            returned by `get_product_reuse_counts`.
+
+        maxCaches : int, optional
+            The maximum number of caches (for different gate values) kept
+            for each evaluation tree.  The least recently used are discarded.
+
+        maxBytes : int, optional
+            The maximum total memory, in bytes, of the kept caches.  None
+            means there's no limit.
+
+        Returns
+        -------
+        None
+        """
+        self._productStore = _gscalc.ProductCacheStore(maxCaches, maxBytes) \
+            if bReuse else None
+
+    def get_product_reuse_counts(self):
+        """
+        Get how many (non-initial) evaluation tree elements have been reused
+        and computed since `set_product_reuse` was called.
+
+        Returns
+        -------
+        nReused, nComputed : int
+            Zeros if product-cache reuse is off.
+        """
+        store = getattr(self,'_productStore',None)
+        if store is None: return 0,0
+        return store.num_reused, store.num_computed
 
     def product(self, gatestring, bScale=False):
         """
@@ -1240,7 +1327,8 @@ class GateSet(object):
 
     def bulk_evaltree_from_resources(self, gatestring_list, comm=None, memLimit=None,
                                      distributeMethod="gatestrings", subcalls=[],
-                                     verbosity=0):
+                                     verbosity=0, germPowers=False, cacheDir=None,
+                                     nThreads=None, baseTree=None):
         """
         Create an evaluation tree based on available memory and CPUs.
 
@@ -1277,6 +1365,30 @@ class GateSet(object):
         verbosity : int, optional
             How much detail to send to stdout.
 
+        germPowers : bool, optional
+            Whether to compute repeated germs by repeated squaring (see
+            `EvalTree.initialize`).
+
+        cacheDir : str, optional
+            A directory used to persist evaluation trees between runs.  When
+            not None, the returned tree and parameter block sizes are read
+            from a file in this directory if one exists for the same gate
+            strings, gate & SPAM labels, number of parameters, `memLimit`,
+            number of processors, `distributeMethod`, `subcalls` and
+            `germPowers`; otherwise they are computed and written to it.
+
+        nThreads : int, optional
+            The number of threads each processor will use to compute the
+            Bulk_* functions (see `bulk_fill_probs`).  When greater than 1,
+            the gate strings ("gatestrings" distribution) or the parameters
+            ("deriv" distribution) are divided into this many times more
+            groups so that each thread is given a subtree or parameter block.
+
+        baseTree : EvalTree, optional
+            An un-split tree which is extended in place to evaluate all of
+            `gatestring_list`, instead of building a new tree from scratch
+            (see `bulk_evaltree`).
+
         Returns
         -------
         evt : EvalTree
@@ -1321,6 +1433,20 @@ class GateSet(object):
         num_params = self.num_params()
         dim = self._dim
         evt_cache = {} # cache of eval trees based on # min subtrees, to avoid re-computation
+
+        if cacheDir is not None:
+            cacheFile = _os.path.join(cacheDir, "evaltree_%s.pkl" % self._evaltree_cache_key(
+                gatestring_list, memLimit, nprocs, distributeMethod, subcalls, germPowers,
+                nThreads))
+            bCached = _os.path.exists(cacheFile)
+            if comm is not None: bCached = comm.bcast(bCached, root=0) #so all procs agree
+            if bCached:
+                with open(cacheFile,"rb") as f:
+                    paramBlkSize1, paramBlkSize2 = _pickle.load(f)
+                    evt = _evaltree.EvalTree(); evt.load(f)
+                printer.log("Loaded evaluation tree with %d subtrees from %s" %
+                            (len(evt.get_sub_trees()), cacheFile))
+                return evt, paramBlkSize1, paramBlkSize2
         floatSize = 8 # in bytes: TODO: a better way
         C = 1.0/(1024.0**3)
 
@@ -1353,7 +1479,8 @@ class GateSet(object):
             if not fastCacheSz:
                 #Slower (but more accurate way)
                 if ng not in evt_cache: evt_cache[ng] = self.bulk_evaltree(
-                    gatestring_list,minSubtrees=ng,verbosity=printer-1)
+                    gatestring_list,minSubtrees=ng,verbosity=printer-1,
+                    germPowers=germPowers, baseTree=baseTree)
                 tstTree = evt_cache[ng]
                 cacheSize = max([len(s) for s in tstTree.get_sub_trees()])
             else:
@@ -1377,6 +1504,15 @@ class GateSet(object):
                     mem += cacheSize # scale cache
                     mem += cacheSize # scale vals
 
+                elif fnName == "bulk_dprobs_by_subtree":
+                    #Note: includes "results" memory since this is allocated within
+                    # the generator and yielded, *not* allocated by the user.
+                    mem += cacheSize * nspam * (num_params + 1) # dprobs & probs results
+                    mem += cacheSize * wrtLen1 * dim * dim # dproduct cache
+                    mem += cacheSize * dim * dim # product cache
+                    mem += cacheSize # scale cache
+                    mem += cacheSize # scale vals
+
                 elif fnName == "bulk_fill_hprobs":
                     mem += cacheSize * wrtLen1 * wrtLen2 * dim * dim # hproduct cache
                     mem += cacheSize * (wrtLen1 + wrtLen2) * dim * dim # dproduct cache
@@ -1397,6 +1533,7 @@ class GateSet(object):
 
                 else:
                     raise ValueError("Unknown subcall name: %s" % fnName)
+            mem *= nThreadGroups # concurrent threads each hold their own caches
             
             if verb == 1:
                 fc_est_str = " (%.2fGB fc)" % (memEstimate(ng,np1,np2,Ng,True)*C)\
@@ -1420,9 +1557,11 @@ class GateSet(object):
             return mem * floatSize
 
 
+        nThreadGroups = max(nThreads or 1, 1) # subtrees/param blocks per processor group
+
         if distributeMethod == "gatestrings":
             np1 = 1; np2 = 1; Ng = nprocs
-            ng = nprocs
+            ng = nprocs * nThreadGroups
             if memLimit is not None:
                 #Increase ng in amounts of Ng (so ng % Ng == 0).  Start
                 # with fast cacheSize computation then switch to slow
@@ -1473,6 +1612,7 @@ class GateSet(object):
                     ng = Ng = set_Ng(nprocs / num_params)
                 else: 
                     np1 = nprocs
+            np1 = min(np1 * nThreadGroups, num_params) #give each thread a block
 
             if memLimit is not None:
 
@@ -1561,12 +1701,34 @@ class GateSet(object):
                 assert(abs(blkSizeTest-paramBlkSize2) < 1e-3) 
                   #all procs should have *same* paramBlkSize2
 
+        if cacheDir is not None and (comm is None or comm.Get_rank() == 0):
+            if not _os.path.isdir(cacheDir): _os.makedirs(cacheDir)
+            tmpFile = "%s.%d.tmp" % (cacheFile, _os.getpid())
+            with open(tmpFile,"wb") as f:
+                _pickle.dump((paramBlkSize1, paramBlkSize2), f, _pickle.HIGHEST_PROTOCOL)
+                evt.save(f)
+            _os.rename(tmpFile, cacheFile) #so other processes never read a partial file
+
         return evt, paramBlkSize1, paramBlkSize2
 
 
+    def _evaltree_cache_key(self, gatestring_list, memLimit, nprocs,
+                            distributeMethod, subcalls, germPowers, nThreads):
+        """ A hash of everything that determines bulk_evaltree_from_resources's result """
+        h = _hashlib.sha1()
+        for x in (list(self.gates.keys()), self.get_spam_labels(), self.num_params(),
+                  self._dim, memLimit, nprocs, distributeMethod, sorted(subcalls),
+                  germPowers, nThreads, len(gatestring_list)):
+            h.update(repr(x).encode('utf-8'))
+        for gs in gatestring_list:
+            h.update((" ".join(gs) + "\n").encode('utf-8'))
+        return h.hexdigest()
+
+
 
     def bulk_evaltree(self, gatestring_list, minSubtrees=None, maxTreeSize=None,
-                      numSubtreeComms=1, verbosity=0):
+                      numSubtreeComms=1, verbosity=0, check=True,
+                      germPowers=False, baseTree=None):
         """
         Create an evaluation tree for all the gate strings in gatestring_list.
 
@@ -1594,6 +1756,25 @@ class GateSet(object):
         verbosity : int, optional
             How much detail to send to stdout.
 
+        check : bool, optional
+            Whether to verify that the constructed tree reproduces
+            `gatestring_list` (see `EvalTree.initialize`).
+
+        germPowers : bool, optional
+            Whether to look for repeated germs, as in long-sequence GST gate
+            strings, and compute them by repeated squaring so that germ^n
+            takes O(log n) instead of O(n) products (see
+            `EvalTree.initialize`).
+
+        baseTree : EvalTree, optional
+            If not None, an un-split tree whose final gate strings are the
+            first `baseTree.num_final_strings()` (possibly zero, for a new
+            `EvalTree()`) elements of `gatestring_list`.  It is extended in
+            place with the remaining elements (see `EvalTree.add_gatestrings`)
+            and a copy of it is returned (split as needed), so that trees for a
+            sequence of nested gate string lists, e.g. those of successive
+            long-sequence GST iterations, are built incrementally.
+
         Returns
         -------
         EvalTree
@@ -1601,8 +1782,22 @@ class GateSet(object):
         """
         tm = _time.time()
         printer = VerbosityPrinter.build_printer(verbosity)
-        evalTree = _evaltree.EvalTree()
-        evalTree.initialize([""] + list(self.gates.keys()), gatestring_list, numSubtreeComms)
+        if baseTree is None:
+            evalTree = _evaltree.EvalTree()
+            evalTree.initialize([""] + list(self.gates.keys()), gatestring_list,
+                                numSubtreeComms, check, germPowers)
+        else:
+            nBase = baseTree.num_final_strings()
+            if len(baseTree) == 0: # a new EvalTree
+                baseTree.initialize([""] + list(self.gates.keys()), gatestring_list,
+                                    numSubtreeComms, check, germPowers)
+            elif nBase <= len(gatestring_list):
+                baseTree.add_gatestrings(gatestring_list[nBase:], check, germPowers)
+            else:
+                raise ValueError("baseTree has more gate strings (%d) than gatestring_list (%d)"
+                                 % (nBase, len(gatestring_list)))
+            evalTree = baseTree.copy() # so baseTree stays un-split
+            evalTree.distribution['numSubtreeComms'] = numSubtreeComms
 
         printer.log("bulk_evaltree: created initial tree (%d strs) in %.0fs" %
                     (len(gatestring_list),_time.time()-tm)); tm = _time.time()
@@ -1625,7 +1820,7 @@ class GateSet(object):
         return evalTree
 
 
-    def bulk_product(self, evalTree, bScale=False, comm=None):
+    def bulk_product(self, evalTree, bScale=False, comm=None, bBatch=False):
         """
         Compute the products of many gate strings at once.
 
@@ -1643,6 +1838,11 @@ class GateSet(object):
            across multiple processors.  This is done over gate strings when a
            *split* evalTree is given, otherwise no parallelization is performed.
 
+        bBatch : bool, optional
+           When True, evaluate the tree one dependency level at a time using
+           stacked matrix products (see `EvalTree.get_evaluation_levels`)
+           instead of one product per tree node.
+
 
         Returns
         -------
@@ -1657,7 +1857,7 @@ class GateSet(object):
             the scaling that needs to be applied to the resulting products
             (final_product[i] = scaleValues[i] * prods[i]).
         """
-        return self._calc().bulk_product(evalTree, bScale, comm)
+        return self._calc().bulk_product(evalTree, bScale, comm, bBatch)
 
 
     def bulk_dproduct(self, evalTree, flat=False, bReturnProds=False,
@@ -2141,7 +2341,8 @@ class GateSet(object):
 
 
     def bulk_fill_probs(self, mxToFill, spam_label_rows,
-                       evalTree, clipTo=None, check=False, comm=None):
+                       evalTree, clipTo=None, check=False, comm=None,
+                       bBatch=False, nThreads=None):
         """
         Identical to bulk_probs(...) except results are
         placed into rows of a pre-allocated array instead
@@ -2180,19 +2381,29 @@ class GateSet(object):
            across multiple processors.  Distribution is performed over
            subtrees of evalTree (if it is split).
 
+        bBatch : bool, optional
+           When True, evaluate the product cache of each (sub-)tree one
+           dependency level at a time using stacked matrix products (see
+           `EvalTree.get_evaluation_levels`) instead of one product per node.
+
+        nThreads : int, optional
+           When greater than 1, the (local) subtrees of evalTree are evaluated
+           concurrently using this many threads.
 
         Returns
         -------
         None
         """
         return self._calc().bulk_fill_probs(mxToFill, spam_label_rows,
-                                            evalTree, clipTo, check, comm)
+                                            evalTree, clipTo, check, comm,
+                                            bBatch, nThreads)
 
 
     def bulk_fill_dprobs(self, mxToFill, spam_label_rows,
                          evalTree, prMxToFill=None,clipTo=None,
                          check=False,comm=None, wrtBlockSize=None,
-                         profiler=None, gatherMemLimit=None):
+                         profiler=None, gatherMemLimit=None, bBatch=False,
+                         nThreads=None):
 
         """
         Identical to bulk_dprobs(...) except results are
@@ -2257,6 +2468,16 @@ class GateSet(object):
           A memory limit in bytes to impose upon the "gather" operations
           performed as a part of MPI processor syncronization.
 
+        bBatch : bool, optional
+          When True, evaluate the product and derivative caches one dependency
+          level at a time using stacked products over all the nodes of a level
+          (see `EvalTree.get_evaluation_levels`) instead of node by node.
+
+        nThreads : int, optional
+          When greater than 1, use this many threads to evaluate the (local)
+          subtrees of evalTree concurrently or, when there is only a single
+          local subtree, its blocks of derivative columns (see wrtBlockSize).
+
 
         Returns
         -------
@@ -2265,14 +2486,15 @@ class GateSet(object):
         return self._calc().bulk_fill_dprobs(mxToFill, spam_label_rows,
                                              evalTree, prMxToFill, clipTo,
                                              check, comm, None, wrtBlockSize,
-                                             profiler, gatherMemLimit)
+                                             profiler, gatherMemLimit, bBatch,
+                                             nThreads)
 
 
     def bulk_fill_hprobs(self, mxToFill, spam_label_rows,
                          evalTree=None, prMxToFill=None, derivMxToFill=None,
                          clipTo=None, check=False, comm=None, 
                          wrtBlockSize1=None, wrtBlockSize2=None,
-                         gatherMemLimit=None):
+                         gatherMemLimit=None, bBatch=False):
 
         """
         Identical to bulk_hprobs(...) except results are
@@ -2342,6 +2564,11 @@ class GateSet(object):
           A memory limit in bytes to impose upon the "gather" operations
           performed as a part of MPI processor syncronization.
 
+        bBatch : bool, optional
+          When True, evaluate the product, derivative and hessian caches one
+          dependency level at a time using stacked products over all the nodes
+          of a level (see `EvalTree.get_evaluation_levels`) instead of node by
+          node.
 
         Returns
         -------
@@ -2350,7 +2577,66 @@ class GateSet(object):
         return self._calc().bulk_fill_hprobs(mxToFill, spam_label_rows,
                                      evalTree, prMxToFill, derivMxToFill, None,
                                      clipTo, check, comm, None, None,
-                                     wrtBlockSize1,wrtBlockSize2,gatherMemLimit)
+                                     wrtBlockSize1,wrtBlockSize2,gatherMemLimit,
+                                     bBatch)
+
+
+    def bulk_dprobs_by_subtree(self, spam_label_rows, evalTree, clipTo=None,
+                               check=False, comm=None, wrtBlockSize=None,
+                               profiler=None, gatherMemLimit=None, nThreads=None):
+        """
+        Constructs a generator that computes the derivatives of the
+        probabilities generated by the gate sequences given by evalTree
+        one sub-tree at a time.
+
+        This routine can be useful when memory constraints make holding the
+        derivatives of all the gate sequences at once impractical, and one is
+        able to reduce the results of a single sub-tree at a time (e.g. to
+        accumulate J^T J for a least-squares optimization).
+
+        Parameters
+        ----------
+        spam_label_rows : dictionary
+          a dictionary with keys == spam labels and values which
+          are integer row indices into the generated arrays, specifying the
+          correspondence between their rows and spam labels.
+
+        evalTree : EvalTree
+           given by a prior call to bulk_evaltree.  Specifies the gate strings
+           to compute the bulk operation on.  Usually this tree is split, as
+           each of its sub-trees gives one generated block.
+
+        clipTo : 2-tuple, optional
+           (min,max) to clip the generated probabilities to if not None.
+
+        check : boolean, optional
+          If True, perform extra checks within code to verify correctness,
+          generating warnings when checks fail.  Used for testing, and runs
+          much slower when True.
+
+        comm : mpi4py.MPI.Comm, optional
+           When not None, an MPI communicator for distributing the computation
+           across multiple processors.  Each sub-tree's block is generated
+           only on the processor that owns it, so that every gate string is
+           generated by exactly one processor.  All the processors of `comm`
+           must iterate over the generator.
+
+        wrtBlockSize, profiler, gatherMemLimit, nThreads
+           Same as in bulk_fill_dprobs, applied to each sub-tree.
+
+        Returns
+        -------
+        block_generator
+          A generator which, when iterated, yields the 3-tuple
+          `(finalSlice, dprobs, probs)` for each of this processor's
+          sub-trees, where `finalSlice` is the slice of evalTree's final gate
+          strings (in computation order) the sub-tree evaluates, and `dprobs`
+          and `probs` are what `bulk_fill_dprobs` would place in
+          `mxToFill[:,finalSlice,:]` and `prMxToFill[:,finalSlice]`.
+        """
+        return self._calc().bulk_dprobs_by_subtree(
+            spam_label_rows, evalTree, clipTo, check, comm, wrtBlockSize,
+            profiler, gatherMemLimit, nThreads)
 
 
     def bulk_hprobs_by_block(self, spam_label_rows, evalTree, wrtSlicesList,
@@ -2609,6 +2895,10 @@ class GateSet(object):
         newGateset._remainderlabel = self._remainderlabel
         newGateset._identitylabel = self._identitylabel
         newGateset._default_gauge_group = self._default_gauge_group
+        newGateset._calcType = getattr(self,'_calcType','product')
+        if getattr(self,'_productStore',None) is not None: #(kept caches are not copied)
+            newGateset.set_product_reuse(True, self._productStore.maxCaches,
+                                         self._productStore.maxBytes)
         return newGateset
 
     def __str__(self):
@@ -25,6 +25,7 @@ class GaugeGroup(object):
         def __init__(self): pass
         def get_transform_matrix(self): return None
         def get_transform_matrix_inverse(self): return None
+        def deriv_wrt_params(self): return _np.empty((0,0),'d')
         def to_vector(self): return _np.array([],'d')
         def from_vector(self,v): pass
 
@@ -58,6 +59,13 @@ class GateGaugeGroup(GaugeGroup):
                 self._inv_matrix = _np.linalg.inv(_np.asarray(self.gate))
             return self._inv_matrix
 
+        def deriv_wrt_params(self):
+            """
+            The derivative of the (flattened) transform matrix with respect
+            to this element's parameters, a (dim**2, num_params) array.
+            """
+            return self.gate.deriv_wrt_params()
+
         def to_vector(self):
             return self.gate.to_vector()
 
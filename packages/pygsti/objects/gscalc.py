@@ -11,6 +11,8 @@ import numpy as _np
 import numpy.linalg as _nla
 import time as _time
 import collections as _collections
+import threading as _threading
+import weakref as _weakref
 
 from ..tools import gatetools as _gt
 from ..tools import mpitools as _mpit
@@ -24,6 +26,116 @@ PSMALL = 1e-100
 DSMALL = 1e-100
 HSMALL = 1e-100
 
+class ProductCacheStore(object):
+    """
+    Remembers the product caches of evaluation trees (and the gate matrices
+    they were computed from) so that a later computation for the same tree
+    either reuses a cache computed from the same gates or only needs to
+    recompute the products of gate strings containing gates which have
+    changed.  A store is held by a GateSet (see `GateSet.set_product_reuse`)
+    and given to the GateSetCalculators it creates.  The least recently
+    used caches are discarded when the store is full.
+    """
+
+    def __init__(self, maxCaches=1, maxBytes=None):
+        """
+        Create a new, empty, store.
+
+        Parameters
+        ----------
+        maxCaches : int, optional
+            The maximum number of caches kept for each evaluation tree.
+
+        maxBytes : int, optional
+            The maximum total size of the kept caches, in bytes.  None means
+            there is no limit.
+        """
+        self.maxCaches = maxCaches
+        self.maxBytes = maxBytes
+        self.records = _collections.OrderedDict()
+          # (id(evalTree), serial) => (weakref(evalTree), evalOrder, gates, prodCache, scaleCache),
+          # from least to most recently used
+        self.num_bytes = 0
+        self.num_reused = 0   # number of non-initial tree nodes copied from stored caches
+        self.num_computed = 0 # number of non-initial tree nodes computed
+        self._serial = 0
+        self._lock = _threading.Lock()
+
+    def __getstate__(self):
+        # stored caches (and counts) are not pickled or copied
+        return {'maxCaches': self.maxCaches, 'maxBytes': self.maxBytes}
+
+    def __setstate__(self, stateDict):
+        self.__init__(stateDict.get('maxCaches',1), stateDict.get('maxBytes',None))
+
+    def _tree_keys(self, evalTree):
+        """ The keys of evalTree's (valid) records, most recently used first """
+        keys = [ k for k,rec in self.records.items() if k[0] == id(evalTree) and
+                 rec[0]() is evalTree and rec[1] is evalTree.eval_order ]
+        return keys[::-1]
+
+    def lookup(self, evalTree, gates):
+        """
+        Find the stored cache for `evalTree` computed from gates most like
+        `gates`, a dictionary of gate matrices.
+
+        Returns
+        -------
+        key, changedLabels, prodCache, scaleCache
+            The record's key (see :method:`touch`), the labels of the gates
+            differing from those the cache was computed from and the (stored,
+            *not* copied) caches; or None if there is no cache for `evalTree`.
+        """
+        best = None
+        with self._lock:
+            for key in self._tree_keys(evalTree):
+                _,_,prevGates,prodCache,scaleCache = self.records[key]
+                changedLabels = [ lbl for lbl,gate in gates.items()
+                                  if lbl not in prevGates or
+                                     not _np.array_equal(gate, prevGates[lbl]) ]
+                if best is None or len(changedLabels) < len(best[1]):
+                    best = (key, changedLabels, prodCache, scaleCache)
+                    if len(changedLabels) == 0: break
+        return best
+
+    def touch(self, key):
+        """ Mark the record with key `key` as the most recently used """
+        with self._lock:
+            if key in self.records: self.records[key] = self.records.pop(key)
+
+    def store(self, evalTree, gates, prodCache, scaleCache):
+        """ Store (copies of) the gate matrices and product cache for `evalTree` """
+        nbytes = prodCache.nbytes + scaleCache.nbytes
+        if self.maxBytes is not None and nbytes > self.maxBytes: return
+        rec = (_weakref.ref(evalTree), evalTree.eval_order,
+               { lbl: _np.array(gate) for lbl,gate in gates.items() },
+               prodCache.copy(), scaleCache.copy())
+
+        with self._lock:
+            #remove invalid records and this tree's least recently used ones
+            treeKeys = self._tree_keys(evalTree)
+            for key in list(self.records.keys()):
+                if self.records[key][0]() is None or (key[0] == id(evalTree) and key not in
+                                                      treeKeys[0:max(self.maxCaches-1,0)]):
+                    self._remove(key)
+            while self.maxBytes is not None and self.num_bytes + nbytes > self.maxBytes:
+                self._remove(next(iter(self.records))) #least recently used
+
+            self._serial += 1
+            self.records[(id(evalTree),self._serial)] = rec
+            self.num_bytes += nbytes
+
+    def _remove(self, key):
+        rec = self.records.pop(key)
+        self.num_bytes -= rec[3].nbytes + rec[4].nbytes
+
+    def add_counts(self, nReused, nComputed):
+        """ Accumulate the numbers of reused and computed tree nodes """
+        with self._lock:
+            self.num_reused += nReused
+            self.num_computed += nComputed
+
+
 class GateSetCalculator(object):
     """
     Encapsulates a calculation tool used by gate set objects to perform product
@@ -36,7 +148,7 @@ class GateSetCalculator(object):
     """
 
     def __init__(self, dim, gates, preps, effects, povm_identity, spamdefs,
-                 remainderLabel, identityLabel):
+                 remainderLabel, identityLabel, productStore=None):
         """
         Construct a new GateSetCalculator object.
 
@@ -71,6 +183,11 @@ class GateSetCalculator(object):
 
         identityLabel : string
             The string used to designate the identity POVM vector.
+
+        productStore : ProductCacheStore, optional
+            If not None, product caches are looked up in and saved to this
+            store, so that only the products involving gates which have
+            changed since a tree was last evaluated are recomputed.
         """
         self._remainderLabel = remainderLabel
         self._identityLabel = identityLabel
@@ -80,6 +197,7 @@ class GateSetCalculator(object):
         self.effects = effects
         self.povm_identity = povm_identity
         self.spamdefs = spamdefs
+        self.productStore = productStore
         self.assumeSumToOne = bool( (self._remainderLabel,self._remainderLabel) in list(spamdefs.values()))
           #Whether spamdefs contains the value ("remainder", "remainder"),
           #  which specifies a spam label that generates probabilities such that
@@ -958,7 +1076,7 @@ class GateSetCalculator(object):
         return hprobs
 
 
-    def _compute_product_cache(self, evalTree, comm=None):
+    def _compute_product_cache(self, evalTree, comm=None, bBatch=False):
         """
         Computes a tree of products in a linear cache space. Will *not*
         parallelize computation, even if given a split tree (since there's
@@ -966,6 +1084,14 @@ class GateSetCalculator(object):
         those of the sub-trees).  Note also that there would be no memory savings
         from using a split tree.  In short, parallelization should be done at a
         higher level.
+
+        When `bBatch` is True, the tree is evaluated one dependency level at
+        a time (see `EvalTree.get_evaluation_levels`) using a single stacked
+        matrix product per level instead of one `dot` per tree node.
+
+        When this calculator has a `productStore` holding a previous product
+        cache for `evalTree`, only the elements whose gate strings contain
+        gates that have changed since then are recomputed.
         """
 
         dim = self.dim
@@ -984,8 +1110,21 @@ class GateSetCalculator(object):
             _warnings.warn("Ignoring tree splitting in product cache calc.")
 
         cacheSize = len(evalTree)
-        prodCache = _np.zeros( (cacheSize, dim, dim) )
-        scaleCache = _np.zeros( cacheSize, 'd' )
+        toCompute = None # which elements to compute (None => all of them)
+        gateMxs = { lbl: gate.base for lbl,gate in self.gates.items() }
+        prev = self.productStore.lookup(evalTree, gateMxs) \
+            if (self.productStore is not None) else None
+        if prev is not None:
+            prevKey, changedLabels, prevProdCache, prevScaleCache = prev
+            toCompute = evalTree.get_nodes_containing(changedLabels)
+            if len(changedLabels) > 0 and _np.all(toCompute[evalTree.get_evaluation_order()]):
+                prev = toCompute = None # no stored products can be reused
+        if prev is not None:
+            prodCache = prevProdCache.copy()
+            scaleCache = prevScaleCache.copy()
+        else:
+            prodCache = _np.zeros( (cacheSize, dim, dim) )
+            scaleCache = _np.zeros( cacheSize, 'd' )
 
         #First element of cache are given by evalTree's initial single- or zero-gate labels
         for i,gateLabel in zip(evalTree.get_init_indices(), evalTree.get_init_labels()):
@@ -998,37 +1137,92 @@ class GateSetCalculator(object):
                 prodCache[i] = gate / nG
                 scaleCache[i] = _np.log(nG)
 
-        #evaluate gate strings using tree (skip over the zero and single-gate-strings)
-        #cnt = 0
-        for i in evalTree.get_evaluation_order():
-            # combine iLeft + iRight => i
-            # LEXICOGRAPHICAL VS MATRIX ORDER Note: we reverse iLeft <=> iRight from evalTree because
-            # (iRight,iLeft,iFinal) = tup implies gatestring[i] = gatestring[iLeft] + gatestring[iRight], but we want:
-            (iRight,iLeft) = evalTree[i]   # since then matrixOf(gatestring[i]) = matrixOf(gatestring[iLeft]) * matrixOf(gatestring[iRight])
-            L,R = prodCache[iLeft], prodCache[iRight]
-            prodCache[i] = _np.dot(L,R)
-            scaleCache[i] = scaleCache[iLeft] + scaleCache[iRight]
-
-            if prodCache[i].max() < PSMALL and prodCache[i].min() > -PSMALL:
-                nL,nR = max(_nla.norm(L), _np.exp(-scaleCache[iLeft]),1e-300), max(_nla.norm(R), _np.exp(-scaleCache[iRight]),1e-300)
-                sL, sR = L/nL, R/nR
-                prodCache[i] = _np.dot(sL,sR); scaleCache[i] += _np.log(nL) + _np.log(nR)
+        evalOrder = evalTree.get_evaluation_order()
+        if toCompute is not None:
+            evalOrder = [ i for i in evalOrder if toCompute[i] ]
+
+        if bBatch:
+            self._compute_product_cache_levels(evalTree, prodCache, scaleCache, toCompute)
+        else:
+            #evaluate gate strings using tree (skip over the zero and single-gate-strings)
+            #cnt = 0
+            for i in evalOrder:
+                # combine iLeft + iRight => i
+                # LEXICOGRAPHICAL VS MATRIX ORDER Note: we reverse iLeft <=> iRight from evalTree because
+                # (iRight,iLeft,iFinal) = tup implies gatestring[i] = gatestring[iLeft] + gatestring[iRight], but we want:
+                (iRight,iLeft) = evalTree[i]   # since then matrixOf(gatestring[i]) = matrixOf(gatestring[iLeft]) * matrixOf(gatestring[iRight])
+                L,R = prodCache[iLeft], prodCache[iRight]
+                prodCache[i] = _np.dot(L,R)
+                scaleCache[i] = scaleCache[iLeft] + scaleCache[iRight]
+
+                if prodCache[i].max() < PSMALL and prodCache[i].min() > -PSMALL:
+                    nL,nR = max(_nla.norm(L), _np.exp(-scaleCache[iLeft]),1e-300), max(_nla.norm(R), _np.exp(-scaleCache[iRight]),1e-300)
+                    sL, sR = L/nL, R/nR
+                    prodCache[i] = _np.dot(sL,sR); scaleCache[i] += _np.log(nL) + _np.log(nR)
 
         #print "bulk_product DEBUG: %d rescalings out of %d products" % (cnt, len(evalTree))
 
         nanOrInfCacheIndices = (~_np.isfinite(prodCache)).nonzero()[0]  #may be duplicates (a list, not a set)
         assert( len(nanOrInfCacheIndices) == 0 ) # since all scaled gates start with norm <= 1, products should all have norm <= 1
 
+        if self.productStore is not None:
+            nTotal = len(evalTree.get_evaluation_order())
+            self.productStore.add_counts(nTotal - len(evalOrder), len(evalOrder))
+            if prev is not None and len(changedLabels) == 0:
+                self.productStore.touch(prevKey) # (already stored)
+            else:
+                self.productStore.store(evalTree, gateMxs, prodCache, scaleCache)
+
         return prodCache, scaleCache
 
 
+    def _compute_product_cache_levels(self, evalTree, prodCache, scaleCache,
+                                      toCompute=None):
+        """
+        Fills the non-initial elements of `prodCache` and `scaleCache` one
+        evaluation level at a time.  Performs the same products and
+        conditional rescalings as the node-by-node loop in
+        `_compute_product_cache`, but on stacks of matrices.  If `toCompute`
+        is not None, only the elements where this boolean array is True
+        are computed.
+        """
+        for indices, iRights, iLefts in evalTree.get_evaluation_levels():
+            if toCompute is not None:
+                sel = toCompute[indices]
+                if not _np.any(sel): continue
+                indices, iRights, iLefts = indices[sel], iRights[sel], iLefts[sel]
+            # LEXICOGRAPHICAL VS MATRIX ORDER Note: iLefts <=> iRights are
+            # reversed for the same reason as in _compute_product_cache
+            L,R = prodCache[iLefts], prodCache[iRights]
+            prods = _np.matmul(L,R)
+            scales = scaleCache[iLefts] + scaleCache[iRights]
+
+            small = _np.logical_and(prods.max(axis=(1,2)) < PSMALL,
+                                    prods.min(axis=(1,2)) > -PSMALL)
+            if _np.any(small):
+                # rescaling is rare, so compute norms exactly as the serial
+                # loop does (keeps the two paths' results identical)
+                iSmall = _np.nonzero(small)[0]
+                nL = _np.array([ max(_nla.norm(L[k]), _np.exp(-scaleCache[iLefts[k]]),1e-300) for k in iSmall ])
+                nR = _np.array([ max(_nla.norm(R[k]), _np.exp(-scaleCache[iRights[k]]),1e-300) for k in iSmall ])
+                prods[iSmall] = _np.matmul(L[iSmall] / nL[:,None,None], R[iSmall] / nR[:,None,None])
+                scales[iSmall] += _np.log(nL) + _np.log(nR)
+
+            prodCache[indices] = prods
+            scaleCache[indices] = scales
+
+
     def _compute_dproduct_cache(self, evalTree, prodCache, scaleCache,
-                                comm=None, wrtSlice=None, profiler=None):
+                                comm=None, wrtSlice=None, profiler=None,
+                                bBatch=False):
         """
         Computes a tree of product derivatives in a linear cache space. Will
         use derivative columns and then (and only when needed) a split tree
         to parallelize computation, since there are no memory savings
         from using a split tree.
+
+        When `bBatch` is True, all the nodes of an evaluation level are
+        processed at once (see `EvalTree.get_evaluation_levels`).
         """
 
         if profiler is None: profiler = _dummy_profiler
@@ -1070,7 +1264,8 @@ class GateSetCalculator(object):
                   #don't compute anything on "extra", i.e. rank != 0, cpus
 
             my_results = self._compute_dproduct_cache(
-                evalTree, prodCache, scaleCache, None, myDerivColSlice, profiler)
+                evalTree, prodCache, scaleCache, None, myDerivColSlice, profiler,
+                bBatch)
                 # pass None as comm, *not* mySubComm, since we can't do any
                 #  further parallelization
 
@@ -1099,27 +1294,31 @@ class GateSetCalculator(object):
 
         #profiler.print_mem("DEBUGMEM: POINT1"); profiler.comm.barrier()
 
-        #evaluate gate strings using tree (skip over the zero and single-gate-strings)
-        for i in evalTree.get_evaluation_order():
-            tm = _time.time()
-            # combine iLeft + iRight => i
-            # LEXICOGRAPHICAL VS MATRIX ORDER Note: we reverse iLeft <=> iRight from evalTree because
-            # (iRight,iLeft,iFinal) = tup implies gatestring[i] = gatestring[iLeft] + gatestring[iRight], but we want:
-            (iRight,iLeft) = evalTree[i]   # since then matrixOf(gatestring[i]) = matrixOf(gatestring[iLeft]) * matrixOf(gatestring[iRight])
-            L,R = prodCache[iLeft], prodCache[iRight]
-            dL,dR = dProdCache[iLeft], dProdCache[iRight]
-            dProdCache[i] = _np.dot(dL, R) + \
-                _np.swapaxes(_np.dot(L, dR),0,1) #dot(dS, T) + dot(S, dT)
-            profiler.add_time("compute_dproduct_cache: dots", tm)
-            profiler.add_count("compute_dproduct_cache: dots")
-
-            scale = scaleCache[i] - (scaleCache[iLeft] + scaleCache[iRight])
-            if abs(scale) > 1e-8: # _np.isclose(scale,0) is SLOW!
-                dProdCache[i] /= _np.exp(scale)
-                if dProdCache[i].max() < DSMALL and dProdCache[i].min() > -DSMALL:
-                    _warnings.warn("Scaled dProd small in order to keep prod managable.")
-            elif _np.count_nonzero(dProdCache[i]) and dProdCache[i].max() < DSMALL and dProdCache[i].min() > -DSMALL:
-                _warnings.warn("Would have scaled dProd but now will not alter scaleCache.")
+        if bBatch:
+            self._compute_dproduct_cache_levels(evalTree, prodCache, scaleCache,
+                                                dProdCache, profiler)
+        else:
+            #evaluate gate strings using tree (skip over the zero and single-gate-strings)
+            for i in evalTree.get_evaluation_order():
+                tm = _time.time()
+                # combine iLeft + iRight => i
+                # LEXICOGRAPHICAL VS MATRIX ORDER Note: we reverse iLeft <=> iRight from evalTree because
+                # (iRight,iLeft,iFinal) = tup implies gatestring[i] = gatestring[iLeft] + gatestring[iRight], but we want:
+                (iRight,iLeft) = evalTree[i]   # since then matrixOf(gatestring[i]) = matrixOf(gatestring[iLeft]) * matrixOf(gatestring[iRight])
+                L,R = prodCache[iLeft], prodCache[iRight]
+                dL,dR = dProdCache[iLeft], dProdCache[iRight]
+                dProdCache[i] = _np.dot(dL, R) + \
+                    _np.swapaxes(_np.dot(L, dR),0,1) #dot(dS, T) + dot(S, dT)
+                profiler.add_time("compute_dproduct_cache: dots", tm)
+                profiler.add_count("compute_dproduct_cache: dots")
+
+                scale = scaleCache[i] - (scaleCache[iLeft] + scaleCache[iRight])
+                if abs(scale) > 1e-8: # _np.isclose(scale,0) is SLOW!
+                    dProdCache[i] /= _np.exp(scale)
+                    if dProdCache[i].max() < DSMALL and dProdCache[i].min() > -DSMALL:
+                        _warnings.warn("Scaled dProd small in order to keep prod managable.")
+                elif _np.count_nonzero(dProdCache[i]) and dProdCache[i].max() < DSMALL and dProdCache[i].min() > -DSMALL:
+                    _warnings.warn("Would have scaled dProd but now will not alter scaleCache.")
 
         #profiler.print_mem("DEBUGMEM: POINT2"); profiler.comm.barrier()
 
@@ -1129,14 +1328,57 @@ class GateSetCalculator(object):
         return dProdCache
 
 
+    def _compute_dproduct_cache_levels(self, evalTree, prodCache, scaleCache,
+                                       dProdCache, profiler):
+        """
+        Fills the non-initial elements of `dProdCache` one evaluation level
+        at a time, using stacked products over all the nodes and derivative
+        columns of a level (see `_compute_dproduct_cache`).
+        """
+        for indices, iRights, iLefts in evalTree.get_evaluation_levels():
+            tm = _time.time()
+            # LEXICOGRAPHICAL VS MATRIX ORDER Note: iLefts <=> iRights are
+            # reversed for the same reason as in _compute_product_cache
+            L,R = prodCache[iLefts], prodCache[iRights]
+            dL,dR = dProdCache[iLefts], dProdCache[iRights]
+            nNodes, nDerivCols, dim, _ = dL.shape
+
+            # dot(dS, T) + dot(S, dT), where derivative columns are folded into
+            # the matrix dimensions so there's one (larger) product per node
+            dLR = _np.matmul(dL.reshape(nNodes,nDerivCols*dim,dim), R)
+            LdR = _np.matmul(L, _np.transpose(dR,(0,2,1,3)).reshape(nNodes,dim,nDerivCols*dim))
+            dProds = dLR.reshape(nNodes,nDerivCols,dim,dim) + \
+                _np.transpose(LdR.reshape(nNodes,dim,nDerivCols,dim),(0,2,1,3))
+            profiler.add_time("compute_dproduct_cache: dots", tm)
+            profiler.add_count("compute_dproduct_cache: dots", len(indices))
+
+            scales = scaleCache[indices] - (scaleCache[iLefts] + scaleCache[iRights])
+            bScaled = _np.abs(scales) > 1e-8
+            if _np.any(bScaled):
+                dProds[bScaled] /= _np.exp(scales[bScaled])[:,None,None,None]
+            if dProds.shape[1] > 0:
+                small = _np.logical_and(dProds.max(axis=(1,2,3)) < DSMALL,
+                                        dProds.min(axis=(1,2,3)) > -DSMALL)
+                if _np.any(_np.logical_and(small, bScaled)):
+                    _warnings.warn("Scaled dProd small in order to keep prod managable.")
+                if _np.any(_np.logical_and(small, ~bScaled)) and \
+                        _np.count_nonzero(dProds[_np.logical_and(small, ~bScaled)]):
+                    _warnings.warn("Would have scaled dProd but now will not alter scaleCache.")
+
+            dProdCache[indices] = dProds
+
+
     def _compute_hproduct_cache(self, evalTree, prodCache, dProdCache1,
                                 dProdCache2, scaleCache, comm=None,
-                                wrtSlice1=None, wrtSlice2=None):
+                                wrtSlice1=None, wrtSlice2=None, bBatch=False):
         """
         Computes a tree of product 2nd derivatives in a linear cache space. Will
         use derivative rows and columns and then (as needed) a split tree
         to parallelize computation, since there are no memory savings
         from using a split tree.
+
+        When `bBatch` is True, all the nodes of an evaluation level are
+        processed at once (see `EvalTree.get_evaluation_levels`).
         """
 
         dim = self.dim
@@ -1201,7 +1443,7 @@ class GateSetCalculator(object):
 
                 hProdCache[:,myDeriv1ColSlice,myDeriv2ColSlice] = self._compute_hproduct_cache(
                     evalTree, prodCache, dProdCache1[:,myDeriv1ColSlice], dProdCache2[:,myDeriv2ColSlice],
-                    scaleCache, None, myHessianSlice1, myHessianSlice2)
+                    scaleCache, None, myHessianSlice1, myHessianSlice2, bBatch)
                     # pass None as comm, *not* mySubSubComm, since we can't do any further parallelization
 
                 _mpit.gather_slices(deriv2Slices, deriv2Owners, hProdCache[:,myDeriv1ColSlice],
@@ -1212,7 +1454,7 @@ class GateSetCalculator(object):
                 #compute "Deriv1" row-derivatives distribution only; don't use column distribution
                 hProdCache[:,myDeriv1ColSlice] = self._compute_hproduct_cache(
                     evalTree, prodCache, dProdCache1[:,myDeriv1ColSlice], dProdCache2,
-                    scaleCache, None, myHessianSlice1, wrtSlice2)
+                    scaleCache, None, myHessianSlice1, wrtSlice2, bBatch)
                     # pass None as comm, *not* mySubComm (this is ok, see "if" condition above)
 
             _mpit.gather_slices(deriv1Slices, deriv1Owners, hProdCache, 1, comm)
@@ -1244,40 +1486,91 @@ class GateSetCalculator(object):
             #                           wrtFilter2=_slct.indices(wrtSlice2))
             #    hProdCache[i] = hgate / _np.exp(scaleCache[i])
 
-        #evaluate gate strings using tree (skip over the zero and single-gate-strings)
-        for i in evalTree.get_evaluation_order():
-
-            # combine iLeft + iRight => i
-            # LEXICOGRAPHICAL VS MATRIX ORDER Note: we reverse iLeft <=> iRight from evalTree because
-            # (iRight,iLeft,iFinal) = tup implies gatestring[i] = gatestring[iLeft] + gatestring[iRight], but we want:
-            (iRight,iLeft) = evalTree[i]   # since then matrixOf(gatestring[i]) = matrixOf(gatestring[iLeft]) * matrixOf(gatestring[iRight])
-            L,R = prodCache[iLeft], prodCache[iRight]
-            dL1,dR1 = dProdCache1[iLeft], dProdCache1[iRight]
-            dL2,dR2 = dProdCache2[iLeft], dProdCache2[iRight]
-            hL,hR = hProdCache[iLeft], hProdCache[iRight]
-              # Note: L, R = GxG ; dL,dR = vgs x GxG ; hL,hR = vgs x vgs x GxG
-
-            dLdRa = _np.swapaxes(_np.dot(dL1,dR2),1,2)
-            dLdRb = _np.swapaxes(_np.dot(dL2,dR1),1,2)
-            dLdR_sym = dLdRa + _np.swapaxes(dLdRb,0,1) 
-
-            hProdCache[i] = _np.dot(hL, R) + dLdR_sym + _np.transpose(_np.dot(L,hR),(1,2,0,3))
-
-            scale = scaleCache[i] - (scaleCache[iLeft] + scaleCache[iRight])
-            if abs(scale) > 1e-8: # _np.isclose(scale,0) is SLOW!
-                hProdCache[i] /= _np.exp(scale)
-                if hProdCache[i].max() < HSMALL and hProdCache[i].min() > -HSMALL:
-                    _warnings.warn("Scaled hProd small in order to keep prod managable.")
-            elif _np.count_nonzero(hProdCache[i]) and hProdCache[i].max() < HSMALL and hProdCache[i].min() > -HSMALL:
-                _warnings.warn("hProd is small (oh well!).")
+        if bBatch:
+            self._compute_hproduct_cache_levels(evalTree, prodCache, dProdCache1,
+                                                dProdCache2, scaleCache, hProdCache)
+        else:
+            #evaluate gate strings using tree (skip over the zero and single-gate-strings)
+            for i in evalTree.get_evaluation_order():
+
+                # combine iLeft + iRight => i
+                # LEXICOGRAPHICAL VS MATRIX ORDER Note: we reverse iLeft <=> iRight from evalTree because
+                # (iRight,iLeft,iFinal) = tup implies gatestring[i] = gatestring[iLeft] + gatestring[iRight], but we want:
+                (iRight,iLeft) = evalTree[i]   # since then matrixOf(gatestring[i]) = matrixOf(gatestring[iLeft]) * matrixOf(gatestring[iRight])
+                L,R = prodCache[iLeft], prodCache[iRight]
+                dL1,dR1 = dProdCache1[iLeft], dProdCache1[iRight]
+                dL2,dR2 = dProdCache2[iLeft], dProdCache2[iRight]
+                hL,hR = hProdCache[iLeft], hProdCache[iRight]
+                  # Note: L, R = GxG ; dL,dR = vgs x GxG ; hL,hR = vgs x vgs x GxG
+
+                dLdRa = _np.swapaxes(_np.dot(dL1,dR2),1,2)
+                dLdRb = _np.swapaxes(_np.dot(dL2,dR1),1,2)
+                dLdR_sym = dLdRa + _np.swapaxes(dLdRb,0,1) 
+
+                hProdCache[i] = _np.dot(hL, R) + dLdR_sym + _np.transpose(_np.dot(L,hR),(1,2,0,3))
+
+                scale = scaleCache[i] - (scaleCache[iLeft] + scaleCache[iRight])
+                if abs(scale) > 1e-8: # _np.isclose(scale,0) is SLOW!
+                    hProdCache[i] /= _np.exp(scale)
+                    if hProdCache[i].max() < HSMALL and hProdCache[i].min() > -HSMALL:
+                        _warnings.warn("Scaled hProd small in order to keep prod managable.")
+                elif _np.count_nonzero(hProdCache[i]) and hProdCache[i].max() < HSMALL and hProdCache[i].min() > -HSMALL:
+                    _warnings.warn("hProd is small (oh well!).")
 
         return hProdCache
 
 
+    def _compute_hproduct_cache_levels(self, evalTree, prodCache, dProdCache1,
+                                       dProdCache2, scaleCache, hProdCache):
+        """
+        Fills the non-initial elements of `hProdCache` one evaluation level
+        at a time, using stacked products over all the nodes and derivative
+        rows & columns of a level (see `_compute_hproduct_cache`).
+        """
+        for indices, iRights, iLefts in evalTree.get_evaluation_levels():
+            # LEXICOGRAPHICAL VS MATRIX ORDER Note: iLefts <=> iRights are
+            # reversed for the same reason as in _compute_product_cache
+            L,R = prodCache[iLefts], prodCache[iRights]
+            dL1,dR1 = dProdCache1[iLefts], dProdCache1[iRights]
+            dL2,dR2 = dProdCache2[iLefts], dProdCache2[iRights]
+            hL,hR = hProdCache[iLefts], hProdCache[iRights]
+              # Note: L, R = N x GxG ; dL,dR = N x vgs x GxG ; hL,hR = N x vgs x vgs x GxG
+            nNodes, n1, n2, dim, _ = hL.shape
+
+            # As in _compute_dproduct_cache_levels, derivative rows & columns
+            # are folded into the matrix dimensions of each node's products
+            dR1T = _np.transpose(dR1,(0,2,1,3)).reshape(nNodes,dim,n1*dim)
+            dR2T = _np.transpose(dR2,(0,2,1,3)).reshape(nNodes,dim,n2*dim)
+            dLdRa = _np.matmul(dL1.reshape(nNodes,n1*dim,dim), dR2T)
+            dLdRb = _np.matmul(dL2.reshape(nNodes,n2*dim,dim), dR1T)
+            dLdR_sym = _np.transpose(dLdRa.reshape(nNodes,n1,dim,n2,dim),(0,1,3,2,4)) + \
+                _np.transpose(dLdRb.reshape(nNodes,n2,dim,n1,dim),(0,3,1,2,4))
+
+            hLR = _np.matmul(hL.reshape(nNodes,n1*n2*dim,dim), R)
+            LhR = _np.matmul(L, _np.transpose(hR,(0,3,1,2,4)).reshape(nNodes,dim,n1*n2*dim))
+            hProds = hLR.reshape(nNodes,n1,n2,dim,dim) + dLdR_sym + \
+                _np.transpose(LhR.reshape(nNodes,dim,n1,n2,dim),(0,2,3,1,4))
+
+            scales = scaleCache[indices] - (scaleCache[iLefts] + scaleCache[iRights])
+            bScaled = _np.abs(scales) > 1e-8
+            if _np.any(bScaled):
+                hProds[bScaled] /= _np.exp(scales[bScaled])[:,None,None,None,None]
+            if hProds[0].size > 0:
+                small = _np.logical_and(hProds.max(axis=(1,2,3,4)) < HSMALL,
+                                        hProds.min(axis=(1,2,3,4)) > -HSMALL)
+                if _np.any(_np.logical_and(small, bScaled)):
+                    _warnings.warn("Scaled hProd small in order to keep prod managable.")
+                if _np.any(_np.logical_and(small, ~bScaled)) and \
+                        _np.count_nonzero(hProds[_np.logical_and(small, ~bScaled)]):
+                    _warnings.warn("hProd is small (oh well!).")
+
+            hProdCache[indices] = hProds
+
+
 ## END CACHE FUNCTIONS
 
 
-    def bulk_product(self, evalTree, bScale=False, comm=None):
+    def bulk_product(self, evalTree, bScale=False, comm=None, bBatch=False):
         """
         Compute the products of many gate strings at once.
 
@@ -1295,6 +1588,11 @@ class GateSetCalculator(object):
            across multiple processors.  This is done over gate strings when a
            *split* evalTree is given, otherwise no parallelization is performed.
 
+        bBatch : bool, optional
+           When True, evaluate the tree one dependency level at a time using
+           stacked matrix products (see `EvalTree.get_evaluation_levels`)
+           instead of one product per tree node.
+
         Returns
         -------
         prods : numpy array
@@ -1308,7 +1606,7 @@ class GateSetCalculator(object):
             the scaling that needs to be applied to the resulting products
             (final_product[i] = scaleValues[i] * prods[i]).
         """
-        prodCache, scaleCache = self._compute_product_cache(evalTree,comm)
+        prodCache, scaleCache = self._compute_product_cache(evalTree,comm,bBatch)
 
         #use cached data to construct return values
         Gs = evalTree.final_view(prodCache, axis=0)
@@ -2074,8 +2372,35 @@ class GateSetCalculator(object):
 
 
 
+    def _fill_probs_subtree(self, mxToFill, spam_label_rows, evalSubTree,
+                            fslc, comm, bBatch):
+        """ Fills mxToFill[:,fslc] with the probabilities of evalSubTree """
+        #Fill cache info
+        prodCache, scaleCache = self._compute_product_cache(evalSubTree, comm, bBatch)
+
+        #use cached data to final values
+        scaleVals = self._scaleExp( evalSubTree.final_view(scaleCache) )
+        Gs  = evalSubTree.final_view( prodCache, axis=0)
+          # ( nGateStrings, dim, dim )
+
+        def calc_and_fill(spamLabel, isp, fslc, pslc1, pslc2, sumInto):
+            old_err = _np.seterr(over='ignore')
+            rho,E = self._rhoE_from_spamLabel(spamLabel)
+            if sumInto:
+                mxToFill[isp,fslc] += self._probs_from_rhoE(spamLabel, rho,
+                                                          E, Gs, scaleVals)
+            else:
+                mxToFill[isp,fslc] =  self._probs_from_rhoE(spamLabel, rho,
+                                                          E, Gs, scaleVals)
+            _np.seterr(**old_err)
+
+        self._fill_result_tuple( (mxToFill,), spam_label_rows,
+                                 fslc, slice(None), slice(None), calc_and_fill )
+
+
     def bulk_fill_probs(self, mxToFill, spam_label_rows,
-                        evalTree, clipTo=None, check=False, comm=None):
+                        evalTree, clipTo=None, check=False, comm=None,
+                        bBatch=False, nThreads=None):
 
         """
         Identical to bulk_probs(...) except results are
@@ -2115,6 +2440,16 @@ class GateSetCalculator(object):
            across multiple processors.  Distribution is performed over
            subtrees of evalTree (if it is split).
 
+        bBatch : bool, optional
+           When True, evaluate the product cache of each (sub-)tree one
+           dependency level at a time using stacked matrix products (see
+           `EvalTree.get_evaluation_levels`) instead of one product per node.
+
+        nThreads : int, optional
+           When greater than 1, the (local) subtrees of evalTree are evaluated
+           concurrently using this many threads.  This only helps when
+           evalTree is split, and each thread holds its own subtree's caches.
+
         Returns
         -------
         None
@@ -2130,37 +2465,19 @@ class GateSetCalculator(object):
         #get distribution across subtrees (groups if needed)
         subtrees = evalTree.get_sub_trees()
         mySubTreeIndices, subTreeOwners, mySubComm = evalTree.distribute(comm)
+        if mySubComm is not None and mySubComm.Get_size() > 1:
+            nThreads = None # don't make concurrent calls using mySubComm
 
         #eval on each local subtree
-        for iSubTree in mySubTreeIndices:
+        def fill_subtree(iSubTree):
             evalSubTree = subtrees[iSubTree]
-            fslc = evalSubTree.final_slice(evalTree)
-
-            #Free memory from previous subtree iteration before computing caches
-            scaleVals = Gs = prodCache = scaleCache = None
-
-            #Fill cache info
-            prodCache, scaleCache = self._compute_product_cache(evalSubTree, mySubComm)
-
-            #use cached data to final values
-            scaleVals = self._scaleExp( evalSubTree.final_view(scaleCache) )
-            Gs  = evalSubTree.final_view( prodCache, axis=0)
-              # ( nGateStrings, dim, dim )
-
-            def calc_and_fill(spamLabel, isp, fslc, pslc1, pslc2, sumInto):
-                tm = _time.time()
-                old_err = _np.seterr(over='ignore')
-                rho,E = self._rhoE_from_spamLabel(spamLabel)
-                if sumInto:
-                    mxToFill[isp,fslc] += self._probs_from_rhoE(spamLabel, rho,
-                                                              E, Gs, scaleVals)
-                else:
-                    mxToFill[isp,fslc] =  self._probs_from_rhoE(spamLabel, rho,
-                                                              E, Gs, scaleVals)
-                _np.seterr(**old_err)
+            self._fill_probs_subtree(mxToFill, spam_label_rows, evalSubTree,
+                                     evalSubTree.final_slice(evalTree),
+                                     mySubComm, bBatch)
 
-            self._fill_result_tuple( (mxToFill,), spam_label_rows,
-                                     fslc, slice(None), slice(None), calc_and_fill )
+        #Note: subtrees fill disjoint gate-string slices of mxToFill, so they can
+        # be processed concurrently (numpy releases the GIL during products)
+        _mpit.thread_map(fill_subtree, mySubTreeIndices, nThreads)
 
         #collect/gather results
         subtreeFinalSlices = [ t.final_slice(evalTree) for t in subtrees]
@@ -2178,7 +2495,8 @@ class GateSetCalculator(object):
     def bulk_fill_dprobs(self, mxToFill, spam_label_rows, evalTree,
                          prMxToFill=None,clipTo=None,check=False,
                          comm=None, wrtFilter=None, wrtBlockSize=None,
-                         profiler=None, gatherMemLimit=None):
+                         profiler=None, gatherMemLimit=None, bBatch=False,
+                         nThreads=None):
 
         """
         Identical to bulk_dprobs(...) except results are
@@ -2251,6 +2569,16 @@ class GateSetCalculator(object):
           A memory limit in bytes to impose upon the "gather" operations
           performed as a part of MPI processor syncronization.
 
+        bBatch : bool, optional
+          When True, evaluate the product and derivative caches one dependency
+          level at a time using stacked products over all the nodes of a level
+          (see `EvalTree.get_evaluation_levels`) instead of node by node.
+
+        nThreads : int, optional
+          When greater than 1, use this many threads to evaluate the (local)
+          subtrees of evalTree concurrently or, when there is only a single
+          local subtree, its blocks of derivative columns (see wrtBlockSize).
+
         Returns
         -------
         None
@@ -2298,19 +2626,22 @@ class GateSetCalculator(object):
         #          (comm.Get_rank(),",".join([str(len(subtrees[i]))
         #                                     for i in mySubTreeIndices])))
 
+        #Use threads for subtrees when there are several of them, otherwise
+        # for the derivative-column blocks of the single local subtree.
+        if mySubComm is not None and mySubComm.Get_size() > 1:
+            nThreads = None # don't make concurrent calls using mySubComm
+        nBlkThreads = nThreads if len(mySubTreeIndices) <= 1 else None
+
         #eval on each local subtree
         #my_results = []
-        for iSubTree in mySubTreeIndices:
+        def fill_subtree(iSubTree):
             evalSubTree = subtrees[iSubTree]
             fslc = evalSubTree.final_slice(evalTree)
-
-            #Free memory from previous subtree iteration before computing caches
-            scaleVals = Gs = dGs = None
-            prodCache = scaleCache = dProdCache = None
+            dGs = None
 
             #Fill cache info (not requiring column distribution)
             tm = _time.time()
-            prodCache, scaleCache = self._compute_product_cache(evalSubTree, mySubComm)
+            prodCache, scaleCache = self._compute_product_cache(evalSubTree, mySubComm, bBatch)
             profiler.add_time("bulk_fill_dprobs: compute_product_cache", tm)
 
             #use cached data to final values
@@ -2356,7 +2687,8 @@ class GateSetCalculator(object):
                 tm = _time.time()
                 gatesSlice = wrtSlices['gates'] if (wrtSlices is not None) else None
                 dProdCache = self._compute_dproduct_cache(evalSubTree, prodCache, scaleCache,
-                                                          mySubComm, gatesSlice, profiler)
+                                                          mySubComm, gatesSlice, profiler,
+                                                          bBatch)
                 dGs = evalSubTree.final_view(dProdCache, axis=0)
                   #( nGateStrings, nDerivCols, dim, dim )
                 profiler.add_time("bulk_fill_dprobs: compute_dproduct_cache", tm)
@@ -2394,41 +2726,44 @@ class GateSetCalculator(object):
                        +" than derivative columns(%d)!" % self.tot_gate_params 
                        +" [blkSize = %.1f, nBlks=%d]" % (blkSize,nBlks))
 
-                def calc_and_fill_blk(spamLabel, isp, fslc, pslc1, pslc2, sumInto):
-                    tm = _time.time()
-                    old_err = _np.seterr(over='ignore')
-                    rho,E = self._rhoE_from_spamLabel(spamLabel)
-                    wrtNoSpam = {'preps':slice(0,0),'effects':slice(0,0)}
-                    
-                    if sumInto:
-                        mxToFill[isp,fslc,pslc1] += self._dprobs_from_rhoE(
-                            spamLabel, rho, E, Gs, dGs, scaleVals, wrtNoSpam)
-                            
-                    else:
-                        mxToFill[isp,fslc,pslc1] = self._dprobs_from_rhoE(
-                            spamLabel, rho, E, Gs, dGs, scaleVals, wrtNoSpam)
-                    _np.seterr(**old_err)
-                    profiler.add_time("bulk_fill_dprobs: calc_and_fill_blk", tm)
-
-                for iBlk in myBlkIndices:
+                def fill_block(iBlk):
                     tm = _time.time()
                     gateSlice = _slct.shift(blocks[iBlk],-self.tot_spam_params)
                     dProdCache = self._compute_dproduct_cache(evalSubTree, prodCache, scaleCache,
-                                                              blkComm, gateSlice, profiler)
+                                                              blkComm, gateSlice, profiler,
+                                                              bBatch)
                     profiler.add_time("bulk_fill_dprobs: compute_dproduct_cache", tm)
                     profiler.mem_check(
                         "bulk_fill_dprobs: post compute dproduct blk (expect "+
                         " +%.2fGB, shape=%s)" % (dProdCache.nbytes/(1024.0**3),
                                                  str(dProdCache.shape)) )
 
-                    dGs = evalSubTree.final_view(dProdCache, axis=0)
+                    dGsBlk = evalSubTree.final_view(dProdCache, axis=0)
                       #( nGateStrings, nDerivCols, dim, dim )
+
+                    def calc_and_fill_blk(spamLabel, isp, fslc, pslc1, pslc2, sumInto):
+                        tm = _time.time()
+                        old_err = _np.seterr(over='ignore')
+                        rho,E = self._rhoE_from_spamLabel(spamLabel)
+                        wrtNoSpam = {'preps':slice(0,0),'effects':slice(0,0)}
+
+                        if sumInto:
+                            mxToFill[isp,fslc,pslc1] += self._dprobs_from_rhoE(
+                                spamLabel, rho, E, Gs, dGsBlk, scaleVals, wrtNoSpam)
+
+                        else:
+                            mxToFill[isp,fslc,pslc1] = self._dprobs_from_rhoE(
+                                spamLabel, rho, E, Gs, dGsBlk, scaleVals, wrtNoSpam)
+                        _np.seterr(**old_err)
+                        profiler.add_time("bulk_fill_dprobs: calc_and_fill_blk", tm)
+
                     self._fill_result_tuple( 
                         (mxToFill,), spam_label_rows, fslc, 
                         blocks[iBlk], slice(None), calc_and_fill_blk )                    
-
                     profiler.mem_check("bulk_fill_dprobs: post fill blk")
-                    dProdCache = dGs = None #free mem
+
+                #Note: blocks fill disjoint derivative-column slices of mxToFill
+                _mpit.thread_map(fill_block, myBlkIndices, nBlkThreads)
 
                 #gather results
                 tm = _time.time()
@@ -2438,6 +2773,11 @@ class GateSetCalculator(object):
                 profiler.add_time("MPI IPC", tm)
                 profiler.mem_check("bulk_fill_dprobs: post gather blocks")
 
+        #Note: subtrees fill disjoint gate-string slices of mxToFill, so they can
+        # be processed concurrently (numpy releases the GIL during products)
+        _mpit.thread_map(fill_subtree, mySubTreeIndices,
+                         nThreads if (nBlkThreads is None) else None)
+
         #collect/gather results
         tm = _time.time()
         subtreeFinalSlices = [ t.final_slice(evalTree) for t in subtrees]
@@ -2468,7 +2808,8 @@ class GateSetCalculator(object):
     def bulk_fill_hprobs(self, mxToFill, spam_label_rows, evalTree,
                          prMxToFill=None, deriv1MxToFill=None, deriv2MxToFill=None, 
                          clipTo=None, check=False,comm=None, wrtFilter1=None, wrtFilter2=None,
-                         wrtBlockSize1=None, wrtBlockSize2=None, gatherMemLimit=None):
+                         wrtBlockSize1=None, wrtBlockSize2=None, gatherMemLimit=None,
+                         bBatch=False):
 
         """
         Identical to bulk_hprobs(...) except results are
@@ -2545,6 +2886,11 @@ class GateSetCalculator(object):
           A memory limit in bytes to impose upon the "gather" operations
           performed as a part of MPI processor syncronization.
 
+        bBatch : bool, optional
+          When True, evaluate the product, derivative and hessian caches one
+          dependency level at a time using stacked products over all the nodes
+          of a level (see `EvalTree.get_evaluation_levels`) instead of node by
+          node.
 
         Returns
         -------
@@ -2603,7 +2949,7 @@ class GateSetCalculator(object):
             prodCache = scaleCache = dProdCache = None
 
             #Fill product cache info (not requiring row or column distribution)
-            prodCache, scaleCache = self._compute_product_cache(evalSubTree, mySubComm)
+            prodCache, scaleCache = self._compute_product_cache(evalSubTree, mySubComm, bBatch)
             scaleVals = self._scaleExp( evalSubTree.final_view(scaleCache))
             Gs  = evalSubTree.final_view(prodCache, axis=0)
               #( nGateStrings, dim, dim )
@@ -2663,10 +3009,12 @@ class GateSetCalculator(object):
                 gatesSlice2 = wrtSlices2['gates'] if (wrtSlices2 is not None) else None
 
                 dProdCache1 = self._compute_dproduct_cache(
-                    evalSubTree, prodCache, scaleCache, mySubComm, gatesSlice1)
+                    evalSubTree, prodCache, scaleCache, mySubComm, gatesSlice1,
+                    bBatch=bBatch)
                 dProdCache2 = dProdCache1 if (gatesSlice1 == gatesSlice2) else \
                     self._compute_dproduct_cache(evalSubTree, prodCache,
-                                                 scaleCache, mySubComm, gatesSlice2)
+                                                 scaleCache, mySubComm, gatesSlice2,
+                                                 bBatch=bBatch)
 
                 dGs1 = evalSubTree.final_view(dProdCache1, axis=0) 
                 dGs2 = evalSubTree.final_view(dProdCache2, axis=0) 
@@ -2674,7 +3022,7 @@ class GateSetCalculator(object):
 
                 hProdCache = self._compute_hproduct_cache(evalSubTree, prodCache, dProdCache1,
                                                           dProdCache2, scaleCache, mySubComm,
-                                                          gatesSlice1, gatesSlice2)
+                                                          gatesSlice1, gatesSlice2, bBatch)
                 hGs = evalSubTree.final_view(hProdCache, axis=0)
                    #( nGateStrings, len(wrtFilter1), len(wrtFilter2), dim, dim )
 
@@ -2708,7 +3056,8 @@ class GateSetCalculator(object):
                     effectSlice1 = _slct.shift( _slct.intersect(blocks1[iBlk1],slice(self.tot_rho_params,self.tot_spam_params)), -self.tot_rho_params)
                     gateSlice1 = _slct.shift( _slct.intersect(blocks1[iBlk1],slice(self.tot_spam_params,None)), -self.tot_spam_params)
                     dProdCache1 = self._compute_dproduct_cache(
-                        evalSubTree, prodCache, scaleCache, blk1Comm, gateSlice1)
+                        evalSubTree, prodCache, scaleCache, blk1Comm, gateSlice1,
+                        bBatch=bBatch)
                     dGs1 = evalSubTree.final_view(dProdCache1, axis=0) 
 
                     for iBlk2 in myBlk2Indices:
@@ -2720,13 +3069,14 @@ class GateSetCalculator(object):
                             dProdCache2 = dProdCache1 ; dGs2 = dGs1
                         else:
                             dProdCache2 =self._compute_dproduct_cache(
-                                evalSubTree, prodCache, scaleCache, blk2Comm, gateSlice2)
+                                evalSubTree, prodCache, scaleCache, blk2Comm, gateSlice2,
+                                bBatch=bBatch)
                             dGs2 = evalSubTree.final_view(dProdCache2, axis=0) 
                         rank = comm.Get_rank()
 
                         hProdCache = self._compute_hproduct_cache(
                             evalSubTree, prodCache, dProdCache1, dProdCache2,
-                            scaleCache, blk2Comm, gateSlice1, gateSlice2)
+                            scaleCache, blk2Comm, gateSlice1, gateSlice2, bBatch)
                         hGs = evalSubTree.final_view(hProdCache, axis=0)
 
                         #Set spam filtering for calc_and_fill
@@ -3237,6 +3587,85 @@ class GateSetCalculator(object):
                          for (i,spamLabel) in enumerate(self.spamdefs) }
 
 
+    def bulk_dprobs_by_subtree(self, spam_label_rows, evalTree, clipTo=None,
+                               check=False, comm=None, wrtBlockSize=None,
+                               profiler=None, gatherMemLimit=None, nThreads=None):
+        """
+        Constructs a generator that computes the derivatives of the
+        probabilities generated by the gate sequences given by evalTree
+        one sub-tree at a time.
+
+        This routine can be useful when memory constraints make holding the
+        derivatives of all the gate sequences at once impractical, and one is
+        able to reduce the results of a single sub-tree at a time (e.g. to
+        accumulate J^T J for a least-squares optimization).
+
+        Parameters
+        ----------
+        spam_label_rows : dictionary
+          a dictionary with keys == spam labels and values which
+          are integer row indices into the generated arrays, specifying the
+          correspondence between their rows and spam labels.
+
+        evalTree : EvalTree
+           given by a prior call to bulk_evaltree.  Specifies the gate strings
+           to compute the bulk operation on.  Usually this tree is split, as
+           each of its sub-trees gives one generated block.
+
+        clipTo : 2-tuple, optional
+           (min,max) to clip the generated probabilities to if not None.
+
+        check : boolean, optional
+          If True, perform extra checks within code to verify correctness,
+          generating warnings when checks fail.  Used for testing, and runs
+          much slower when True.
+
+        comm : mpi4py.MPI.Comm, optional
+           When not None, an MPI communicator for distributing the computation
+           across multiple processors.  Sub-trees are distributed as in
+           bulk_fill_dprobs, and each sub-tree's block is generated only on
+           the processor that owns it, so that every gate string is generated
+           by exactly one processor.  All the processors of `comm` must
+           iterate over the generator.
+
+        wrtBlockSize, profiler, gatherMemLimit, nThreads
+           Same as in bulk_fill_dprobs, applied to each sub-tree.
+
+        Returns
+        -------
+        block_generator
+          A generator which, when iterated, yields the 3-tuple
+          `(finalSlice, dprobs, probs)` for each of this processor's
+          sub-trees, where `finalSlice` is the slice of evalTree's final gate
+          strings (in computation order) the sub-tree evaluates, `dprobs` is a
+          K x S x M array of the derivatives and `probs` a K x S array of the
+          probabilities, where:
+
+          - K is the length of spam_label_rows,
+          - S is the number of gate strings in `finalSlice`,
+          - M is the length of the vectorized gateset.
+        """
+        subtrees = evalTree.get_sub_trees()
+        mySubTreeIndices, subTreeOwners, mySubComm = evalTree.distribute(comm)
+        rank = 0 if (comm is None) else comm.Get_rank()
+
+        for iSubTree in mySubTreeIndices:
+            evalSubTree = subtrees[iSubTree]
+            nStrs = evalSubTree.num_final_strings()
+            dprobs = _np.empty( (len(spam_label_rows), nStrs, self.tot_params), 'd' )
+            probs = _np.empty( (len(spam_label_rows), nStrs), 'd' )
+
+            #all of mySubComm computes the sub-tree (a collective operation)...
+            self.bulk_fill_dprobs(dprobs, spam_label_rows, evalSubTree, probs,
+                                  clipTo, check, mySubComm, None, wrtBlockSize,
+                                  profiler, gatherMemLimit, nThreads=nThreads)
+
+            #...but only its owner yields the result
+            if subTreeOwners[iSubTree] == rank:
+                yield evalSubTree.final_slice(evalTree), dprobs, probs
+            dprobs = probs = None #free mem
+
+
     def bulk_hprobs_by_block(self, spam_label_rows, evalTree, wrtSlicesList,
                              bReturnDProbs12=False, comm=None):
                              
@@ -3623,3 +4052,64 @@ class GateSetCalculator(object):
                     dists.append( _gt.diamonddist(spamGate, spamGate2) )
 
         return max(dists)
+
+
+
+class GateSetVectorCalculator(GateSetCalculator):
+    """
+    A GateSetCalculator which computes (bulk) probabilities by propagating
+    state vectors instead of forming gate-string products.
+
+    Each state preparation vector is pushed through the prefix trie of an
+    evaluation tree's gate strings (see `EvalTree.get_prefix_trie`), which
+    takes one matrix-vector product per distinct prefix, and the resulting
+    states are contracted with the effect vectors.  This is cheaper than
+    the matrix-matrix products of `GateSetCalculator` when only
+    probabilities are needed, particularly for larger gate dimensions.
+    Derivatives and Hessians are computed as in `GateSetCalculator`.
+    """
+
+    def _fill_probs_subtree(self, mxToFill, spam_label_rows, evalSubTree,
+                            fslc, comm, bBatch):
+        """ Fills mxToFill[:,fslc] with the probabilities of evalSubTree """
+        #Note: comm and bBatch are unused - each processor propagates the
+        # states of its entire sub-tree, which takes little work.
+        groups, finalNodes, nNodes = evalSubTree.get_prefix_trie()
+
+        rhoLabels = [ rholabel for rholabel in self.preps ]
+        rhoIndex = { rholabel: i for i,rholabel in enumerate(rhoLabels) }
+        states = _np.empty( (nNodes, self.dim, len(rhoLabels)), 'd' )
+        scaleCache = _np.zeros( nNodes, 'd' )
+        if len(rhoLabels) > 0:
+            states[0] = _np.concatenate( [ self.preps[rholabel] for
+                                           rholabel in rhoLabels ], axis=1 )
+
+        #propagate the states one trie group (all nodes of a given length
+        # and last gate) at a time, rescaling any that become too small or
+        # too large (e.g. under non-trace-preserving gates) so they stay finite
+        for gateLabel, indices, parents in groups:
+            newStates = _np.dot(self.gates[gateLabel], states[parents]).transpose(1,0,2)
+              # (nNodesInGroup, dim, nRhos)
+            scaleCache[indices] = scaleCache[parents]
+            nrm = _np.max( _np.abs(newStates), axis=(1,2) )
+            rescale = _np.logical_and( _np.logical_or(nrm < PSMALL, nrm > 1.0/PSMALL),
+                                       nrm > 0 )
+            if _np.any(rescale):
+                newStates[rescale] /= nrm[rescale][:,None,None]
+                scaleCache[indices[rescale]] += _np.log(nrm[rescale])
+            states[indices] = newStates
+
+        finalStates = states[finalNodes] # (nGateStrings, dim, nRhos)
+        scaleVals = self._scaleExp( scaleCache[finalNodes] )
+
+        def calc_and_fill(spamLabel, isp, fslc, pslc1, pslc2, sumInto):
+            old_err = _np.seterr(over='ignore')
+            (rholabel,elabel) = self.spamdefs[spamLabel]
+            E = _np.conjugate(_np.transpose(self._get_evec(elabel)))
+            vp = _np.dot( finalStates[:,:,rhoIndex[rholabel]], E[0] ) * scaleVals
+            if sumInto: mxToFill[isp,fslc] += vp
+            else:       mxToFill[isp,fslc] =  vp
+            _np.seterr(**old_err)
+
+        self._fill_result_tuple( (mxToFill,), spam_label_rows,
+                                 fslc, slice(None), slice(None), calc_and_fill )
@@ -0,0 +1,399 @@
+from __future__ import division, print_function, absolute_import, unicode_literals
+#*****************************************************************
+#    pyGSTi 0.9:  Copyright 2015 Sandia Corporation
+#    This Software is released under the GPL license detailed
+#    in the file "license.txt" in the top-level pyGSTi directory
+#*****************************************************************
+"""Defines the LocalComm class and supporting functionality"""
+
+import os as _os
+import mmap as _mmap
+import pickle as _pickle
+import tempfile as _tempfile
+import traceback as _traceback
+import functools as _functools
+import threading as _threading
+import multiprocessing as _mp
+import numpy as _np
+
+try:
+    import queue as _queue
+except ImportError:
+    import Queue as _queue # Python 2
+
+#Directory holding the files backing shared memory segments.  On Linux
+# /dev/shm is a (POSIX shared memory) RAM filesystem; elsewhere the files are
+# only ever mmap'd so their contents usually stay in the page cache.
+SHM_DIR = "/dev/shm" if _os.path.isdir("/dev/shm") else _tempfile.gettempdir()
+
+POLL_INTERVAL = 0.5 # seconds between checks for failed processes while waiting
+
+
+class _SharedSegment(object):
+    """
+    A block of memory that can be mapped by several processes, backed by a
+    file in `SHM_DIR` which is removed as soon as all processes have mapped it.
+    """
+    def __init__(self, nbytes, path=None):
+        self.nbytes = max(int(nbytes),1)
+        if path is None: # create the segment
+            fd, path = _tempfile.mkstemp(prefix="pygsti_localcomm_", dir=SHM_DIR)
+            _os.ftruncate(fd, self.nbytes)
+        else: # open an existing segment
+            fd = _os.open(path, _os.O_RDWR)
+        try:
+            self.buf = _mmap.mmap(fd, self.nbytes)
+        finally:
+            _os.close(fd)
+        self.path = path
+
+    def view(self, shape, dtype):
+        """ A numpy array of the given shape and type using this segment's memory """
+        count = int(_np.prod(shape))
+        return _np.frombuffer(self.buf, dtype, count).reshape(shape)
+
+    def unlink(self):
+        """ Remove the backing file (existing mappings remain valid) """
+        if self.path is not None and _os.path.exists(self.path):
+            _os.remove(self.path)
+
+
+class _LocalWorld(object):
+    """
+    The state shared by all the processes of a local "world", which must be
+    created before they are started (forked).
+    """
+    def __init__(self, nprocs, ctx):
+        self.nprocs = nprocs
+        self.inboxes = [ ctx.Queue() for i in range(nprocs) ]
+        self.results = ctx.Queue()
+        self.abort = ctx.Event()
+        self.finished = ctx.Array('b', nprocs, lock=False) # set by each process when done
+        self.parent_pid = _os.getpid() # rank 0's process
+        self.pending = {} # per-process: received messages not yet asked for
+
+
+class LocalComm(object):
+    """
+    A communicator between processes on a single machine which mimics (the
+    part of) the `mpi4py.MPI.Comm` interface used by pyGSTi.
+
+    LocalComm objects are created by :func:`run_with_local_comm`, which starts
+    worker processes using `multiprocessing`, and can be passed as the `comm`
+    argument of pyGSTi functions so they run in parallel without an MPI
+    installation.  Lower-case methods (`bcast`, `gather`, `allgather`,
+    `allreduce`) communicate arbitrary (picklable) objects through pipes,
+    while the upper-case methods (`Bcast`, `Allgather`, `Allreduce`) exchange
+    numpy arrays through a shared memory buffer without pickling them.  Arrays
+    which should not be copied at all can be allocated with
+    :method:`shared_array`.
+    """
+
+    #Reduction operations (mpi4py's MPI.SUM, etc. are also accepted)
+    SUM = "sum"
+    PROD = "prod"
+    MAX = "max"
+    MIN = "min"
+
+    def __init__(self, world, world_ranks, rank, comm_id=()):
+        """
+        Create a new LocalComm.  This shouldn't be called directly: use
+        :func:`run_with_local_comm` or :method:`Split` instead.
+
+        Parameters
+        ----------
+        world : _LocalWorld
+            The state shared by all processes.
+
+        world_ranks : list
+            The world ranks of this communicator's processes, indexed by
+            their rank within this communicator.
+
+        rank : int
+            The rank of this process within this communicator.
+
+        comm_id : tuple
+            An identifier which is the same for all the processes of this
+            communicator and distinct from all other communicators.
+        """
+        self.world = world
+        self.world_ranks = list(world_ranks)
+        self.rank = rank
+        self.comm_id = comm_id
+        self._seq = 0 # number of collective operations performed so far
+        self._scratch = None # shared segment used by upper-case methods
+
+    def Get_rank(self):
+        """ The rank of this process within the communicator """
+        return self.rank
+
+    def Get_size(self):
+        """ The number of processes in the communicator """
+        return len(self.world_ranks)
+
+    def __getstate__(self):
+        raise ValueError("LocalComm objects cannot be pickled")
+
+    # ---- point-to-point messages (private) ----
+
+    def _next_tag(self):
+        self._seq += 1
+        return self._seq
+
+    def _send(self, dest, tag, obj):
+        data = _pickle.dumps(obj, _pickle.HIGHEST_PROTOCOL) #pickle now, not in
+        self.world.inboxes[self.world_ranks[dest]].put(       # Queue's thread
+            (self.comm_id, tag, self.world_ranks[self.rank], data))
+
+    def _recv(self, src, tag):
+        key = (self.comm_id, tag, self.world_ranks[src])
+        pending = self.world.pending
+        inbox = self.world.inboxes[self.world_ranks[self.rank]]
+        while key not in pending:
+            try:
+                comm_id, msg_tag, msg_src, data = inbox.get(timeout=POLL_INTERVAL)
+                pending[(comm_id, msg_tag, msg_src)] = data
+            except _queue.Empty:
+                if self.world.abort.is_set():
+                    raise RuntimeError("A process of the LocalComm has failed")
+                if _os.getpid() != self.world.parent_pid and \
+                   _os.getppid() != self.world.parent_pid:
+                    raise RuntimeError("The rank-0 process of the LocalComm has died")
+        return _pickle.loads(pending.pop(key))
+
+    # ---- object collectives ----
+
+    def bcast(self, obj, root=0):
+        """ Broadcast `obj` from process `root`; returns `obj` on all processes """
+        tag = self._next_tag()
+        if self.rank == root:
+            for i in range(self.Get_size()):
+                if i != root: self._send(i, tag, obj)
+            return obj
+        return self._recv(root, tag)
+
+    def gather(self, obj, root=0):
+        """ Returns the list of all processes' `obj` on `root`, None elsewhere """
+        tag = self._next_tag()
+        if self.rank == root:
+            return [ (obj if i == root else self._recv(i, tag))
+                     for i in range(self.Get_size()) ]
+        self._send(root, tag, obj)
+        return None
+
+    def allgather(self, obj):
+        """ Returns the list of all processes' `obj` on every process """
+        return self.bcast(self.gather(obj, root=0), root=0)
+
+    def allreduce(self, obj, op=SUM):
+        """ Returns the reduction (by default, sum) of all processes' `obj` """
+        fn = { "sum": lambda x,y: x+y, "prod": lambda x,y: x*y,
+               "max": max, "min": min }[_op_name(op)]
+        return _functools.reduce(fn, self.allgather(obj))
+
+    def barrier(self):
+        """ Wait until all processes have called `barrier` """
+        self.allgather(None)
+
+    Barrier = barrier
+
+    def Split(self, color=0, key=0):
+        """
+        Split this communicator into sub-communicators, one for each distinct
+        `color`.  Within each, processes are ranked by (`key`, current rank).
+        """
+        tag = self._seq + 1 #the tag of the allgather below
+        colorkeys = self.allgather((color,key))
+        members = sorted([ i for i,(c,k) in enumerate(colorkeys) if c == color ],
+                         key=lambda i: (colorkeys[i][1],i))
+        return LocalComm(self.world, [ self.world_ranks[i] for i in members ],
+                         members.index(self.rank), self.comm_id + ((tag,color),))
+
+    def Free(self):
+        """ Release this communicator's shared memory """
+        self._scratch = None
+
+    # ---- shared memory and array collectives ----
+
+    def _open_segment(self, nbytes):
+        """ Collectively create a new shared segment mapped by all processes """
+        seg = _SharedSegment(nbytes) if self.rank == 0 else None
+        path = self.bcast(seg.path if (seg is not None) else None, root=0)
+        if seg is None: seg = _SharedSegment(nbytes, path)
+        self.barrier() # all processes have mapped the segment
+        if self.rank == 0: seg.unlink()
+        return seg
+
+    def _scratch_view(self, shape, dtype):
+        """ (Collective) A view into the shared scratch buffer, enlarged as needed """
+        nbytes = int(_np.prod(shape)) * _np.dtype(dtype).itemsize
+        if self._scratch is None or self._scratch.nbytes < nbytes:
+            oldsize = self._scratch.nbytes if (self._scratch is not None) else 0
+            self._scratch = None
+            self._scratch = self._open_segment(max(nbytes, 2*oldsize))
+        else:
+            self.barrier() # don't overwrite data others may still be reading
+        return self._scratch.view(shape, dtype)
+
+    def shared_array(self, shape, dtype='d'):
+        """
+        Allocate an array whose memory is shared by all of the processes.
+
+        This is a collective operation.  Every process receives an array
+        using the *same* memory, so values written by one process are seen by
+        all of the others without being copied (call :method:`barrier` between
+        writing and reading).  This is useful for large arrays which would
+        otherwise need to be broadcast, e.g. a Jacobian computed once and then
+        only read.
+
+        Parameters
+        ----------
+        shape : tuple
+            The array shape.
+
+        dtype : numpy dtype, optional
+            The array's data type.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        nbytes = int(_np.prod(shape)) * _np.dtype(dtype).itemsize
+        return self._open_segment(nbytes).view(shape, dtype)
+
+    def Bcast(self, buf, root=0):
+        """ Broadcast the contents of array `buf` on `root` to `buf` on all processes """
+        if self.Get_size() == 1: return
+        shared = self._scratch_view(buf.shape, buf.dtype)
+        if self.rank == root: shared[...] = buf
+        self.barrier()
+        if self.rank != root: buf[...] = shared
+
+    def Allgather(self, sendbuf, recvbuf):
+        """
+        Gather all processes' `sendbuf` arrays into `recvbuf` on every process,
+        so that `recvbuf` holds `Get_size()` times as many elements (ordered by
+        rank) as `sendbuf`.
+        """
+        n = self.Get_size()
+        sendbuf = _np.asarray(sendbuf)
+        shared = self._scratch_view((n,) + sendbuf.shape, sendbuf.dtype)
+        shared[self.rank] = sendbuf
+        self.barrier()
+        recvbuf[...] = shared.reshape(recvbuf.shape)
+
+    def Allreduce(self, sendbuf, recvbuf, op=SUM):
+        """ Set `recvbuf` to the element-wise reduction of all processes' `sendbuf` """
+        n = self.Get_size()
+        sendbuf = _np.asarray(sendbuf)
+        shared = self._scratch_view((n,) + sendbuf.shape, sendbuf.dtype)
+        shared[self.rank] = sendbuf
+        self.barrier()
+        fn = { "sum": _np.sum, "prod": _np.prod,
+               "max": _np.max, "min": _np.min }[_op_name(op)]
+        recvbuf[...] = fn(shared, axis=0)
+
+
+def _op_name(op):
+    """ Converts a LocalComm or mpi4py reduction operation to a LocalComm one """
+    if op in (LocalComm.SUM, LocalComm.PROD, LocalComm.MAX, LocalComm.MIN):
+        return op
+    from mpi4py import MPI
+    for nm in ("SUM","PROD","MAX","MIN"):
+        if op == getattr(MPI,nm): return nm.lower()
+    raise ValueError("Unsupported reduction operation: %s" % str(op))
+
+
+def _run_worker(world, rank, fn, args, kwargs):
+    """ The function run by each non-root process of `run_with_local_comm` """
+    try:
+        fn(*args, comm=LocalComm(world, range(world.nprocs), rank), **kwargs)
+        world.results.put( (rank, None) )
+    except:
+        world.abort.set()
+        world.results.put( (rank, _traceback.format_exc()) )
+    finally:
+        world.finished[rank] = 1
+
+
+def _watch_workers(world, workers, stop):
+    """
+    Run by a thread of the rank-0 process of `run_with_local_comm`: sets
+    `world.abort` when a worker process dies (e.g. is killed by a signal)
+    before finishing, so the other processes stop waiting for it.
+    """
+    while not stop.wait(POLL_INTERVAL):
+        for i,p in enumerate(workers):
+            if not p.is_alive() and not world.finished[i+1]:
+                world.abort.set(); return
+
+
+def run_with_local_comm(nprocs, fn, *args, **kwargs):
+    """
+    Run `fn(*args, comm=comm, **kwargs)` on `nprocs` processes.
+
+    The current process becomes rank 0 and `nprocs-1` worker processes are
+    forked, so `fn` and its arguments need not be picklable.  Each process
+    is given a :class:`LocalComm` as the `comm` argument, which may be used
+    wherever pyGSTi accepts an MPI communicator, e.g.::
+
+        results = run_with_local_comm(4, pygsti.do_long_sequence_gst,
+                                      ds, gs_target, ...)
+
+    If any process raises an exception or dies (e.g. is killed by a signal),
+    the processes waiting to communicate with it give up and a RuntimeError
+    is raised.
+
+    Parameters
+    ----------
+    nprocs : int
+        The number of processes.
+
+    fn : function
+        The function to run.  It must accept a `comm` keyword argument.
+
+    args, kwargs
+        Additional arguments to `fn`.
+
+    Returns
+    -------
+    object
+        The value returned by `fn` on the rank-0 process.
+    """
+    if nprocs <= 1:
+        return fn(*args, comm=None, **kwargs)
+
+    if not hasattr(_os, "fork"):
+        raise NotImplementedError("run_with_local_comm requires os.fork()")
+    ctx = _mp.get_context("fork") if hasattr(_mp, "get_context") else _mp
+    world = _LocalWorld(nprocs, ctx)
+    workers = [ ctx.Process(target=_run_worker, args=(world, i, fn, args, kwargs))
+                for i in range(1,nprocs) ]
+    for p in workers:
+        p.daemon = True; p.start()
+    stopWatching = _threading.Event()
+    watcher = _threading.Thread(target=_watch_workers, args=(world, workers, stopWatching))
+    watcher.daemon = True; watcher.start()
+
+    try:
+        try:
+            ret = fn(*args, comm=LocalComm(world, range(nprocs), 0), **kwargs)
+        except:
+            world.abort.set()
+            for p in workers: p.terminate()
+            raise
+        for p in workers: p.join()
+    finally:
+        stopWatching.set(); watcher.join()
+
+    tracebacks = {}
+    while True:
+        try: rank, tb = world.results.get(timeout=POLL_INTERVAL)
+        except _queue.Empty: break
+        tracebacks[rank] = tb
+    errors = [ "Rank %d:\n%s" % (i+1, tracebacks.get(i+1, "exited with code %s\n"
+                                                     % str(p.exitcode)))
+               for i,p in enumerate(workers) if tracebacks.get(i+1, "") is not None ]
+    if errors:
+        raise RuntimeError("LocalComm worker(s) failed:\n" + "\n".join(errors))
+    return ret
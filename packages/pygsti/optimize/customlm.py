@@ -18,7 +18,106 @@ MACH_PRECISION = 1e-12
 
 def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
                    rel_ftol=1e-6, rel_xtol=1e-6, max_iter=100, comm=None,
-                   verbosity=0, profiler=None):
+                   verbosity=0, profiler=None, jac_blocks=False,
+                   linear_solver="solve", cg_tol=1e-10, cg_maxiter=None,
+                   broyden_iters=0, broyden_min_gain=0.5,
+                   checkpoint_fn=None, init_state=None):
+    """
+    An implementation of the Levenberg-Marquardt least-squares optimization
+    algorithm customized for use within pyGSTi.
+
+    Parameters
+    ----------
+    obj_fn : function
+        The objective function, mapping a parameter vector to the vector
+        whose sum of squares is minimized.
+
+    jac_fn : function
+        The Jacobian function.  When `jac_blocks` is False it returns the
+        Jacobian of `obj_fn`, a matrix with one row per element of the
+        objective vector and one column per parameter.  When `jac_blocks`
+        is True it returns an iterable of `(rowSlice, jacBlock)` pairs, where
+        `jacBlock` holds the Jacobian rows `rowSlice` (a slice into the
+        objective vector), so that J^T J and J^T f are accumulated one block
+        at a time and the whole Jacobian is never held in memory.  In this
+        case, when `comm` is not None, each Jacobian row must be given by
+        exactly one processor and the sums are reduced across `comm`.
+
+    x0 : numpy array
+        The starting parameter vector.
+
+    f_norm2_tol, jac_norm_tol, rel_ftol, rel_xtol : float, optional
+        Convergence tolerances on the sum of squares, the (infinity) norm of
+        J^T f, and the relative reductions in the sum of squares and in x.
+
+    max_iter : int, optional
+        The maximum number of (outer) iterations.
+
+    comm : mpi4py.MPI.Comm, optional
+        When not None, an MPI communicator for distributing the J^T J
+        computation across multiple processors.
+
+    verbosity : int, optional
+        Amount of detail to print to stdout.
+
+    profiler : Profiler, optional
+        A profiler object used for to track timing and memory usage.
+
+    jac_blocks : bool, optional
+        Whether `jac_fn` returns Jacobian row blocks (see above).
+
+    linear_solver : {"solve", "eig", "pcg"}, optional
+        How the damped normal equations (J^T J + mu I) dx = -J^T f are solved
+        for each damping value mu tried.  "solve" solves them directly each
+        time.  "eig" eigen-decomposes J^T J once per outer iteration, after
+        which each damping value costs only O(n^2), which is faster when
+        steps are often rejected (each rejection tries a new mu).  "pcg" uses
+        a Jacobi-preconditioned conjugate gradient method, which needs only
+        matrix-vector products and may be faster for very large numbers of
+        parameters.
+
+    cg_tol : float, optional
+        The relative residual tolerance of the "pcg" solver.
+
+    cg_maxiter : int, optional
+        The maximum number of iterations of the "pcg" solver.  None means
+        the number of parameters.
+
+    broyden_iters : int, optional
+        The maximum number of consecutive iterations which, instead of
+        calling `jac_fn`, use a Jacobian obtained by a rank-1 (Broyden)
+        update of the previous one.  Zero (the default) always computes the
+        exact Jacobian.  An exact Jacobian is re-computed whenever a step
+        computed from an updated Jacobian is rejected, has a gain ratio
+        (actual / predicted decrease of the sum of squares) below
+        `broyden_min_gain`, or would signal convergence.  Ignored when
+        `jac_blocks` is True, since the Jacobian is never held in memory.
+
+    broyden_min_gain : float, optional
+        The smallest gain ratio of an accepted step for which the following
+        iteration may use a Broyden-updated Jacobian.
+
+    checkpoint_fn : function, optional
+        If not None, a function `checkpoint_fn(x, mu, nu, k)` which is called
+        at the start of each outer iteration with the current point `x`,
+        damping parameters `mu` and `nu`, and iteration index `k`.  Saving
+        these allows an interrupted optimization to be resumed (see
+        `init_state`).
+
+    init_state : tuple, optional
+        A `(mu, nu, k)` tuple, as given to `checkpoint_fn` along with `x`, from
+        which to resume an optimization.  In this case `x0` should be the
+        corresponding `x`.
+
+    Returns
+    -------
+    x : numpy array
+        The optimal parameter vector found.
+    converged : bool
+        Whether the optimization converged.
+    msg : str
+        A message describing why the optimization stopped.
+    """
     msg = ""
     converged = False
     x = x0
@@ -29,15 +128,25 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
     nu = 2
     mu = 0 #initialized on 1st iter
     my_cols_slice = None
+    Jac = None
+    refresh_jac = True #whether the next Jacobian must be computed exactly
+    nBroyden = 0 #number of consecutive Broyden-updated Jacobians used
 
     if comm is not None and comm.Get_rank() != 0:
         verbosity = 0 #Only print to stdout from root process
 
+    if linear_solver not in ("solve","eig","pcg"):
+        raise ValueError("Invalid linear_solver: %s" % linear_solver)
+
+    k0 = 0
+    if init_state is not None:
+        mu, nu, k0 = init_state
+
     if not _np.isfinite(norm_f):
         msg = "Infinite norm of objective function at initial point!"
 
 
-    for k in range(max_iter): #outer loop
+    for k in range(k0, max_iter): #outer loop
         # assume x, f, fnorm hold valid values
 
         if len(msg) > 0: 
@@ -51,20 +160,40 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
             print("--- Outer Iter %d: norm_f = %g, mu=%g" % (k,norm_f,mu))
             
         if profiler: profiler.mem_check("custom_leastsq: begin outer iter *before de-alloc*")
-        Jac = None; JTJ = None; JTf = None
+        JTJ = None; JTf = None
+        if refresh_jac: Jac = None
+        jac_is_approx = not refresh_jac
 
         if profiler: profiler.mem_check("custom_leastsq: begin outer iter")
-        Jac = jac_fn(x)
-        if profiler: profiler.mem_check("custom_leastsq: after jacobian:" 
-                                        + "shape=%s, GB=%.2f" % (str(Jac.shape),
-                                                        Jac.nbytes/(1024.0**3)) )
-
-        tm = _time.time()
-        if my_cols_slice is None:
-            my_cols_slice = _mpit.distribute_for_dot(Jac.shape[0], comm)
-        JTJ = _mpit.mpidot(Jac.T,Jac,my_cols_slice,comm)   #_np.dot(Jac.T,Jac)
-        JTf = _np.dot(Jac.T,f)
-        if profiler: profiler.add_time("custom_leastsq: dotprods",tm)
+        if jac_blocks:
+            #accumulate J^T J and J^T f one block of rows at a time
+            JTJ = _np.zeros( (len(x),len(x)), 'd' )
+            JTf = _np.zeros( len(x), 'd' )
+            for rowSlice, jacBlock in jac_fn(x):
+                tm = _time.time()
+                JTJ += _np.dot(jacBlock.T,jacBlock)
+                JTf += _np.dot(jacBlock.T,f[rowSlice])
+                if profiler: profiler.add_time("custom_leastsq: dotprods",tm)
+            jacBlock = None #free mem
+            JTJ = _mpit.sum_across_procs(JTJ, comm)
+            JTf = _mpit.sum_across_procs(JTf, comm)
+            if profiler: profiler.mem_check("custom_leastsq: after jacobian blocks")
+        else:
+            if refresh_jac:
+                Jac = jac_fn(x); nBroyden = 0
+                if profiler: profiler.mem_check("custom_leastsq: after jacobian:" 
+                                                + "shape=%s, GB=%.2f" % (str(Jac.shape),
+                                                                Jac.nbytes/(1024.0**3)) )
+            else: # Jac has been Broyden-updated
+                nBroyden += 1
+                if profiler: profiler.add_count("custom_leastsq: Broyden jacobians",1)
+
+            tm = _time.time()
+            if my_cols_slice is None:
+                my_cols_slice = _mpit.distribute_for_dot(Jac.shape[0], comm)
+            JTJ = _mpit.mpidot(Jac.T,Jac,my_cols_slice,comm)   #_np.dot(Jac.T,Jac)
+            JTf = _np.dot(Jac.T,f)
+            if profiler: profiler.add_time("custom_leastsq: dotprods",tm)
 
         idiag = _np.diag_indices_from(JTJ)
         norm_JTf = _np.linalg.norm(JTf,ord=_np.inf)
@@ -72,6 +201,8 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
         undampled_JTJ_diag = JTJ.diagonal().copy()
 
         if norm_JTf < jac_norm_tol:
+            if jac_is_approx: # don't trust an approximate jacobian to signal convergence
+                refresh_jac = True; continue
             msg = "norm(jacobian) is at most %g" % jac_norm_tol
             converged = True; break
 
@@ -79,6 +210,16 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
             #mu = tau # initial damping element
             mu = tau * _np.max(undampled_JTJ_diag) # initial damping element
 
+        if checkpoint_fn is not None:
+            checkpoint_fn(x, mu, nu, k)
+
+        if linear_solver == "eig":
+            # J^T J = V diag(evals) V^T => (J^T J + mu I)^-1 = V diag(1/(evals+mu)) V^T
+            tm = _time.time()
+            evals, evecs = _np.linalg.eigh(JTJ)
+            evecsT_JTf = _np.dot(evecs.T, JTf)
+            if profiler: profiler.add_time("custom_leastsq: eigendecomposition",tm)
+
         #determing increment using adaptive damping
         while True:  #inner loop
 
@@ -90,7 +231,16 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
                 if profiler: profiler.mem_check("custom_leastsq: before linsolve")
                 tm = _time.time()
                 success = True
-                dx = _np.linalg.solve(JTJ, -JTf) 
+                if linear_solver == "eig":
+                    damped_evals = evals + mu
+                    if _np.min(damped_evals) <= 0: # (near-)singular system
+                        raise _np.linalg.LinAlgError("Singular matrix")
+                    dx = -_np.dot(evecs, evecsT_JTf / damped_evals)
+                elif linear_solver == "pcg":
+                    dx, nCGIters = _pcg_solve(JTJ, -JTf, cg_tol, cg_maxiter)
+                    if profiler: profiler.add_count("custom_leastsq: CG iterations",nCGIters)
+                else:
+                    dx = _np.linalg.solve(JTJ, -JTf) 
                 if profiler: profiler.add_time("custom_leastsq: linsolve",tm)
             except _np.linalg.LinAlgError:
                 success = False
@@ -104,6 +254,8 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
                     print("  - Inner Loop: mu=%g, norm_dx=%g" % (mu,norm_dx))
 
                 if norm_dx < (rel_xtol**2)*norm_x:
+                    if jac_is_approx:
+                        refresh_jac = True; break
                     msg = "Relative change in |x| is at most %g" % rel_xtol
                     converged = True; break
 
@@ -124,6 +276,8 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
                           (norm_new_f,dL,dF,dL/norm_f,dF/norm_f))
 
                 if dL/norm_f < rel_ftol and dF/norm_f < rel_ftol and dF/dL < 2.0:
+                    if jac_is_approx:
+                        refresh_jac = True; break
                     msg = "Both actual and predicted relative reductions in the" + \
                         " sum of squares are at most %g" % rel_ftol
                     converged = True; break
@@ -135,6 +289,15 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
                     t = 1.0 - (2*dF/dL-1.0)**3 # dF/dL == gain ratio
                     mu *= max(t,1.0/3.0)
                     nu = 2
+
+                    refresh_jac = bool(jac_blocks or nBroyden >= broyden_iters
+                                       or dF/dL < broyden_min_gain)
+                    if not refresh_jac:
+                        # Broyden update: Jac += (df - Jac*dx) dx^T / |dx|^2
+                        tm = _time.time()
+                        Jac += _np.outer(new_f - f - _np.dot(Jac,dx), dx/norm_dx)
+                        if profiler: profiler.add_time("custom_leastsq: Broyden update",tm)
+
                     x,f, norm_f = new_x, new_f, norm_new_f
 
                     if verbosity > 1:
@@ -153,6 +316,9 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
 
             # if this point is reached, either the linear solve failed
             # or the error did not reduce.  In either case, reject increment.
+
+            if jac_is_approx: # retry with an exact jacobian before damping more
+                refresh_jac = True; break
                 
             #Increase damping (mu), then increase damping factor to 
             # accelerate further damping increases.
@@ -181,6 +347,39 @@ def custom_leastsq(obj_fn, jac_fn, x0, f_norm2_tol=1e-6, jac_norm_tol=1e-6,
 
 
 
+def _pcg_solve(A, b, tol=1e-10, maxiter=None):
+    """
+    Solves A x = b for a symmetric positive definite A using the conjugate
+    gradient method with a Jacobi (diagonal) preconditioner.
+
+    Returns the solution and the number of iterations taken.  Raises
+    a numpy LinAlgError if A is found not to be positive definite.
+    """
+    if maxiter is None: maxiter = len(b)
+    Minv = 1.0 / A.diagonal()
+    if _np.any(~_np.isfinite(Minv)) or _np.any(Minv <= 0):
+        raise _np.linalg.LinAlgError("Matrix is not positive definite")
+
+    x = _np.zeros(len(b), 'd')
+    r = b.copy(); z = Minv * r; p = z.copy()
+    rz = _np.dot(r,z); norm_b = _np.linalg.norm(b)
+    if norm_b == 0: return x, 0
+
+    for i in range(maxiter):
+        Ap = _np.dot(A,p)
+        pAp = _np.dot(p,Ap)
+        if pAp <= 0: raise _np.linalg.LinAlgError("Matrix is not positive definite")
+        alpha = rz / pAp
+        x += alpha * p
+        r -= alpha * Ap
+        if _np.linalg.norm(r) <= tol * norm_b: return x, i+1
+        z = Minv * r
+        rz_new = _np.dot(r,z)
+        p = z + (rz_new / rz) * p
+        rz = rz_new
+    return x, maxiter
+
+
 #Wikipedia-version of LM algorithm, testing mu and mu/nu damping params and taking 
 # mu/nu => new_mu if acceptable...  This didn't seem to perform well, but maybe just
 # needs some tweaking, so leaving it commented here for reference
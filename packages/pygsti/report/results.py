@@ -286,7 +286,9 @@ class Results(object):
             `targetGateset` argument *can* be specified, but if it isn't, is
             taken to be `gatesets['target']`.  This argument may also be a
             list of such dictionaries, in which case each element describes
-            a successive stage of gauge optimization.
+            a successive stage of gauge optimization.  A multi-start
+            optimization can be specified using the `nStarts`, `nProcesses`,
+            `abortRatio` and `seed` arguments of :func:`gaugeopt_to_target`.
 
         setparam : bool, optional
             Whether to set `parameters['gaugeOptParams']` to the list of
@@ -155,6 +155,86 @@ def _processBlockDims(dimOrBlockDims):
 #    #return dmiToVi, dmDim, dim  #Note dim == len(dmiToVi)
 #    return dmDim, dim
 
+#Cache of basis matrices and transform matrices, keyed by
+# (kind, basis, dimOrBlockDims).  Cached arrays are made read-only since
+# they are shared between all callers.
+_basisCache = _collections.OrderedDict()
+_basisCacheMaxSize = 128
+_basisCacheCounts = {'hits': 0, 'misses': 0}
+
+def _dimKey(dimOrBlockDims):
+    """ Hashable version of dimOrBlockDims, or None if it can't be made """
+    if isinstance(dimOrBlockDims, _numbers.Integral):
+        return int(dimOrBlockDims)
+    if isinstance(dimOrBlockDims, _collections.Container):
+        try: return tuple([ int(d) for d in dimOrBlockDims ])
+        except (TypeError, ValueError): return None
+    return None
+
+def _readonly(x):
+    """ Sets an array (or each array of a list) to be non-writeable """
+    for a in (x if isinstance(x, (list,tuple)) else [x]):
+        a.flags.writeable = False
+    return x
+
+def _cached(kind, basis, dimOrBlockDims, builder):
+    """
+    Look up `(kind, basis, dimOrBlockDims)` in the basis cache, calling
+    `builder()` to compute (and cache) the value on a miss.  Values are
+    arrays, lists of arrays, or tuples of arrays, which are made read-only
+    before being stored.  Lists are returned as new (shallow) copies so
+    that callers may alter the list itself.
+    """
+    dimKey = _dimKey(dimOrBlockDims)
+    if dimKey is None: return builder() # let the builder deal with bad dims
+
+    key = (kind, basis, dimKey)
+    if key in _basisCache:
+        _basisCacheCounts['hits'] += 1
+        val = _basisCache.pop(key); _basisCache[key] = val # most recently used
+    else:
+        _basisCacheCounts['misses'] += 1
+        val = builder()
+        if isinstance(val, tuple): val = tuple([ _readonly(v) for v in val ])
+        else: _readonly(val)
+        _basisCache[key] = val
+        while len(_basisCache) > _basisCacheMaxSize:
+            _basisCache.popitem(last=False) # least recently used
+
+    return list(val) if isinstance(val, list) else val
+
+
+def basis_cache_info():
+    """
+    Get usage information about the cache of basis matrices and
+    basis-transform matrices used by this module.
+
+    Returns
+    -------
+    dict
+        A dictionary with keys `"hits"` and `"misses"` (the number of
+        cache lookups that were and were not found in the cache since
+        the last call to :func:`clear_basis_cache`), `"size"` (the current
+        number of cached items) and `"maxsize"`.
+    """
+    return { 'hits': _basisCacheCounts['hits'],
+             'misses': _basisCacheCounts['misses'],
+             'size': len(_basisCache), 'maxsize': _basisCacheMaxSize }
+
+
+def clear_basis_cache():
+    """
+    Empty the cache of basis matrices and basis-transform matrices
+    and reset its hit and miss counters.
+
+    Returns
+    -------
+    None
+    """
+    _basisCache.clear()
+    _basisCacheCounts['hits'] = _basisCacheCounts['misses'] = 0
+
+
 def basis_longname(basis, dimOrBlockDims=None):
     """
     Get the "long name" for a particular basis,
@@ -661,12 +741,15 @@ def gm_matrices(dimOrBlockDims):
         "embedding" density matrix (the sum of dimOrBlockDims)
         and N is the dimension of the density-matrix space,
         equal to sum( block_dim_i^2 ).
+        The matrices are shared (cached) and so are read-only.
     """
-    mxs = gm_matrices_unnormalized(dimOrBlockDims)
-    mxs[0] *= 1/_np.sqrt( mxs[0].shape[0] ) #identity mx
-    for mx in mxs[1:]:
-        mx *= 1/sqrt2
-    return mxs
+    def build():
+        mxs = gm_matrices_unnormalized(dimOrBlockDims)
+        mxs[0] *= 1/_np.sqrt( mxs[0].shape[0] ) #identity mx
+        for mx in mxs[1:]:
+            mx *= 1/sqrt2
+        return mxs
+    return _cached('matrices', 'gm', dimOrBlockDims, build)
 
 def gm_to_std_transform_matrix(dimOrBlockDims):
     """
@@ -684,6 +767,7 @@ def gm_to_std_transform_matrix(dimOrBlockDims):
     numpy array
         An array of shape (N,N), where N is the dimension
         of the density matrix space, i.e. sum( dimOrBlockDims_i^2 ).
+        This array is shared (cached) and so is read-only.
 
     Notes
     -----
@@ -694,25 +778,27 @@ def gm_to_std_transform_matrix(dimOrBlockDims):
         basis matrices along it's columns.
     """
     #vectorize Gell Mann mxs and place appropriate elements into columns of a matrix
-    _, gateDim, blockDims = _processBlockDims(dimOrBlockDims)
-    gmToStd = _np.zeros( (gateDim,gateDim), 'complex' )
+    def build():
+        _, gateDim, blockDims = _processBlockDims(dimOrBlockDims)
+        gmToStd = _np.zeros( (gateDim,gateDim), 'complex' )
 
-    #Since a multi-block basis is just the direct sum of the individual block bases,
-    # transform mx is just the transfrom matrices of the individual blocks along the
-    # diagonal of the total basis transform matrix
+        #Since a multi-block basis is just the direct sum of the individual block bases,
+        # transform mx is just the transfrom matrices of the individual blocks along the
+        # diagonal of the total basis transform matrix
 
-    start = 0
-    for blockDim in blockDims:
-        mxs = gm_matrices(blockDim)
-        assert( len(mxs) == blockDim**2 )
+        start = 0
+        for blockDim in blockDims:
+            mxs = gm_matrices(blockDim)
+            assert( len(mxs) == blockDim**2 )
 
-        for j,mx in enumerate(mxs):
-            gmToStd[start:start+blockDim**2,start+j] = mx.flatten()
+            for j,mx in enumerate(mxs):
+                gmToStd[start:start+blockDim**2,start+j] = mx.flatten()
 
-        start += blockDim**2
+            start += blockDim**2
 
-    assert(start == gateDim)
-    return gmToStd
+        assert(start == gateDim)
+        return gmToStd
+    return _cached('toStd', 'gm', dimOrBlockDims, build)
 
 def std_to_gm(mxInStdBasis, dimOrBlockDims=None):
     """
@@ -739,8 +825,7 @@ def std_to_gm(mxInStdBasis, dimOrBlockDims=None):
         dimOrBlockDims = int(round(_np.sqrt(mxInStdBasis.shape[0])))
         assert( dimOrBlockDims**2 == mxInStdBasis.shape[0] )
 
-    gmToStd = gm_to_std_transform_matrix(dimOrBlockDims)
-    stdToGM = _np.linalg.inv(gmToStd)
+    gmToStd, stdToGM = basis_transform_matrices("gm", dimOrBlockDims)
 
     if len(mxInStdBasis.shape) == 2 and mxInStdBasis.shape[0] == mxInStdBasis.shape[1]:
         gm = _np.dot( stdToGM, _np.dot( mxInStdBasis, gmToStd ) )
@@ -794,8 +879,7 @@ def gm_to_std(mxInGellMannBasis, dimOrBlockDims=None):
         dimOrBlockDims = int(round(_np.sqrt(mxInGellMannBasis.shape[0])))
         assert( dimOrBlockDims**2 == mxInGellMannBasis.shape[0] )
 
-    gmToStd = gm_to_std_transform_matrix(dimOrBlockDims)
-    stdToGM = _np.linalg.inv(gmToStd)
+    gmToStd, stdToGM = basis_transform_matrices("gm", dimOrBlockDims)
 
     if len(mxInGellMannBasis.shape) == 2 and mxInGellMannBasis.shape[0] == mxInGellMannBasis.shape[1]:
         return _np.dot( gmToStd, _np.dot( mxInGellMannBasis, stdToGM ) )
@@ -834,6 +918,7 @@ def pp_matrices(dim):
     list
         A list of N numpy arrays each of shape (dim, dim),
         where N == dim^2, the dimension of the density-matrix space.
+        The matrices are shared (cached) and so are read-only.
 
     Notes
     -----
@@ -841,34 +926,36 @@ def pp_matrices(dim):
     e.g., for 2 qubits: II, IX, IY, IZ, XI, XX, XY, XZ, YI, ... ZZ
     """
 
-    sigmaVec = (id2x2/sqrt2, sigmax/sqrt2, sigmay/sqrt2, sigmaz/sqrt2)
+    def build(dim):
+        sigmaVec = (id2x2/sqrt2, sigmax/sqrt2, sigmay/sqrt2, sigmaz/sqrt2)
 
-    def is_integer(x):
-        return bool( abs(x - round(x)) < 1e-6 )
+        def is_integer(x):
+            return bool( abs(x - round(x)) < 1e-6 )
 
-    if not isinstance(dim, _numbers.Integral):
-        if isinstance(dim, _collections.Container) and len(dim) == 1:
-            dim = dim[0]
-        else:
-            raise ValueError("Dimension for Pauli tensor product matrices must be an *integer* power of 2")
+        if not isinstance(dim, _numbers.Integral):
+            if isinstance(dim, _collections.Container) and len(dim) == 1:
+                dim = dim[0]
+            else:
+                raise ValueError("Dimension for Pauli tensor product matrices must be an *integer* power of 2")
 
-    nQubits = _np.log2(dim)
-    if not is_integer(nQubits):
-        raise ValueError("Dimension for Pauli tensor product matrices must be an integer *power of 2*")
+        nQubits = _np.log2(dim)
+        if not is_integer(nQubits):
+            raise ValueError("Dimension for Pauli tensor product matrices must be an integer *power of 2*")
 
-    if nQubits == 0: #special case: return single 1x1 identity mx
-        return [ _np.identity(1,'complex') ]
+        if nQubits == 0: #special case: return single 1x1 identity mx
+            return [ _np.identity(1,'complex') ]
 
-    matrices = []
-    nQubits = int(round(nQubits))
-    basisIndList = [ [0,1,2,3] ]*nQubits
-    for sigmaInds in _itertools.product(*basisIndList):
-        M = _np.identity(1,'complex')
-        for i in sigmaInds:
-            M = _np.kron(M,sigmaVec[i])
-        matrices.append(M)
+        matrices = []
+        nQubits = int(round(nQubits))
+        basisIndList = [ [0,1,2,3] ]*nQubits
+        for sigmaInds in _itertools.product(*basisIndList):
+            M = _np.identity(1,'complex')
+            for i in sigmaInds:
+                M = _np.kron(M,sigmaVec[i])
+            matrices.append(M)
 
-    return matrices
+        return matrices
+    return _cached('matrices', 'pp', dim, lambda: build(dim))
 
 
 def pp_to_std_transform_matrix(dimOrBlockDims):
@@ -887,6 +974,7 @@ def pp_to_std_transform_matrix(dimOrBlockDims):
     numpy array
         An array of shape (N,N), where N is the dimension
         of the density matrix space, i.e. sum( dimOrBlockDims_i^2 ).
+        This array is shared (cached) and so is read-only.
 
     Notes
     -----
@@ -898,25 +986,27 @@ def pp_to_std_transform_matrix(dimOrBlockDims):
     """
 
     #vectorize tensor products of Pauli mxs and place them as columns into a matrix
-    _, gateDim, blockDims = _processBlockDims(dimOrBlockDims)
-    ppToStd = _np.zeros( (gateDim,gateDim), 'complex' )
+    def build():
+        _, gateDim, blockDims = _processBlockDims(dimOrBlockDims)
+        ppToStd = _np.zeros( (gateDim,gateDim), 'complex' )
 
-    #Since a multi-block basis is just the direct sum of the individual block bases,
-    # transform mx is just the transfrom matrices of the individual blocks along the
-    # diagonal of the total basis transform matrix
+        #Since a multi-block basis is just the direct sum of the individual block bases,
+        # transform mx is just the transfrom matrices of the individual blocks along the
+        # diagonal of the total basis transform matrix
 
-    start = 0
-    for blockDim in blockDims:
-        mxs = pp_matrices(blockDim)
-        assert( len(mxs) == blockDim**2 )
+        start = 0
+        for blockDim in blockDims:
+            mxs = pp_matrices(blockDim)
+            assert( len(mxs) == blockDim**2 )
 
-        for j,mx in enumerate(mxs):
-            ppToStd[start:start+blockDim**2,start+j] = mx.flatten()
+            for j,mx in enumerate(mxs):
+                ppToStd[start:start+blockDim**2,start+j] = mx.flatten()
 
-        start += blockDim**2
+            start += blockDim**2
 
-    assert(start == gateDim)
-    return ppToStd
+        assert(start == gateDim)
+        return ppToStd
+    return _cached('toStd', 'pp', dimOrBlockDims, build)
 
 
 def std_to_pp(mxInStdBasis, dimOrBlockDims=None):
@@ -945,8 +1035,7 @@ def std_to_pp(mxInStdBasis, dimOrBlockDims=None):
         dimOrBlockDims = int(round(_np.sqrt(mxInStdBasis.shape[0])))
         assert( dimOrBlockDims**2 == mxInStdBasis.shape[0] )
 
-    ppToStd = pp_to_std_transform_matrix(dimOrBlockDims)
-    stdToPP = _np.linalg.inv(ppToStd)
+    ppToStd, stdToPP = basis_transform_matrices("pp", dimOrBlockDims)
 
     if len(mxInStdBasis.shape) == 2 and mxInStdBasis.shape[0] == mxInStdBasis.shape[1]:
         pp = _np.dot( stdToPP, _np.dot( mxInStdBasis, ppToStd ) )
@@ -1001,8 +1090,7 @@ def pp_to_std(mxInPauliProdBasis, dimOrBlockDims=None):
         dimOrBlockDims = int(round(_np.sqrt(mxInPauliProdBasis.shape[0])))
         assert( dimOrBlockDims**2 == mxInPauliProdBasis.shape[0] )
 
-    ppToStd = pp_to_std_transform_matrix(dimOrBlockDims)
-    stdToPP = _np.linalg.inv(ppToStd)
+    ppToStd, stdToPP = basis_transform_matrices("pp", dimOrBlockDims)
 
     if len(mxInPauliProdBasis.shape) == 2 and mxInPauliProdBasis.shape[0] == mxInPauliProdBasis.shape[1]:
         return _np.dot( ppToStd, _np.dot( mxInPauliProdBasis, stdToPP ) )
@@ -1033,37 +1121,40 @@ def qt_matrices(dim, selected_pp_indices=[0,5,10,11,1,2,3,6,7]):
     -------
     list
         A list of 9 numpy arrays each of shape (3, 3).
+        The matrices are shared (cached) and so are read-only.
     """
     assert(dim == 3)
-    A = _np.array( [[1,0,0,0],
-                   [0,1./_np.sqrt(2),1./_np.sqrt(2),0],
-                   [0,0,0,1]], 'd') #projector onto symmetric space
+    def build():
+        A = _np.array( [[1,0,0,0],
+                       [0,1./_np.sqrt(2),1./_np.sqrt(2),0],
+                       [0,0,0,1]], 'd') #projector onto symmetric space
     
-    def toQutritSpace(inputMat):
-        return _np.dot(A,_np.dot(inputMat,A.transpose()))
+        def toQutritSpace(inputMat):
+            return _np.dot(A,_np.dot(inputMat,A.transpose()))
 
-    qt_mxs = []
-    pp_mxs = pp_matrices(4)
-    #selected_pp_indices = [0,5,10,11,1,2,3,6,7] #which pp mxs to project
-    # labels = ['II', 'XX', 'YY', 'YZ', 'IX', 'IY', 'IZ', 'XY', 'XZ']
-    qt_mxs = [toQutritSpace(pp_mxs[i]) for i in selected_pp_indices]
+        qt_mxs = []
+        pp_mxs = pp_matrices(4)
+        #selected_pp_indices = [0,5,10,11,1,2,3,6,7] #which pp mxs to project
+        # labels = ['II', 'XX', 'YY', 'YZ', 'IX', 'IY', 'IZ', 'XY', 'XZ']
+        qt_mxs = [toQutritSpace(pp_mxs[i]) for i in selected_pp_indices]
 
-    # Normalize so Tr(BiBj) = delta_ij (done by hand, since only 3x3 mxs)
-    qt_mxs[0] *= 1/_np.sqrt(0.75)
+        # Normalize so Tr(BiBj) = delta_ij (done by hand, since only 3x3 mxs)
+        qt_mxs[0] *= 1/_np.sqrt(0.75)
     
-    #TAKE 2 (more symmetric = better?)
-    q1 = qt_mxs[1] - qt_mxs[0]*_np.sqrt(0.75)/3
-    q2 = qt_mxs[2] - qt_mxs[0]*_np.sqrt(0.75)/3
-    qt_mxs[1] = (q1 + q2)/_np.sqrt(2./3.)
-    qt_mxs[2] = (q1 - q2)/_np.sqrt(2)
+        #TAKE 2 (more symmetric = better?)
+        q1 = qt_mxs[1] - qt_mxs[0]*_np.sqrt(0.75)/3
+        q2 = qt_mxs[2] - qt_mxs[0]*_np.sqrt(0.75)/3
+        qt_mxs[1] = (q1 + q2)/_np.sqrt(2./3.)
+        qt_mxs[2] = (q1 - q2)/_np.sqrt(2)
 
-    #TAKE 1 (XX-II and YY-XX-II terms... not symmetric):
-    #qt_mxs[1] = (qt_mxs[1] - qt_mxs[0]*_np.sqrt(0.75)/3) / _np.sqrt(2.0/3.0)
-    #qt_mxs[2] = (qt_mxs[2] - qt_mxs[0]*_np.sqrt(0.75)/3 + qt_mxs[1]*_np.sqrt(2.0/3.0)/2) / _np.sqrt(0.5)
+        #TAKE 1 (XX-II and YY-XX-II terms... not symmetric):
+        #qt_mxs[1] = (qt_mxs[1] - qt_mxs[0]*_np.sqrt(0.75)/3) / _np.sqrt(2.0/3.0)
+        #qt_mxs[2] = (qt_mxs[2] - qt_mxs[0]*_np.sqrt(0.75)/3 + qt_mxs[1]*_np.sqrt(2.0/3.0)/2) / _np.sqrt(0.5)
 
-    for i in range(3,9): qt_mxs[i] *= 1/ _np.sqrt(0.5)
+        for i in range(3,9): qt_mxs[i] *= 1/ _np.sqrt(0.5)
     
-    return qt_mxs
+        return qt_mxs
+    return _cached('matrices', ('qt',tuple(selected_pp_indices)), dim, build)
 
 
 def qt_to_std_transform_matrix(dimOrBlockDims):
@@ -1082,6 +1173,7 @@ def qt_to_std_transform_matrix(dimOrBlockDims):
     numpy array
         An array of shape (N,N), where N is the dimension
         of the density matrix space, i.e. sum( dimOrBlockDims_i^2 ).
+        This array is shared (cached) and so is read-only.
 
     Notes
     -----
@@ -1092,25 +1184,27 @@ def qt_to_std_transform_matrix(dimOrBlockDims):
         basis matrices along it's columns.
     """
     #vectorize Gell Mann mxs and place appropriate elements into columns of a matrix
-    _, gateDim, blockDims = _processBlockDims(dimOrBlockDims)
-    gmToStd = _np.zeros( (gateDim,gateDim), 'complex' )
+    def build():
+        _, gateDim, blockDims = _processBlockDims(dimOrBlockDims)
+        gmToStd = _np.zeros( (gateDim,gateDim), 'complex' )
 
-    #Since a multi-block basis is just the direct sum of the individual block bases,
-    # transform mx is just the transfrom matrices of the individual blocks along the
-    # diagonal of the total basis transform matrix
+        #Since a multi-block basis is just the direct sum of the individual block bases,
+        # transform mx is just the transfrom matrices of the individual blocks along the
+        # diagonal of the total basis transform matrix
 
-    start = 0
-    for blockDim in blockDims:
-        mxs = qt_matrices(blockDim)
-        assert( len(mxs) == blockDim**2 )
+        start = 0
+        for blockDim in blockDims:
+            mxs = qt_matrices(blockDim)
+            assert( len(mxs) == blockDim**2 )
 
-        for j,mx in enumerate(mxs):
-            gmToStd[start:start+blockDim**2,start+j] = mx.flatten()
+            for j,mx in enumerate(mxs):
+                gmToStd[start:start+blockDim**2,start+j] = mx.flatten()
 
-        start += blockDim**2
+            start += blockDim**2
 
-    assert(start == gateDim)
-    return gmToStd
+        assert(start == gateDim)
+        return gmToStd
+    return _cached('toStd', 'qt', dimOrBlockDims, build)
 
 def std_to_qt(mxInStdBasis, dimOrBlockDims=None):
     """
@@ -1137,8 +1231,7 @@ def std_to_qt(mxInStdBasis, dimOrBlockDims=None):
         dimOrBlockDims = int(round(_np.sqrt(mxInStdBasis.shape[0])))
         assert( dimOrBlockDims**2 == mxInStdBasis.shape[0] )
 
-    qtToStd = qt_to_std_transform_matrix(dimOrBlockDims)
-    stdToQT = _np.linalg.inv(qtToStd)
+    qtToStd, stdToQT = basis_transform_matrices("qt", dimOrBlockDims)
 
     if len(mxInStdBasis.shape) == 2 and mxInStdBasis.shape[0] == mxInStdBasis.shape[1]:
         qt = _np.dot( stdToQT, _np.dot( mxInStdBasis, qtToStd ) )
@@ -1184,8 +1277,7 @@ def qt_to_std(mxInQutritBasis, dimOrBlockDims=None):
         dimOrBlockDims = int(round(_np.sqrt(mxInQutritBasis.shape[0])))
         assert( dimOrBlockDims**2 == mxInQutritBasis.shape[0] )
 
-    qtToStd = qt_to_std_transform_matrix(dimOrBlockDims)
-    stdToQT = _np.linalg.inv(qtToStd)
+    qtToStd, stdToQT = basis_transform_matrices("qt", dimOrBlockDims)
 
     if len(mxInQutritBasis.shape) == 2 and mxInQutritBasis.shape[0] == mxInQutritBasis.shape[1]:
         return _np.dot( qtToStd, _np.dot( mxInQutritBasis, stdToQT ) )
@@ -1371,7 +1463,50 @@ def basis_matrices(basis, dimOrBlockDims):
     if basis == "pp":  return pp_matrices(dimOrBlockDims)
     if basis == "qt":  return qt_matrices(dimOrBlockDims)
     raise ValueError("Invalid 'basis' argument: %s" % basis)
-    
+
+
+def basis_transform_matrices(basis, dimOrBlockDims):
+    """
+    Get the matrices which transform a gate matrix between the specified
+    basis and the Standard basis of a density matrix space.
+
+    Both matrices are cached, so this is the preferred way of obtaining
+    the inverse of, e.g., :func:`pp_to_std_transform_matrix` when it is
+    needed repeatedly.
+
+    Parameters
+    ----------
+    basis : {'std', 'gm', 'pp', 'qt'}
+        The basis type.  Allowed values are Matrix-unit (std), Gell-Mann (gm),
+        Pauli-product (pp), and Qutrit (qt).
+
+    dimOrBlockDims : int or list of ints
+        Structure of the density-matrix space.
+
+    Returns
+    -------
+    toStd, fromStd : numpy array
+        Arrays of shape (N,N), where N is the dimension of the density
+        matrix space, i.e. sum( dimOrBlockDims_i^2 ).  `toStd` transforms
+        from `basis` to the Standard basis and `fromStd` is its inverse.
+        These arrays are shared (cached) and so are read-only.
+    """
+    if basis == "std":
+        def build():
+            _, gateDim, _ = _processBlockDims(dimOrBlockDims)
+            return _np.identity(gateDim, 'complex'), _np.identity(gateDim, 'complex')
+    else:
+        if basis == "gm":   toStdFn = gm_to_std_transform_matrix
+        elif basis == "pp": toStdFn = pp_to_std_transform_matrix
+        elif basis == "qt": toStdFn = qt_to_std_transform_matrix
+        else: raise ValueError("Invalid 'basis' argument: %s" % basis)
+
+        def build():
+            toStd = toStdFn(dimOrBlockDims)
+            return toStd, _np.linalg.inv(toStd)
+
+    return _cached('transforms', basis, dimOrBlockDims, build)
+
 
 def change_basis(mx, from_basis, to_basis, dimOrBlockDims=None):
     """
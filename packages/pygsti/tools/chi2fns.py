@@ -141,10 +141,10 @@ def chi2(dataset, gateset, gateStrings=None,
     #  evTree.print_analysis()
 
 
-    for (i,gateStr) in enumerate(gateStrings):
-        N[i] = float(dataset[gateStr].total())
-        for k,sl in enumerate(spamLabels):
-            f[k,i] = dataset[gateStr].fraction(sl)
+    dsSpamLabels = dataset.get_spam_labels()
+    cnts = dataset.get_counts_matrix(gateStrings, dsSpamLabels)
+    N[:] = cnts.sum(axis=0)
+    f[:,:] = cnts[ [dsSpamLabels.index(sl) for sl in spamLabels] ] / N[None,:]
 
 
     if returnHessian:
@@ -255,6 +255,125 @@ def fast_jamiolkowski_iso_std_inv(choiMx, gateMxBasis="gm", dimOrStateSpaceDims=
     return _bt.change_basis(gateMxInStdBasis, "std", gateMxBasis, dimOrStateSpaceDims)
 
 
+def fast_jamiolkowski_iso_std_stack(gateMxs, gateMxBasis="gm", dimOrStateSpaceDims=None):
+    """
+    Compute the (trace == 1) Choi matrices in the standard basis of a stack
+    of gate matrices, as :func:`fast_jamiolkowski_iso_std` does for a single
+    gate, using one vectorized basis transform for the entire stack.
+
+    Parameters
+    ----------
+    gateMxs : numpy array
+        An array of shape (nGates, dim, dim) holding the gate matrices.
+
+    gateMxBasis : {"std","gm","pp","qt"}, optional
+        the basis of the gate matrices: standard (matrix units), Gell-Mann,
+        Pauli-product, or Qutrit, respectively.
+
+    dimOrStateSpaceDims : int or list of ints, optional
+        Structure of the density-matrix space, which further specifies the basis
+        of the gate matrices (see BasisTools).
+
+    Returns
+    -------
+    numpy array
+        An array of shape (nGates, dim, dim) of Choi matrices, each normalized
+        to have trace == 1, in the std basis.
+    """
+    gateMxs = _np.asarray(gateMxs)
+    nGates, N2 = gateMxs.shape[0], gateMxs.shape[1]; N = int(round(_np.sqrt(N2)))
+    assert(N*N == N2) #make sure N2 is a perfect square
+    if dimOrStateSpaceDims is None: dimOrStateSpaceDims = N
+    toStd, fromStd = _bt.basis_transform_matrices(gateMxBasis, dimOrStateSpaceDims)
+    gateMxsInStdBasis = _np.matmul(toStd, _np.matmul(gateMxs, fromStd))
+
+    #Shuffle indices to go from process matrices to Jamiolkowski matrices
+    Jmxs = gateMxsInStdBasis.reshape((nGates,N,N,N,N)).swapaxes(2,3)
+    return Jmxs.reshape((nGates,N2,N2)) / N
+
+
+def choi_eigensystems(gateMxs, gateMxBasis="gm", dimOrStateSpaceDims=None):
+    """
+    Compute the eigenvalues and eigenvectors of the (trace == 1) Choi matrices
+    of a stack of gate matrices using a single batched Hermitian
+    eigendecomposition.
+
+    The Choi matrix of a gate matrix that is real in the "gm", "pp" or "qt"
+    basis (i.e. of a Hermiticity-preserving map) is Hermitian.  In general,
+    the eigensystem of the Hermitian part of each Choi matrix is computed.
+
+    Parameters
+    ----------
+    gateMxs : numpy array
+        An array of shape (nGates, dim, dim) holding the gate matrices.
+
+    gateMxBasis : {"std","gm","pp","qt"}, optional
+        the basis of the gate matrices.
+
+    dimOrStateSpaceDims : int or list of ints, optional
+        Structure of the density-matrix space (see BasisTools).
+
+    Returns
+    -------
+    evals : numpy array
+        A real array of shape (nGates, dim); `evals[i]` holds the eigenvalues
+        of the i-th gate's Choi matrix in ascending order.
+    evecs : numpy array
+        An array of shape (nGates, dim, dim) whose `evecs[i][:,k]` is the
+        (std basis) eigenvector corresponding to `evals[i,k]`.
+    """
+    Jmxs = fast_jamiolkowski_iso_std_stack(gateMxs, gateMxBasis, dimOrStateSpaceDims)
+    Jmxs = 0.5*(Jmxs + Jmxs.swapaxes(1,2).conjugate())
+    return _np.linalg.eigh(Jmxs)
+
+
+def choi_evals_derivs(evecs, evalWeights, gateMxBasis="gm", dimOrStateSpaceDims=None):
+    """
+    Compute the derivative of a weighted sum of Choi-matrix eigenvalues with
+    respect to the elements of the corresponding gate matrices.
+
+    For each gate `i`, this is the derivative of
+    `sum_k evalWeights[i,k] * evals[i,k]` (with the weights held fixed), where
+    `evals` and `evecs` are as returned by :func:`choi_eigensystems`.  Using
+    `evalWeights = -(evals < 0)` gives the derivative of the sum of negative
+    eigenvalues' magnitudes, and `evalWeights = sign(evals)` gives the
+    derivative of the Choi matrix's trace norm.
+
+    Parameters
+    ----------
+    evecs : numpy array
+        The eigenvectors returned by :func:`choi_eigensystems`, of shape
+        (nGates, dim, dim).
+
+    evalWeights : numpy array
+        The weights, of shape (nGates, dim).
+
+    gateMxBasis : {"std","gm","pp","qt"}, optional
+        the basis of the gate matrices.
+
+    dimOrStateSpaceDims : int or list of ints, optional
+        Structure of the density-matrix space (see BasisTools).
+
+    Returns
+    -------
+    numpy array
+        A real array of shape (nGates, dim, dim) whose `[i,a,b]` element is
+        the derivative of gate `i`'s weighted eigenvalue sum with respect to
+        the `(a,b)` element of its gate matrix (in `gateMxBasis`).
+    """
+    nGates, N2 = evecs.shape[0], evecs.shape[1]; N = int(round(_np.sqrt(N2)))
+    if dimOrStateSpaceDims is None: dimOrStateSpaceDims = N
+    toStd, fromStd = _bt.basis_transform_matrices(gateMxBasis, dimOrStateSpaceDims)
+
+    # d(evals[k]) = u_k^dag dJ u_k = Tr(dJ M) with M = sum_k w_k u_k u_k^dag.  Since
+    #  J is an index shuffle of (toStd G fromStd)/N, Tr(dJ M) = sum_ab dG[a,b] D[a,b]
+    #  where D = toStd^T W fromStd^T / N and W is the same shuffle of M^T.
+    M = _np.matmul(evecs * _np.asarray(evalWeights)[:,None,:], evecs.swapaxes(1,2).conjugate())
+    W = M.swapaxes(1,2).reshape((nGates,N,N,N,N)).swapaxes(2,3).reshape((nGates,N2,N2))
+    D = _np.matmul(toStd.T, _np.matmul(W, fromStd.T)) / N
+    return D.real
+
+
 def sum_of_negative_choi_evals(gateset, weights=None):
     """
     Compute the amount of non-CP-ness of a gateset by summing the negative
@@ -300,16 +419,9 @@ def sums_of_negative_choi_evals(gateset):
         each element == sum of the negative eigenvalues of the Choi matrix
         for the corresponding gate (as ordered  by gateset.gates.iteritems()).
     """
-    ret = []
-    mxBasis = gateset.get_basis_name()
-    for (_, gate) in gateset.gates.items():
-        J = fast_jamiolkowski_iso_std(gate, mxBasis) #Choi mx basis doesn't matter
-        evals = _np.linalg.eigvals( J )  #could use eigvalsh, but wary of this since eigh can be wrong...
-        sumOfNeg = 0.0
-        for ev in evals:
-            if ev.real < 0: sumOfNeg -= ev.real
-        ret.append(sumOfNeg)
-    return ret
+    if len(gateset.gates) == 0: return []
+    evals, _ = choi_eigensystems(_gate_stack(gateset), gateset.get_basis_name())
+    return list(-_np.where(evals < 0, evals, 0.0).sum(axis=1))
 
 
 def mags_of_negative_choi_evals(gateset):
@@ -329,10 +441,11 @@ def mags_of_negative_choi_evals(gateset):
         this list will vary based on how many negative eigenvalues are found,
         as positive eigenvalues contribute nothing to this list.
     """
-    ret = []
-    for (_, gate) in gateset.gates.items():
-        J = jamiolkowski_iso( gate, choiMxBasis="std" )
-        evals = _np.linalg.eigvals( J )  #could use eigvalsh, but wary of this since eigh can be wrong...
-        for ev in evals:
-            ret.append( -ev.real if ev.real < 0 else 0.0 )
-    return ret
+    if len(gateset.gates) == 0: return []
+    evals, _ = choi_eigensystems(_gate_stack(gateset), gateset.get_basis_name())
+    return list(-_np.where(evals < 0, evals, 0.0).flatten())
+
+
+def _gate_stack(gateset):
+    """ The gate matrices of `gateset` as a (nGates, dim, dim) array """
+    return _np.array([ _np.asarray(gate) for gate in gateset.gates.values() ])
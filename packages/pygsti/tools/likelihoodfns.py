@@ -45,10 +45,8 @@ def create_count_vec_dict(spamLabels, dataset, gatestring_list):
     dict
         as described above.
     """
-    countVecDict = { }
-    for spamLabel in spamLabels:
-        countVecDict[spamLabel] = _np.array( [ dataset[gs][spamLabel] for gs in gatestring_list ] )
-    return countVecDict
+    countMx = dataset.get_counts_matrix(gatestring_list, spamLabels)
+    return { spamLabel: countMx[k] for k,spamLabel in enumerate(spamLabels) }
 
 
 def fill_count_vecs(mxToFill, spam_label_rows, dataset, gatestring_list):
@@ -82,8 +80,9 @@ def fill_count_vecs(mxToFill, spam_label_rows, dataset, gatestring_list):
     -------
     None
     """
-    for spamLabel,iRow in spam_label_rows.items():
-        mxToFill[iRow,:] = [ dataset[gs][spamLabel] for gs in gatestring_list ]
+    spamLabels = list(spam_label_rows.keys())
+    rows = [ spam_label_rows[sl] for sl in spamLabels ]
+    mxToFill[rows,:] = dataset.get_counts_matrix(gatestring_list, spamLabels)
 
 
 
@@ -171,7 +170,8 @@ def fill_count_vecs(mxToFill, spam_label_rows, dataset, gatestring_list):
 
 def logl(gateset, dataset, gatestring_list=None,
          minProbClip=1e-6, probClipInterval=(-1e6,1e6), radius=1e-4,
-         evalTree=None, countVecMx=None, poissonPicture=True, check=False):
+         evalTree=None, countVecMx=None, poissonPicture=True, check=False,
+         nThreads=None):
     """
     The log-likelihood function.
 
@@ -222,6 +222,12 @@ def logl(gateset, dataset, gatestring_list=None,
       If True, perform extra checks within code to verify correctness.  Used
       for testing, and runs much slower when True.
 
+    nThreads : int, optional
+      If greater than 1, the number of threads used to compute the
+      probabilities.  When `evalTree` is None, the tree created by this
+      function is split into (at least) this many subtrees so the threads
+      have something to work on.
+
     Returns
     -------
     float
@@ -249,10 +255,15 @@ def logl(gateset, dataset, gatestring_list=None,
     a = radius # parameterizes "roundness" of f == 0 terms
     min_p = minProbClip
 
-    if evalTree is None:
-        evalTree = gateset.bulk_evaltree(gatestring_list)
+    bOwnTree = evalTree is None
+    if bOwnTree:
+        evalTree = gateset.bulk_evaltree(gatestring_list, minSubtrees=nThreads
+                                         if (nThreads is not None and nThreads > 1) else None)
 
-    gateset.bulk_fill_probs(probs, spam_lbl_rows, evalTree, probClipInterval, check)
+    gateset.bulk_fill_probs(probs, spam_lbl_rows, evalTree, probClipInterval, check,
+                            nThreads=nThreads)
+    if bOwnTree and evalTree.is_split(): #permute back to gatestring_list order
+        probs = evalTree.permute_computation_to_original(probs, axis=1)
     pos_probs = _np.where(probs < min_p, min_p, probs)
 
     if poissonPicture:
@@ -286,7 +297,8 @@ def logl(gateset, dataset, gatestring_list=None,
 
 def logl_jacobian(gateset, dataset, gatestring_list=None,
                   minProbClip=1e-6, probClipInterval=(-1e6,1e6), radius=1e-4,
-                  evalTree=None, countVecMx=None, poissonPicture=True, check=False):
+                  evalTree=None, countVecMx=None, poissonPicture=True, check=False,
+                  nThreads=None):
     """
     The jacobian of the log-likelihood function.
 
@@ -336,6 +348,10 @@ def logl_jacobian(gateset, dataset, gatestring_list=None,
         If True, perform extra checks within code to verify correctness.  Used
         for testing, and runs much slower when True.
 
+    nThreads : int, optional
+        If greater than 1, the number of threads used to compute the
+        probability derivatives (see `logl`).
+
     Returns
     -------
     numpy array
@@ -368,11 +384,17 @@ def logl_jacobian(gateset, dataset, gatestring_list=None,
     a = radius # parameterizes "roundness" of f == 0 terms
     min_p = minProbClip
 
-    if evalTree is None:
-        evalTree = gateset.bulk_evaltree(gatestring_list)
+    bOwnTree = evalTree is None
+    if bOwnTree:
+        evalTree = gateset.bulk_evaltree(gatestring_list, minSubtrees=nThreads
+                                         if (nThreads is not None and nThreads > 1) else None)
 
     gateset.bulk_fill_dprobs(dprobs, spam_lbl_rows, evalTree,
-                            prMxToFill=probs, clipTo=probClipInterval, check=check)
+                            prMxToFill=probs, clipTo=probClipInterval, check=check,
+                            nThreads=nThreads)
+    if bOwnTree and evalTree.is_split(): #permute back to gatestring_list order
+        probs = evalTree.permute_computation_to_original(probs, axis=1)
+        dprobs = evalTree.permute_computation_to_original(dprobs, axis=1)
 
     pos_probs = _np.where(probs < min_p, min_p, probs)
 
@@ -176,6 +176,45 @@ def distribute_indices_base(indices, nprocs, rank, allow_split_comm=True):
     return loc_indices, owners
 
 
+def thread_map(fn, items, nThreads=None):
+    """
+    Call `fn` on each of `items`, possibly concurrently in a pool of threads.
+
+    This is a shared-memory complement to distributing work among MPI
+    processors: it is useful when `fn` spends most of its time in numpy
+    routines (e.g. matrix products) which release the GIL.  Since the
+    calls share memory, they must write their results to *disjoint*
+    locations.
+
+    Parameters
+    ----------
+    fn : function
+        A function taking a single argument (an element of `items`).
+
+    items : list
+        The arguments to call `fn` with.
+
+    nThreads : int, optional
+        The number of threads to use.  If None or 1, or if there are fewer
+        than two items, `fn` is simply called on each item in turn.
+
+    Returns
+    -------
+    list
+        The return values of `fn`, in the order of `items`.
+    """
+    items = list(items)
+    if nThreads is None or nThreads <= 1 or len(items) <= 1:
+        return [ fn(item) for item in items ]
+
+    from multiprocessing.pool import ThreadPool as _ThreadPool
+    pool = _ThreadPool(min(nThreads, len(items)))
+    try:
+        return pool.map(fn, items, chunksize=1) # re-raises any exception from fn
+    finally:
+        pool.close(); pool.join()
+
+
 def slice_up_slice(slc, num_slices):
     """ 
     Divides up `slc` into `num_slices` slices.
@@ -557,6 +596,12 @@ def distribute_for_dot(contracted_dim, comm):
     assert(loc_indices == list(range(start,stop)))
     return slice(start, stop) # local column range as a slice
 
+def _sum_op(comm):
+    """ The summation operation to give `comm`'s reduction methods """
+    if hasattr(comm, "SUM"): return comm.SUM # e.g. a pygsti LocalComm
+    from mpi4py import MPI #not at top so can import pygsti on cluster login nodes
+    return MPI.SUM
+
 def mpidot(a,b,loc_slice,comm):
     """
     Performs a distributed dot product, dot(a,b).
@@ -581,10 +626,9 @@ def mpidot(a,b,loc_slice,comm):
         assert(loc_slice == slice(0,b.shape[0]))
         return _np.dot(a,b)
 
-    from mpi4py import MPI #not at top so can import pygsti on cluster login nodes
     loc_dot = _np.dot(a[:,loc_slice],b[loc_slice,:])
     result = _np.empty( loc_dot.shape, loc_dot.dtype )
-    comm.Allreduce(loc_dot, result, op=MPI.SUM)
+    comm.Allreduce(loc_dot, result, op=_sum_op(comm))
 
     #DEBUG: assert(_np.linalg.norm( _np.dot(a,b) - result ) < 1e-6)
     return result
@@ -599,3 +643,27 @@ def mpidot(a,b,loc_slice,comm):
     #                [CTels, (sizes,displacements[:-1]), MPI.F_DOUBLE_COMPLEX])
 
     
+
+
+def sum_across_procs(a, comm):
+    """
+    Sums an array over all the processors of a communicator.
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        This processor's contribution to the sum.
+
+    comm : mpi4py.MPI.Comm or None
+        The communicator whose processors' arrays are summed.
+
+    Returns
+    -------
+    numpy.ndarray
+        The sum (`a` itself when `comm` is None).
+    """
+    if comm is None or comm.Get_size() == 1:
+        return a
+    result = _np.empty( a.shape, a.dtype )
+    comm.Allreduce(_np.ascontiguousarray(a), result, op=_sum_op(comm))
+    return result
@@ -0,0 +1,46 @@
+"""
+Times EvalTree construction as a function of the number and length of
+the gate strings being evaluated, and compares the number of products
+in trees built with and without repeated squaring of germ powers.  Run directly:
+
+    python evalTreeSpeedTest.py [maxL]
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+
+import sys
+import time
+
+import pygsti
+from pygsti.construction import std1Q_XYI as std
+
+
+def time_evaltree(gs, gatestring_list, check=True, germPowers=False):
+    t0 = time.time()
+    evt = gs.bulk_evaltree(gatestring_list, check=check, germPowers=germPowers)
+    return time.time() - t0, len(evt.get_evaluation_order())
+
+
+def main(maxMaxL=256):
+    gs = std.gs_target
+    gateLabels = list(gs.gates.keys())
+    maxLengths = [1]
+    while maxLengths[-1] < maxMaxL:
+        maxLengths.append(2*maxLengths[-1])
+
+    print("%8s %10s %10s %12s %12s %10s %12s" % ("maxL", "nStrings", "products",
+                                                 "time (s)", "no check (s)",
+                                                 "products", "powers (s)"))
+    for i in range(len(maxLengths)):
+        lsgstLists = pygsti.construction.make_lsgst_lists(
+            gateLabels, std.fiducials, std.fiducials, std.germs,
+            maxLengths[0:i+1])
+        gatestring_list = lsgstLists[-1]
+        t, nTree = time_evaltree(gs, gatestring_list)
+        tNoCheck, _ = time_evaltree(gs, gatestring_list, check=False)
+        tPow, nPow = time_evaltree(gs, gatestring_list, germPowers=True)
+        print("%8d %10d %10d %12.3f %12.3f %10d %12.3f" % (maxLengths[i], len(gatestring_list),
+                                                          nTree, t, tNoCheck, nPow, tPow))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 256)
@@ -0,0 +1,102 @@
+"""
+Times the per-candidate cost of scoring germ sets during germ selection,
+comparing IncrementalGermScorer's low-rank updates with the from-scratch
+eigenvalue computation (sum of the germs' J^H*J matrices followed by
+eigvalsh) the search routines used to perform, on a 1Q XYI and a 2Q XYCNOT
+candidate germ list.  Three kinds of moves are timed:
+
+  add    - one germ added to a small, non-AC germ set (build_up, GRASP
+           construction), scored with non_AC_score
+  remove - one germ removed from an AC germ set (optimize_integer_germs_slack)
+  swap   - one germ swapped into an AC germ set (GRASP local search)
+
+The reference sums only the changed germs into a precomputed matrix for the
+base germ set, so it is a lower bound on the cost of re-averaging the whole
+stack.  Run directly (the 2Q case takes a few minutes):
+
+    python germSelectionScoreSpeedTest.py [nCandidates]
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+
+import sys
+import time
+
+import numpy as np
+import pygsti
+from pygsti.algorithms import germselection as germsel
+from pygsti.algorithms import scoring
+from pygsti.construction import std1Q_XYI, std2Q_XYCNOT
+
+
+def reference_score(baseDDD, factors, weights, baseWeights, nGaugeParams, nonAC):
+    """ Score by summing the changed germs into baseDDD and calling eigvalsh """
+    combinedDDD = baseDDD.copy()
+    for i in np.nonzero(weights - baseWeights)[0]:
+        combinedDDD += (weights[i] - baseWeights[i]) * np.dot(factors[i].T.conjugate(), factors[i])
+    if nonAC:
+        return germsel.compute_non_AC_score(scoring.list_score, thresholdAC=1e6,
+                                            partialDerivDaggerDeriv=combinedDDD[None,:,:],
+                                            numGaugeParams=nGaugeParams)
+    observableEigenvals = np.sort(np.linalg.eigvalsh(combinedDDD))[nGaugeParams:]
+    return scoring.list_score(observableEigenvals, 'all')
+
+
+def moves(kind, baseWeights, nCandidates, rnd):
+    """ Generate candidate weight vectors near baseWeights """
+    members = np.nonzero(baseWeights)[0]; others = np.nonzero(baseWeights == 0)[0]
+    for k in range(nCandidates):
+        w = baseWeights.copy()
+        if kind in ('add', 'swap'): w[rnd.choice(others)] = 1
+        if kind in ('remove', 'swap'): w[rnd.choice(members)] = 0
+        yield w
+
+
+def run(name, gs_target, germsList, acGerms, nCandidates, seed=2017):
+    gs = gs_target.randomize_with_unitary(1e-2, seed=seed)
+    nGaugeParams = germsel.get_gateset_params([gs])[1]
+    t0 = time.time()
+    factors = germsel.calc_twirled_DDD_factors(gs, germsList, 1e-6)
+    print("%s: %d candidate germs, %d parameters, J^H*J ranks %d-%d (factors in %.1fs)" % (
+        name, len(germsList), factors[0].shape[1], min(len(f) for f in factors),
+        max(len(f) for f in factors), time.time() - t0))
+
+    rnd = np.random.RandomState(seed)
+    acWeights = np.array([1 if germ in acGerms else 0 for germ in germsList], 'd')
+    smallWeights = np.zeros(len(germsList), 'd')
+    smallWeights[rnd.choice(np.nonzero(acWeights)[0], 10, replace=False)] = 1
+
+    print("%8s %14s %14s %10s %12s" % ("move", "old time (s)", "new time (s)", "speedup", "max rel diff"))
+    for kind, baseWeights in (("add", smallWeights), ("remove", acWeights), ("swap", acWeights)):
+        nonAC = (kind == 'add')
+        scorer = germsel.IncrementalGermScorer(factors, nGaugeParams, 'all', baseWeights)
+        baseDDD = scorer.combinedDDD
+        tOld = tNew = 0.0; maxDiff = 0.0
+        for w in moves(kind, baseWeights, nCandidates, rnd):
+            t0 = time.time(); old = reference_score(baseDDD, factors, w, baseWeights, nGaugeParams, nonAC)
+            t1 = time.time(); new = scorer.non_AC_score(w) if nonAC else scorer.list_score(w)
+            t2 = time.time()
+            tOld += t1 - t0; tNew += t2 - t1
+            if nonAC:
+                assert(old.N == new.N)
+                old, new = old.score, new.score
+            if np.isfinite(old): maxDiff = max(maxDiff, abs(new - old) / abs(old))
+        print("%8s %14.4f %14.4f %10.1f %12.1g" % (kind, tOld / nCandidates, tNew / nCandidates,
+                                                  tOld / tNew, maxDiff))
+
+
+def candidate_germs(std, maxLength):
+    """ The standard (AC) germs of `std` followed by other short germs """
+    return std.germs + [ germ for germ in
+        pygsti.construction.list_all_gatestrings_without_powers_and_cycles(
+            list(std.gs_target.gates.keys()), maxLength) if germ not in std.germs ]
+
+
+def main(nCandidates=20):
+    run("1Q XYI", std1Q_XYI.gs_target, candidate_germs(std1Q_XYI, 6), std1Q_XYI.germs,
+        nCandidates)
+    run("2Q XYCNOT", std2Q_XYCNOT.gs_target, candidate_germs(std2Q_XYCNOT, 2),
+        std2Q_XYCNOT.germs, max(nCandidates // 5, 1))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
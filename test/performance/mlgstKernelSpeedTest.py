@@ -0,0 +1,125 @@
+"""
+Times the per-call cost and peak (temporary) memory of the MLGST
+least-squares objective and jacobian-factor kernels, comparing the
+preallocated-buffer kernels used by do_mlgst with the equivalent
+expression-based computation they replaced, on synthetic data with
+1e6 (gate string, spam label) pairs by default.  Run directly:
+
+    python mlgstKernelSpeedTest.py [nPairs]
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+
+import sys
+import time
+
+import numpy as np
+from pygsti.algorithms import core
+
+try:
+    import tracemalloc #numpy reports its allocations to tracemalloc (Python 3 only)
+except ImportError:
+    tracemalloc = None
+
+
+def make_data(nPairs, nSpamLabels=2, seed=1234):
+    rnd = np.random.RandomState(seed)
+    ng = nPairs // nSpamLabels
+    probs = rnd.dirichlet(np.ones(nSpamLabels), ng).T.copy() # K x M
+    cnts = np.array([ rnd.multinomial(1000, p) for p in probs.T ], 'd').T
+    cnts[ rnd.random_sample(cnts.shape) < 0.05 ] = 0.0 # extra zero-count terms
+    probs[ rnd.random_sample(probs.shape) < 0.01 ] *= -1e-6 # some slightly negative probabilities
+    return probs, cnts
+
+
+def reference_kernels(probs, cnts, min_p, a, poissonPicture):
+    """ The K x M expression-based computations the buffer kernels replaced """
+    minusCnts = -cnts; totalCnts = cnts.sum(0)[None,:]
+    with np.errstate(invalid='ignore'): #strings with all-zero counts
+        freqs = cnts / totalCnts
+    freqTerm = cnts * np.log(np.where(cnts == 0, 1.0, freqs))
+    if poissonPicture: freqTerm -= cnts
+    freqTerm[ cnts == 0 ] = 0.0
+    if not poissonPicture: totalCnts = 0.0
+
+    def terms():
+        pos_probs = np.where(probs < min_p, min_p, probs)
+        S = minusCnts / min_p + totalCnts
+        S2 = -0.5 * minusCnts / (min_p**2)
+        v = freqTerm + minusCnts * np.log(pos_probs) + totalCnts*pos_probs
+        v = np.maximum(v,0)
+        v = np.where( probs < min_p, v + S*(probs - min_p) + S2*(probs - min_p)**2, v)
+        v = np.where( minusCnts == 0, totalCnts * np.where(probs >= a, probs, (-1.0/(3*a**2))*probs**3 + probs**2/a + a/3.0), v)
+        return np.sqrt(v), pos_probs, S, S2
+
+    def factor():
+        v, pos_probs, S, S2 = terms()
+        v = np.maximum(v,1e-100)
+        dprobs_factor_pos = (0.5 / v) * (minusCnts / pos_probs + totalCnts)
+        dprobs_factor_neg = (0.5 / v) * (S + 2*S2*(probs - min_p))
+        dprobs_factor_zerofreq = (0.5 / v) * totalCnts * np.where( probs >= a, 1.0, (-1.0/a**2)*probs**2 + 2*probs/a )
+        dprobs_factor = np.where( probs < min_p, dprobs_factor_neg, dprobs_factor_pos)
+        return np.where( minusCnts == 0, dprobs_factor_zerofreq, dprobs_factor )
+
+    return (lambda: terms()[0]), factor, freqTerm
+
+
+def buffer_kernels(probs, cnts, freqTerm, min_p, a, poissonPicture):
+    """ The kernels used by do_mlgst, with their one-time setup """
+    shape = probs.shape
+    minusCnts = -cnts
+    totalCntMx = np.empty(shape, 'd'); totalCntMx[:,:] = cnts.sum(0)[None,:]
+    S = minusCnts / min_p + totalCntMx if poissonPicture else minusCnts / min_p
+    if not poissonPicture: totalCntMx = None
+    S2 = -0.5 * minusCnts / (min_p**2)
+    zeroMask = (cnts == 0)
+    posBuf = np.empty(shape, 'd'); lowMask = np.empty(shape, bool)
+    vBuf = np.empty(shape, 'd'); factorBuf = np.empty(shape, 'd')
+
+    def terms():
+        v = np.empty(shape, 'd') #objective returns new memory
+        core._logl_terms_fill(v, probs, minusCnts, totalCntMx, freqTerm, S, S2,
+                              zeroMask, min_p, a, posBuf, lowMask)
+        return v
+
+    def factor():
+        core._logl_terms_fill(vBuf, probs, minusCnts, totalCntMx, freqTerm, S, S2,
+                              zeroMask, min_p, a, posBuf, lowMask)
+        core._logl_dprobs_factor_fill(factorBuf, probs, vBuf, minusCnts, totalCntMx, S, S2,
+                                      zeroMask, min_p, a, posBuf, lowMask)
+        return factorBuf
+
+    return terms, factor
+
+
+def time_and_peak(fn, nRepeats=5):
+    times = []
+    for i in range(nRepeats):
+        t0 = time.time(); fn(); times.append(time.time() - t0)
+    peak = float('nan')
+    if tracemalloc is not None:
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def main(nPairs=1000000):
+    min_p = 1e-4; a = 1e-4
+    probs, cnts = make_data(nPairs)
+    print("%d (gate string, spam label) pairs; peak memory is allocated during one call" % probs.size)
+    print("%10s %10s %14s %14s %14s %14s %10s" % ("picture", "kernel", "old time (s)", "new time (s)",
+                                                "old peak (MB)", "new peak (MB)", "max diff"))
+    for poissonPicture in (True, False):
+        oldTerms, oldFactor, freqTerm = reference_kernels(probs, cnts, min_p, a, poissonPicture)
+        newTerms, newFactor = buffer_kernels(probs, cnts, freqTerm, min_p, a, poissonPicture)
+        for name, old, new in (("objective", oldTerms, newTerms), ("jacobian", oldFactor, newFactor)):
+            tOld, memOld = time_and_peak(old)
+            tNew, memNew = time_and_peak(new)
+            maxDiff = np.max(np.abs(old() - new()))
+            print("%10s %10s %14.4f %14.4f %14.1f %14.1f %10.1g" % (
+                "poisson" if poissonPicture else "standard", name, tOld, tNew, memOld, memNew, maxDiff))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
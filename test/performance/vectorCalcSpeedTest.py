@@ -0,0 +1,53 @@
+"""
+Times bulk probability computation using the default (gate-string product)
+calculator and the vector (state-propagation) calculator of a GateSet, for
+1- and 2-qubit gate sets, as a function of the maximum gate string length.
+Run directly:
+
+    python vectorCalcSpeedTest.py [maxL]
+"""
+from __future__ import division, print_function, absolute_import, unicode_literals
+
+import sys
+import time
+
+import numpy as np
+import pygsti
+from pygsti.construction import std1Q_XYI as std1Q
+from pygsti.construction import std2Q_XYCNOT as std2Q
+
+
+def time_probs(gs, evt, calcType, nRepeats=3):
+    gs.set_calc_type(calcType)
+    times = []
+    for i in range(nRepeats):
+        t0 = time.time()
+        probs = gs.bulk_probs(evt)
+        times.append(time.time() - t0)
+    return min(times), probs
+
+
+def main(maxMaxL=64):
+    maxLengths = [1]
+    while maxLengths[-1] < maxMaxL:
+        maxLengths.append(2*maxLengths[-1])
+
+    print("%6s %6s %10s %12s %12s %10s %10s" % ("dim", "maxL", "nStrings", "product (s)",
+                                                "vector (s)", "speedup", "max diff"))
+    for std, fids, germs in ((std1Q, std1Q.fiducials, std1Q.germs),
+                             (std2Q, std2Q.fiducials, std2Q.germs)):
+        gs = std.gs_target.depolarize(gate_noise=0.01, spam_noise=0.01)
+        for i in range(len(maxLengths)):
+            gatestring_list = pygsti.construction.make_lsgst_lists(
+                list(gs.gates.keys()), fids, fids, germs, maxLengths[0:i+1])[-1]
+            evt = gs.bulk_evaltree(gatestring_list)
+            tProd, probs = time_probs(gs, evt, "product")
+            tVec, vecProbs = time_probs(gs, evt, "vector")
+            maxDiff = max([ np.max(np.abs(probs[sl] - vecProbs[sl])) for sl in probs ])
+            print("%6d %6d %10d %12.3f %12.3f %10.1f %10.1g" % (gs.get_dimension(), maxLengths[i],
+                                                                len(gatestring_list), tProd, tVec,
+                                                                tProd/tVec, maxDiff))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
@@ -354,6 +354,268 @@ class TestCoreMethods(BaseTestCase):
 
         self.assertAlmostEqual( gs_mlegst_go.frobeniusdist(gs_mle_compare), 0, places=5)
 
+    def test_jacobian_blocks(self):
+        ds = self.ds
+        gs_lgst = pygsti.do_lgst(ds, self.specs, self.gateset, svdTruncateTo=4, verbosity=0)
+        gs_lgst_go = pygsti.gaugeopt_to_target(gs_lgst,self.gateset, {'spam':1.0, 'gates': 1.0})
+        gs_clgst = pygsti.contract(gs_lgst_go, "CPTP")
+        strs = self.lsgstStrings[1]
+
+        for kwargs in ({}, {'regularizeFactor': 1e-3}, {'cptp_penalty_factor': 1.0},
+                       {'useFreqWeightedChiSq': True}):
+            _, gs_full = pygsti.do_mc2gst(ds, gs_clgst, strs, minProbClipForWeighting=1e-6,
+                                          jacBlocks=False, **kwargs)
+            _, gs_blks = pygsti.do_mc2gst(ds, gs_clgst, strs, minProbClipForWeighting=1e-6,
+                                          jacBlocks=True, **kwargs)
+            self.assertAlmostEqual(gs_full.frobeniusdist(gs_blks), 0, places=6)
+
+        for kwargs in ({}, {'poissonPicture': False}, {'cptp_penalty_factor': 1.0}):
+            logl_full, gs_full = pygsti.do_mlgst(ds, gs_clgst, strs, minProbClip=1e-6,
+                                                 probClipInterval=(-1e2,1e2),
+                                                 jacBlocks=False, **kwargs)
+            logl_blks, gs_blks = pygsti.do_mlgst(ds, gs_clgst, strs, minProbClip=1e-6,
+                                                 probClipInterval=(-1e2,1e2),
+                                                 jacBlocks=True, **kwargs)
+            self.assertAlmostEqual(logl_full, logl_blks, places=6)
+            self.assertAlmostEqual(gs_full.frobeniusdist(gs_blks), 0, places=6)
+
+    def test_broyden_jacobians(self):
+        ds = self.ds
+        gs_lgst = pygsti.do_lgst(ds, self.specs, self.gateset, svdTruncateTo=4, verbosity=0)
+        gs_lgst_go = pygsti.gaugeopt_to_target(gs_lgst,self.gateset, {'spam':1.0, 'gates': 1.0})
+        gs_clgst = pygsti.contract(gs_lgst_go, "CPTP")
+        strs = self.lsgstStrings[-1]
+
+        chi2, gs_chi2 = pygsti.do_mc2gst(ds, gs_clgst, strs, minProbClipForWeighting=1e-6)
+        chi2_b, gs_chi2_b = pygsti.do_mc2gst(ds, gs_clgst, strs, minProbClipForWeighting=1e-6,
+                                             broydenIters=3)
+        self.assertAlmostEqual(sum(chi2**2), sum(chi2_b**2), places=2)
+
+        logl, gs_ml = pygsti.do_mlgst(ds, gs_clgst, strs, minProbClip=1e-6,
+                                      probClipInterval=(-1e2,1e2))
+        logl_b, gs_ml_b = pygsti.do_mlgst(ds, gs_clgst, strs, minProbClip=1e-6,
+                                          probClipInterval=(-1e2,1e2), broydenIters=3)
+        self.assertAlmostEqual(logl, logl_b, places=2)
+
+    def test_mlgst_multi(self):
+        strs = self.lsgstStrings[1]
+        gs_start = self.datagen_gateset
+        multiDS = pygsti.objects.MultiDataSet()
+        for seed in (1,2,3):
+            multiDS.add_dataset("ds%d" % seed, pygsti.construction.generate_fake_data(
+                self.datagen_gateset, strs, nSamples=1000, sampleError='binomial', seed=seed))
+        datasets = [ multiDS[dsName] for dsName in multiDS.keys() ]
+
+        logls, gatesets = pygsti.do_mlgst_multi(multiDS, gs_start, strs, minProbClip=1e-6,
+                                                probClipInterval=(-1e2,1e2))
+        logls_cold, gatesets_cold = pygsti.do_mlgst_multi(
+            datasets, [gs_start]*3, strs, minProbClip=1e-6, probClipInterval=(-1e2,1e2))
+        self.assertEqual(len(gatesets), 3)
+        for ds, logl, logl_cold in zip(datasets, logls, logls_cold):
+            logl_single, gs_single = pygsti.do_mlgst(ds, gs_start, strs, minProbClip=1e-6,
+                                                     probClipInterval=(-1e2,1e2))
+            self.assertAlmostEqual(logl, logl_single, places=3)
+            self.assertAlmostEqual(logl_cold, logl_single, places=6)
+
+        with self.assertRaises(AssertionError):
+            pygsti.do_mlgst_multi(datasets, [gs_start]*2, strs)
+
+    def test_gaugeopt_least_squares(self):
+        gs = self.datagen_gateset.copy()
+        dim = gs.get_dimension()
+        el = pygsti.objects.FullGaugeGroup(dim).get_element(
+            np.identity(dim).flatten() + 0.05*np.random.RandomState(0).randn(dim**2))
+        gs.transform(el)
+        weights = {'gates': 1.0, 'spam': 0.5}
+
+        for gaugeGroup in (pygsti.objects.FullGaugeGroup(dim), pygsti.objects.TPGaugeGroup(dim),
+                           pygsti.objects.DiagGaugeGroup(dim)):
+            d_ls, S_ls, gs_ls = pygsti.gaugeopt_to_target(gs, self.gateset, weights, gauge_group=gaugeGroup,
+                                                           method="ls", returnAll=True)
+            d_bfgs, S_bfgs, gs_bfgs = pygsti.gaugeopt_to_target(gs, self.gateset, weights, gauge_group=gaugeGroup,
+                                                                 method="L-BFGS-B", returnAll=True)
+            self.assertAlmostEqual(d_ls, gs_ls.frobeniusdist(self.gateset, None, 1.0, 0.5), places=10)
+            self.assertLess(d_ls, d_bfgs + 1e-6)
+            self.assertAlmostEqual(d_ls, d_bfgs, places=4)
+
+        with self.assertRaises(ValueError):
+            pygsti.gaugeopt_to_target(gs, self.gateset, CPpenalty=1.0, method="ls")
+
+    def test_gaugeopt_multistart(self):
+        gs = self.datagen_gateset.copy()
+        dim = gs.get_dimension()
+        el = pygsti.objects.FullGaugeGroup(dim).get_element(
+            np.identity(dim).flatten() + 0.05*np.random.RandomState(0).randn(dim**2))
+        gs.transform(el)
+
+        d1, S1, gs1 = pygsti.gaugeopt_to_target(gs, self.gateset, method="L-BFGS-B", returnAll=True)
+        for method in ("ls", "L-BFGS-B"):
+            for nProcesses in (1,2):
+                d, S, gs_go, startInfo = pygsti.gaugeopt_to_target(
+                    gs, self.gateset, method=method, returnAll=True, nStarts=3,
+                    nProcesses=nProcesses, abortRatio=None, seed=1234)
+                self.assertEqual(len(startInfo), 3)
+                self.assertArraysAlmostEqual(startInfo[0]['x0'], np.identity(dim).flatten())
+                self.assertAlmostEqual(d, min([info['fun'] for info in startInfo]))
+                self.assertFalse(any([info['aborted'] for info in startInfo]))
+                self.assertTrue(all([info['time'] >= 0 for info in startInfo]))
+                self.assertAlmostEqual(d, d1, places=5)
+
+        #Run serially, later starts are abandoned unless they beat the first
+        d, S, gs_go, startInfo = pygsti.gaugeopt_to_target(
+            gs, self.gateset, method="L-BFGS-B", returnAll=True, nStarts=3, abortRatio=1.0, seed=1234)
+        self.assertFalse(startInfo[0]['aborted'])
+        self.assertTrue(any([info['aborted'] for info in startInfo[1:]]))
+        self.assertEqual(startInfo[0]['fun'], d)
+        self.assertAlmostEqual(gs_go.frobeniusdist(gs1), 0, places=6)
+
+    def test_logl_kernels(self):
+        from pygsti.algorithms import core
+        min_p = a = 1e-3
+        probs = np.array([[0.5, 1e-4, -1e-5, 0.3, 2e-4],
+                          [0.5, 0.9999, 1.0, 0.7, 0.9998]])
+        cnts = np.array([[50., 3., 2., 0., 0.],
+                         [50., 97., 98., 100., 100.]])
+        zeroMask = (cnts == 0)
+        freqTerm = np.where(zeroMask, 0.0, cnts * np.log(np.where(zeroMask, 1.0, cnts/cnts.sum(0))))
+        totalCntMx = np.ones(cnts.shape) * cnts.sum(0)[None,:]
+        posBuf = np.empty(cnts.shape); lowMask = np.empty(cnts.shape, bool)
+
+        for poisson in (True, False):
+            totalCnts = totalCntMx if poisson else None
+            S = -cnts / min_p + (totalCntMx if poisson else 0)
+            S2 = 0.5 * cnts / min_p**2
+            ft = freqTerm - cnts if poisson else freqTerm
+
+            def terms(p):
+                v = np.empty(cnts.shape)
+                core._logl_terms_fill(v, p, -cnts, totalCnts, ft, S, S2, zeroMask,
+                                      min_p, a, posBuf, lowMask)
+                return v
+
+            v = terms(probs)
+            self.assertTrue(np.all(np.isfinite(v)))
+            factor = np.empty(cnts.shape)
+            core._logl_dprobs_factor_fill(factor, probs, v.copy(), -cnts, totalCnts, S, S2,
+                                          zeroMask, min_p, a, posBuf, lowMask)
+            eps = 1e-9
+            fd_factor = (terms(probs + eps) - terms(probs - eps)) / (2*eps)
+            self.assertLess(np.max(np.abs(factor[v > 1e-2] / fd_factor[v > 1e-2] - 1.0)), 1e-4)
+            if not poisson:
+                self.assertArraysAlmostEqual(v[zeroMask], 0)
+
+    def test_product_reuse(self):
+        gs_lgst = pygsti.do_lgst(self.ds, self.specs, self.gateset, svdTruncateTo=4, verbosity=0)
+        gs_lgst_go = pygsti.gaugeopt_to_target(gs_lgst,self.gateset, {'spam':1.0, 'gates': 1.0})
+        gs_clgst = pygsti.contract(gs_lgst_go, "CPTP")
+        strs = self.lsgstStrings[1]
+
+        for fn, kwargs in ((pygsti.do_mc2gst, {'minProbClipForWeighting': 1e-6}),
+                           (pygsti.do_mlgst, {'minProbClip': 1e-6})):
+            f, gs = fn(self.ds, gs_clgst, strs, memLimit=2**30, **kwargs)
+            f_reuse, gs_reuse = fn(self.ds, gs_clgst, strs, memLimit=2**30, productReuse=True, **kwargs)
+            self.assertAlmostEqual(gs_reuse.frobeniusdist(gs), 0, places=8)
+            self.assertEqual(gs_reuse.get_product_reuse_counts(), (0,0)) #reuse is turned off again
+
+    def test_germ_powers(self):
+        gs_lgst = pygsti.do_lgst(self.ds, self.specs, self.gateset, svdTruncateTo=4, verbosity=0)
+        gs_lgst_go = pygsti.gaugeopt_to_target(gs_lgst,self.gateset, {'spam':1.0, 'gates': 1.0})
+        gs_clgst = pygsti.contract(gs_lgst_go, "CPTP")
+        strs = self.lsgstStrings[0:3]
+
+        #record the germPowers argument of every evaluation tree the drivers build
+        GateSet = pygsti.objects.GateSet
+        orig_fn = GateSet.bulk_evaltree_from_resources
+        used = []
+        def instrumented(gs, *args, **kwargs):
+            used.append(kwargs.get('germPowers',False))
+            return orig_fn(gs, *args, **kwargs)
+
+        for fn, kwargs in ((pygsti.do_iterative_mc2gst, {'minProbClipForWeighting': 1e-6}),
+                           (pygsti.do_iterative_mlgst, {'minProbClip': 1e-6})):
+            gs = fn(self.ds, gs_clgst, strs, **kwargs)
+            GateSet.bulk_evaltree_from_resources = instrumented
+            try:
+                gs_germPowers = fn(self.ds, gs_clgst, strs, germPowers=True, **kwargs)
+            finally:
+                GateSet.bulk_evaltree_from_resources = orig_fn
+            self.assertAlmostEqual(gs_germPowers.frobeniusdist(gs), 0, places=6)
+        self.assertGreater(len(used), 0)
+        self.assertTrue(all(used))
+
+    def test_checkpoint_resume(self):
+        ds = self.ds
+        gs_lgst = pygsti.do_lgst(ds, self.specs, self.gateset, svdTruncateTo=4, verbosity=0)
+        gs_lgst_go = pygsti.gaugeopt_to_target(gs_lgst,self.gateset, {'spam':1.0, 'gates': 1.0})
+        gs_clgst = pygsti.contract(gs_lgst_go, "CPTP")
+        strs = self.lsgstStrings[0:3]
+        core = pygsti.algorithms.core
+
+        class Interrupted(Exception): pass
+        def instrumented_save(saved, nSaves=None):
+            save = core._save_checkpoint
+            def instrumented(filename, state, comm):
+                save(filename, state, comm)
+                saved.append( (state['stage'], state.get('phase',None),
+                               state['optimizer'] is not None) )
+                if len(saved) == nSaves: raise Interrupted()
+            return instrumented
+
+        ckptFile = temp_files + "/iterative_gst.ckpt"
+        orig_save = core._save_checkpoint
+        for fn, kwargs in ((pygsti.do_iterative_mc2gst, {'minProbClipForWeighting': 1e-6}),
+                           (pygsti.do_iterative_mlgst, {'minProbClip': 1e-6})):
+            if os.path.exists(ckptFile): os.remove(ckptFile)
+            saved = []
+            core._save_checkpoint = instrumented_save(saved)
+            try:
+                expected = fn(ds, gs_clgst, strs, returnAll=True, checkpointFile=ckptFile,
+                              checkpointInterval=0, **kwargs)
+            finally:
+                core._save_checkpoint = orig_save
+
+            #interrupt right after the first save of each kind (mid-optimization,
+            # between iterations, and before/during the final ML optimization)
+            interruptAt = sorted([ saved.index(kind)+1 for kind in set(saved) ])
+            self.assertGreater(len(interruptAt), 3)
+            for nSaves in interruptAt:
+                self.assertFalse(os.path.exists(ckptFile)) #removed by a finished computation
+                core._save_checkpoint = instrumented_save([], nSaves)
+                try:
+                    fn(ds, gs_clgst, strs, returnAll=True, checkpointFile=ckptFile,
+                       checkpointInterval=0, **kwargs)
+                    self.fail("Computation was not interrupted") # pragma: no cover
+                except Interrupted: pass
+                finally:
+                    core._save_checkpoint = orig_save
+
+                resumed = fn(ds, gs_clgst, strs, returnAll=True, checkpointFile=ckptFile,
+                             checkpointInterval=0, **kwargs)
+                self.assertEqual(len(resumed), len(expected))
+                for gs_resumed, gs_expected in zip(resumed, expected):
+                    self.assertAlmostEqual(gs_resumed.frobeniusdist(gs_expected), 0, places=5)
+
+            self.assertFalse(os.path.exists(ckptFile)) #removed by a finished computation
+
+        #checkpoints are only resumed by runs with the same inputs
+        core._save_checkpoint = instrumented_save([], 1)
+        try:
+            pygsti.do_iterative_mlgst(ds, gs_clgst, strs, checkpointFile=ckptFile)
+            self.fail("Computation was not interrupted") # pragma: no cover
+        except Interrupted: pass
+        finally:
+            core._save_checkpoint = orig_save
+        ds2 = ds.copy_nonstatic(); ds2.add_count_dict(strs[-1][0], {'plus': 1000, 'minus': 0})
+        for args, kwargs in ( ((ds, gs_clgst.depolarize(gate_noise=0.01), strs), {}),
+                              ((ds, gs_clgst, self.lsgstStrings[1:4]), {}),
+                              ((ds2, gs_clgst, strs), {}),
+                              ((ds, gs_clgst, strs), {'minProbClip': 1e-3}) ):
+            with self.assertRaises(ValueError):
+                pygsti.do_iterative_mlgst(*args, checkpointFile=ckptFile, **kwargs)
+        with self.assertRaises(ValueError): #mlgst checkpoint used by mc2gst
+            pygsti.do_iterative_mc2gst(ds, gs_clgst, strs, checkpointFile=ckptFile)
+        os.remove(ckptFile)
+
     def test_LGST_1overSqrtN_dependence(self):
         my_datagen_gateset = self.gateset.depolarize(gate_noise=0.05, spam_noise=0)
         # !!don't depolarize spam or 1/sqrt(N) dependence saturates!!
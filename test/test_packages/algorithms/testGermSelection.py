@@ -48,3 +48,52 @@ class GermSelectionTestCase(AlgorithmTestCase):
                 initialWeights=np.ones( len(germsToTest), 'd' ),
                 returnAll=True, tol=1e-6, verbosity=4)
                 # must specify either fixedSlack or slackFrac
+
+    def test_bulk_twirled_deriv(self):
+        import pygsti.algorithms.germselection as germsel
+
+        germs = pygsti.construction.list_all_gatestrings_without_powers_and_cycles(
+            std.gs_target.gates.keys(), 3)
+        gs_random = std.gs_target.randomize_with_unitary(1e-2, seed=2014)
+
+        #the target gateset has highly degenerate germs (e.g. Gi)
+        for gs in (gs_random, std.gs_target):
+            bulk = germsel.bulk_twirled_deriv(gs, germs, eps=1e-6)
+            self.assertEqual(bulk.shape[0:2], (len(germs), 16))
+            for i, germ in enumerate(germs):
+                self.assertArraysAlmostEqual(bulk[i], germsel.twirled_deriv(gs, germ, eps=1e-6))
+
+    def test_incremental_germ_scorer(self):
+        import pygsti.algorithms.germselection as germsel
+        import pygsti.algorithms.scoring as scoring
+
+        gs = std.gs_target.randomize_with_unitary(1e-2, seed=2014)
+        germs = pygsti.construction.list_all_gatestrings_without_powers_and_cycles(
+            std.gs_target.gates.keys(), 4)
+        nGaugeParams = germsel.get_gateset_params([gs])[1]
+        DDD = germsel.calc_twirled_DDD(gs, germs, 1e-6)
+        factors = germsel.calc_twirled_DDD_factors(gs, germs, 1e-6)
+        for F, D in zip(factors, DDD):
+            self.assertArraysAlmostEqual(np.dot(F.T.conjugate(), F), D)
+
+        rnd = np.random.RandomState(2014)
+        allWeights = np.ones(len(germs))
+        smallWeights = np.zeros(len(germs)); smallWeights[0:5] = 1
+        for scoreFunc in ('all', 'worst'):
+            scorer = germsel.IncrementalGermScorer(factors, nGaugeParams, scoreFunc, allWeights)
+            for base in (allWeights, smallWeights, allWeights):
+                for i in range(10): #add, remove & swap moves (as well as re-basing)
+                    w = base.copy()
+                    w[rnd.choice(len(germs), 2, replace=False)] = rnd.randint(0, 2, 2)
+
+                    refScore = germsel.compute_score(w, 0, scoreFunc, [DDD], None, None, nGaugeParams,
+                                                     0.0, np.zeros(len(germs)), l1Penalty=0.0)
+                    if refScore < 1e6:
+                        self.assertAlmostEqual(scorer.list_score(w) / refScore, 1.0)
+
+                    refNonAC = germsel.compute_non_AC_score(
+                        lambda x: scoring.list_score(x, scoreFunc), 1e6, initN=2,
+                        partialDerivDaggerDeriv=DDD[np.nonzero(w)[0]], numGaugeParams=nGaugeParams)
+                    nonAC = scorer.non_AC_score(w, 1e6, initN=2)
+                    self.assertEqual(nonAC.N, refNonAC.N)
+                    self.assertAlmostEqual(nonAC.score / refNonAC.score, 1.0)
@@ -30,6 +30,35 @@ class GraspTestCase(BaseTestCase):
                                             threshold=threshold, verbosity=1, iterations=1,
                                             l1Penalty=1.0, returnAll=True)
 
+    def test_parallel_grasp(self):
+        import pygsti.algorithms.germselection as germsel
+        import pygsti.algorithms.fiducialselection as fidsel
+
+        gatesetNeighborhood = germsel.randomizeGatesetList([std.gs_target], randomizationStrength=1e-2,
+                                                           numCopies=2, seed=2014)
+        germs = pygsti.construction.list_all_gatestrings_without_powers_and_cycles(
+            std.gs_target.gates.keys(), 4)
+
+        import random
+        random.seed(0); callerState = random.getstate()
+
+        #3 iterations: run concurrently with 2 processes, and with concurrent scoring with 4
+        results = [ germsel.grasp_germ_set_optimization(gatesetList=gatesetNeighborhood, germsList=germs,
+                                                        alpha=0.1, randomize=False, seed=2014,
+                                                        iterations=3, shuffle=True, l1Penalty=1.0,
+                                                        returnAll=True, nProcesses=nProcesses)
+                    for nProcesses in (1, 2, 4) ]
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+        self.assertEqual(len(results[0][2]), 3)
+        self.assertEqual(random.getstate(), callerState) #seeded runs leave `random` alone
+
+        fiducials = pygsti.construction.list_all_gatestrings(list(std.gs_target.gates.keys()), 0, 2)
+        fidResults = [ fidsel.grasp_fiducial_optimization(std.gs_target, fiducials, "prep", alpha=0.5,
+                                                          iterations=2, seed=2014, nProcesses=nProcesses)
+                       for nProcesses in (1, 2, 3) ]
+        self.assertEqual(fidResults[1], fidResults[0])
+        self.assertEqual(fidResults[2], fidResults[0])
 
 
 if __name__ == '__main__':
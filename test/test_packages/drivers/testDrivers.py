@@ -256,6 +256,23 @@ class TestDriversMethods(DriversTestCase):
             std.germs, maxLengths, inputGateSet=gs,
             returnData=False)
 
+        bootgs_p_multi = self.runSilent(pygsti.drivers.make_bootstrap_gatesets,
+            2, ds, 'parametric', std.fiducials, std.fiducials,
+            std.germs, maxLengths, inputGateSet=gs,
+            returnData=False, fitMethod="mlgst")
+        self.assertEqual(len(bootgs_p_multi), 2)
+
+        bootgs_np_multi = self.runSilent(pygsti.drivers.make_bootstrap_gatesets,
+            2, ds, 'nonparametric', std.fiducials, std.fiducials,
+            std.germs, maxLengths, targetGateSet=gs,
+            returnData=False, fitMethod="mlgst")
+        self.assertEqual(len(bootgs_np_multi), 2)
+
+        with self.assertRaises(ValueError):
+            pygsti.drivers.make_bootstrap_gatesets(
+                2, ds, 'parametric', std.fiducials, std.fiducials,
+                std.germs, maxLengths, inputGateSet=gs, fitMethod="foobar")
+
         default_maxLens = [0]+[2**k for k in range(10)]
         gateStrings = pygsti.construction.make_lsgst_experiment_list(
             self.gateLabels, self.fiducials, self.fiducials, self.germs,
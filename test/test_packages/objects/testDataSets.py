@@ -380,6 +380,35 @@ Gx^4 20 80 0.2 100
         self.assertEqual( ds.keys(), [ ('Gx','Gx'), ('Gx','Gy'), ('Gx','Gx','#1') ] )
         self.assertEqual( ds.keys(stripOccuranceTags=True), [ ('Gx','Gx'), ('Gx','Gy'), ('Gx','Gx') ] )
 
+    def test_counts_matrix(self):
+        ds = pygsti.objects.DataSet(spamLabels=['plus','minus'])
+        ds.add_count_dict( ('Gx',), {'plus': 10, 'minus': 90} )
+        ds.add_count_dict( ('Gy',), {'plus': 40, 'minus': 60} )
+        ds.add_count_dict( ('Gx','Gy'), {'plus': 25, 'minus': 75} )
+        gstrs = pygsti.construction.gatestring_list([ ('Gx','Gy'), ('Gx',), ('Gx','Gy') ])
+
+        for bStatic in (False, True):
+            if bStatic: ds.done_adding_data()
+            self.assertEqual( list(ds.get_row_indices(gstrs)), [2,0,2] )
+
+            cntMx = ds.get_counts_matrix(gstrs)
+            self.assertEqual( cntMx.shape, (2,3) )
+            for k,sl in enumerate(ds.get_spam_labels()):
+                self.assertArraysAlmostEqual( cntMx[k], [ ds[gs][sl] for gs in gstrs ] )
+
+            cntMx = ds.get_counts_matrix(gstrs, ['minus'])
+            self.assertArraysAlmostEqual( cntMx, [[75,90,75]] )
+
+            countVecs = pygsti.create_count_vec_dict(['plus','minus'], ds, gstrs)
+            self.assertArraysAlmostEqual( countVecs['plus'], [25,10,25] )
+
+            mx = np.zeros( (3,3), 'd')
+            pygsti.fill_count_vecs(mx, {'plus': 2, 'minus': 0}, ds, gstrs)
+            self.assertArraysAlmostEqual( mx, [[75,90,75],[0,0,0],[25,10,25]] )
+
+        with self.assertRaises(KeyError):
+            ds.get_counts_matrix( [('Gz',)] )
+
 
 
 
@@ -235,6 +235,70 @@ class TestGateSetMethods(GateSetTestCase):
         debug_stuff = evt.get_analysis_plot_infos()
 
 
+    def test_batched_multiplication(self):
+        gatestrings = [('Gx',), ('Gx','Gy'), ('Gx','Gy','Gy'), ('Gy','Gy','Gx'),
+                       ('Gx','Gy','Gy','Gx','Gi'), ('Gi','Gi','Gi','Gi')]
+        evt = self.gateset.bulk_evaltree(gatestrings)
+
+        levels = evt.get_evaluation_levels()
+        self.assertEqual(sorted(np.concatenate([lvl[0] for lvl in levels])),
+                         sorted(evt.get_evaluation_order()))
+        computed = set(evt.get_init_indices())
+        for indices, lefts, rights in levels:
+            self.assertTrue(set(lefts).issubset(computed))
+            self.assertTrue(set(rights).issubset(computed))
+            computed.update(indices)
+
+        prods, scaleVals = self.gateset.bulk_product(evt, bScale=True)
+        prods_b, scaleVals_b = self.gateset.bulk_product(evt, bScale=True, bBatch=True)
+        self.assertTrue(np.array_equal(prods, prods_b))
+        self.assertTrue(np.array_equal(scaleVals, scaleVals_b))
+
+        #engage the scaling machinery in both paths
+        PORIG = pygsti.objects.gscalc.PSMALL; pygsti.objects.gscalc.PSMALL = 10
+        prods, scaleVals = self.gateset.bulk_product(evt, bScale=True)
+        prods_b, scaleVals_b = self.gateset.bulk_product(evt, bScale=True, bBatch=True)
+        pygsti.objects.gscalc.PSMALL = PORIG
+        self.assertTrue(np.array_equal(prods, prods_b))
+        self.assertTrue(np.array_equal(scaleVals, scaleVals_b))
+
+        evt.split(numSubTrees=2)
+        spam_label_rows = { 'plus': 0, 'minus': 1 }
+        probs = np.empty( (2,len(gatestrings)), 'd')
+        probs_b = np.empty( (2,len(gatestrings)), 'd')
+        self.gateset.bulk_fill_probs(probs, spam_label_rows, evt)
+        self.gateset.bulk_fill_probs(probs_b, spam_label_rows, evt, bBatch=True)
+        self.assertTrue(np.array_equal(probs, probs_b))
+
+    def test_batched_derivatives(self):
+        gatestrings = [('Gx',), ('Gx','Gy'), ('Gx','Gy','Gy'), ('Gy','Gy','Gx'),
+                       ('Gx','Gy','Gy','Gx','Gi'), ('Gi','Gi','Gi','Gi')]
+        evt = self.gateset.bulk_evaltree(gatestrings)
+        spam_label_rows = { 'plus': 0, 'minus': 1 }
+        nP = self.gateset.num_params(); nS = len(gatestrings)
+
+        for blkSize in (None, 5):
+            dprobs = np.empty( (2,nS,nP), 'd')
+            dprobs_b = np.empty( (2,nS,nP), 'd')
+            self.gateset.bulk_fill_dprobs(dprobs, spam_label_rows, evt, wrtBlockSize=blkSize)
+            self.gateset.bulk_fill_dprobs(dprobs_b, spam_label_rows, evt, wrtBlockSize=blkSize,
+                                          bBatch=True)
+            self.assertArraysAlmostEqual(dprobs, dprobs_b)
+
+        hprobs = np.empty( (2,nS,nP,nP), 'd')
+        hprobs_b = np.empty( (2,nS,nP,nP), 'd')
+        self.gateset.bulk_fill_hprobs(hprobs, spam_label_rows, evt)
+        self.gateset.bulk_fill_hprobs(hprobs_b, spam_label_rows, evt, bBatch=True)
+        self.assertArraysAlmostEqual(hprobs, hprobs_b)
+
+        #engage the scaling machinery in both paths
+        PORIG = pygsti.objects.gscalc.PSMALL; pygsti.objects.gscalc.PSMALL = 10
+        self.gateset.bulk_fill_hprobs(hprobs, spam_label_rows, evt)
+        self.gateset.bulk_fill_hprobs(hprobs_b, spam_label_rows, evt, bBatch=True)
+        pygsti.objects.gscalc.PSMALL = PORIG
+        self.assertArraysAlmostEqual(hprobs, hprobs_b)
+
+
     def test_simple_probabilityA(self):
         gatestring = ('Gx','Gy')
         p1 = np.dot( np.transpose(self.gateset.effects['E0']),
@@ -671,6 +735,287 @@ class TestGateSetMethods(GateSetTestCase):
              evtC.permute_computation_to_original(bulk_prC) )
 
 
+    def test_tree_construction(self):
+        gatestrings = [ pygsti.obj.GateString(s) for s in
+                        [(),
+                         ('Gx',),
+                         ('Gx','Gy','Gx','Gy'),
+                         ('Gx','Gy','Gx','Gy','Gx'),
+                         ('Gy','Gx','Gy','Gx','Gx','Gx'),
+                         ('Gx','Gy'),
+                         ('Gx','Gy','Gx','Gy'), #duplicate
+                         ('Gy','Gy','Gy','Gy','Gy','Gy','Gy','Gy')] ]
+        evt = self.gateset.bulk_evaltree( gatestrings )
+        self.assertEqual(evt.generate_gatestring_list(), gatestrings)
+        self.assertEqual(evt.num_final_strings(), len(gatestrings))
+
+        evtNoCheck = self.gateset.bulk_evaltree( gatestrings, check=False )
+        self.assertEqual(list(evtNoCheck), list(evt))
+        self.assertEqual(evtNoCheck.get_evaluation_order(), evt.get_evaluation_order())
+
+        bulk_prods = self.gateset.bulk_product(evt)
+        for i,s in enumerate(gatestrings):
+            self.assertArraysAlmostEqual(bulk_prods[i], self.gateset.product(s))
+
+    def test_germ_power_tree(self):
+        from pygsti.construction import std1Q_XYI as std
+        gateLabels = list(self.gateset.gates.keys())
+        gatestrings = pygsti.construction.make_lsgst_lists(
+            gateLabels, std.fiducials, std.fiducials, std.germs, [1,2,4,8,16,32])[-1]
+        gatestrings = gatestrings + [ pygsti.obj.GateString(('Gx','Gy')*8),
+                                      pygsti.obj.GateString(('Gy',)*9 + ('Gx',)) ]
+
+        evt = self.gateset.bulk_evaltree( gatestrings )
+        evtPow = self.gateset.bulk_evaltree( gatestrings, germPowers=True )
+        self.assertEqual(evtPow.generate_gatestring_list(), evt.generate_gatestring_list())
+        self.assertLess(len(evtPow.get_evaluation_order()), len(evt.get_evaluation_order()))
+        self.assertLess(len(evtPow.get_evaluation_levels()), len(evt.get_evaluation_levels()))
+
+        bulk_prods = self.gateset.bulk_product(evt)
+        self.assertArraysAlmostEqual(self.gateset.bulk_product(evtPow), bulk_prods)
+
+        evtPow.split(numSubTrees=3)
+        self.assertArraysAlmostEqual(
+            evtPow.permute_computation_to_original(self.gateset.bulk_product(evtPow)), bulk_prods)
+
+    def test_evaltree_extend(self):
+        from pygsti.construction import std1Q_XYI as std
+        gateLabels = list(self.gateset.gates.keys())
+        lists = pygsti.construction.make_lsgst_lists(
+            gateLabels, std.fiducials, std.fiducials, std.germs, [1,2,4,8])
+        duplicates = [ lists[-1][5] ] + pygsti.construction.gatestring_list(
+            [('Gx',), ()]) #already-evaluated strings
+
+        for germPowers in (False, True):
+            evtFull = self.gateset.bulk_evaltree(lists[-1] + duplicates, germPowers=germPowers)
+            bulk_prods = self.gateset.bulk_product(evtFull)
+
+            evt = self.gateset.bulk_evaltree(lists[0], germPowers=germPowers)
+            for prev,cur in zip(lists[:-1],lists[1:]):
+                self.assertEqual(cur[0:len(prev)], prev) #nested lists
+                evt.add_gatestrings(cur[len(prev):], germPowers=germPowers)
+            evt.add_gatestrings(duplicates, germPowers=germPowers)
+            self.assertEqual(evt.generate_gatestring_list(), evtFull.generate_gatestring_list())
+            self.assertArraysAlmostEqual(self.gateset.bulk_product(evt), bulk_prods)
+
+            #extending a copy (which must rebuild its evaluation trie)
+            evt2 = self.gateset.bulk_evaltree(lists[1], germPowers=germPowers).copy()
+            evt2.add_gatestrings(lists[-1][len(lists[1]):] + duplicates, germPowers=germPowers)
+            self.assertArraysAlmostEqual(self.gateset.bulk_product(evt2), bulk_prods)
+
+        #incremental trees via bulk_evaltree
+        base = pygsti.obj.EvalTree()
+        for strs in lists:
+            evtA = self.gateset.bulk_evaltree(strs, minSubtrees=3, baseTree=base)
+            evtB = self.gateset.bulk_evaltree(strs, minSubtrees=3)
+            self.assertFalse(base.is_split())
+            self.assertEqual(base.num_final_strings(), len(strs))
+            self.assertEqual(len(evtA.get_sub_trees()), 3)
+            self.assertArraysAlmostEqual(
+                evtA.permute_computation_to_original(self.gateset.bulk_product(evtA)),
+                evtB.permute_computation_to_original(self.gateset.bulk_product(evtB)))
+
+        with self.assertRaises(ValueError):
+            self.gateset.bulk_evaltree(lists[0], baseTree=base) #fewer strings than base
+        with self.assertRaises(ValueError):
+            evtA.add_gatestrings(duplicates) #split trees can't be extended
+
+        #pickling (a list subclass is rebuilt through its list methods)
+        import pickle
+        for tree in (evt, evtA):
+            tree2 = pickle.loads(pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+            self.assertEqual(list(tree2), list(tree))
+            self.assertEqual(len(tree2.get_sub_trees()), len(tree.get_sub_trees()))
+            self.assertArraysAlmostEqual(self.gateset.bulk_product(tree2), self.gateset.bulk_product(tree))
+        evt3 = pickle.loads(pickle.dumps(evt))
+        evt3.add_gatestrings(pygsti.construction.gatestring_list([('Gy','Gx','Gx','Gy')]))
+        self.assertEqual(evt3.num_final_strings(), evt.num_final_strings() + 1)
+
+    def test_evaltree_save_and_cache(self):
+        gatestrings = pygsti.construction.gatestring_list(
+            [(), ('Gx',), ('Gx','Gy'), ('Gy','Gy'), ('Gy','Gx'), ('Gx','Gx','Gx'),
+             ('Gx','Gy','Gx'), ('Gx','Gy','Gy'), ('Gy','Gy','Gy'), ('Gy','Gx','Gx')])
+        evt = self.gateset.bulk_evaltree( gatestrings )
+        evt.split(numSubTrees=3)
+        evt.save(temp_files + "/evaltree.saved")
+        evt.save(temp_files + "/evaltree.saved.gz")
+
+        for filename in (temp_files + "/evaltree.saved", temp_files + "/evaltree.saved.gz"):
+            evt2 = pygsti.obj.EvalTree()
+            evt2.load(filename)
+            self.assertEqual(list(evt2), list(evt))
+            self.assertEqual(evt2.get_evaluation_order(), evt.get_evaluation_order())
+            self.assertEqual(evt2.generate_gatestring_list(), evt.generate_gatestring_list())
+            self.assertEqual(len(evt2.get_sub_trees()), 3)
+            self.assertArraysAlmostEqual(self.gateset.bulk_probs(evt2)['plus'],
+                                         self.gateset.bulk_probs(evt)['plus'])
+
+        cacheDir = temp_files + "/evaltree_cache"
+        if os.path.isdir(cacheDir):
+            for f in os.listdir(cacheDir): os.remove(os.path.join(cacheDir,f))
+        evtA, blkA, _ = self.gateset.bulk_evaltree_from_resources(
+            gatestrings, memLimit=100*1024**2, subcalls=["bulk_fill_probs"], cacheDir=cacheDir)
+        self.assertEqual(len(os.listdir(cacheDir)), 1)
+        evtB, blkB, _ = self.gateset.bulk_evaltree_from_resources(
+            gatestrings, memLimit=100*1024**2, subcalls=["bulk_fill_probs"], cacheDir=cacheDir)
+        self.assertEqual(len(os.listdir(cacheDir)), 1) #loaded, not re-created
+        self.assertEqual(list(evtB), list(evtA))
+        self.assertEqual(blkB, blkA)
+
+        self.gateset.bulk_evaltree_from_resources(
+            gatestrings[0:5], memLimit=100*1024**2, subcalls=["bulk_fill_probs"], cacheDir=cacheDir)
+        self.assertEqual(len(os.listdir(cacheDir)), 2) #different gate strings => new entry
+
+    def test_product_reuse(self):
+        gatestrings = pygsti.construction.gatestring_list(
+            [(), ('Gx',), ('Gx','Gy'), ('Gy','Gy'), ('Gy','Gx'), ('Gx','Gx','Gx'),
+             ('Gi','Gy','Gy'), ('Gy','Gy','Gy'), ('Gy','Gi','Gy','Gy')])
+        spam_label_rows = { 'plus': 0, 'minus': 1 }
+        gs = self.gateset.copy()
+        gs.set_product_reuse(True)
+        evt = gs.bulk_evaltree(gatestrings)
+        nNodes = len(evt.get_evaluation_order())
+
+        probs = np.empty( (2,len(gatestrings)), 'd')
+        gs.bulk_fill_probs(probs, spam_label_rows, evt)
+        self.assertEqual(gs.get_product_reuse_counts(), (0,nNodes))
+
+        gs.bulk_fill_probs(probs, spam_label_rows, evt, bBatch=True) #nothing changed
+        self.assertEqual(gs.get_product_reuse_counts(), (nNodes,nNodes))
+
+        v = gs.to_vector()
+        gxOffset = gs.get_vector_offsets()['Gx']
+        v[gxOffset[0]:gxOffset[1]] += 0.01
+        gs.from_vector(v)
+        changed = evt.get_nodes_containing(['Gx'])
+        nChanged = sum(changed[evt.get_evaluation_order()])
+        self.assertTrue(0 < nChanged < nNodes)
+
+        for bBatch in (False,True):
+            gs.set_product_reuse(True)
+            gs.bulk_fill_probs(probs, spam_label_rows, evt) #caches for the unchanged gs
+            gs2 = gs.copy(); gs2.from_vector(v) #keeps reuse on
+            gs2.set_product_reuse(False)
+            gs.from_vector(v)
+            expected = np.empty( (2,len(gatestrings)), 'd')
+            gs2.bulk_fill_probs(expected, spam_label_rows, evt)
+
+            gs.set_product_reuse(True)
+            gs.bulk_fill_probs(probs, spam_label_rows, evt)
+            v[gxOffset[0]] += 0.01; gs.from_vector(v)
+            gs.bulk_fill_probs(probs, spam_label_rows, evt, bBatch=bBatch)
+            self.assertEqual(gs.get_product_reuse_counts(), (nNodes-nChanged, nNodes+nChanged))
+
+            gs2.from_vector(v)
+            gs2.bulk_fill_probs(expected, spam_label_rows, evt, bBatch=bBatch)
+            self.assertTrue(np.array_equal(probs, expected))
+
+        gs_pickled = pickle.loads(pickle.dumps(gs))
+        self.assertEqual(gs_pickled.get_product_reuse_counts(), (0,0))
+
+        #alternate between two points, as an optimizer's objective & jacobian do
+        gs.set_product_reuse(True, maxCaches=2)
+        v2 = v + 0.01 #changes all gates
+        dprobs = np.empty( (2,len(gatestrings),gs.num_params()), 'd')
+        for vec in (v, v2, v, v2):
+            gs.from_vector(vec)
+            gs.bulk_fill_probs(probs, spam_label_rows, evt)
+            gs.bulk_fill_dprobs(dprobs, spam_label_rows, evt, prMxToFill=expected)
+            self.assertTrue(np.array_equal(probs, expected))
+        self.assertEqual(gs.get_product_reuse_counts(), (6*nNodes,2*nNodes))
+
+        gs.set_product_reuse(True, maxBytes=0) #nothing fits => nothing kept
+        gs.bulk_fill_probs(probs, spam_label_rows, evt)
+        gs.bulk_fill_probs(probs, spam_label_rows, evt)
+        self.assertEqual(gs.get_product_reuse_counts(), (0,2*nNodes))
+
+    def test_vector_calc(self):
+        from pygsti.construction import std2Q_XYCNOT as std2Q
+        gs1Q = self.gateset.copy()
+        gs1Q.preps['rho1'] = np.dot(gs1Q.gates['Gx'], gs1Q.preps['rho0'])
+        gs1Q.spamdefs['plus1'] = ('rho1','E0')
+        gs2Q = std2Q.gs_target.depolarize(gate_noise=0.05, spam_noise=0.01)
+
+        for gs, gatestrings in ((gs1Q, pygsti.construction.gatestring_list(
+                    [(), ('Gx',), ('Gx','Gy'), ('Gx','Gy','Gy'), ('Gi',)*50 + ('Gx',),
+                     ('Gy','Gx','Gx'), ('Gy','Gx','Gx','Gi')])),
+                                (gs2Q, pygsti.construction.make_lsgst_lists(
+                    list(std2Q.gs_target.gates.keys()), std2Q.fiducials[0:4],
+                    std2Q.fiducials[0:4], std2Q.germs[0:3], [1,2])[-1])):
+            evt = gs.bulk_evaltree(gatestrings)
+            expected = gs.bulk_probs(evt)
+            gsVec = gs.copy()
+            gsVec.set_calc_type("vector")
+            self.assertEqual(gsVec.copy()._calcType, "vector")
+            probs = gsVec.bulk_probs(evt)
+            for spamLabel in gs.get_spam_labels():
+                self.assertArraysAlmostEqual(probs[spamLabel], expected[spamLabel])
+
+            evt.split(numSubTrees=3)
+            spam_label_rows = { sl: i for i,sl in enumerate(gs.get_spam_labels()) }
+            splitProbs = np.empty( (len(spam_label_rows),len(gatestrings)), 'd')
+            gsVec.bulk_fill_probs(splitProbs, spam_label_rows, evt, nThreads=2)
+            splitProbs = evt.permute_computation_to_original(splitProbs, axis=1)
+            for spamLabel,i in spam_label_rows.items():
+                self.assertArraysAlmostEqual(splitProbs[i], expected[spamLabel])
+
+        groups, finalNodes, nNodes = evt.get_sub_trees()[0].get_prefix_trie()
+        self.assertEqual(nNodes, 1 + sum([ len(indices) for _,indices,_ in groups ]))
+
+        with self.assertRaises(ValueError):
+            gsVec.set_calc_type("foobar")
+
+    def test_vector_calc_rescaling(self):
+        #A long germ power of an amplifying (non-TP) gate, undone by an
+        # attenuating one: the intermediate states would overflow unless the
+        # vector calculator rescales large as well as small states.
+        gs = self.gateset.copy()
+        gs.gates['Ga'] = 2.0 * gs.gates['Gx']
+        gs.gates['Gb'] = 0.5 * gs.gates['Gx']
+        gs.set_calc_type("vector")
+        gatestrings = pygsti.construction.gatestring_list(
+            [(), ('Ga',)*1104 + ('Gb',)*1104, ('Gx',)*1000, ('Ga',)*1000 ])
+        probs = gs.bulk_probs(gs.bulk_evaltree(gatestrings))['plus']
+        self.assertTrue(np.all(np.isfinite(probs)))
+        self.assertAlmostEqual(probs[1], probs[0]) # Gx^2208 == identity
+        self.assertAlmostEqual(probs[3] / 2.0**1000, probs[2])
+
+    def test_threaded_bulk_fill(self):
+        gatestrings = pygsti.construction.gatestring_list(
+            [(), ('Gx',), ('Gx','Gy'), ('Gy','Gy'), ('Gy','Gx'), ('Gx','Gx','Gx'),
+             ('Gx','Gy','Gx'), ('Gx','Gy','Gy'), ('Gy','Gy','Gy'), ('Gy','Gx','Gx')])
+        spam_label_rows = { 'plus': 0, 'minus': 1 }
+        nP = self.gateset.num_params(); nS = len(gatestrings)
+
+        evt = self.gateset.bulk_evaltree( gatestrings, minSubtrees=3 )
+        probs = np.empty( (2,nS), 'd'); probs_t = np.empty( (2,nS), 'd')
+        self.gateset.bulk_fill_probs(probs, spam_label_rows, evt)
+        self.gateset.bulk_fill_probs(probs_t, spam_label_rows, evt, nThreads=3)
+        self.assertArraysAlmostEqual(probs, probs_t)
+
+        evt1 = self.gateset.bulk_evaltree( gatestrings )
+        for tree, blkSize in ((evt, None), (evt, 5), (evt1, 5)):
+            dprobs = np.empty( (2,nS,nP), 'd'); dprobs_t = np.empty( (2,nS,nP), 'd')
+            self.gateset.bulk_fill_dprobs(dprobs, spam_label_rows, tree,
+                                          prMxToFill=probs, wrtBlockSize=blkSize)
+            self.gateset.bulk_fill_dprobs(dprobs_t, spam_label_rows, tree, prMxToFill=probs_t,
+                                          wrtBlockSize=blkSize, nThreads=4)
+            self.assertArraysAlmostEqual(dprobs, dprobs_t)
+            self.assertArraysAlmostEqual(probs, probs_t)
+
+        evtR, blkSize, _ = self.gateset.bulk_evaltree_from_resources(
+            gatestrings, subcalls=["bulk_fill_probs"], nThreads=3)
+        self.assertGreaterEqual(len(evtR.get_sub_trees()), 3)
+
+        ds = pygsti.construction.generate_fake_data(self.gateset, gatestrings, 1000,
+                                                    sampleError='none')
+        self.assertAlmostEqual(pygsti.logl(self.gateset, ds, gatestrings, nThreads=3),
+                               pygsti.logl(self.gateset, ds, gatestrings))
+        self.assertArraysAlmostEqual(
+            pygsti.logl_jacobian(self.gateset, ds, gatestrings, nThreads=3),
+            pygsti.logl_jacobian(self.gateset, ds, gatestrings))
+
+
 
     def test_failures(self):
 
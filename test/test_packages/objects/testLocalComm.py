@@ -0,0 +1,155 @@
+import unittest
+import pygsti
+import numpy as np
+
+from pygsti.construction import std1Q_XYI as std
+from pygsti.objects import run_with_local_comm
+from ..testutils import BaseTestCase
+
+
+def _collectives(comm):
+    rank, size = comm.Get_rank(), comm.Get_size()
+    results = {}
+    results['bcast'] = comm.bcast("hello" if rank == 0 else None, root=0)
+    results['gather'] = comm.gather(rank, root=0)
+    results['allgather'] = comm.allgather(rank**2)
+    results['allreduce'] = comm.allreduce(rank)
+
+    buf = np.arange(5,dtype='d') if rank == 1 else np.zeros(5,'d')
+    comm.Bcast(buf, root=1)
+    results['Bcast'] = buf
+
+    big = np.full(100000, rank, 'd') #forces the scratch buffer to grow
+    comm.Bcast(big, root=size-1)
+    results['Bcast_big'] = big[-1]
+
+    gathered = np.empty((size,3),'d')
+    comm.Allgather(np.full(3, rank, 'd'), gathered)
+    results['Allgather'] = gathered[:,0]
+
+    summed = np.empty(4,'d')
+    comm.Allreduce(np.ones(4,'d')*rank, summed, op=comm.SUM)
+    results['Allreduce'] = summed.copy()
+    comm.Allreduce(np.ones(4,'d')*rank, summed, op=comm.MAX)
+    results['Allreduce_max'] = summed
+
+    sub = comm.Split(color=rank % 2, key=-rank)
+    results['Split'] = (sub.Get_size(), sub.Get_rank(), sub.allgather(rank))
+
+    shared = comm.shared_array((size,2))
+    shared[rank,:] = rank
+    comm.barrier()
+    results['shared_array'] = shared.copy()
+
+    results['all_equal'] = all(comm.allgather(results['Allreduce'][0] == 6))
+    return results
+
+
+def _failing(comm):
+    if comm.Get_rank() == 2:
+        raise ValueError("Oops")
+    comm.barrier()
+
+
+def _killed(rank0Waits, comm):
+    import os, signal
+    rank = comm.Get_rank()
+    sub = comm.Split(color=int(rank > 0)) #ranks 1 and 2
+    if rank == 2:
+        os.kill(os.getpid(), signal.SIGKILL) #as by the OOM killer
+    if rank0Waits: comm.barrier()
+    elif rank == 1: sub.barrier() #rank 0 returns immediately
+
+
+class TestLocalComm(BaseTestCase):
+
+    def test_collectives(self):
+        r = run_with_local_comm(4, _collectives)
+        self.assertEqual(r['bcast'], "hello")
+        self.assertEqual(r['gather'], [0,1,2,3])
+        self.assertEqual(r['allgather'], [0,1,4,9])
+        self.assertEqual(r['allreduce'], 6)
+        self.assertArraysAlmostEqual(r['Bcast'], np.arange(5))
+        self.assertEqual(r['Bcast_big'], 3)
+        self.assertArraysAlmostEqual(r['Allgather'], np.arange(4))
+        self.assertArraysAlmostEqual(r['Allreduce'], 6*np.ones(4))
+        self.assertArraysAlmostEqual(r['Allreduce_max'], 3*np.ones(4))
+        self.assertEqual(r['Split'], (2, 1, [2,0]))
+        self.assertArraysAlmostEqual(r['shared_array'][:,0], np.arange(4))
+        self.assertTrue(r['all_equal'])
+
+    def test_failure(self):
+        with self.assertRaises(RuntimeError):
+            run_with_local_comm(3, _failing)
+
+    def test_killed_worker(self):
+        import time
+        for rank0Waits in (True, False):
+            tStart = time.time()
+            with self.assertRaises(RuntimeError) as cm:
+                run_with_local_comm(3, _killed, rank0Waits)
+            self.assertLess(time.time() - tStart, 30)
+            if not rank0Waits:
+                self.assertTrue("Rank 2:\nexited with code -9" in str(cm.exception))
+
+    def test_bulk_fill_dprobs(self):
+        gs = std.gs_target.depolarize(gate_noise=0.05, spam_noise=0.01)
+        gatestrings = pygsti.construction.make_lsgst_lists(
+            list(gs.gates.keys()), std.fiducials, std.fiducials, std.germs, [1,2])[-1]
+        spam_label_rows = { 'plus': 0, 'minus': 1 }
+        shape = (2, len(gatestrings), gs.num_params())
+
+        def fill(distributeMethod, comm):
+            evt, blkSize, _ = gs.bulk_evaltree_from_resources(
+                gatestrings, comm, None, distributeMethod, ["bulk_fill_dprobs"])
+            dprobs = np.empty(shape, 'd')
+            gs.bulk_fill_dprobs(dprobs, spam_label_rows, evt, comm=comm,
+                                wrtBlockSize=blkSize)
+            return evt.permute_computation_to_original(dprobs, axis=1)
+
+        expected = fill("gatestrings", None)
+        for distributeMethod in ("gatestrings", "deriv"):
+            self.assertArraysAlmostEqual(
+                run_with_local_comm(3, fill, distributeMethod), expected)
+
+    def test_jacobian_blocks(self):
+        gs = std.gs_target.depolarize(gate_noise=0.05, spam_noise=0.01)
+        gatestrings = pygsti.construction.make_lsgst_lists(
+            list(gs.gates.keys()), std.fiducials, std.fiducials, std.germs, [1,2])[-1]
+        ds = pygsti.construction.generate_fake_data(gs, gatestrings, nSamples=1000,
+                                                    sampleError='binomial', seed=100)
+
+        def run(comm):
+            return pygsti.do_mlgst(ds, std.gs_target, gatestrings, minProbClip=1e-6,
+                                   probClipInterval=(-1e2,1e2), comm=comm,
+                                   distributeMethod="gatestrings", jacBlocks=True)
+
+        logl, gs_serial = run(None)
+        logl_par, gs_par = run_with_local_comm(3, run)
+        self.assertAlmostEqual(logl, logl_par, places=6)
+        self.assertAlmostEqual(gs_serial.frobeniusdist(gs_par), 0, places=6)
+
+    def test_mlgst_multi(self):
+        gs = std.gs_target.depolarize(gate_noise=0.05, spam_noise=0.01)
+        gatestrings = pygsti.construction.make_lsgst_lists(
+            list(gs.gates.keys()), std.fiducials, std.fiducials, std.germs, [1])[-1]
+        datasets = [ pygsti.construction.generate_fake_data(gs, gatestrings, nSamples=1000,
+                                                            sampleError='binomial', seed=seed)
+                     for seed in (1,2,3) ]
+
+        def run(dsList, comm):
+            return pygsti.do_mlgst_multi(dsList, gs, gatestrings, minProbClip=1e-6,
+                                         probClipInterval=(-1e2,1e2), comm=comm,
+                                         warmStart=False)
+
+        logls, gatesets = run(datasets, None)
+        for nProcs, dsList in ((2, datasets), (4, datasets[0:2])): #4 procs: 2 per fit
+            logls_par, gatesets_par = run_with_local_comm(nProcs, run, dsList)
+            self.assertEqual(len(gatesets_par), len(dsList))
+            for i in range(len(dsList)):
+                self.assertAlmostEqual(logls[i], logls_par[i], places=6)
+                self.assertAlmostEqual(gatesets[i].frobeniusdist(gatesets_par[i]), 0, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
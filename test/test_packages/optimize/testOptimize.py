@@ -16,6 +16,17 @@ def f_vec(x):
 def jac(x):
     return 2*x[None,:]
 
+def rosen_vec(x):
+    return np.array( [10*(x[1]-x[0]**2), 1-x[0], 0.5*(x[0]+x[1]-2)] )
+
+def rosen_jac(x):
+    return np.array( [[-20*x[0], 10], [-1, 0], [0.5, 0.5]], 'd')
+
+def rosen_jac_blocks(x):
+    J = rosen_jac(x)
+    yield slice(0,1), J[0:1]
+    yield slice(1,3), J[1:3]
+
 class TestOptimizeMethods(BaseTestCase):
 
     def setUp(self):
@@ -58,6 +69,63 @@ class TestOptimizeMethods(BaseTestCase):
         sys.stdout = old_stdout
 
 
+    def test_custom_leastsq(self):
+        x0 = np.array( [-1.2, 1.0], 'd')
+        x, converged, msg = pygsti.optimize.custom_leastsq(
+            rosen_vec, rosen_jac, x0, 1e-10, 1e-10, 1e-10, 1e-10, max_iter=100)
+        xb, convergedb, msgb = pygsti.optimize.custom_leastsq(
+            rosen_vec, rosen_jac_blocks, x0, 1e-10, 1e-10, 1e-10, 1e-10, max_iter=100,
+            jac_blocks=True)
+        self.assertTrue(converged and convergedb)
+        self.assertLess(np.linalg.norm(x - np.array([1,1],'d')), 1e-4)
+        self.assertArraysAlmostEqual(xb, x)
+        self.assertEqual(msgb, msg)
+
+    def test_custom_leastsq_linear_solvers(self):
+        x0 = np.array( [-1.2, 1.0], 'd')
+        x, converged, msg = pygsti.optimize.custom_leastsq(
+            rosen_vec, rosen_jac, x0, 1e-10, 1e-10, 1e-10, 1e-10, max_iter=100)
+        for solver in ("eig","pcg"):
+            xs, convergeds, msgs = pygsti.optimize.custom_leastsq(
+                rosen_vec, rosen_jac, x0, 1e-10, 1e-10, 1e-10, 1e-10, max_iter=100,
+                linear_solver=solver)
+            self.assertTrue(convergeds)
+            self.assertArraysAlmostEqual(xs, x)
+
+        #linear least squares: all solvers should find the lstsq solution
+        rng = np.random.RandomState(1234)
+        A = rng.randn(40,10); b = rng.randn(40)
+        x_exact = np.linalg.lstsq(A, b, rcond=-1)[0]
+        for solver in ("solve","eig","pcg"):
+            xs, _, _ = pygsti.optimize.custom_leastsq(
+                lambda x: np.dot(A,x)-b, lambda x: A, np.zeros(10,'d'),
+                1e-12, 1e-12, 1e-12, 1e-12, max_iter=500, linear_solver=solver)
+            self.assertLess(np.linalg.norm(xs - x_exact), 1e-5)
+
+        with self.assertRaises(ValueError):
+            pygsti.optimize.custom_leastsq(rosen_vec, rosen_jac, x0,
+                                           linear_solver="foobar")
+
+    def test_custom_leastsq_broyden(self):
+        x0 = np.array( [-1.2, 1.0], 'd')
+        nJacs = [0]
+        def counting_jac(x):
+            nJacs[0] += 1
+            return rosen_jac(x)
+
+        x, converged, msg = pygsti.optimize.custom_leastsq(
+            rosen_vec, counting_jac, x0, 1e-10, 1e-10, 1e-10, 1e-10, max_iter=100)
+        nExact = nJacs[0]; nJacs[0] = 0
+
+        prof = pygsti.objects.Profiler()
+        xb, convergedb, msgb = pygsti.optimize.custom_leastsq(
+            rosen_vec, counting_jac, x0, 1e-10, 1e-10, 1e-10, 1e-10, max_iter=100,
+            profiler=prof, broyden_iters=5, broyden_min_gain=0.1)
+        self.assertTrue(converged and convergedb)
+        self.assertLess(np.linalg.norm(xb - np.array([1,1],'d')), 1e-4)
+        self.assertLess(nJacs[0], nExact)
+        self.assertGreater(prof.counters.get("custom_leastsq: Broyden jacobians",0), 0)
+
     def test_checkjac(self):
         x0 = self.x0
         pygsti.optimize.check_jac(f_vec, x0, jac(x0), eps=1e-10, tol=1e-6, errType='rel')
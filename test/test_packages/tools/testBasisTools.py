@@ -229,6 +229,34 @@ class BasisBaseTestCase(BaseTestCase):
             basistools._processBlockDims("FooBar") #arg should be a list,tuple,or int
         basistools.pp_matrices([1])
 
+    def test_basis_cache(self):
+        basistools.clear_basis_cache()
+        mxs = basistools.pp_matrices(2)
+        ppToStd, stdToPP = basistools.basis_transform_matrices("pp", [2,1])
+        info = basistools.basis_cache_info()
+        self.assertTrue(info['misses'] > 0)
+
+        #repeated requests return the same (read-only) arrays
+        self.assertTrue(basistools.pp_matrices(2)[1] is mxs[1])
+        self.assertTrue(basistools.pp_to_std_transform_matrix([2,1]) is ppToStd)
+        self.assertEqual(basistools.basis_cache_info()['hits'], info['hits'] + 2)
+        with self.assertRaises(ValueError):
+            mxs[0][0,0] = 2.0
+        with self.assertRaises(ValueError):
+            stdToPP[0,0] = 2.0
+        mxs.append(None) #the returned list itself is the caller's
+        self.assertEqual(len(basistools.pp_matrices(2)), 4)
+
+        self.assertArraysAlmostEqual(np.dot(ppToStd, stdToPP), np.identity(5))
+        for basis in ('std','gm','pp'):
+            toStd, fromStd = basistools.basis_transform_matrices(basis, 2)
+            self.assertArraysAlmostEqual(np.dot(fromStd, toStd), np.identity(4))
+        with self.assertRaises(ValueError):
+            basistools.basis_transform_matrices("foobar", 2)
+
+        basistools.clear_basis_cache()
+        self.assertEqual(basistools.basis_cache_info()['size'], 0)
+
     def test_basis_longname(self):
         longnames = {basistools.basis_longname(basis) for basis in {'gm', 'std', 'pp'}}
         self.assertEqual(longnames, {'Gell-Mann', 'Matrix-unit', 'Pauli-prod'})
@@ -159,5 +159,38 @@ class TestJamiolkowskiMethods(JamiolkowskiTestCase):
         self.assertArraysAlmostEqual(sumsOfNeg, np.zeros(3,'d')) # 3 gates in std.gs_target
         self.assertArraysAlmostEqual(magsOfNeg, np.zeros(12,'d')) # 3 gates * 4 evals each = 12
 
+    def test_choi_stacks(self):
+        gs = std.gs_target.depolarize(gate_noise=0.1)
+        gateMxs = np.array([ np.asarray(g) for g in gs.gates.values() ])
+        gateMxs += 0.05*np.random.RandomState(0).randn(*gateMxs.shape) #some evals are < 0
+
+        Jmxs = pygsti.fast_jamiolkowski_iso_std_stack(gateMxs, "pp")
+        for i in range(len(gateMxs)):
+            self.assertArraysAlmostEqual(Jmxs[i], pygsti.fast_jamiolkowski_iso_std(gateMxs[i], "pp"))
+
+        evals, evecs = pygsti.choi_eigensystems(gateMxs, "pp")
+        for i in range(len(gateMxs)):
+            self.assertArraysAlmostEqual(evals[i], np.sort(np.linalg.eigvals(Jmxs[i]).real))
+            self.assertArraysAlmostEqual(np.dot(Jmxs[i], evecs[i]), evecs[i] * evals[i][None,:])
+        self.assertTrue(np.any(evals < 0))
+
+        #derivative of the sum of negative eigenvalues vs. finite differences
+        weights = np.where(evals < 0, -1.0, 0.0)
+        derivs = pygsti.choi_evals_derivs(evecs, weights, "pp")
+        negsum = lambda mxs: -np.where(mxs < 0, mxs, 0).sum(axis=1)
+        eps = 1e-6
+        for a,b in [(0,0),(1,2),(3,1),(2,3)]:
+            dG = np.zeros(gateMxs.shape); dG[:,a,b] = eps
+            fd = (negsum(pygsti.choi_eigensystems(gateMxs + dG, "pp")[0]) -
+                  negsum(pygsti.choi_eigensystems(gateMxs - dG, "pp")[0])) / (2*eps)
+            self.assertArraysAlmostEqual(fd, derivs[:,a,b])
+
+        for lbl,mx in zip(list(gs.gates.keys()), gateMxs):
+            gs.gates[lbl] = mx
+        self.assertArraysAlmostEqual(pygsti.sums_of_negative_choi_evals(gs), negsum(evals))
+        self.assertArraysAlmostEqual(pygsti.mags_of_negative_choi_evals(gs), -np.where(evals < 0, evals, 0).flatten())
+        self.assertAlmostEqual(pygsti.sum_of_negative_choi_evals(gs, {'gates': 2.0, 'Gx': 0.0}),
+                               2*sum(s for l,s in zip(gs.gates.keys(), negsum(evals)) if l != 'Gx'))
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)